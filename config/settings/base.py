@@ -5,6 +5,8 @@ This file contains settings common to all environments.
 import os
 from pathlib import Path
 
+from celery.schedules import crontab
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
@@ -45,6 +47,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'personal.auditoria.UsuarioAuditoriaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -94,6 +97,21 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Exportaciones: caché en disco de archivos generados (política LRU por tamaño)
+EXPORTACIONES_DIR = MEDIA_ROOT / 'exportaciones'
+EXPORTACIONES_MAX_BYTES = int(os.environ.get('EXPORTACIONES_MAX_BYTES', 512 * 1024 * 1024))
+
+# Auditoría: retención por niveles (la antigua pasa a segmentos comprimidos en lugar de eliminarse)
+AUDITORIA_ARCHIVAR = os.environ.get('AUDITORIA_ARCHIVAR', 'True') == 'True'
+AUDITORIA_ARCHIVO_DIR = Path(os.environ.get('AUDITORIA_ARCHIVO_DIR', BASE_DIR / 'archivo_auditoria'))
+
+# Importación: procesos para leer en paralelo las hojas de libros anuales (None = uno por CPU)
+IMPORTACION_MAX_PROCESOS = int(os.environ['IMPORTACION_MAX_PROCESOS']) if os.environ.get('IMPORTACION_MAX_PROCESOS') else None
+
+# Notificaciones de aprobación: ventana de agrupación por destinatario y resúmenes por ejecución
+NOTIFICACIONES_VENTANA_MINUTOS = int(os.environ.get('NOTIFICACIONES_VENTANA_MINUTOS', 15))
+NOTIFICACIONES_MAX_DESTINATARIOS = int(os.environ.get('NOTIFICACIONES_MAX_DESTINATARIOS', 200))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -151,3 +169,25 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutos
+CELERY_BEAT_SCHEDULE = {
+    # Fin de mes, fuera de horario: plantillas de roster del mes siguiente
+    'pregenerar-exportaciones-roster': {
+        'task': 'personal.tasks.pregenerar_exportaciones_roster',
+        'schedule': crontab(hour=2, minute=0, day_of_month='25-31'),
+    },
+    # Reporte del mes recién cerrado
+    'generar-reporte-mensual': {
+        'task': 'personal.tasks.generar_reporte_mensual',
+        'schedule': crontab(hour=3, minute=0, day_of_month='1'),
+    },
+    # Instantáneas para reconstruir el roster en fechas pasadas
+    'tomar-instantaneas-roster': {
+        'task': 'personal.tasks.tomar_instantaneas_roster',
+        'schedule': crontab(hour=1, minute=30),
+    },
+    # Resúmenes de notificaciones de aprobación
+    'enviar-resumenes-notificaciones': {
+        'task': 'personal.tasks.enviar_resumenes_notificaciones',
+        'schedule': crontab(minute='*/5'),
+    },
+}
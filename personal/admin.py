@@ -4,7 +4,12 @@ Configuración del admin para el módulo personal.
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from .models import Area, SubArea, Personal, Roster, RosterAudit
+from django.utils.html import format_html, format_html_join
+from django.contrib import messages
+from django.core.exceptions import ValidationError
+from .archivo_auditoria import leer_segmento
+from .auditoria import deshacer_lote
+from .models import Area, SubArea, Personal, Roster, RosterAudit, SegmentoAuditoria, LoteAuditoria
 from .user_models import UserProfile
 
 
@@ -48,7 +53,8 @@ class AreaAdmin(admin.ModelAdmin):
 
 @admin.register(SubArea)
 class SubAreaAdmin(admin.ModelAdmin):
-    list_display = ['nombre', 'area', 'activa', 'creado_en']
+    list_display = ['nombre', 'area', 'activa', 'dotacion_minima', 'creado_en']
+    list_editable = ['dotacion_minima']
     list_filter = ['area', 'activa', 'creado_en']
     search_fields = ['nombre', 'area__nombre']
 
@@ -99,10 +105,10 @@ class RosterAdmin(admin.ModelAdmin):
 
 @admin.register(RosterAudit)
 class RosterAuditAdmin(admin.ModelAdmin):
-    list_display = ['personal', 'fecha', 'campo_modificado', 'usuario', 'creado_en']
+    list_display = ['personal', 'fecha', 'campo_modificado', 'usuario', 'lote', 'creado_en']
     list_filter = ['campo_modificado', 'creado_en']
     search_fields = ['personal__apellidos_nombres', 'personal__nro_doc']
-    raw_id_fields = ['personal', 'usuario']
+    raw_id_fields = ['personal', 'usuario', 'lote']
     date_hierarchy = 'creado_en'
     
     def has_add_permission(self, request):
@@ -110,3 +116,71 @@ class RosterAuditAdmin(admin.ModelAdmin):
     
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.register(SegmentoAuditoria)
+class SegmentoAuditoriaAdmin(admin.ModelAdmin):
+    """Segmentos del archivo histórico de auditoría (solo lectura)."""
+    list_display = ['periodo', 'archivo', 'filas', 'fecha_min', 'fecha_max', 'auditado_desde', 'auditado_hasta']
+    list_filter = ['periodo']
+    search_fields = ['archivo']
+    readonly_fields = ['vista_previa']
+    
+    LIMITE_VISTA_PREVIA = 200
+    
+    @admin.display(description='Registros archivados')
+    def vista_previa(self, obj):
+        filas = []
+        for registro in leer_segmento(obj):
+            filas.append((
+                registro['personal_id'], registro['fecha'], registro['campo_modificado'],
+                registro['valor_anterior'], registro['valor_nuevo'], registro['usuario_id'] or '',
+                registro['creado_en'],
+            ))
+            if len(filas) >= self.LIMITE_VISTA_PREVIA:
+                break
+        return format_html(
+            '<table><tr><th>Personal</th><th>Fecha</th><th>Campo</th><th>Anterior</th>'
+            '<th>Nuevo</th><th>Usuario</th><th>Auditado</th></tr>{}</table>',
+            format_html_join(
+                '', '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+                filas
+            )
+        )
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LoteAuditoria)
+class LoteAuditoriaAdmin(admin.ModelAdmin):
+    list_display = ['id', 'origen', 'descripcion', 'usuario', 'total', 'creado_en', 'deshecho_en']
+    list_filter = ['origen', 'creado_en']
+    search_fields = ['descripcion', 'usuario__username']
+    raw_id_fields = ['usuario', 'deshecho_por']
+    date_hierarchy = 'creado_en'
+    actions = ['deshacer_lotes']
+    
+    @admin.action(description='Deshacer los lotes seleccionados')
+    def deshacer_lotes(self, request, queryset):
+        for lote in queryset.order_by('-creado_en'):
+            try:
+                resultado = deshacer_lote(lote.pk, request.user)
+            except ValidationError as e:
+                self.message_user(request, f"Lote {lote.pk}: {e.messages[0]}", messages.ERROR)
+                continue
+            self.message_user(
+                request,
+                f"Lote {lote.pk}: {resultado['restauradas']} restauradas, {resultado['recreadas']} recreadas, "
+                f"{resultado['eliminadas']} eliminadas, {len(resultado['conflictos'])} con cambios posteriores",
+                messages.WARNING if resultado['conflictos'] else messages.SUCCESS
+            )
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
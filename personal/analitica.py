@@ -0,0 +1,288 @@
+"""
+Exportación columnar (Parquet / CSV) para consumo de BI.
+
+Cada dataset se lee desde un cursor del servidor (`.values_list().iterator()`)
+en lotes de tamaño fijo, de modo que la memoria queda acotada por el lote y
+no por el rango exportado. En Parquet los códigos se escriben con
+codificación de diccionario y las fechas como date32; el esquema se deriva de
+los campos del modelo.
+
+Las exportaciones incrementales filtran por una marca de agua
+(`actualizado_en`, o `creado_en` para la auditoría, que no se modifica).
+"""
+from collections import namedtuple
+import csv
+import io
+import logging
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import Max
+
+from .models import Area, SubArea, Personal, Roster, RosterAudit, MarcaAguaExportacion
+
+logger = logging.getLogger('personal.business')
+
+# Filas por lote (RecordBatch en Parquet, bloque de texto en CSV)
+TAMANO_LOTE_ANALITICA = 50_000
+
+FORMATOS_ANALITICA = ('parquet', 'csv')
+
+# modelo, campos exportados (admiten lookups con '__'), campo de fecha para
+# filtrar por rango (None si no aplica), campo de marca de agua y campos
+# categóricos que se codifican como diccionario en Parquet
+Dataset = namedtuple('Dataset', ['modelo', 'campos', 'campo_fecha', 'campo_marca', 'categorias'])
+
+DATASETS = {
+    'roster': Dataset(
+        Roster,
+        ['id', 'personal_id', 'personal__nro_doc', 'fecha', 'codigo', 'estado', 'observaciones',
+         'fuente', 'modificado_por_id', 'aprobado_por_id', 'aprobado_en', 'creado_en', 'actualizado_en'],
+        'fecha', 'actualizado_en', {'codigo', 'estado', 'fuente'}
+    ),
+    'personal': Dataset(
+        Personal,
+        ['id', 'nro_doc', 'tipo_doc', 'apellidos_nombres', 'cargo', 'tipo_trab', 'subarea_id',
+         'estado', 'fecha_alta', 'fecha_cese', 'sexo', 'regimen_laboral', 'regimen_turno',
+         'dias_libres_corte_2025', 'creado_en', 'actualizado_en'],
+        None, 'actualizado_en', {'tipo_doc', 'tipo_trab', 'estado', 'sexo', 'regimen_laboral', 'regimen_turno'}
+    ),
+    'subareas': Dataset(
+        SubArea,
+        ['id', 'nombre', 'area_id', 'area__nombre', 'descripcion', 'activa', 'creado_en', 'actualizado_en'],
+        None, 'actualizado_en', {'area__nombre'}
+    ),
+    'areas': Dataset(
+        Area,
+        ['id', 'nombre', 'descripcion', 'activa', 'creado_en', 'actualizado_en'],
+        None, 'actualizado_en', set()
+    ),
+    'auditoria': Dataset(
+        RosterAudit,
+        ['id', 'personal_id', 'fecha', 'campo_modificado', 'valor_anterior', 'valor_nuevo',
+         'usuario_id', 'creado_en'],
+        'fecha', 'creado_en', {'campo_modificado', 'valor_anterior', 'valor_nuevo'}
+    ),
+}
+
+
+def obtener_dataset(nombre):
+    """Retorna la definición de un dataset o lanza ValidationError."""
+    if nombre not in DATASETS:
+        raise ValidationError(f"Dataset desconocido: {nombre}. Opciones: {', '.join(DATASETS)}")
+    return DATASETS[nombre]
+
+
+def nombre_columna(campo):
+    return campo.replace('__', '_')
+
+
+def _resolver_campo(modelo, ruta):
+    """Obtiene el Field de Django para 'campo', 'fk_id' o 'relacion__campo'."""
+    partes = ruta.split('__')
+    for parte in partes[:-1]:
+        modelo = modelo._meta.get_field(parte).related_model
+    ultimo = partes[-1]
+    for campo in modelo._meta.concrete_fields:
+        if ultimo in (campo.name, campo.attname):
+            return campo
+    raise ValidationError(f"Campo desconocido: {ruta}")
+
+
+def _tipo_arrow(campo, categorico):
+    import pyarrow as pa
+
+    if categorico:
+        return pa.dictionary(pa.int32(), pa.string())
+    if isinstance(campo, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    if isinstance(campo, models.DateField):
+        return pa.date32()
+    if isinstance(campo, models.BooleanField):
+        return pa.bool_()
+    if isinstance(campo, models.DecimalField):
+        return pa.decimal128(campo.max_digits, campo.decimal_places)
+    if isinstance(campo, (models.AutoField, models.IntegerField, models.ForeignKey)):
+        return pa.int64()
+    return pa.string()
+
+
+def esquema_arrow(nombre):
+    """Esquema Arrow del dataset derivado de los campos del modelo."""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ValidationError('Para exportar en Parquet debe instalarse pyarrow.') from None
+
+    dataset = obtener_dataset(nombre)
+    return pa.schema([
+        pa.field(
+            nombre_columna(ruta),
+            _tipo_arrow(_resolver_campo(dataset.modelo, ruta), ruta in dataset.categorias)
+        )
+        for ruta in dataset.campos
+    ])
+
+
+def consulta_dataset(nombre, desde=None, hasta=None, modificado_desde=None):
+    """
+    QuerySet de tuplas del dataset filtrado por rango de fechas y marca de agua.
+
+    Args:
+        nombre: Clave de DATASETS
+        desde: Fecha mínima (solo datasets con campo de fecha)
+        hasta: Fecha máxima (solo datasets con campo de fecha)
+        modificado_desde: Exporta solo filas con marca de agua posterior a esta fecha/hora
+    """
+    dataset = obtener_dataset(nombre)
+    consulta = dataset.modelo.objects.all()
+    if dataset.campo_fecha:
+        if desde:
+            consulta = consulta.filter(**{f'{dataset.campo_fecha}__gte': desde})
+        if hasta:
+            consulta = consulta.filter(**{f'{dataset.campo_fecha}__lte': hasta})
+    if modificado_desde:
+        consulta = consulta.filter(**{f'{dataset.campo_marca}__gt': modificado_desde})
+    return consulta.order_by('pk').values_list(*dataset.campos)
+
+
+def marca_actual(nombre, consulta):
+    """Máxima marca de agua de una consulta (para entregar al consumidor)."""
+    dataset = obtener_dataset(nombre)
+    return consulta.aggregate(marca=Max(dataset.campo_marca))['marca']
+
+
+def iterar_lotes(consulta, tamano_lote=TAMANO_LOTE_ANALITICA):
+    """Agrupa en listas de tamaño fijo las filas de un cursor del servidor."""
+    lote = []
+    for fila in consulta.iterator(chunk_size=min(tamano_lote, 10_000)):
+        lote.append(fila)
+        if len(lote) >= tamano_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def escribir_parquet(destino, nombre, consulta, tamano_lote=TAMANO_LOTE_ANALITICA):
+    """
+    Escribe un dataset en Parquet, un RecordBatch por lote.
+
+    Args:
+        destino: Ruta o archivo binario
+        nombre: Clave de DATASETS
+        consulta: QuerySet devuelto por consulta_dataset
+
+    Returns:
+        dict: {'filas': n, 'marca': máxima marca de agua escrita}
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    dataset = obtener_dataset(nombre)
+    esquema = esquema_arrow(nombre)
+    indice_marca = dataset.campos.index(dataset.campo_marca)
+    filas = 0
+    marca = None
+
+    with pq.ParquetWriter(destino, esquema, compression='zstd') as escritor:
+        for lote in iterar_lotes(consulta, tamano_lote):
+            columnas = list(zip(*lote, strict=True))
+            escritor.write_batch(pa.record_batch(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, esquema, strict=True)],
+                schema=esquema
+            ))
+            filas += len(lote)
+            marca_lote = max((v for v in columnas[indice_marca] if v is not None), default=None)
+            if marca_lote is not None and (marca is None or marca_lote > marca):
+                marca = marca_lote
+            del columnas, lote
+
+    return {'filas': filas, 'marca': marca}
+
+
+def _texto_csv(valor):
+    if valor is None:
+        return ''
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return valor
+
+
+def iterar_csv(nombre, consulta, tamano_lote=TAMANO_LOTE_ANALITICA):
+    """Genera el CSV del dataset en bloques de texto (cabecera + un bloque por lote)."""
+    dataset = obtener_dataset(nombre)
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow([nombre_columna(campo) for campo in dataset.campos])
+    for lote in iterar_lotes(consulta, tamano_lote):
+        escritor.writerows([_texto_csv(valor) for valor in fila] for fila in lote)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def escribir_csv(destino, nombre, consulta, tamano_lote=TAMANO_LOTE_ANALITICA):
+    """
+    Escribe un dataset en CSV (UTF-8) por bloques.
+
+    Returns:
+        dict: {'filas': n, 'marca': máxima marca de agua escrita}
+    """
+    dataset = obtener_dataset(nombre)
+    indice_marca = dataset.campos.index(dataset.campo_marca)
+    estado = {'filas': 0, 'marca': None}
+
+    def contar(lotes):
+        for lote in lotes:
+            estado['filas'] += len(lote)
+            marca_lote = max((fila[indice_marca] for fila in lote if fila[indice_marca]), default=None)
+            if marca_lote is not None and (estado['marca'] is None or marca_lote > estado['marca']):
+                estado['marca'] = marca_lote
+            yield lote
+
+    escritor = csv.writer(destino)
+    escritor.writerow([nombre_columna(campo) for campo in dataset.campos])
+    for lote in contar(iterar_lotes(consulta, tamano_lote)):
+        escritor.writerows([_texto_csv(valor) for valor in fila] for fila in lote)
+    return estado
+
+
+def exportar_incremental(nombre, consumidor, destino, formato='parquet', desde=None, hasta=None):
+    """
+    Exporta solo las filas modificadas desde la última ejecución del consumidor.
+
+    La marca de agua se avanza únicamente si la escritura terminó sin errores.
+
+    Args:
+        nombre: Clave de DATASETS
+        consumidor: Identificador del proceso que consume la exportación (ej. 'bi-nocturno')
+        destino: Ruta o archivo (binario para Parquet, texto para CSV)
+        formato: 'parquet' o 'csv'
+
+    Returns:
+        dict: {'filas': n, 'marca': nueva marca de agua}
+    """
+    if formato not in FORMATOS_ANALITICA:
+        raise ValidationError(f"Formato no soportado: {formato}")
+
+    registro, _ = MarcaAguaExportacion.objects.get_or_create(consumidor=consumidor, dataset=nombre)
+    consulta = consulta_dataset(nombre, desde, hasta, modificado_desde=registro.marca)
+
+    if formato == 'parquet':
+        resultado = escribir_parquet(destino, nombre, consulta)
+    else:
+        resultado = escribir_csv(destino, nombre, consulta)
+
+    if resultado['marca'] is not None:
+        registro.marca = resultado['marca']
+        registro.filas = resultado['filas']
+        registro.save(update_fields=['marca', 'filas', 'actualizado_en'])
+
+    logger.info(
+        f"Exportación analítica {nombre} ({formato}) para {consumidor}: "
+        f"{resultado['filas']} filas, marca {resultado['marca']}"
+    )
+    return resultado
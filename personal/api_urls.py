@@ -5,7 +5,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .api_views import (
     AreaViewSet, SubAreaViewSet, PersonalViewSet,
-    RosterViewSet, RosterAuditViewSet
+    RosterViewSet, RosterAuditViewSet, LoteAuditoriaViewSet, AnaliticaExportView
 )
 
 router = DefaultRouter()
@@ -14,7 +14,9 @@ router.register(r'subareas', SubAreaViewSet, basename='subarea')
 router.register(r'personal', PersonalViewSet, basename='personal')
 router.register(r'roster', RosterViewSet, basename='roster')
 router.register(r'roster-audit', RosterAuditViewSet, basename='roster-audit')
+router.register(r'lotes-auditoria', LoteAuditoriaViewSet, basename='lote-auditoria')
 
 urlpatterns = [
+    path('analitica/<str:dataset>/', AnaliticaExportView.as_view(), name='analitica-export'),
     path('', include(router.urls)),
 ]
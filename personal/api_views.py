@@ -4,20 +4,84 @@ API Views para el módulo personal usando Django REST Framework.
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+import tempfile
 
-from .models import Area, SubArea, Personal, Roster, RosterAudit
+from .analitica import (
+    FORMATOS_ANALITICA, consulta_dataset, escribir_parquet, iterar_csv, marca_actual
+)
+from .archivo_auditoria import consultar_archivo
+from .auditoria import deshacer_lote, en_lote
+from .cobertura import MAX_DIAS_COBERTURA, huecos_cobertura
+from .dotacion import CODIGOS_PRESENCIA, MAX_DIAS_DOTACION, NIVELES_DOTACION, series_dotacion
+from .historico import roster_en
+from .importacion import cargar_registros_roster
+from .models import Area, SubArea, Personal, Roster, RosterAudit, LoteAuditoria
+from .paginacion import PaginacionAuditoria, PaginacionRoster
+from .permissions import filtrar_personal, filtrar_subareas
+from .proyeccion import MAX_DIAS_PROYECCION, proyectar_saldos
 from .serializers import (
+    campos_solicitados, columnas_de_campos,
     AreaSerializer, SubAreaSerializer,
     PersonalListSerializer, PersonalDetailSerializer, PersonalCreateUpdateSerializer,
-    RosterSerializer, RosterBulkCreateSerializer, RosterAuditSerializer
+    RosterSerializer, RosterBulkCreateSerializer, RosterAuditSerializer, LoteAuditoriaSerializer
 )
+from .transmision import FORMATOS_FLUJO, columnas_roster, respuesta_flujo
+
+
+def _fecha_param(request, nombre):
+    """Fecha AAAA-MM-DD de un parámetro, o None si falta o no es válida."""
+    try:
+        return parse_date(request.query_params.get(nombre, ''))
+    except ValueError:
+        return None
+
+
+class CamposParcialesViewMixin:
+    """
+    Con ?fields= carga solo las columnas que usan los campos pedidos
+    (.only() y los select_related necesarios).
+    """
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        campos = campos_solicitados(self.request)
+        columnas = columnas_de_campos(self.get_serializer_class(), campos) if campos else None
+        if columnas:
+            solo, relaciones = columnas
+            orden = getattr(self.pagination_class, 'campo', None)
+            queryset = queryset.select_related(None)
+            if relaciones:
+                queryset = queryset.select_related(*relaciones)
+            queryset = queryset.only(*solo, *([orden] if orden else []))
+        return queryset
 
 
 class AreaViewSet(viewsets.ModelViewSet):
-    """ViewSet para Gerencias."""
-    queryset = Area.objects.all()
+    """
+    ViewSet para Gerencias.
+    
+    Los totales y los responsables se cargan en la misma consulta de la lista
+    (anotaciones y un prefetch), no por cada área.
+    """
+    queryset = Area.objects.annotate(
+        total_areas=Count('subareas', filter=Q(subareas__activa=True), distinct=True),
+        total_personal=Count(
+            'subareas__personal_asignado',
+            filter=Q(subareas__personal_asignado__estado='Activo'),
+            distinct=True
+        ),
+    ).prefetch_related(
+        Prefetch('responsables', queryset=Personal.objects.only('id', 'apellidos_nombres'))
+    )
     serializer_class = AreaSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -29,7 +93,9 @@ class AreaViewSet(viewsets.ModelViewSet):
 
 class SubAreaViewSet(viewsets.ModelViewSet):
     """ViewSet para SubÁreas."""
-    queryset = SubArea.objects.select_related('area').all()
+    queryset = SubArea.objects.select_related('area').annotate(
+        total_personal=Count('personal_asignado', filter=Q(personal_asignado__estado='Activo'))
+    )
     serializer_class = SubAreaSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -64,62 +130,386 @@ class PersonalViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(personal_activo, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def proyeccion_saldos(self, request):
+        """
+        Proyección de saldos de días libres con el roster planificado.
+        
+        GET /api/personal/proyeccion_saldos/?area=<id> (o &subarea=<id>)&desde=AAAA-MM-DD&dias=90&curvas=1
+        
+        Por persona activa retorna el saldo antes del horizonte, el mínimo, el
+        final y la primera fecha en que quedaría negativo; con curvas=1 agrega
+        el saldo de cada día.
+        """
+        params = request.query_params
+        try:
+            area_id = int(params['area']) if params.get('area') else None
+            subarea_id = int(params['subarea']) if params.get('subarea') else None
+            dias = int(params.get('dias', 90))
+        except ValueError:
+            area_id = subarea_id = None
+            dias = 0
+        desde = _fecha_param(request, 'desde') if params.get('desde') else timezone.localdate()
+        if (area_id is None and subarea_id is None) or desde is None or not 1 <= dias <= MAX_DIAS_PROYECCION:
+            return Response(
+                {'error': f'Debe proporcionar area o subarea, desde (AAAA-MM-DD) y dias entre 1 y {MAX_DIAS_PROYECCION}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        personal = filtrar_personal(request.user).filter(estado='Activo')
+        if area_id:
+            personal = personal.filter(subarea__area_id=area_id)
+        if subarea_id:
+            personal = personal.filter(subarea_id=subarea_id)
+        return Response(proyectar_saldos(personal, desde, dias, incluir_curvas=params.get('curvas') == '1'))
+    
     @action(detail=True, methods=['get'])
     def roster(self, request, pk=None):
-        """Obtener roster de un personal específico."""
+        """
+        Obtener roster de un personal específico.
+        
+        Sin formato retorna los últimos 30 días. Con ?formato=ndjson|csv
+        transmite todo su roster (o el de fecha_desde/fecha_hasta) en flujo.
+        """
         personal = self.get_object()
-        roster = Roster.objects.filter(personal=personal).order_by('-fecha')[:30]
-        serializer = RosterSerializer(roster, many=True)
-        return Response(serializer.data)
+        formato = request.query_params.get('formato')
+        if formato is None:
+            roster = Roster.objects.filter(personal=personal).order_by('-fecha')[:30]
+            serializer = RosterSerializer(roster, many=True)
+            return Response(serializer.data)
+        
+        if formato not in FORMATOS_FLUJO:
+            return Response(
+                {'error': f'Formato no soportado. Opciones: {", ".join(FORMATOS_FLUJO)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        roster = Roster.objects.filter(personal=personal)
+        fecha_desde = _fecha_param(request, 'fecha_desde')
+        fecha_hasta = _fecha_param(request, 'fecha_hasta')
+        if fecha_desde:
+            roster = roster.filter(fecha__gte=fecha_desde)
+        if fecha_hasta:
+            roster = roster.filter(fecha__lte=fecha_hasta)
+        return respuesta_flujo(
+            roster.order_by('fecha'), columnas_roster(campos_solicitados(request)), formato,
+            f'roster-{personal.nro_doc}'
+        )
 
 
-class RosterViewSet(viewsets.ModelViewSet):
-    """ViewSet para Roster."""
-    queryset = Roster.objects.select_related('personal', 'personal__subarea__area').all()
+class RosterViewSet(CamposParcialesViewMixin, viewsets.ModelViewSet):
+    """
+    ViewSet para Roster.
+    
+    La lista se pagina por (fecha, id) con cursor; ?ordering=fecha la recorre
+    en orden ascendente.
+    """
+    queryset = Roster.objects.select_related('personal', 'personal__subarea').all()
     serializer_class = RosterSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = PaginacionRoster
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['personal', 'fecha', 'personal__subarea__area']
     search_fields = ['personal__apellidos_nombres', 'personal__nro_doc', 'codigo']
-    ordering_fields = ['fecha', 'personal__apellidos_nombres']
-    ordering = ['-fecha', 'personal__apellidos_nombres']
     
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
-        """Creación masiva de registros de roster."""
+        """
+        Creación o actualización masiva de registros de roster.
+        
+        Se valida todo el lote en memoria y se escribe con un solo upsert; si
+        algún registro es inválido no se guarda ninguno.
+        """
         serializer = RosterBulkCreateSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(
-                {'mensaje': 'Registros creados exitosamente'},
-                status=status.HTTP_201_CREATED
-            )
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        registros = serializer.validated_data['registros']
+        try:
+            with transaction.atomic(), en_lote('api', request.user, f'Carga masiva de roster ({len(registros)} registros)'):
+                resultado = cargar_registros_roster(registros, request.user)
+        except ValidationError as e:
+            return Response({'errores': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {'mensaje': 'Registros guardados exitosamente', **resultado},
+            status=status.HTTP_201_CREATED
+        )
     
     @action(detail=False, methods=['get'])
     def por_rango(self, request):
-        """Obtener roster por rango de fechas."""
-        fecha_desde = request.query_params.get('fecha_desde')
-        fecha_hasta = request.query_params.get('fecha_hasta')
+        """
+        Obtener roster por rango de fechas, en flujo.
+        
+        GET /api/roster/por_rango/?fecha_desde=AAAA-MM-DD&fecha_hasta=AAAA-MM-DD&formato=ndjson|csv
+            &fields=fecha,codigo,...
+        
+        Las filas salen de un cursor del servidor ordenadas por (fecha, id);
+        la memoria no depende del tamaño del rango.
+        """
+        fecha_desde = _fecha_param(request, 'fecha_desde')
+        fecha_hasta = _fecha_param(request, 'fecha_hasta')
+        formato = request.query_params.get('formato', 'ndjson')
         
         if not fecha_desde or not fecha_hasta:
             return Response(
                 {'error': 'Debe proporcionar fecha_desde y fecha_hasta'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if formato not in FORMATOS_FLUJO:
+            return Response(
+                {'error': f'Formato no soportado. Opciones: {", ".join(FORMATOS_FLUJO)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        roster = self.queryset.filter(fecha__range=[fecha_desde, fecha_hasta])
-        serializer = self.get_serializer(roster, many=True)
-        return Response(serializer.data)
+        roster = Roster.objects.filter(fecha__range=[fecha_desde, fecha_hasta]).order_by('fecha', 'id')
+        return respuesta_flujo(
+            roster, columnas_roster(campos_solicitados(request)), formato,
+            f'roster-{fecha_desde.isoformat()}-{fecha_hasta.isoformat()}'
+        )
+    
+    @action(detail=False, methods=['get'])
+    def dotacion(self, request):
+        """
+        Dotación diaria: celdas aprobadas por fecha, área/subárea y código.
+        
+        GET /api/roster/dotacion/?desde=AAAA-MM-DD&hasta=AAAA-MM-DD&codigos=T,TR&nivel=subarea|area
+        
+        Cada serie trae un conteo por fecha de `fechas` (arreglos densos para
+        graficar). codigos=todos incluye todos los códigos. Solo se incluyen
+        las subáreas que el usuario puede ver.
+        """
+        desde = _fecha_param(request, 'desde')
+        hasta = _fecha_param(request, 'hasta')
+        nivel = request.query_params.get('nivel', 'subarea')
+        if not desde or not hasta or hasta < desde:
+            return Response(
+                {'error': 'Debe proporcionar desde y hasta (AAAA-MM-DD)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if (hasta - desde).days >= MAX_DIAS_DOTACION:
+            return Response(
+                {'error': f'El rango no puede superar {MAX_DIAS_DOTACION} días'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if nivel not in NIVELES_DOTACION:
+            return Response(
+                {'error': f'Nivel no soportado. Opciones: {", ".join(NIVELES_DOTACION)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        codigos = request.query_params.get('codigos')
+        if codigos == 'todos':
+            codigos = None
+        elif codigos:
+            codigos = {codigo.strip().upper() for codigo in codigos.split(',') if codigo.strip()}
+        else:
+            codigos = CODIGOS_PRESENCIA
+        
+        subareas = None if request.user.is_superuser else filtrar_subareas(request.user)
+        return Response(series_dotacion(desde, hasta, codigos=codigos, nivel=nivel, subareas=subareas))
+    
+    @action(detail=False, methods=['get'])
+    def cobertura(self, request):
+        """
+        Huecos de cobertura: días en que una subárea queda bajo su dotación mínima.
+        
+        GET /api/roster/cobertura/?desde=AAAA-MM-DD&hasta=AAAA-MM-DD&area=<id>&subarea=<id>
+        
+        Se leen de la cobertura diaria precalculada; solo se revisan las
+        subáreas activas con dotacion_minima mayor que cero.
+        """
+        desde = _fecha_param(request, 'desde')
+        hasta = _fecha_param(request, 'hasta')
+        if not desde or not hasta or hasta < desde:
+            return Response(
+                {'error': 'Debe proporcionar desde y hasta (AAAA-MM-DD)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if (hasta - desde).days >= MAX_DIAS_COBERTURA:
+            return Response(
+                {'error': f'El rango no puede superar {MAX_DIAS_COBERTURA} días'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            area_id = int(request.query_params['area']) if request.query_params.get('area') else None
+            subarea_id = int(request.query_params['subarea']) if request.query_params.get('subarea') else None
+        except ValueError:
+            return Response({'error': 'area y subarea deben ser ids'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        subareas = filtrar_subareas(request.user)
+        if area_id:
+            subareas = subareas.filter(area_id=area_id)
+        if subarea_id:
+            subareas = subareas.filter(pk=subarea_id)
+        
+        huecos = huecos_cobertura(desde, hasta, subareas=subareas)
+        return Response({'desde': desde.isoformat(), 'hasta': hasta.isoformat(), 'huecos': huecos})
+    
+    @action(detail=False, methods=['get'])
+    def historico(self, request):
+        """
+        Roster de un mes tal como estaba en un momento pasado.
+        
+        GET /api/roster/historico/?momento=<ISO 8601>&anio=AAAA&mes=MM&personal=<id> (o &area=<id>)
+        """
+        params = request.query_params
+        momento = parse_datetime(params.get('momento', ''))
+        try:
+            anio, mes = int(params['anio']), int(params['mes'])
+            personal = int(params['personal']) if params.get('personal') else None
+            area = int(params['area']) if params.get('area') and personal is None else None
+        except (KeyError, ValueError):
+            anio = mes = None
+        if momento is None or anio is None or not 1 <= mes <= 12 or (personal is None and area is None):
+            return Response(
+                {'error': 'Debe proporcionar momento, anio, mes y personal o area'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timezone.is_naive(momento):
+            momento = timezone.make_aware(momento)
+        
+        estado = roster_en(momento, anio, mes, personal=personal, area=area)
+        return Response({
+            'momento': momento.isoformat(),
+            'periodo': f'{anio}-{mes:02d}',
+            'personal': [
+                {
+                    'personal': personal_id,
+                    'celdas': {fecha.isoformat(): celda for fecha, celda in sorted(celdas.items())}
+                }
+                for personal_id, celdas in sorted(estado.items())
+            ]
+        })
 
 
-class RosterAuditViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet para auditoría de Roster (solo lectura)."""
+class RosterAuditViewSet(CamposParcialesViewMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet para auditoría de Roster (solo lectura).
+    
+    La lista se pagina por (creado_en, id) con cursor, de la más reciente a la
+    más antigua; ?ordering=creado_en invierte el orden.
+    """
     queryset = RosterAudit.objects.select_related('personal', 'usuario').all()
     serializer_class = RosterAuditSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = PaginacionAuditoria
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['personal', 'fecha', 'campo_modificado']
     search_fields = ['personal__apellidos_nombres', 'personal__nro_doc']
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Lista la tabla de auditoría y, al filtrar por personal o fecha, también
+        los segmentos archivados que pueden contener esos registros.
+        """
+        try:
+            archivadas = self._archivadas(request)
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        if not archivadas:
+            return super().list(request, *args, **kwargs)
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginator.paginar_con(queryset, archivadas, request, view=self)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+    
+    def _archivadas(self, request):
+        params = request.query_params
+        try:
+            personal = int(params['personal']) if params.get('personal') else None
+        except ValueError:
+            raise ValidationError('personal debe ser un id') from None
+        fecha = None
+        if params.get('fecha'):
+            fecha = _fecha_param(request, 'fecha')
+            if fecha is None:
+                raise ValidationError('fecha debe tener el formato AAAA-MM-DD')
+        if personal is None and fecha is None:
+            # Sin un filtro acotado se consulta solo la tabla caliente
+            return []
+        archivadas = consultar_archivo(
+            personal_id=personal,
+            fecha=fecha,
+            campo_modificado=params.get('campo_modificado') or None,
+        )
+        termino = params.get('search', '').strip().lower()
+        if termino:
+            archivadas = [
+                auditoria for auditoria in archivadas
+                if auditoria.personal and (
+                    termino in auditoria.personal.apellidos_nombres.lower()
+                    or termino in auditoria.personal.nro_doc.lower()
+                )
+            ]
+        return archivadas
+
+
+class LoteAuditoriaViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet para los lotes de auditoría (acciones masivas) y su reversión."""
+    queryset = LoteAuditoria.objects.select_related('usuario').all()
+    serializer_class = LoteAuditoriaSerializer
+    permission_classes = [IsAdminUser]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['origen', 'usuario']
     ordering_fields = ['creado_en']
     ordering = ['-creado_en']
+    
+    @action(detail=True, methods=['post'])
+    def deshacer(self, request, pk=None):
+        """Restaura las celdas del lote a sus valores previos."""
+        try:
+            resultado = deshacer_lote(pk, request.user)
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        resultado['conflictos'] = [
+            {'personal': personal_id, 'fecha': fecha.isoformat()} for personal_id, fecha in resultado['conflictos']
+        ]
+        return Response(resultado)
+
+
+class AnaliticaExportView(APIView):
+    """
+    Exportación columnar de un dataset para BI.
+    
+    GET /api/analitica/<dataset>/?formato=parquet|csv&desde=AAAA-MM-DD&hasta=AAAA-MM-DD
+        &modificado_desde=<ISO 8601>
+    
+    La cabecera X-Marca-Agua trae la marca a usar como modificado_desde en la
+    siguiente extracción incremental.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request, dataset):
+        formato = request.query_params.get('formato', 'parquet')
+        if formato not in FORMATOS_ANALITICA:
+            return Response(
+                {'error': f'Formato no soportado. Opciones: {", ".join(FORMATOS_ANALITICA)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        desde = request.query_params.get('desde')
+        hasta = request.query_params.get('hasta')
+        modificado_desde = request.query_params.get('modificado_desde')
+        try:
+            desde = parse_date(desde) if desde else None
+            hasta = parse_date(hasta) if hasta else None
+            modificado_desde = parse_datetime(modificado_desde) if modificado_desde else None
+            consulta = consulta_dataset(dataset, desde, hasta, modificado_desde)
+        except (ValueError, ValidationError) as e:
+            mensaje = '; '.join(e.messages) if isinstance(e, ValidationError) else str(e)
+            return Response({'error': mensaje}, status=status.HTTP_400_BAD_REQUEST)
+        
+        marca = marca_actual(dataset, consulta)
+        nombre_archivo = f'{dataset}.{formato}'
+        if formato == 'csv':
+            response = StreamingHttpResponse(iterar_csv(dataset, consulta), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+        else:
+            archivo = tempfile.TemporaryFile(suffix='.parquet')
+            escribir_parquet(archivo, dataset, consulta)
+            archivo.seek(0)
+            response = FileResponse(
+                archivo, as_attachment=True, filename=nombre_archivo,
+                content_type='application/vnd.apache.parquet'
+            )
+        if marca:
+            response['X-Marca-Agua'] = marca.isoformat()
+        return response
@@ -0,0 +1,200 @@
+"""
+Retención por niveles de la auditoría del roster.
+
+Las auditorías antiguas se retiran de la tabla RosterAudit (nivel caliente) y
+se escriben en segmentos de solo anexado: un archivo JSONL comprimido con gzip
+por mes y por ejecución. La tabla SegmentoAuditoria guarda los rangos de
+personal, fecha y fecha de auditoría de cada segmento, así una consulta solo
+abre los segmentos que pueden contenerla.
+"""
+from datetime import date, datetime
+import gzip
+import json
+import logging
+import os
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Personal, RosterAudit, SegmentoAuditoria
+
+logger = logging.getLogger('personal.business')
+
+CAMPOS_ARCHIVO = [
+    'id', 'personal_id', 'fecha', 'campo_modificado', 'valor_anterior', 'valor_nuevo',
+    'usuario_id', 'lote_id', 'creado_en',
+]
+
+# Filas leídas por viaje al servidor al volcar un mes
+TAMANO_CURSOR_ARCHIVO = 5000
+
+
+def directorio_archivo():
+    directorio = str(getattr(settings, 'AUDITORIA_ARCHIVO_DIR', os.path.join(settings.BASE_DIR, 'archivo_auditoria')))
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def _limites_mes(mes):
+    """Inicio del mes y del siguiente, en la zona horaria local."""
+    zona = timezone.get_current_timezone()
+    inicio = datetime(mes.year, mes.month, 1, tzinfo=zona)
+    siguiente = datetime(mes.year + (mes.month == 12), mes.month % 12 + 1, 1, tzinfo=zona)
+    return inicio, siguiente
+
+
+def _escribir_segmento(filas, periodo):
+    """
+    Escribe las filas en un segmento nuevo y retorna sus metadatos (sin guardar).
+
+    Returns:
+        SegmentoAuditoria o None si no había filas
+    """
+    directorio = directorio_archivo()
+    nombre = f'auditoria-{periodo}-{uuid.uuid4().hex[:12]}.jsonl.gz'
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    segmento = None
+    try:
+        with os.fdopen(descriptor, 'wb') as destino, gzip.open(destino, 'wt', encoding='utf-8') as salida:
+            for fila in filas:
+                registro = dict(zip(CAMPOS_ARCHIVO, fila, strict=True))
+                salida.write(json.dumps(registro, cls=DjangoJSONEncoder, ensure_ascii=False))
+                salida.write('\n')
+                if segmento is None:
+                    segmento = SegmentoAuditoria(
+                        periodo=periodo, archivo=nombre,
+                        personal_min=registro['personal_id'], personal_max=registro['personal_id'],
+                        fecha_min=registro['fecha'], fecha_max=registro['fecha'],
+                        auditado_desde=registro['creado_en'], auditado_hasta=registro['creado_en'],
+                    )
+                segmento.filas += 1
+                segmento.personal_min = min(segmento.personal_min, registro['personal_id'])
+                segmento.personal_max = max(segmento.personal_max, registro['personal_id'])
+                segmento.fecha_min = min(segmento.fecha_min, registro['fecha'])
+                segmento.fecha_max = max(segmento.fecha_max, registro['fecha'])
+                segmento.auditado_hasta = registro['creado_en']
+        if segmento is None:
+            os.unlink(temporal)
+            return None
+        os.replace(temporal, os.path.join(directorio, nombre))
+    except Exception:
+        if os.path.exists(temporal):
+            os.unlink(temporal)
+        raise
+    return segmento
+
+
+def archivar_auditorias(antes_de):
+    """
+    Mueve a segmentos comprimidos las auditorías creadas antes de `antes_de`.
+
+    Cada mes se vuelca en streaming a su propio segmento. El registro del
+    segmento y la eliminación de sus filas de la tabla se hacen en la misma
+    transacción; si fallan, el archivo escrito se elimina.
+
+    Args:
+        antes_de: datetime límite (exclusivo)
+
+    Returns:
+        dict: {'archivados': filas movidas, 'segmentos': segmentos creados}
+    """
+    antiguas = RosterAudit.objects.filter(creado_en__lt=antes_de)
+    archivados = segmentos = 0
+
+    for mes in antiguas.dates('creado_en', 'month'):
+        inicio, siguiente = _limites_mes(mes)
+        del_mes = antiguas.filter(creado_en__gte=inicio, creado_en__lt=siguiente)
+        filas = del_mes.order_by('creado_en', 'id').values_list(*CAMPOS_ARCHIVO).iterator(
+            chunk_size=TAMANO_CURSOR_ARCHIVO
+        )
+        segmento = _escribir_segmento(filas, f'{mes.year}-{mes.month:02d}')
+        if segmento is None:
+            continue
+        try:
+            with transaction.atomic():
+                segmento.save()
+                eliminados = del_mes.delete()[0]
+                if eliminados != segmento.filas:
+                    # Otro proceso modificó el mes durante el volcado: se revierte
+                    raise RuntimeError(
+                        f"El mes {segmento.periodo} cambió durante el archivado "
+                        f"({eliminados} filas en la tabla, {segmento.filas} en el segmento)"
+                    )
+        except Exception:
+            os.unlink(os.path.join(directorio_archivo(), segmento.archivo))
+            raise
+        archivados += eliminados
+        segmentos += 1
+        logger.info(f"Auditoría archivada: {segmento.archivo} ({segmento.filas} filas)")
+
+    return {'archivados': archivados, 'segmentos': segmentos}
+
+
+def leer_segmento(segmento):
+    """Itera los registros (dict) de un segmento."""
+    ruta = os.path.join(directorio_archivo(), segmento.archivo)
+    with gzip.open(ruta, 'rt', encoding='utf-8') as entrada:
+        for linea in entrada:
+            registro = json.loads(linea)
+            registro['fecha'] = date.fromisoformat(registro['fecha'])
+            registro['creado_en'] = datetime.fromisoformat(registro['creado_en'])
+            yield registro
+
+
+def segmentos_para(personal_id=None, fecha=None, fecha_desde=None, fecha_hasta=None):
+    """Segmentos cuyos rangos pueden contener auditorías de la consulta."""
+    segmentos = SegmentoAuditoria.objects.all()
+    if personal_id is not None:
+        segmentos = segmentos.filter(personal_min__lte=personal_id, personal_max__gte=personal_id)
+    if fecha is not None:
+        fecha_desde = fecha_hasta = fecha
+    if fecha_desde is not None:
+        segmentos = segmentos.filter(fecha_max__gte=fecha_desde)
+    if fecha_hasta is not None:
+        segmentos = segmentos.filter(fecha_min__lte=fecha_hasta)
+    return segmentos.order_by('auditado_desde')
+
+
+def consultar_archivo(personal_id=None, fecha=None, fecha_desde=None, fecha_hasta=None,
+                      campo_modificado=None, creado_desde=None):
+    """
+    Auditorías archivadas que cumplen los filtros, como instancias RosterAudit (sin guardar).
+
+    Las relaciones personal y usuario se resuelven con una consulta cada una.
+
+    Returns:
+        list[RosterAudit] ordenada por creado_en descendente
+    """
+    if fecha is not None:
+        fecha_desde = fecha_hasta = fecha
+    auditorias = []
+    for segmento in segmentos_para(personal_id, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta):
+        if creado_desde is not None and segmento.auditado_hasta < creado_desde:
+            continue
+        for registro in leer_segmento(segmento):
+            if personal_id is not None and registro['personal_id'] != personal_id:
+                continue
+            if fecha_desde is not None and registro['fecha'] < fecha_desde:
+                continue
+            if fecha_hasta is not None and registro['fecha'] > fecha_hasta:
+                continue
+            if campo_modificado is not None and registro['campo_modificado'] != campo_modificado:
+                continue
+            if creado_desde is not None and registro['creado_en'] < creado_desde:
+                continue
+            auditorias.append(RosterAudit(**registro))
+
+    personas = Personal.objects.in_bulk({auditoria.personal_id for auditoria in auditorias})
+    usuarios = User.objects.in_bulk({auditoria.usuario_id for auditoria in auditorias} - {None})
+    for auditoria in auditorias:
+        auditoria._state.adding = False
+        auditoria.personal = personas.get(auditoria.personal_id)
+        auditoria.usuario = usuarios.get(auditoria.usuario_id)
+    auditorias.sort(key=lambda auditoria: (auditoria.creado_en, auditoria.pk), reverse=True)
+    return auditorias
+
@@ -0,0 +1,515 @@
+"""
+Captura de cambios del roster para la auditoría.
+
+Los valores de los campos seguidos se guardan al cargar la fila (Roster.from_db),
+así el guardado compara en memoria sin volver a leer la fila. El usuario que
+actúa se toma del request en curso (UsuarioAuditoriaMiddleware) o de
+actuando_como() en servicios y tareas. Las auditorías se acumulan por
+transacción y se insertan con un solo bulk_create en transaction.on_commit;
+los deltas de contadores y cobertura de las señales de Roster viajan en el
+mismo lote.
+
+Las acciones masivas se agrupan en un LoteAuditoria (en_lote) y pueden
+deshacerse completas con deshacer_lote.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import threading
+import weakref
+
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+from django.utils import timezone
+
+from .cobertura import DeltasCobertura, aplicar_deltas as aplicar_cobertura, categoria_codigo
+from .contadores import DeltasContadores, clave_estado
+from .models import Personal, Roster, RosterAudit, LoteAuditoria
+
+logger = logging.getLogger('personal.business')
+
+CAMPOS_AUDITADOS = ('codigo', 'observaciones', 'estado')
+
+# Valores de una celda recién creada; el alta solo audita los campos que difieren
+VALORES_INICIALES = {
+    campo: str(Roster._meta.get_field(campo).get_default()) for campo in CAMPOS_AUDITADOS
+}
+
+# campo_modificado de la auditoría que registra la eliminación de la celda
+CAMPO_REGISTRO = 'registro'
+
+_actor = ContextVar('actor_auditoria', default=None)
+_lote = ContextVar('lote_auditoria', default=None)
+_local = threading.local()
+
+
+# ============================================================================
+# USUARIO QUE ACTÚA
+# ============================================================================
+
+class UsuarioAuditoriaMiddleware:
+    """
+    Publica el request en curso para que las auditorías registren su usuario.
+
+    El usuario se resuelve recién al auditar, de modo que los requests que no
+    tocan el roster no cargan la sesión por esta causa.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _actor.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _actor.reset(token)
+
+
+@contextmanager
+def actuando_como(usuario):
+    """Atribuye a `usuario` las auditorías generadas dentro del bloque."""
+    token = _actor.set(usuario)
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+
+def usuario_actual():
+    """Usuario autenticado que origina el cambio, o None."""
+    actor = _actor.get()
+    usuario = getattr(actor, 'user', actor)
+    if usuario is not None and getattr(usuario, 'is_authenticated', False):
+        return usuario
+    return None
+
+
+# ============================================================================
+# LOTES
+# ============================================================================
+
+class _LoteEnCurso:
+    """Lote de la acción en curso; la cabecera se crea con la primera auditoría."""
+
+    def __init__(self, origen, usuario, descripcion):
+        self.origen = origen
+        self.usuario = usuario
+        self.descripcion = descripcion
+        self.instancia = None
+        self.total = 0
+
+    def asignar(self, auditorias):
+        if not auditorias:
+            return
+        self.total += len(auditorias)
+        if self.instancia is None:
+            self.instancia = LoteAuditoria.objects.create(
+                origen=self.origen, usuario=self.usuario or usuario_actual(),
+                descripcion=self.descripcion[:200], total=self.total
+            )
+        for auditoria in auditorias:
+            if auditoria.lote_id is None:
+                auditoria.lote = self.instancia
+
+    def cerrar(self):
+        if self.instancia is not None and self.instancia.total != self.total:
+            LoteAuditoria.objects.filter(pk=self.instancia.pk).update(total=self.total)
+            self.instancia.total = self.total
+
+
+@contextmanager
+def en_lote(origen, usuario=None, descripcion=''):
+    """
+    Agrupa en un LoteAuditoria las auditorías generadas dentro del bloque.
+
+    Si la acción no cambia nada no se crea la cabecera.
+
+    Yields:
+        _LoteEnCurso (su atributo instancia es el LoteAuditoria o None)
+    """
+    lote = _LoteEnCurso(origen, usuario, descripcion)
+    token = _lote.set(lote)
+    try:
+        yield lote
+    finally:
+        _lote.reset(token)
+    lote.cerrar()
+
+
+def asignar_lote(auditorias):
+    """Asocia las auditorías al lote en curso, si lo hay."""
+    lote = _lote.get()
+    if lote is not None:
+        lote.asignar(auditorias)
+
+
+# ============================================================================
+# INSTANTÁNEAS Y DIFERENCIAS
+# ============================================================================
+
+def instantanea(roster):
+    """Valores actuales de los campos seguidos que están cargados en la instancia."""
+    return {
+        campo: roster.__dict__[campo]
+        for campo in Roster.CAMPOS_SEGUIDOS if campo in roster.__dict__
+    }
+
+
+def valores_anteriores(roster):
+    """
+    Valores guardados en la BD antes de este save.
+
+    Usa la instantánea tomada al cargar; solo consulta la BD por los campos que
+    no se cargaron (instancias construidas a mano o con .only()).
+
+    Returns:
+        dict o None si la fila no existe todavía
+    """
+    if roster.pk is None:
+        return None
+    cargados = roster.__dict__.get('_valores_cargados', {})
+    faltantes = [campo for campo in Roster.CAMPOS_SEGUIDOS if campo not in cargados]
+    if not faltantes:
+        return dict(cargados)
+    fila = Roster._base_manager.filter(pk=roster.pk).values(*faltantes).first()
+    if fila is None:
+        return None
+    return {**cargados, **fila}
+
+
+def auditorias_de_cambio(roster, anteriores, campos=None):
+    """
+    RosterAudit (sin guardar) por cada campo auditado que cambió.
+
+    Args:
+        roster: Instancia ya guardada
+        anteriores: Valores previos (valores_anteriores), o None si la celda es
+            nueva: se audita desde '' cada campo distinto de VALORES_INICIALES
+        campos: Campos efectivamente guardados (update_fields) o None para todos
+    """
+    usuario = usuario_actual()
+    auditorias = []
+    for campo in CAMPOS_AUDITADOS:
+        if campos is not None and campo not in campos:
+            continue
+        valor_nuevo = str(getattr(roster, campo))
+        if anteriores is None:
+            valor_anterior = ''
+            cambio = valor_nuevo != VALORES_INICIALES[campo]
+        else:
+            valor_anterior = str(anteriores[campo])
+            cambio = valor_anterior != valor_nuevo
+        if cambio:
+            auditorias.append(RosterAudit(
+                personal_id=roster.personal_id,
+                fecha=roster.fecha,
+                campo_modificado=campo,
+                valor_anterior=valor_anterior,
+                valor_nuevo=valor_nuevo,
+                usuario=usuario,
+            ))
+    return auditorias
+
+
+def auditoria_de_baja(roster, usuario=None):
+    """RosterAudit (sin guardar) que registra la eliminación de la celda."""
+    return RosterAudit(
+        personal_id=roster.personal_id,
+        fecha=roster.fecha,
+        campo_modificado=CAMPO_REGISTRO,
+        valor_anterior=roster.codigo,
+        valor_nuevo='eliminado',
+        usuario=usuario or usuario_actual(),
+    )
+
+
+# ============================================================================
+# INSERCIÓN POR TRANSACCIÓN
+# ============================================================================
+
+class _LoteAuditoria:
+    """
+    Auditorías y deltas de conteo pendientes de un nivel de transacción (o savepoint).
+
+    La única referencia fuerte al lote es su callback en on_commit; el registro
+    por hilo guarda una referencia débil. Así el lote deja de estar vigente
+    cuando se inserta (vaciado) o cuando Django descarta el callback al
+    revertir la transacción o el savepoint, sin leer el estado interno de la
+    conexión.
+    """
+
+    def __init__(self, using):
+        self.using = using
+        self.auditorias = []
+        self.contadores = DeltasContadores()
+        self.cobertura = DeltasCobertura()
+        self.vaciado = False
+
+    def vaciar(self):
+        self.vaciado = True
+        with transaction.atomic(using=self.using):
+            if self.auditorias:
+                RosterAudit.objects.using(self.using).bulk_create(self.auditorias)
+            self.contadores.aplicar()
+            self.cobertura.aplicar()
+
+
+def _lote_vigente(referencia):
+    lote = referencia()
+    return lote is not None and not lote.vaciado
+
+
+def _lote_en_curso(using):
+    """Lote del nivel de transacción en curso, o None fuera de un bloque atómico."""
+    conexion = transaction.get_connection(using)
+    if not conexion.in_atomic_block:
+        return None
+
+    lotes = {
+        clave: referencia for clave, referencia in getattr(_local, 'lotes', {}).items()
+        if _lote_vigente(referencia)
+    }
+    _local.lotes = lotes
+    clave = (using, tuple(conexion.savepoint_ids))
+    lote = lotes[clave]() if clave in lotes else None
+    if lote is None:
+        lote = _LoteAuditoria(using)
+        lotes[clave] = weakref.ref(lote)
+        transaction.on_commit(lote.vaciar, using=using)
+    return lote
+
+
+def encolar_auditorias(auditorias, using=None):
+    """
+    Agrega auditorías para insertarlas al confirmar la transacción en curso.
+
+    Fuera de un bloque atómico se insertan de inmediato. Las auditorías de
+    un savepoint revertido se descartan junto con él.
+    """
+    if not auditorias:
+        return
+    asignar_lote(auditorias)
+    using = using or router.db_for_write(RosterAudit)
+    lote = _lote_en_curso(using)
+    if lote is None:
+        RosterAudit.objects.using(using).bulk_create(auditorias)
+        return
+    lote.auditorias.extend(auditorias)
+
+
+def _ubicacion_celda(roster):
+    """(subarea_id, area_id) de la persona de la celda; sin consulta si ya vienen cargados."""
+    if Roster.personal.is_cached(roster):
+        personal = roster.personal
+        if personal.subarea_id is None:
+            return None, None
+        if Personal.subarea.is_cached(personal):
+            return personal.subarea_id, personal.subarea.area_id
+    return Personal.objects.filter(pk=roster.personal_id).values_list(
+        'subarea_id', 'subarea__area_id'
+    ).first() or (None, None)
+
+
+def encolar_conteos_celda(roster, anteriores=None, baja=False):
+    """
+    Registra el alta, cambio o baja de una celda en los contadores de
+    aprobación y en la cobertura diaria (señales de Roster).
+
+    Los deltas se acumulan en el lote de la transacción y se escriben una vez
+    al confirmarla; fuera de un bloque atómico se escriben de inmediato. El
+    área se fija al registrar el cambio para que un traslado posterior de la
+    persona en la misma transacción (mover_personas) no la cuente dos veces.
+
+    Args:
+        roster: Celda guardada o eliminada
+        anteriores: Valores previos de la celda (None si es nueva)
+        baja: Si es True la celda se eliminó
+    """
+    if baja:
+        codigo_anterior, estado_anterior = roster.codigo, (roster.estado, roster.aprobado_en)
+        codigo_nuevo = estado_nuevo = None
+    else:
+        codigo_anterior = anteriores['codigo'] if anteriores else None
+        estado_anterior = (anteriores['estado'], anteriores['aprobado_en']) if anteriores else None
+        codigo_nuevo, estado_nuevo = roster.codigo, (roster.estado, roster.aprobado_en)
+
+    cambia_estado = (
+        (clave_estado(*estado_anterior) if estado_anterior else None)
+        != (clave_estado(*estado_nuevo) if estado_nuevo else None)
+    )
+    cambia_categoria = categoria_codigo(codigo_anterior) != categoria_codigo(codigo_nuevo)
+    if not cambia_estado and not cambia_categoria:
+        return
+
+    subarea_id, area_id = _ubicacion_celda(roster)
+    lote = _lote_en_curso(router.db_for_write(Roster))
+    contadores = lote.contadores if lote else DeltasContadores()
+    cobertura = lote.cobertura if lote else DeltasCobertura()
+    if estado_anterior:
+        contadores.restar(area_id, *estado_anterior)
+    if estado_nuevo:
+        contadores.sumar(area_id, *estado_nuevo)
+    cobertura.cambio(subarea_id, roster.fecha, codigo_anterior, codigo_nuevo)
+    if lote is None:
+        contadores.aplicar()
+        aplicar_cobertura(cobertura.deltas, {subarea_id: area_id})
+
+
+# ============================================================================
+# DESHACER LOTES
+# ============================================================================
+
+def _estado_previo(entradas):
+    """
+    Valores de una celda antes del lote, a partir de sus auditorías (en orden).
+
+    Returns:
+        dict {campo: valor} con el primer valor anterior de cada campo, y
+        CAMPO_REGISTRO si el lote eliminó la celda
+    """
+    previo = {}
+    for campo, valor_anterior in entradas:
+        previo.setdefault(campo, valor_anterior)
+    return previo
+
+
+@transaction.atomic
+def deshacer_lote(lote_id, usuario):
+    """
+    Restaura las celdas de un lote a sus valores previos con escrituras masivas.
+
+    Cada celda vuelve al estado anterior al lote: las modificadas con un solo
+    bulk_update, las eliminadas con un bulk_create y las creadas con un
+    DELETE. Las celdas con cambios posteriores al lote no se tocan y se
+    informan como conflictos. Lo restaurado queda auditado en un lote
+    'deshacer'.
+
+    Returns:
+        dict: {'restauradas', 'recreadas', 'eliminadas', 'conflictos': [(personal_id, fecha)], 'lote'}
+
+    Raises:
+        ValidationError: Si el lote no existe, ya fue deshecho o tiene auditorías archivadas
+    """
+    try:
+        lote = LoteAuditoria.objects.select_for_update().get(pk=lote_id)
+    except LoteAuditoria.DoesNotExist:
+        raise ValidationError('Lote de auditoría no encontrado.') from None
+    if lote.deshecho_en:
+        raise ValidationError('El lote ya fue deshecho.')
+
+    por_celda = defaultdict(list)
+    ultimo_id = {}
+    entradas = lote.auditorias.order_by('id').values_list(
+        'id', 'personal_id', 'fecha', 'campo_modificado', 'valor_anterior'
+    )
+    cantidad = 0
+    for pk, personal_id, fecha, campo, valor_anterior in entradas:
+        por_celda[(personal_id, fecha)].append((campo, valor_anterior))
+        ultimo_id[(personal_id, fecha)] = pk
+        cantidad += 1
+    if cantidad < lote.total:
+        raise ValidationError('El lote tiene auditorías archivadas; no se puede deshacer.')
+
+    personas = {personal_id for personal_id, _ in por_celda}
+    fechas = [fecha for _, fecha in por_celda]
+    rango = (min(fechas), max(fechas)) if fechas else None
+
+    # Celdas con auditorías posteriores de otras acciones: no se restauran
+    conflictos = set()
+    if por_celda:
+        for personal_id, fecha, pk in RosterAudit.objects.filter(
+            personal_id__in=personas, fecha__range=rango, id__gt=min(ultimo_id.values())
+        ).exclude(lote=lote).values_list('personal_id', 'fecha', 'id'):
+            celda = (personal_id, fecha)
+            if celda in ultimo_id and pk > ultimo_id[celda]:
+                conflictos.add(celda)
+
+    actuales = {}
+    if rango:
+        for roster in Roster.objects.filter(personal_id__in=personas, fecha__range=rango).select_related(
+            'personal__subarea'
+        ):
+            actuales[(roster.personal_id, roster.fecha)] = roster
+
+    ahora = timezone.now()
+    contadores = DeltasContadores()
+    cobertura = DeltasCobertura()
+    restaurar, recrear, eliminar, auditorias = [], [], [], []
+    personal_recreado = Personal.objects.in_bulk([
+        personal_id for (personal_id, fecha) in por_celda
+        if (personal_id, fecha) not in actuales and (personal_id, fecha) not in conflictos
+    ])
+
+    for celda, entradas_celda in por_celda.items():
+        if celda in conflictos:
+            continue
+        previo = _estado_previo(entradas_celda)
+        roster = actuales.get(celda)
+        if roster is None:
+            if CAMPO_REGISTRO not in previo:
+                conflictos.add(celda)
+                continue
+            codigo = previo.get('codigo', previo[CAMPO_REGISTRO])
+            roster = Roster(
+                personal=personal_recreado[celda[0]], fecha=celda[1], codigo=codigo,
+                estado=previo.get('estado', VALORES_INICIALES['estado']),
+                observaciones=previo.get('observaciones', VALORES_INICIALES['observaciones']),
+                modificado_por=usuario, fuente=f'Deshacer lote {lote.pk}'
+            )
+            recrear.append(roster)
+            cobertura.cambio(roster.personal.subarea_id, roster.fecha, None, roster.codigo)
+            auditorias += auditorias_de_cambio(roster, None)
+        elif previo.get('codigo') == '':
+            # Sin código previo la celda no existía (alta dentro del lote)
+            eliminar.append(roster.pk)
+        else:
+            anteriores = instantanea(roster)
+            for campo in CAMPOS_AUDITADOS:
+                if campo in previo:
+                    setattr(roster, campo, previo[campo])
+            if roster.estado != 'aprobado':
+                roster.aprobado_por = None
+                roster.aprobado_en = None
+            roster.modificado_por = usuario
+            roster.actualizado_en = ahora
+            # El área se lee junto con la celda: la instantánea de catálogos se publica al
+            # confirmar y no refleja subáreas creadas o movidas en esta misma transacción
+            subarea = roster.personal.subarea
+            area_id = subarea.area_id if subarea else None
+            contadores.restar(area_id, anteriores['estado'], anteriores['aprobado_en'])
+            contadores.sumar(area_id, roster.estado, roster.aprobado_en)
+            cobertura.cambio(roster.personal.subarea_id, roster.fecha, anteriores['codigo'], roster.codigo)
+            restaurar.append(roster)
+            auditorias += auditorias_de_cambio(roster, anteriores)
+
+    with actuando_como(usuario), en_lote('deshacer', usuario, f'Deshacer lote {lote.pk}') as deshacer:
+        # bulk_update/bulk_create no disparan señales: auditoría, contadores y cobertura explícitos
+        Roster.objects.bulk_update(
+            restaurar,
+            ['codigo', 'estado', 'observaciones', 'aprobado_por', 'aprobado_en', 'modificado_por', 'actualizado_en'],
+        )
+        Roster.objects.bulk_create(recrear)
+        contadores.sumar_celdas(recrear)
+        contadores.aplicar()
+        cobertura.aplicar()
+        encolar_auditorias(auditorias)
+        # El DELETE pasa por las señales (contadores y auditoría de la baja)
+        Roster.objects.filter(pk__in=eliminar).delete()
+
+    lote.deshecho_en = ahora
+    lote.deshecho_por = usuario
+    lote.save(update_fields=['deshecho_en', 'deshecho_por'])
+
+    logger.info(
+        f"Lote {lote.pk} deshecho por {usuario.username}: {len(restaurar)} restauradas, "
+        f"{len(recrear)} recreadas, {len(eliminar)} eliminadas, {len(conflictos)} conflictos"
+    )
+    return {
+        'restauradas': len(restaurar),
+        'recreadas': len(recrear),
+        'eliminadas': len(eliminar),
+        'conflictos': sorted(conflictos),
+        'lote': deshacer.instancia.pk if deshacer.instancia else None,
+    }
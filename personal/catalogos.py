@@ -0,0 +1,132 @@
+"""
+Catálogos compartidos: áreas, subáreas, personal activo y códigos de roster.
+
+Los catálogos se materializan como instantáneas inmutables (tuplas de
+namedtuples) en la memoria del proceso. Cada cambio en Area, SubArea o
+Personal publica una nueva versión en la caché de Django (señales en
+signals.py e importadores masivos); la instantánea local solo se reconstruye
+cuando su versión difiere de la publicada, así formularios, plantillas y
+exportaciones leen los catálogos sin volver a consultar la BD en cada uso.
+"""
+from collections import namedtuple
+import logging
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger('personal.business')
+
+CLAVE_VERSION_CATALOGOS = 'personal:catalogos:version'
+
+# Códigos válidos en la matriz de roster (código, descripción)
+CODIGOS_ROSTER = (
+    ('T', 'Trabajo Presencial'),
+    ('TR', 'Trabajo Remoto'),
+    ('DL', 'Día Libre'),
+    ('DOL', 'Compensación por Horario Extendido'),
+    ('DM', 'Descanso Médico'),
+    ('V', 'Vacaciones'),
+    ('F', 'Feriado No Recuperable'),
+    ('FC', 'Feriado Compensable'),
+    ('P', 'Permiso'),
+    ('I', 'Inasistencia'),
+    ('L', 'Licencia'),
+)
+
+AreaCatalogo = namedtuple('AreaCatalogo', ['id', 'nombre', 'activa'])
+SubAreaCatalogo = namedtuple('SubAreaCatalogo', ['id', 'nombre', 'area', 'activa'])
+PersonaCatalogo = namedtuple('PersonaCatalogo', ['id', 'nro_doc', 'apellidos_nombres', 'subarea_id'])
+
+
+class Catalogos(namedtuple('Catalogos', ['version', 'areas', 'subareas', 'personal_activo', 'codigos'])):
+    """
+    Instantánea inmutable de los catálogos.
+
+    areas y subareas incluyen las inactivas (ordenadas por nombre y por
+    área/nombre); personal_activo está ordenado por apellidos y nombres.
+    """
+    __slots__ = ()
+
+    @property
+    def areas_activas(self):
+        return tuple(area for area in self.areas if area.activa)
+
+    @property
+    def subareas_activas(self):
+        return tuple(subarea for subarea in self.subareas if subarea.activa)
+
+    def subareas_de(self, area_ids, solo_activas=True):
+        """Subáreas que pertenecen a las áreas indicadas."""
+        area_ids = set(area_ids)
+        subareas = self.subareas_activas if solo_activas else self.subareas
+        return tuple(subarea for subarea in subareas if subarea.area.id in area_ids)
+
+
+_instantanea = None
+_bloqueo = threading.Lock()
+
+
+def _version_publicada():
+    version = cache.get(CLAVE_VERSION_CATALOGOS)
+    if version is None:
+        cache.add(CLAVE_VERSION_CATALOGOS, uuid.uuid4().hex, timeout=None)
+        version = cache.get(CLAVE_VERSION_CATALOGOS)
+    return version
+
+
+def _construir(version):
+    from .models import Area, SubArea, Personal
+
+    areas = tuple(
+        AreaCatalogo(*fila) for fila in Area.objects.order_by('nombre').values_list('id', 'nombre', 'activa')
+    )
+    areas_por_id = {area.id: area for area in areas}
+    subareas = tuple(
+        SubAreaCatalogo(subarea_id, nombre, areas_por_id[area_id], activa)
+        for subarea_id, nombre, area_id, activa in SubArea.objects.order_by(
+            'area__nombre', 'nombre'
+        ).values_list('id', 'nombre', 'area_id', 'activa')
+    )
+    personal_activo = tuple(
+        PersonaCatalogo(*fila)
+        for fila in Personal.objects.filter(estado='Activo').order_by(
+            'apellidos_nombres', 'pk'
+        ).values_list('id', 'nro_doc', 'apellidos_nombres', 'subarea_id')
+    )
+    logger.debug(f"Catálogos reconstruidos (versión {version})")
+    return Catalogos(version, areas, subareas, personal_activo, CODIGOS_ROSTER)
+
+
+def obtener_catalogos():
+    """
+    Retorna la instantánea vigente de los catálogos.
+
+    Solo consulta la caché para conocer la versión publicada; la BD se
+    consulta únicamente cuando la instantánea local quedó desactualizada.
+    """
+    global _instantanea
+    version = _version_publicada()
+    instantanea = _instantanea
+    if instantanea is not None and instantanea.version == version:
+        return instantanea
+
+    with _bloqueo:
+        if _instantanea is None or _instantanea.version != version:
+            _instantanea = _construir(version)
+        return _instantanea
+
+
+def invalidar_catalogos():
+    """
+    Publica una nueva versión de los catálogos al confirmar la transacción.
+
+    Publicar antes del commit permitiría que otro request construya la
+    instantánea con filas sin confirmar y la deje en caché si la transacción
+    se revierte. Fuera de un bloque atómico se publica de inmediato.
+    """
+    def publicar():
+        cache.set(CLAVE_VERSION_CATALOGOS, uuid.uuid4().hex, timeout=None)
+
+    transaction.on_commit(publicar)
@@ -0,0 +1,264 @@
+"""
+Cobertura diaria precalculada: celdas de roster por día, subárea y categoría.
+
+La portada y la consulta de huecos (días en que una subárea queda bajo su
+SubArea.dotacion_minima) suman unas pocas filas de CoberturaDiaria en lugar
+de contar Roster. Igual que los contadores de aprobación, las señales de
+Roster encolan los deltas de save()/delete() en el lote de la transacción
+(auditoria.encolar_conteos_celda) y las escrituras masivas (importación,
+carga por API, reversión de lotes) registran sus deltas explícitamente
+dentro de la misma transacción. Las celdas se cuentan sin importar su estado.
+El comando reconciliar_contadores también corrige la deriva de esta tabla.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .dotacion import CODIGOS_PRESENCIA
+from .models import SubArea, Roster, CoberturaDiaria
+
+logger = logging.getLogger('personal.business')
+
+# Categoría -> códigos; los códigos no listados cuentan como 'otro'
+CATEGORIAS_COBERTURA = {
+    'presencia': CODIGOS_PRESENCIA,
+    'descanso': ('D', 'DL', 'DLA', 'DOL', 'DS', 'F', 'FC'),
+    'ausencia': ('V', 'DM', 'L', 'P', 'S'),
+}
+
+_CATEGORIA_DE_CODIGO = {
+    codigo: categoria for categoria, codigos in CATEGORIAS_COBERTURA.items() for codigo in codigos
+}
+
+MAX_DIAS_COBERTURA = 366
+
+
+def categoria_codigo(codigo):
+    """Categoría de cobertura de un código de roster (None si no hay celda)."""
+    if codigo is None:
+        return None
+    return _CATEGORIA_DE_CODIGO.get(codigo, 'otro')
+
+
+def clave_cobertura(fecha, subarea_id, categoria):
+    return f"{fecha.isoformat()}:{subarea_id or 0}:{categoria}"
+
+
+def aplicar_deltas(deltas, area_de_subarea=None):
+    """
+    Suma los deltas {(fecha, subarea_id, categoria): n} a la cobertura.
+
+    Mismo esquema que contadores.aplicar_deltas: las filas faltantes se crean
+    con bulk_create(ignore_conflicts) y los incrementos son UPDATE ... SET
+    total = total + n, uno por valor distinto de delta.
+
+    Args:
+        area_de_subarea: {subarea_id: area_id} si ya se conoce (evita la consulta)
+    """
+    deltas = {clave: delta for clave, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    if area_de_subarea is None:
+        # El área se lee de la BD: la instantánea de catálogos puede no reflejar
+        # aún subáreas creadas o movidas en esta misma transacción
+        area_de_subarea = dict(SubArea.objects.filter(
+            pk__in={subarea_id for _, subarea_id, _ in deltas if subarea_id}
+        ).values_list('id', 'area_id'))
+    claves = {clave_cobertura(*clave): clave for clave in deltas}
+    CoberturaDiaria.objects.bulk_create([
+        CoberturaDiaria(
+            clave=texto, fecha=fecha, subarea_id=subarea_id, area_id=area_de_subarea.get(subarea_id),
+            categoria=categoria
+        )
+        for texto, (fecha, subarea_id, categoria) in claves.items()
+    ], ignore_conflicts=True)
+
+    por_delta = defaultdict(list)
+    for texto, clave in claves.items():
+        por_delta[deltas[clave]].append(texto)
+    ahora = timezone.now()
+    for delta, textos in por_delta.items():
+        CoberturaDiaria.objects.filter(clave__in=textos).update(
+            total=F('total') + delta, actualizado_en=ahora
+        )
+
+
+class DeltasCobertura:
+    """Acumula cambios de código de celdas y los escribe en un solo paso."""
+
+    def __init__(self):
+        self.deltas = Counter()
+
+    def cambio(self, subarea_id, fecha, codigo_anterior=None, codigo_nuevo=None, cantidad=1):
+        """
+        Registra que `cantidad` celdas pasaron de codigo_anterior a codigo_nuevo.
+
+        None como código anterior es un alta y como código nuevo una baja.
+        """
+        anterior = categoria_codigo(codigo_anterior)
+        nueva = categoria_codigo(codigo_nuevo)
+        if anterior == nueva:
+            return
+        if anterior:
+            self.deltas[(fecha, subarea_id, anterior)] -= cantidad
+        if nueva:
+            self.deltas[(fecha, subarea_id, nueva)] += cantidad
+
+    def aplicar(self):
+        aplicar_deltas(self.deltas)
+        self.deltas.clear()
+
+
+def conteos_cobertura(roster_qs):
+    """Conteos {(fecha, subarea_id, categoria): n} de un queryset de Roster, agrupados en la BD."""
+    conteos = Counter()
+    for fecha, subarea_id, codigo, total in roster_qs.values_list(
+        'fecha', 'personal__subarea_id', 'codigo'
+    ).annotate(total=Count('pk')).order_by():
+        conteos[(fecha, subarea_id, categoria_codigo(codigo))] += total
+    return +conteos
+
+
+def mover_personal(cambios):
+    """
+    Traslada la cobertura de personas que cambiaron de subárea.
+
+    Args:
+        cambios: Dict {personal_id: (subarea_anterior, subarea_nueva)}
+    """
+    cambios = {personal_id: par for personal_id, par in cambios.items() if par[0] != par[1]}
+    if not cambios:
+        return
+    deltas = Counter()
+    for personal_id, fecha, codigo, total in Roster.objects.filter(
+        personal_id__in=list(cambios)
+    ).values_list('personal_id', 'fecha', 'codigo').annotate(total=Count('pk')).order_by():
+        anterior, nueva = cambios[personal_id]
+        categoria = categoria_codigo(codigo)
+        deltas[(fecha, anterior, categoria)] -= total
+        deltas[(fecha, nueva, categoria)] += total
+    aplicar_deltas(deltas)
+
+
+def totales_cobertura(fecha=None, areas=None):
+    """
+    Celdas de roster de un día por categoría, para la portada.
+
+    Args:
+        fecha: Día a consultar (por defecto hoy)
+        areas: QuerySet o lista de áreas (None = todas, para superusuarios)
+
+    Returns:
+        dict: {'total', 'presencia', 'descanso', 'ausencia', 'otro'}
+    """
+    fecha = fecha or timezone.localdate()
+    coberturas = CoberturaDiaria.objects.filter(fecha=fecha)
+    if areas is not None:
+        coberturas = coberturas.filter(area__in=areas)
+    totales = coberturas.aggregate(**{
+        categoria: Coalesce(Sum('total', filter=Q(categoria=categoria)), 0)
+        for categoria, _ in CoberturaDiaria.CATEGORIA_CHOICES
+    })
+    return {'total': sum(totales.values()), **totales}
+
+
+def huecos_cobertura(desde, hasta, subareas=None):
+    """
+    Días en que una subárea tiene menos presencia (T/TR) que su dotación mínima.
+
+    Args:
+        desde, hasta: Rango de fechas (inclusive)
+        subareas: QuerySet de subáreas a revisar (None = todas)
+
+    Returns:
+        list: [{'fecha', 'area', 'area_nombre', 'subarea', 'subarea_nombre',
+        'minimo', 'presencia', 'faltantes'}] ordenada por fecha y subárea
+    """
+    subareas = (subareas if subareas is not None else SubArea.objects.all()).filter(
+        activa=True, dotacion_minima__gt=0
+    ).select_related('area').order_by('area__nombre', 'nombre')
+    subareas = list(subareas)
+    if not subareas:
+        return []
+
+    presencia = {
+        (fecha, subarea_id): total
+        for fecha, subarea_id, total in CoberturaDiaria.objects.filter(
+            fecha__range=(desde, hasta), categoria='presencia', subarea__in=[subarea.pk for subarea in subareas]
+        ).values_list('fecha', 'subarea_id', 'total')
+    }
+
+    huecos = []
+    for dia in range((hasta - desde).days + 1):
+        fecha = desde + timedelta(days=dia)
+        for subarea in subareas:
+            total = presencia.get((fecha, subarea.pk), 0)
+            if total < subarea.dotacion_minima:
+                huecos.append({
+                    'fecha': fecha.isoformat(),
+                    'area': subarea.area_id,
+                    'area_nombre': subarea.area.nombre,
+                    'subarea': subarea.pk,
+                    'subarea_nombre': subarea.nombre,
+                    'minimo': subarea.dotacion_minima,
+                    'presencia': total,
+                    'faltantes': subarea.dotacion_minima - total,
+                })
+    return huecos
+
+
+@transaction.atomic
+def reconciliar_cobertura(corregir=True):
+    """
+    Recalcula la cobertura diaria desde Roster y corrige las diferencias.
+
+    Args:
+        corregir: Si es False solo informa la deriva sin escribir
+
+    Returns:
+        dict: {'creados': n, 'actualizados': n, 'eliminados': n}
+    """
+    actuales = {
+        (fecha, subarea_id, categoria): (pk, area_id, total)
+        for pk, fecha, subarea_id, categoria, area_id, total in CoberturaDiaria.objects.select_for_update().values_list(
+            'pk', 'fecha', 'subarea_id', 'categoria', 'area_id', 'total'
+        )
+    }
+    reales = conteos_cobertura(Roster.objects.all())
+    area_de_subarea = dict(SubArea.objects.values_list('id', 'area_id'))
+
+    crear = [clave for clave in reales if clave not in actuales]
+    actualizar = [
+        (actuales[clave][0], area_de_subarea.get(clave[1]), total) for clave, total in reales.items()
+        if clave in actuales and (
+            actuales[clave][2] != total or actuales[clave][1] != area_de_subarea.get(clave[1])
+        )
+    ]
+    # Las filas en cero no son deriva: quedan para reutilizarse en el próximo cambio
+    eliminar = [pk for clave, (pk, _, total) in actuales.items() if clave not in reales and total]
+
+    if corregir:
+        ahora = timezone.now()
+        CoberturaDiaria.objects.bulk_create([
+            CoberturaDiaria(
+                clave=clave_cobertura(*clave), fecha=clave[0], subarea_id=clave[1],
+                area_id=area_de_subarea.get(clave[1]), categoria=clave[2], total=reales[clave]
+            )
+            for clave in crear
+        ])
+        CoberturaDiaria.objects.bulk_update([
+            CoberturaDiaria(pk=pk, area_id=area_id, total=total, actualizado_en=ahora)
+            for pk, area_id, total in actualizar
+        ], ['area_id', 'total', 'actualizado_en'])
+        CoberturaDiaria.objects.filter(pk__in=eliminar).delete()
+
+    resultado = {'creados': len(crear), 'actualizados': len(actualizar), 'eliminados': len(eliminar)}
+    if any(resultado.values()):
+        logger.warning(f"Deriva en cobertura diaria: {resultado}")
+    return resultado
@@ -0,0 +1,245 @@
+"""
+Contadores desnormalizados de aprobaciones por área.
+
+get_context_usuario y dashboard_aprobaciones suman unas pocas filas de
+ContadorAprobacion en lugar de contar celdas de Roster con joins a
+Personal/SubArea/Area. Las señales de Roster encolan los deltas de
+save()/delete() en el lote de la transacción y se escriben una vez al
+confirmarla (auditoria.encolar_conteos_celda); las escrituras masivas
+(importación, envío a aprobación) los registran explícitamente dentro de la
+misma transacción. El comando reconciliar_contadores corrige cualquier deriva.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import SubArea, Personal, Roster, ContadorAprobacion
+
+logger = logging.getLogger('personal.business')
+
+# Estados que se cuentan sin fecha; los aprobados se cuentan por día de aprobación
+ESTADOS_SIN_FECHA = ('borrador', 'pendiente')
+
+CELDAS_CONTADAS = Q(estado__in=ESTADOS_SIN_FECHA) | Q(estado='aprobado', aprobado_en__isnull=False)
+
+
+def clave_estado(estado, aprobado_en=None):
+    """(estado, fecha) con que se cuenta una celda, o None si no se cuenta."""
+    if estado in ESTADOS_SIN_FECHA:
+        return (estado, None)
+    if estado == 'aprobado' and aprobado_en:
+        return (estado, timezone.localdate(aprobado_en))
+    return None
+
+
+def clave_contador(area_id, estado, fecha):
+    return f"{area_id or 0}:{estado}:{fecha.isoformat() if fecha else ''}"
+
+
+def area_de_personal(personal_id):
+    return Personal.objects.filter(pk=personal_id).values_list('subarea__area_id', flat=True).first()
+
+
+def aplicar_deltas(deltas):
+    """
+    Suma los deltas {(area_id, estado, fecha): n} a los contadores.
+
+    Las filas faltantes se crean con bulk_create(ignore_conflicts) y los
+    incrementos se hacen con UPDATE ... SET total = total + n (un UPDATE por
+    valor distinto de delta), así las escrituras concurrentes no se pisan.
+    """
+    deltas = {clave: delta for clave, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    claves = {clave_contador(*clave): clave for clave in deltas}
+    ContadorAprobacion.objects.bulk_create([
+        ContadorAprobacion(clave=texto, area_id=area_id, estado=estado, fecha=fecha)
+        for texto, (area_id, estado, fecha) in claves.items()
+    ], ignore_conflicts=True)
+
+    por_delta = defaultdict(list)
+    for texto, clave in claves.items():
+        por_delta[deltas[clave]].append(texto)
+    ahora = timezone.now()
+    for delta, textos in por_delta.items():
+        ContadorAprobacion.objects.filter(clave__in=textos).update(
+            total=F('total') + delta, actualizado_en=ahora
+        )
+
+
+class DeltasContadores:
+    """Acumula cambios de estado de celdas y los escribe en un solo paso."""
+
+    def __init__(self):
+        self.deltas = Counter()
+
+    def sumar(self, area_id, estado, aprobado_en=None, cantidad=1):
+        clave = clave_estado(estado, aprobado_en)
+        if clave is not None:
+            self.deltas[(area_id, *clave)] += cantidad
+
+    def restar(self, area_id, estado, aprobado_en=None, cantidad=1):
+        self.sumar(area_id, estado, aprobado_en, -cantidad)
+
+    def sumar_celdas(self, celdas):
+        """
+        Suma celdas nuevas de Roster (con su personal cargado).
+
+        El área se lee de la BD y solo para las celdas que cuentan (las
+        importadas nacen aprobadas sin fecha): la instantánea de catálogos se
+        publica al confirmar y no refleja subáreas creadas o movidas en esta
+        misma transacción.
+        """
+        contadas = [celda for celda in celdas if clave_estado(celda.estado, celda.aprobado_en)]
+        if not contadas:
+            return
+        area_de_subarea = dict(SubArea.objects.filter(
+            pk__in={celda.personal.subarea_id for celda in contadas if celda.personal.subarea_id}
+        ).values_list('id', 'area_id'))
+        for celda in contadas:
+            self.sumar(area_de_subarea.get(celda.personal.subarea_id), celda.estado, celda.aprobado_en)
+
+    def aplicar(self):
+        aplicar_deltas(self.deltas)
+        self.deltas.clear()
+
+
+def registrar_cambio(personal_id, anterior, nuevo, cantidad=1, area_id=None):
+    """
+    Refleja en los contadores que `cantidad` celdas de una persona cambiaron de estado.
+
+    Args:
+        personal_id: Persona dueña de las celdas
+        anterior: (estado, aprobado_en) previo, o None si las celdas son nuevas
+        nuevo: (estado, aprobado_en) actual, o None si las celdas se eliminaron
+        area_id: Área de la persona si ya se conoce (evita la consulta)
+    """
+    clave_anterior = clave_estado(*anterior) if anterior else None
+    clave_nueva = clave_estado(*nuevo) if nuevo else None
+    if clave_anterior == clave_nueva:
+        return
+
+    if area_id is None:
+        area_id = area_de_personal(personal_id)
+    deltas = Counter()
+    if clave_anterior:
+        deltas[(area_id, *clave_anterior)] -= cantidad
+    if clave_nueva:
+        deltas[(area_id, *clave_nueva)] += cantidad
+    aplicar_deltas(deltas)
+
+
+def conteos_roster(roster_qs):
+    """Conteos {(area_id, estado, fecha): n} de un queryset de Roster, agrupados en la BD."""
+    filas = roster_qs.filter(CELDAS_CONTADAS).annotate(
+        dia=TruncDate('aprobado_en', tzinfo=timezone.get_current_timezone())
+    ).values_list('personal__subarea__area_id', 'estado', 'dia').annotate(total=Count('pk')).order_by()
+
+    conteos = Counter()
+    for area_id, estado, dia, total in filas:
+        conteos[(area_id, estado, None if estado in ESTADOS_SIN_FECHA else dia)] += total
+    return +conteos
+
+
+def mover_personal(personal_id, area_anterior, area_nueva):
+    """Traslada los conteos de una persona cuando cambia de área."""
+    mover_personas({personal_id: (area_anterior, area_nueva)})
+
+
+def mover_personas(cambios):
+    """
+    Traslada los conteos de varias personas que cambiaron de área (una consulta agrupada).
+
+    Args:
+        cambios: Dict {personal_id: (area_anterior, area_nueva)}
+    """
+    cambios = {personal_id: par for personal_id, par in cambios.items() if par[0] != par[1]}
+    if not cambios:
+        return
+    deltas = Counter()
+    for personal_id, estado, dia, total in Roster.objects.filter(
+        CELDAS_CONTADAS, personal_id__in=list(cambios)
+    ).annotate(
+        dia=TruncDate('aprobado_en', tzinfo=timezone.get_current_timezone())
+    ).values_list('personal_id', 'estado', 'dia').annotate(total=Count('pk')).order_by():
+        fecha = None if estado in ESTADOS_SIN_FECHA else dia
+        area_anterior, area_nueva = cambios[personal_id]
+        deltas[(area_anterior, estado, fecha)] -= total
+        deltas[(area_nueva, estado, fecha)] += total
+    aplicar_deltas(deltas)
+
+
+def totales_aprobacion(areas=None, hoy=None):
+    """
+    Totales para badges y estadísticas del dashboard.
+
+    Args:
+        areas: QuerySet o lista de áreas (None = todas, para superusuarios)
+
+    Returns:
+        dict: {'borradores', 'pendientes', 'aprobados_hoy', 'total_semana'}
+    """
+    hoy = hoy or timezone.localdate()
+    inicio_semana = hoy - timedelta(days=hoy.weekday())
+    contadores = ContadorAprobacion.objects.all()
+    if areas is not None:
+        contadores = contadores.filter(area__in=areas)
+    return contadores.aggregate(
+        borradores=Coalesce(Sum('total', filter=Q(estado='borrador')), 0),
+        pendientes=Coalesce(Sum('total', filter=Q(estado='pendiente')), 0),
+        aprobados_hoy=Coalesce(Sum('total', filter=Q(estado='aprobado', fecha=hoy)), 0),
+        total_semana=Coalesce(Sum('total', filter=Q(estado='aprobado', fecha__gte=inicio_semana)), 0),
+    )
+
+
+@transaction.atomic
+def reconciliar_contadores(corregir=True):
+    """
+    Recalcula los contadores desde Roster y corrige las diferencias.
+
+    Args:
+        corregir: Si es False solo informa la deriva sin escribir
+
+    Returns:
+        dict: {'creados': n, 'actualizados': n, 'eliminados': n}
+    """
+    actuales = {
+        (area_id, estado, fecha): (pk, total)
+        for pk, area_id, estado, fecha, total in ContadorAprobacion.objects.select_for_update().values_list(
+            'pk', 'area_id', 'estado', 'fecha', 'total'
+        )
+    }
+    reales = conteos_roster(Roster.objects.all())
+
+    crear = [clave for clave in reales if clave not in actuales]
+    actualizar = [
+        (actuales[clave][0], total) for clave, total in reales.items()
+        if clave in actuales and actuales[clave][1] != total
+    ]
+    # Las filas en cero no son deriva: quedan para reutilizarse en el próximo cambio
+    eliminar = [pk for clave, (pk, total) in actuales.items() if clave not in reales and total]
+
+    if corregir:
+        ahora = timezone.now()
+        ContadorAprobacion.objects.bulk_create([
+            ContadorAprobacion(
+                clave=clave_contador(*clave), area_id=clave[0], estado=clave[1], fecha=clave[2],
+                total=reales[clave]
+            )
+            for clave in crear
+        ])
+        ContadorAprobacion.objects.bulk_update([
+            ContadorAprobacion(pk=pk, total=total, actualizado_en=ahora) for pk, total in actualizar
+        ], ['total', 'actualizado_en'])
+        ContadorAprobacion.objects.filter(pk__in=eliminar).delete()
+
+    resultado = {'creados': len(crear), 'actualizados': len(actualizar), 'eliminados': len(eliminar)}
+    if any(resultado.values()):
+        logger.warning(f"Deriva en contadores de aprobación: {resultado}")
+    return resultado
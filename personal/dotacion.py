@@ -0,0 +1,170 @@
+"""
+Dotación diaria: celdas aprobadas de roster por (fecha, subárea, código).
+
+Los conteos salen de un único GROUP BY sobre el rango pedido. Los meses
+cerrados (anteriores al actual) se guardan en la caché junto con la última
+auditoría existente al calcularlos; como toda escritura del roster deja
+auditoría, basta buscar auditorías posteriores de ese mes para saber si el
+conteo guardado sigue vigente. La clave incluye la versión de los catálogos,
+así los cambios de subárea del personal también lo invalidan.
+"""
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, timedelta
+from functools import reduce
+import logging
+from operator import or_
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .catalogos import obtener_catalogos
+from .models import Roster, RosterAudit
+
+logger = logging.getLogger('personal.business')
+
+# Códigos que cuentan como presencia en sitio o trabajo
+CODIGOS_PRESENCIA = ('T', 'TR')
+
+NIVELES_DOTACION = ('subarea', 'area')
+
+MAX_DIAS_DOTACION = 731
+
+DURACION_CACHE_DOTACION = 60 * 60 * 24 * 90
+
+
+def _clave(anio, mes, version):
+    return f'personal:dotacion:{anio}-{mes:02d}:{version}'
+
+
+def _meses(desde, hasta):
+    meses = []
+    anio, mes = desde.year, desde.month
+    while (anio, mes) <= (hasta.year, hasta.month):
+        meses.append((anio, mes))
+        anio, mes = (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+    return meses
+
+
+def _rango_meses(meses):
+    return reduce(or_, (
+        Q(fecha__range=(date(anio, mes, 1), date(anio, mes, monthrange(anio, mes)[1])))
+        for anio, mes in meses
+    ))
+
+
+def conteos_dotacion(desde, hasta):
+    """
+    Celdas aprobadas por (fecha, subárea, código) entre dos fechas.
+
+    Returns:
+        dict: {(fecha, subarea_id, codigo): cantidad}
+    """
+    hoy = timezone.localdate()
+    version = obtener_catalogos().version
+    meses = _meses(desde, hasta)
+    claves = {mes: _clave(*mes, version) for mes in meses if mes < (hoy.year, hoy.month)}
+    # La marca se lee antes de contar: una escritura posterior deja una auditoría mayor
+    marca = RosterAudit.objects.aggregate(marca=Max('id'))['marca'] or 0
+
+    guardados = cache.get_many(list(claves.values()))
+    en_cache = {mes: guardados[clave] for mes, clave in claves.items() if clave in guardados}
+    vigentes = {}
+    if en_cache:
+        ultimas = {
+            (inicio.year, inicio.month): ultima
+            for inicio, ultima in RosterAudit.objects.filter(
+                _rango_meses(en_cache), id__gt=min(entrada['marca'] for entrada in en_cache.values())
+            ).annotate(mes=TruncMonth('fecha')).values('mes').annotate(ultima=Max('id')).values_list('mes', 'ultima')
+        }
+        vigentes = {
+            mes: entrada for mes, entrada in en_cache.items() if ultimas.get(mes, 0) <= entrada['marca']
+        }
+
+    por_mes = {mes: entrada['conteos'] for mes, entrada in vigentes.items()}
+    # Los meses vigentes avanzan su marca para acotar la próxima búsqueda de auditorías
+    nuevos = {
+        claves[mes]: {'marca': marca, 'conteos': entrada['conteos']}
+        for mes, entrada in vigentes.items() if entrada['marca'] < marca
+    }
+    faltantes = [mes for mes in meses if mes not in vigentes]
+    if faltantes:
+        calculados = defaultdict(list)
+        for fecha, subarea_id, codigo, cantidad in Roster.objects.filter(
+            _rango_meses(faltantes), estado='aprobado'
+        ).values_list('fecha', 'personal__subarea_id', 'codigo').annotate(cantidad=Count('id')).order_by():
+            calculados[(fecha.year, fecha.month)].append((fecha.day, subarea_id, codigo, cantidad))
+        for mes in faltantes:
+            por_mes[mes] = calculados.get(mes, [])
+            if mes in claves:
+                nuevos[claves[mes]] = {'marca': marca, 'conteos': por_mes[mes]}
+        logger.debug(f"Dotación calculada para {len(faltantes)} mes(es)")
+    if nuevos:
+        cache.set_many(nuevos, timeout=DURACION_CACHE_DOTACION)
+
+    conteos = {}
+    for (anio, mes), filas in por_mes.items():
+        for dia, subarea_id, codigo, cantidad in filas:
+            fecha = date(anio, mes, dia)
+            if desde <= fecha <= hasta:
+                conteos[(fecha, subarea_id, codigo)] = cantidad
+    return conteos
+
+
+def series_dotacion(desde, hasta, codigos=CODIGOS_PRESENCIA, nivel='subarea', subareas=None):
+    """
+    Series densas de dotación para graficar.
+
+    Args:
+        desde, hasta: Rango de fechas (inclusive)
+        codigos: Códigos a incluir (None = todos)
+        nivel: 'subarea' o 'area' (suma las subáreas de cada área)
+        subareas: QuerySet de subáreas visibles (None = todas, incluidas las celdas sin subárea)
+
+    Returns:
+        dict: {'fechas': [...], 'series': [{'area', 'area_nombre', ['subarea', 'subarea_nombre'],
+        'codigo', 'conteos': [un valor por fecha]}]} con solo las series no vacías
+    """
+    catalogos = obtener_catalogos()
+    # Los conteos en caché son globales; el alcance del usuario se aplica al armar las series
+    visibles = None if subareas is None else set(subareas.values_list('id', flat=True))
+    subareas = {subarea.id: subarea for subarea in catalogos.subareas}
+    dias = (hasta - desde).days + 1
+
+    series = {}
+    for (fecha, subarea_id, codigo), cantidad in conteos_dotacion(desde, hasta).items():
+        if codigos and codigo not in codigos:
+            continue
+        if visibles is not None and subarea_id not in visibles:
+            continue
+        subarea = subareas.get(subarea_id)
+        area = subarea.area if subarea else None
+        clave = (area, codigo) if nivel == 'area' else (area, subarea, codigo)
+        serie = series.get(clave)
+        if serie is None:
+            serie = series[clave] = [0] * dias
+        serie[(fecha - desde).days] += cantidad
+
+    def orden(clave):
+        *grupos, codigo = clave
+        return tuple(grupo.nombre if grupo else '' for grupo in grupos) + (codigo,)
+
+    resultado = []
+    for clave in sorted(series, key=orden):
+        area = clave[0]
+        fila = {'area': area.id if area else None, 'area_nombre': area.nombre if area else 'Sin área'}
+        if nivel != 'area':
+            subarea = clave[1]
+            fila.update({
+                'subarea': subarea.id if subarea else None,
+                'subarea_nombre': subarea.nombre if subarea else 'Sin subárea',
+            })
+        fila.update({'codigo': clave[-1], 'conteos': series[clave]})
+        resultado.append(fila)
+
+    return {
+        'fechas': [(desde + timedelta(days=n)).isoformat() for n in range(dias)],
+        'series': resultado,
+    }
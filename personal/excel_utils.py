@@ -127,7 +127,7 @@ def crear_plantilla_personal(personal_queryset=None):
     """
     Crea una plantilla Excel para importar/actualizar Personal con catálogos y validaciones.
     """
-    from .models import Area, SubArea, Personal
+    from .catalogos import obtener_catalogos
     
     # Datos principales (personal actual si se proporciona)
     if personal_queryset:
@@ -185,10 +185,11 @@ def crear_plantilla_personal(personal_queryset=None):
     df_personal = pd.DataFrame(data_personal)
     
     # Catálogos
+    subareas = sorted(obtener_catalogos().subareas_activas, key=lambda a: a.nombre)
     catalogos = {
         'CAT_SubAreas': pd.DataFrame({
-            'SubArea': [a.nombre for a in SubArea.objects.filter(activa=True).order_by('nombre')],
-            'Area': [a.area.nombre for a in SubArea.objects.filter(activa=True).order_by('nombre')]
+            'SubArea': [a.nombre for a in subareas],
+            'Area': [a.area.nombre for a in subareas]
         }),
         'CAT_TipoDoc': pd.DataFrame({
             'TipoDoc': ['DNI', 'CE', 'Pasaporte']
@@ -220,7 +221,7 @@ def crear_plantilla_gerencias(gerencias_queryset=None):
     """
     Crea una plantilla Excel para importar/actualizar Gerencias.
     """
-    from .models import Area, Personal
+    from .catalogos import obtener_catalogos
     
     # Datos principales
     if gerencias_queryset:
@@ -246,10 +247,11 @@ def crear_plantilla_gerencias(gerencias_queryset=None):
     df_gerencias = pd.DataFrame(data)
     
     # Catálogo de responsables
+    personal_activo = obtener_catalogos().personal_activo
     catalogos = {
         'CAT_Responsables': pd.DataFrame({
-            'DNI': [p.nro_doc for p in Personal.objects.filter(estado='Activo').order_by('apellidos_nombres')],
-            'Nombre': [p.apellidos_nombres for p in Personal.objects.filter(estado='Activo').order_by('apellidos_nombres')]
+            'DNI': [p.nro_doc for p in personal_activo],
+            'Nombre': [p.apellidos_nombres for p in personal_activo]
         }),
         'CAT_Activa': pd.DataFrame({
             'Activa': ['Sí', 'No']
@@ -268,7 +270,7 @@ def crear_plantilla_areas(areas_queryset=None):
     """
     Crea una plantilla Excel para importar/actualizar Áreas.
     """
-    from .models import SubArea, Area
+    from .catalogos import obtener_catalogos
     
     # Datos principales
     if areas_queryset:
@@ -293,7 +295,7 @@ def crear_plantilla_areas(areas_queryset=None):
     # Catálogos
     catalogos = {
         'CAT_Areas': pd.DataFrame({
-            'Area': [g.nombre for g in Area.objects.filter(activa=True).order_by('nombre')]
+            'Area': [g.nombre for g in obtener_catalogos().areas_activas]
         }),
         'CAT_Activa': pd.DataFrame({
             'Activa': ['Sí', 'No']
@@ -315,6 +317,7 @@ def crear_plantilla_roster(mes, anio, personal_queryset, rosters_queryset=None):
     from calendar import monthrange
     from datetime import datetime
     from collections import defaultdict
+    from .catalogos import obtener_catalogos
     
     dias_en_mes = monthrange(anio, mes)[1]
     
@@ -344,26 +347,12 @@ def crear_plantilla_roster(mes, anio, personal_queryset, rosters_queryset=None):
     df_roster = pd.DataFrame(data)
     
     # Catálogos
+    codigos = obtener_catalogos().codigos
     catalogos = {
         'CAT_Codigos': pd.DataFrame({
-            'Codigo': ['T', 'TR', 'DL', 'DOL', 'DM', 'V', 'F', 'FC', 'P', 'I', 'L']
-        }),
-        'CAT_Descripcion': pd.DataFrame({
-            'Codigo': ['T', 'TR', 'DL', 'DOL', 'DM', 'V', 'F', 'FC', 'P', 'I', 'L'],
-            'Descripcion': [
-                'Trabajo Presencial',
-                'Trabajo Remoto',
-                'Día Libre',
-                'Compensación por Horario Extendido',
-                'Descanso Médico',
-                'Vacaciones',
-                'Feriado No Recuperable',
-                'Feriado Compensable',
-                'Permiso',
-                'Inasistencia',
-                'Licencia'
-            ]
+            'Codigo': [codigo for codigo, _ in codigos]
         }),
+        'CAT_Descripcion': pd.DataFrame(list(codigos), columns=['Codigo', 'Descripcion']),
     }
     
     # Aplicar validación a todas las columnas de días
@@ -0,0 +1,702 @@
+"""
+Motor de exportación Excel en memoria constante.
+
+Las filas se escriben directamente desde cursores `.values_list().iterator()`
+con xlsxwriter en modo `constant_memory`: cada fila se vuelca a disco al
+pasar a la siguiente, así que la memoria no crece con el tamaño del archivo.
+Anchos de columna y formatos de texto salen de los metadatos de cada columna
+en lugar de recorrer las celdas ya escritas.
+"""
+from calendar import monthrange
+from collections import defaultdict, namedtuple
+from datetime import date
+from itertools import groupby
+from operator import itemgetter
+import hashlib
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import FileResponse
+import xlsxwriter
+
+from .catalogos import CODIGOS_ROSTER, obtener_catalogos
+from .models import Area, SubArea, Personal, Roster
+
+logger = logging.getLogger('personal')
+
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Filas por viaje al servidor de BD en los cursores de exportación
+TAMANO_CURSOR = 2000
+
+# Filas mínimas con lista desplegable (para que la plantilla admita altas nuevas)
+FILAS_VALIDACION = 1000
+
+ANCHO_MAXIMO = 50
+
+# Columna de exportación: título de cabecera, ancho y si se escribe como texto
+Columna = namedtuple('Columna', ['titulo', 'ancho', 'texto'])
+
+def columna(titulo, modelo=None, campo=None, ancho=None, texto=False):
+    """
+    Define una columna calculando su ancho a partir del max_length del campo.
+
+    Args:
+        titulo: Texto de la cabecera
+        modelo: Modelo Django del que se toma el campo (opcional)
+        campo: Nombre del campo en el modelo
+        ancho: Ancho explícito (tiene prioridad sobre el del campo)
+        texto: Si es True la columna se formatea y escribe como texto ('@')
+    """
+    if ancho is None:
+        max_length = modelo._meta.get_field(campo).max_length if modelo and campo else None
+        ancho = max_length or 12
+    return Columna(titulo, min(max(ancho, len(titulo)) + 2, ANCHO_MAXIMO), texto)
+
+
+def abrir_libro(destino):
+    """Crea un Workbook de xlsxwriter en modo constant_memory sobre una ruta o archivo."""
+    libro = xlsxwriter.Workbook(destino, {
+        'constant_memory': True,
+        'tmpdir': tempfile.gettempdir(),
+        'strings_to_numbers': False,
+        'strings_to_formulas': False,
+    })
+    libro.formatos = {
+        'encabezado': libro.add_format({
+            'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#366092',
+            'align': 'center', 'valign': 'vcenter'
+        }),
+        'texto': libro.add_format({'num_format': '@'}),
+    }
+    return libro
+
+
+def escribir_hoja(libro, nombre, columnas, filas, validaciones=None):
+    """
+    Escribe una hoja fila a fila desde un iterable.
+
+    Args:
+        libro: Workbook creado con abrir_libro
+        nombre: Nombre de la hoja
+        columnas: Lista de Columna
+        filas: Iterable de tuplas con un valor por columna
+        validaciones: Dict {(col_inicio, col_fin): (hoja_catalogo, filas_catalogo)}
+            para aplicar listas desplegables a un rango de columnas
+
+    Returns:
+        int: Número de filas de datos escritas
+    """
+    hoja = libro.add_worksheet(nombre)
+    formato_texto = libro.formatos['texto']
+    for indice, col in enumerate(columnas):
+        hoja.set_column(indice, indice, col.ancho, formato_texto if col.texto else None)
+    hoja.write_row(0, 0, [col.titulo for col in columnas], libro.formatos['encabezado'])
+    hoja.freeze_panes(1, 0)
+
+    indices_texto = {indice for indice, col in enumerate(columnas) if col.texto}
+    total = 0
+    for total, fila in enumerate(filas, start=1):
+        for indice, valor in enumerate(fila):
+            if valor is None or valor == '':
+                continue
+            if indice in indices_texto:
+                hoja.write_string(total, indice, str(valor), formato_texto)
+            else:
+                hoja.write(total, indice, valor)
+
+    ultima_fila = max(total, FILAS_VALIDACION)
+    for (col_inicio, col_fin), (catalogo, filas_catalogo) in (validaciones or {}).items():
+        hoja.data_validation(1, col_inicio, ultima_fila, col_fin, {
+            'validate': 'list',
+            'source': f"='{catalogo}'!$A$2:$A${filas_catalogo + 1}",
+            'error_title': 'Valor inválido',
+            'error_message': 'Por favor, selecciona un valor de la lista',
+        })
+    return total
+
+
+def escribir_catalogo(libro, nombre, titulos, filas):
+    """Escribe una hoja de catálogo y retorna su número de filas (para las validaciones)."""
+    filas = list(filas)
+    anchos = [max([len(titulo)] + [len(str(fila[i])) for fila in filas]) for i, titulo in enumerate(titulos)]
+    columnas = [columna(titulo, ancho=ancho) for titulo, ancho in zip(titulos, anchos, strict=True)]
+    return escribir_hoja(libro, nombre, columnas, filas)
+
+
+def _texto_fecha(valor):
+    return valor.isoformat() if valor else ''
+
+
+def escribir_libro(libro, nombre, columnas, filas, catalogos=None, validaciones=None):
+    """
+    Escribe la hoja principal seguida de sus hojas de catálogo.
+
+    Args:
+        libro: Workbook creado con abrir_libro
+        nombre: Nombre de la hoja principal
+        columnas: Lista de Columna de la hoja principal
+        filas: Iterable de filas de la hoja principal
+        catalogos: Dict {hoja: (titulos, filas)}
+        validaciones: Dict {titulo_columna o (col_inicio, col_fin): hoja_catalogo}
+
+    Returns:
+        int: Número de filas de la hoja principal
+    """
+    catalogos = {hoja: (titulos, list(filas_catalogo)) for hoja, (titulos, filas_catalogo) in (catalogos or {}).items()}
+    titulos = [col.titulo for col in columnas]
+    rangos = {}
+    for objetivo, hoja in (validaciones or {}).items():
+        if not isinstance(objetivo, tuple):
+            objetivo = (titulos.index(objetivo),) * 2
+        rangos[objetivo] = (hoja, len(catalogos[hoja][1]))
+
+    total = escribir_hoja(libro, nombre, columnas, filas, rangos)
+    for hoja, (titulos_catalogo, filas_catalogo) in catalogos.items():
+        escribir_catalogo(libro, hoja, titulos_catalogo, filas_catalogo)
+    return total
+
+
+# ================== PERSONAL ==================
+
+COLUMNAS_PERSONAL = [
+    (columna('NroDoc', Personal, 'nro_doc', texto=True), 'nro_doc'),
+    (columna('TipoDoc', Personal, 'tipo_doc'), 'tipo_doc'),
+    (columna('ApellidosNombres', Personal, 'apellidos_nombres', ancho=40), 'apellidos_nombres'),
+    (columna('CodigoFotocheck', Personal, 'codigo_fotocheck', texto=True), 'codigo_fotocheck'),
+    (columna('Cargo', Personal, 'cargo', ancho=30), 'cargo'),
+    (columna('TipoTrabajador', Personal, 'tipo_trab'), 'tipo_trab'),
+    (columna('SubArea', ancho=30), 'subarea__nombre'),
+    (columna('Estado', Personal, 'estado'), 'estado'),
+    (columna('FechaAlta', ancho=10), 'fecha_alta'),
+    (columna('FechaCese', ancho=10), 'fecha_cese'),
+    (columna('FechaNacimiento', ancho=10), 'fecha_nacimiento'),
+    (columna('Sexo', Personal, 'sexo'), 'sexo'),
+    (columna('Celular', Personal, 'celular', texto=True), 'celular'),
+    (columna('CorreoPersonal', ancho=30), 'correo_personal'),
+    (columna('CorreoCorporativo', ancho=30), 'correo_corporativo'),
+    (columna('Direccion', ancho=40), 'direccion'),
+    (columna('Ubigeo', Personal, 'ubigeo', texto=True), 'ubigeo'),
+    (columna('RegimenLaboral', Personal, 'regimen_laboral'), 'regimen_laboral'),
+    (columna('RegimenTurno', Personal, 'regimen_turno'), 'regimen_turno'),
+    (columna('DiasLibresCorte2025', ancho=8), 'dias_libres_corte_2025'),
+    (columna('Observaciones', ancho=40), 'observaciones'),
+]
+
+EJEMPLO_PERSONAL = (
+    '12345678', 'DNI', 'APELLIDOS, NOMBRES', '', 'CARGO EJEMPLO', 'Empleado', '', 'Activo',
+    '2024-01-01', '', '1990-01-01', 'M', '', '', '', '', '', '', '21x7', 0, '',
+)
+
+CAMPOS_FECHA_PERSONAL = {'fecha_alta', 'fecha_cese', 'fecha_nacimiento'}
+
+
+def _filas_personal(personal_qs):
+    campos = [campo for _, campo in COLUMNAS_PERSONAL]
+    indices_fecha = [i for i, campo in enumerate(campos) if campo in CAMPOS_FECHA_PERSONAL]
+    indice_dias = campos.index('dias_libres_corte_2025')
+    for fila in personal_qs.values_list(*campos).iterator(chunk_size=TAMANO_CURSOR):
+        fila = list(fila)
+        for indice in indices_fecha:
+            fila[indice] = _texto_fecha(fila[indice])
+        fila[indice_dias] = float(fila[indice_dias])
+        yield fila
+
+
+def exportar_personal(destino, personal_qs=None):
+    """
+    Exporta Personal con catálogos y validaciones.
+
+    Args:
+        destino: Ruta o archivo binario donde escribir el .xlsx
+        personal_qs: QuerySet a exportar (None genera la plantilla con una fila de ejemplo)
+
+    Returns:
+        int: Número de filas exportadas
+    """
+    filas = [EJEMPLO_PERSONAL] if personal_qs is None else _filas_personal(personal_qs)
+    catalogos = {
+        'CAT_SubAreas': (
+            ['SubArea', 'Area'],
+            sorted((subarea.nombre, subarea.area.nombre) for subarea in obtener_catalogos().subareas_activas)
+        ),
+        'CAT_TipoDoc': (['TipoDoc'], [('DNI',), ('CE',), ('Pasaporte',)]),
+        'CAT_TipoTrabajador': (['TipoTrabajador'], [('Empleado',), ('Obrero',)]),
+        'CAT_Estado': (['Estado'], [('Activo',), ('Inactivo',), ('Suspendido',), ('Cesado',)]),
+        'CAT_Sexo': (['Sexo'], [('M',), ('F',)]),
+    }
+    validaciones = {
+        'SubArea': 'CAT_SubAreas',
+        'TipoDoc': 'CAT_TipoDoc',
+        'TipoTrabajador': 'CAT_TipoTrabajador',
+        'Estado': 'CAT_Estado',
+        'Sexo': 'CAT_Sexo',
+    }
+
+    with abrir_libro(destino) as libro:
+        total = escribir_libro(
+            libro, 'Personal', [col for col, _ in COLUMNAS_PERSONAL], filas, catalogos, validaciones
+        )
+    logger.info(f"Excel de personal exportado: {total} filas")
+    return total
+
+
+# ================== GERENCIAS Y ÁREAS ==================
+
+COLUMNAS_GERENCIAS = [
+    columna('Nombre', Area, 'nombre'),
+    columna('Responsable_DNI', ancho=20, texto=True),
+    columna('Responsable_Nombre', ancho=40),
+    columna('Descripcion', ancho=40),
+    columna('Activa', ancho=6),
+]
+
+COLUMNAS_SUBAREAS = [
+    columna('Nombre', SubArea, 'nombre'),
+    columna('Area', Area, 'nombre'),
+    columna('Descripcion', ancho=40),
+    columna('Activa', ancho=6),
+]
+
+
+def _si_no(valor):
+    return 'Sí' if valor else 'No'
+
+
+def _filas_gerencias(areas_qs):
+    responsables = defaultdict(list)
+    for area_id, nro_doc, nombre in Area.responsables.through.objects.filter(
+        area__in=areas_qs
+    ).order_by('personal__apellidos_nombres').values_list(
+        'area_id', 'personal__nro_doc', 'personal__apellidos_nombres'
+    ):
+        responsables[area_id].append((nro_doc, nombre))
+
+    for area_id, nombre, descripcion, activa in areas_qs.values_list(
+        'id', 'nombre', 'descripcion', 'activa'
+    ).iterator(chunk_size=TAMANO_CURSOR):
+        personas = responsables.get(area_id, [])
+        yield (
+            nombre,
+            ', '.join(nro_doc for nro_doc, _ in personas),
+            ', '.join(nombre_responsable for _, nombre_responsable in personas),
+            descripcion,
+            _si_no(activa),
+        )
+
+
+def exportar_gerencias(destino, areas_qs=None):
+    """Exporta Gerencias (Area) con el catálogo de responsables activos."""
+    if areas_qs is None:
+        filas = [('AREA EJEMPLO', '', '', '', 'Sí')]
+    else:
+        filas = _filas_gerencias(areas_qs)
+    catalogos = {
+        'CAT_Responsables': (
+            ['DNI', 'Nombre'],
+            [(persona.nro_doc, persona.apellidos_nombres) for persona in obtener_catalogos().personal_activo]
+        ),
+        'CAT_Activa': (['Activa'], [('Sí',), ('No',)]),
+    }
+    validaciones = {'Responsable_DNI': 'CAT_Responsables', 'Activa': 'CAT_Activa'}
+
+    with abrir_libro(destino) as libro:
+        return escribir_libro(libro, 'Gerencias', COLUMNAS_GERENCIAS, filas, catalogos, validaciones)
+
+
+def exportar_subareas(destino, subareas_qs=None):
+    """Exporta Áreas (SubArea) con el catálogo de gerencias activas."""
+    if subareas_qs is None:
+        filas = [('SUBAREA EJEMPLO', '', '', 'Sí')]
+    else:
+        filas = (
+            (nombre, area, descripcion, _si_no(activa))
+            for nombre, area, descripcion, activa in subareas_qs.values_list(
+                'nombre', 'area__nombre', 'descripcion', 'activa'
+            ).iterator(chunk_size=TAMANO_CURSOR)
+        )
+    catalogos = {
+        'CAT_Areas': (['Area'], [(area.nombre,) for area in obtener_catalogos().areas_activas]),
+        'CAT_Activa': (['Activa'], [('Sí',), ('No',)]),
+    }
+    validaciones = {'Area': 'CAT_Areas', 'Activa': 'CAT_Activa'}
+
+    with abrir_libro(destino) as libro:
+        return escribir_libro(libro, 'Areas', COLUMNAS_SUBAREAS, filas, catalogos, validaciones)
+
+
+# ================== ROSTER ==================
+
+COLUMNAS_FIJAS_ROSTER = [
+    columna('DNI', Personal, 'nro_doc', texto=True),
+    columna('ApellidosNombres', ancho=40),
+    columna('SubArea', ancho=30),
+    columna('DiasLibresCorte2025', ancho=8),
+]
+
+
+def columnas_roster(dias_en_mes):
+    """Columnas de la hoja matricial: datos fijos + Dia01..DiaNN."""
+    return COLUMNAS_FIJAS_ROSTER + [
+        columna(f'Dia{dia:02d}', ancho=3) for dia in range(1, dias_en_mes + 1)
+    ]
+
+
+def filas_roster(personal_qs, primer_dia, ultimo_dia):
+    """
+    Genera las filas matriciales de un mes combinando dos cursores ordenados igual.
+
+    El personal y sus celdas de roster se recorren en paralelo ordenados por
+    (apellidos_nombres, id), de modo que nunca se materializa el mes completo.
+    """
+    dias_en_mes = (ultimo_dia - primer_dia).days + 1
+    personas = personal_qs.order_by('apellidos_nombres', 'pk').values_list(
+        'pk', 'nro_doc', 'apellidos_nombres', 'subarea__nombre', 'dias_libres_corte_2025'
+    ).iterator(chunk_size=TAMANO_CURSOR)
+    celdas = Roster.objects.filter(
+        personal__in=personal_qs.values('pk'),
+        fecha__gte=primer_dia,
+        fecha__lte=ultimo_dia
+    ).order_by('personal__apellidos_nombres', 'personal_id', 'fecha').values_list(
+        'personal_id', 'fecha', 'codigo'
+    ).iterator(chunk_size=TAMANO_CURSOR)
+
+    grupos = groupby(celdas, key=itemgetter(0))
+    grupo = next(grupos, None)
+    for pk, nro_doc, nombre, subarea, dias_corte in personas:
+        codigos = [''] * dias_en_mes
+        while grupo is not None and grupo[0] == pk:
+            for _, fecha, codigo in grupo[1]:
+                codigos[fecha.day - 1] = codigo
+            grupo = next(grupos, None)
+        yield [nro_doc, nombre, subarea or '', float(dias_corte)] + codigos
+
+
+def catalogos_roster():
+    """Hojas de catálogo de códigos del roster."""
+    return {
+        'CAT_Codigos': (['Codigo'], [(codigo,) for codigo, _ in CODIGOS_ROSTER]),
+        'CAT_Descripcion': (['Codigo', 'Descripcion'], CODIGOS_ROSTER),
+    }
+
+
+def exportar_roster(destino, mes, anio, personal_qs):
+    """
+    Exporta el roster matricial de un mes con lista desplegable de códigos en cada día.
+
+    Returns:
+        int: Número de personas exportadas
+    """
+    dias_en_mes = monthrange(anio, mes)[1]
+    primer_dia = date(anio, mes, 1)
+    ultimo_dia = date(anio, mes, dias_en_mes)
+    columnas = columnas_roster(dias_en_mes)
+    inicio_dias = len(COLUMNAS_FIJAS_ROSTER)
+    validaciones = {(inicio_dias, len(columnas) - 1): 'CAT_Codigos'}
+
+    with abrir_libro(destino) as libro:
+        total = escribir_libro(
+            libro, 'Roster', columnas, filas_roster(personal_qs, primer_dia, ultimo_dia),
+            catalogos_roster(), validaciones
+        )
+    logger.info(f"Excel de roster {anio}-{mes:02d} exportado: {total} personas")
+    return total
+
+
+NOMBRES_MESES = [
+    'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio', 'Agosto',
+    'Septiembre', 'Octubre', 'Noviembre', 'Diciembre',
+]
+
+# Límite de meses por archivo en la exportación por rango
+MAX_MESES_RANGO = 24
+
+
+def meses_rango(desde, hasta):
+    """Lista de (anio, mes) entre dos fechas (se usa solo año y mes de cada una)."""
+    meses = []
+    anio, mes = desde.year, desde.month
+    while (anio, mes) <= (hasta.year, hasta.month):
+        meses.append((anio, mes))
+        anio, mes = (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+    return meses
+
+
+def _limites_rango(desde, hasta):
+    ultimo_anio, ultimo_mes = meses_rango(desde, hasta)[-1]
+    return date(desde.year, desde.month, 1), date(ultimo_anio, ultimo_mes, monthrange(ultimo_anio, ultimo_mes)[1])
+
+
+def filas_resumen_roster(personal_qs, primer_dia, ultimo_dia):
+    """
+    Totales por persona y código del rango, calculados con un GROUP BY en la BD.
+
+    Returns:
+        (codigos, filas): códigos presentes en el rango y filas
+        [DNI, Nombre, total_codigo..., total]
+    """
+    from .reportes import pivot_codigos
+
+    celdas = Roster.objects.filter(
+        personal__in=personal_qs.values('pk'),
+        fecha__gte=primer_dia,
+        fecha__lte=ultimo_dia
+    )
+    return pivot_codigos(celdas, ['personal__nro_doc', 'personal__apellidos_nombres'])
+
+
+def exportar_roster_rango(destino, desde, hasta, personal_qs):
+    """
+    Exporta varios meses de roster en un solo libro: una hoja por mes y un resumen.
+
+    Cada hoja mensual se genera de forma perezosa desde su propio cursor al
+    momento de escribirla; las hojas de catálogo se escriben una sola vez al
+    final y todas las hojas mensuales las referencian en sus validaciones.
+
+    Args:
+        destino: Ruta o archivo binario donde escribir el .xlsx
+        desde: Fecha del primer mes del rango
+        hasta: Fecha del último mes del rango
+        personal_qs: QuerySet del personal a exportar
+
+    Returns:
+        int: Número de hojas mensuales escritas
+    """
+    meses = meses_rango(desde, hasta)
+    if not meses:
+        raise ValueError('El mes inicial debe ser anterior o igual al mes final')
+    if len(meses) > MAX_MESES_RANGO:
+        raise ValueError(f'El rango no puede superar {MAX_MESES_RANGO} meses')
+
+    catalogos = {hoja: (titulos, list(filas)) for hoja, (titulos, filas) in catalogos_roster().items()}
+    filas_codigos = len(catalogos['CAT_Codigos'][1])
+    inicio_dias = len(COLUMNAS_FIJAS_ROSTER)
+
+    with abrir_libro(destino) as libro:
+        codigos, filas_resumen = filas_resumen_roster(personal_qs, *_limites_rango(desde, hasta))
+        columnas_resumen = COLUMNAS_FIJAS_ROSTER[:2] + [
+            columna(codigo, ancho=5) for codigo in codigos
+        ] + [columna('Total', ancho=5)]
+        escribir_hoja(libro, 'Resumen', columnas_resumen, filas_resumen)
+
+        for anio, mes in meses:
+            dias_en_mes = monthrange(anio, mes)[1]
+            columnas = columnas_roster(dias_en_mes)
+            escribir_hoja(
+                libro,
+                f'{NOMBRES_MESES[mes - 1]} {anio}',
+                columnas,
+                filas_roster(personal_qs, date(anio, mes, 1), date(anio, mes, dias_en_mes)),
+                {(inicio_dias, len(columnas) - 1): ('CAT_Codigos', filas_codigos)}
+            )
+
+        for hoja, (titulos, filas) in catalogos.items():
+            escribir_catalogo(libro, hoja, titulos, filas)
+
+    logger.info(f"Excel de roster {desde:%Y-%m} a {hasta:%Y-%m} exportado: {len(meses)} meses")
+    return len(meses)
+
+
+# ================== RESPUESTA HTTP ==================
+
+def respuesta_xlsx(exportador, nombre_archivo, *args, **kwargs):
+    """
+    Genera un .xlsx en un archivo temporal y lo sirve por bloques con FileResponse.
+
+    Args:
+        exportador: Función exportar_* que recibe el destino como primer argumento
+        nombre_archivo: Nombre de descarga
+        *args, **kwargs: Argumentos adicionales del exportador
+    """
+    archivo = tempfile.TemporaryFile(suffix='.xlsx')
+    try:
+        exportador(archivo, *args, **kwargs)
+    except Exception:
+        archivo.close()
+        raise
+    archivo.seek(0)
+    return FileResponse(
+        archivo, as_attachment=True, filename=nombre_archivo, content_type=CONTENT_TYPE_XLSX
+    )
+
+
+# ================== CACHÉ DE ARCHIVOS GENERADOS ==================
+#
+# Los archivos se guardan en EXPORTACIONES_DIR con nombre
+# {tipo}-{periodo}-{alcance}-{version}.xlsx, donde `version` es un hash de
+# conteos y última modificación de los datos exportados. Si los datos no
+# cambiaron, las descargas repetidas sirven el mismo archivo desde disco.
+
+
+def firma_consulta(queryset, campo='actualizado_en'):
+    """Conteo y última modificación de un queryset (None para plantillas vacías)."""
+    if queryset is None:
+        return None
+    return tuple(queryset.aggregate(total=Count('pk'), ultimo=Max(campo)).values())
+
+
+def hash_version(*partes, longitud=8):
+    return hashlib.blake2b(repr(partes).encode(), digest_size=longitud).hexdigest()
+
+
+def version_personal(personal_qs=None):
+    return hash_version(firma_consulta(personal_qs), firma_consulta(SubArea.objects.all()))
+
+
+def version_gerencias(areas_qs=None):
+    responsables = None
+    if areas_qs is not None:
+        # Los pares completos: un conteo o una suma no distinguen un intercambio de responsables
+        responsables = hash_version(*Area.responsables.through.objects.filter(area__in=areas_qs).order_by(
+            'area_id', 'personal_id'
+        ).values_list('area_id', 'personal_id'))
+    return hash_version(
+        firma_consulta(areas_qs), responsables, firma_consulta(Personal.objects.filter(estado='Activo'))
+    )
+
+
+def version_subareas(subareas_qs=None):
+    return hash_version(firma_consulta(subareas_qs), firma_consulta(Area.objects.all()))
+
+
+def version_roster_rango(desde, hasta, personal_qs):
+    primer_dia, ultimo_dia = _limites_rango(desde, hasta)
+    celdas = Roster.objects.filter(
+        personal__in=personal_qs.values('pk'), fecha__gte=primer_dia, fecha__lte=ultimo_dia
+    )
+    return hash_version(
+        firma_consulta(personal_qs), firma_consulta(celdas), firma_consulta(SubArea.objects.all())
+    )
+
+
+def version_roster(mes, anio, personal_qs):
+    return version_roster_rango(date(anio, mes, 1), date(anio, mes, 1), personal_qs)
+
+
+# Tipo de exportación -> (exportador, cálculo de versión); ambos reciben los mismos argumentos
+EXPORTACIONES = {
+    'personal': (exportar_personal, version_personal),
+    'gerencias': (exportar_gerencias, version_gerencias),
+    'subareas': (exportar_subareas, version_subareas),
+    'roster': (exportar_roster, version_roster),
+    'roster_rango': (exportar_roster_rango, version_roster_rango),
+}
+
+
+def registrar_exportacion(tipo, exportador, calcular_version):
+    """Agrega un tipo de exportación cacheable (usado por módulos como reportes)."""
+    EXPORTACIONES[tipo] = (exportador, calcular_version)
+
+
+def directorio_exportaciones():
+    directorio = str(getattr(settings, 'EXPORTACIONES_DIR', os.path.join(settings.MEDIA_ROOT, 'exportaciones')))
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def obtener_exportacion(tipo, alcance, periodo, *args, abrir=False):
+    """
+    Retorna la ruta del archivo exportado, generándolo solo si los datos cambiaron.
+
+    Otro request puede eliminar el archivo (versión anterior o depuración LRU)
+    en cualquier momento. Con abrir=True el archivo se abre aquí mismo: uno ya
+    abierto sigue siendo legible aunque se elimine, y si desaparece antes de
+    abrirlo se trata como un fallo de caché.
+
+    Args:
+        tipo: Clave de EXPORTACIONES ('personal', 'gerencias', 'subareas', 'roster')
+        alcance: Identificador del alcance de datos (ver permissions.clave_alcance)
+        periodo: Período exportado ('2026-03') o '' si no aplica
+        *args: Argumentos del exportador (sin el destino)
+        abrir: Si es True retorna el archivo abierto en modo 'rb' en lugar de la ruta
+
+    Returns:
+        str: Ruta del archivo .xlsx en disco (o el archivo abierto con abrir=True)
+    """
+    exportador, calcular_version = EXPORTACIONES[tipo]
+    directorio = directorio_exportaciones()
+    prefijo = f'{tipo}-{periodo or "actual"}-{hash_version(alcance, longitud=6)}-'
+    ruta = os.path.join(directorio, f'{prefijo}{calcular_version(*args)}.xlsx')
+
+    archivo = None
+    try:
+        if abrir:
+            archivo = open(ruta, 'rb')
+        # Marcar como usado recientemente para la política LRU
+        os.utime(ruta)
+        en_cache = True
+    except FileNotFoundError:
+        # Si ya se abrió, sigue siendo legible aunque otro request lo haya eliminado
+        en_cache = archivo is not None
+    if en_cache:
+        logger.info(f"Exportación servida desde caché: {os.path.basename(ruta)}")
+        return archivo if abrir else ruta
+
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as destino:
+            exportador(destino, *args)
+        # Se abre antes de publicarlo, así la depuración no puede quitarlo entre medio
+        archivo = open(temporal, 'rb') if abrir else None
+        os.replace(temporal, ruta)
+    except Exception:
+        if archivo:
+            archivo.close()
+        os.unlink(temporal)
+        raise
+
+    # Las versiones anteriores del mismo archivo ya no se volverán a pedir
+    for nombre in os.listdir(directorio):
+        if nombre.startswith(prefijo) and nombre != os.path.basename(ruta):
+            _eliminar(os.path.join(directorio, nombre))
+    depurar_exportaciones()
+    return archivo if abrir else ruta
+
+
+def _eliminar(ruta):
+    try:
+        os.unlink(ruta)
+    except FileNotFoundError:
+        pass
+
+
+def depurar_exportaciones(max_bytes=None):
+    """
+    Elimina los archivos usados menos recientemente hasta quedar bajo el presupuesto.
+
+    Args:
+        max_bytes: Tamaño máximo de la caché (por defecto EXPORTACIONES_MAX_BYTES)
+
+    Returns:
+        int: Número de archivos eliminados
+    """
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'EXPORTACIONES_MAX_BYTES', 512 * 1024 * 1024)
+    directorio = directorio_exportaciones()
+
+    archivos = []
+    for entrada in os.scandir(directorio):
+        if entrada.is_file() and entrada.name.endswith('.xlsx'):
+            estado = entrada.stat()
+            archivos.append((estado.st_mtime, estado.st_size, entrada.path))
+    total = sum(tamano for _, tamano, _ in archivos)
+
+    eliminados = 0
+    for _, tamano, ruta in sorted(archivos):
+        if total <= max_bytes:
+            break
+        _eliminar(ruta)
+        total -= tamano
+        eliminados += 1
+    if eliminados:
+        logger.info(f"Caché de exportaciones depurada: {eliminados} archivos eliminados")
+    return eliminados
+
+
+def respuesta_exportacion(tipo, alcance, periodo, nombre_archivo, *args):
+    """Sirve una exportación desde la caché en disco (generándola si hace falta)."""
+    archivo = obtener_exportacion(tipo, alcance, periodo, *args, abrir=True)
+    return FileResponse(archivo, as_attachment=True, filename=nombre_archivo, content_type=CONTENT_TYPE_XLSX)
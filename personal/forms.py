@@ -5,9 +5,25 @@ from django import forms
 from django.contrib.admin.widgets import FilteredSelectMultiple
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Submit, Row, Column, Div
+from .catalogos import obtener_catalogos
 from .models import Area, SubArea, Personal, Roster
 
 
+def opciones_catalogo(campo, elementos, etiqueta):
+    """
+    Carga las opciones de un ModelChoiceField desde la instantánea de catálogos.
+
+    El queryset del campo se mantiene para validar el valor enviado; solo el
+    renderizado deja de consultar la BD.
+    """
+    opciones = [('', campo.empty_label)] if campo.empty_label is not None else []
+    campo.choices = opciones + [(elemento.id, etiqueta(elemento)) for elemento in elementos]
+
+
+def etiqueta_subarea(subarea):
+    return f"{subarea.area.nombre} - {subarea.nombre}"
+
+
 class AreaForm(forms.ModelForm):
     class Meta:
         model = Area
@@ -35,13 +51,14 @@ class AreaForm(forms.ModelForm):
 class SubAreaForm(forms.ModelForm):
     class Meta:
         model = SubArea
-        fields = ['nombre', 'area', 'descripcion', 'activa']
+        fields = ['nombre', 'area', 'descripcion', 'activa', 'dotacion_minima']
         widgets = {
             'descripcion': forms.Textarea(attrs={'rows': 3}),
         }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        opciones_catalogo(self.fields['area'], obtener_catalogos().areas, lambda area: area.nombre)
         self.helper = FormHelper()
         self.helper.form_method = 'post'
         self.helper.add_input(Submit('submit', 'Guardar', css_class='btn btn-primary'))
@@ -74,6 +91,7 @@ class PersonalForm(forms.ModelForm):
                 self.initial['fecha_cese'] = self.instance.fecha_cese.strftime('%Y-%m-%d')
             if self.instance.fecha_nacimiento:
                 self.initial['fecha_nacimiento'] = self.instance.fecha_nacimiento.strftime('%Y-%m-%d')
+        opciones_catalogo(self.fields['subarea'], obtener_catalogos().subareas, etiqueta_subarea)
         
         self.helper = FormHelper()
         self.helper.form_method = 'post'
@@ -113,6 +131,14 @@ class PersonalForm(forms.ModelForm):
             ),
             Submit('submit', 'Guardar', css_class='btn btn-primary')
         )
+    
+    def limitar_subareas(self, areas):
+        """Restringe las subáreas elegibles a las de las áreas indicadas (responsables)."""
+        area_ids = list(areas.values_list('pk', flat=True))
+        self.fields['subarea'].queryset = SubArea.objects.filter(area_id__in=area_ids)
+        opciones_catalogo(
+            self.fields['subarea'], obtener_catalogos().subareas_de(area_ids, solo_activas=False), etiqueta_subarea
+        )
 
 
 class RosterForm(forms.ModelForm):
@@ -134,9 +160,15 @@ class RosterForm(forms.ModelForm):
 class ImportExcelForm(forms.Form):
     """Formulario para importación de archivos Excel."""
     archivo = forms.FileField(
-        label='Archivo Excel',
-        help_text='Selecciona un archivo .xlsx o .xls',
-        widget=forms.FileInput(attrs={'accept': '.xlsx,.xls'})
+        label='Archivo',
+        help_text='Selecciona un archivo Excel (.xlsx, .xls), CSV (.csv) o Parquet (.parquet)',
+        widget=forms.FileInput(attrs={'accept': '.xlsx,.xls,.csv,.parquet'})
+    )
+    reprocesar = forms.BooleanField(
+        label='Reprocesar todas las filas',
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        help_text='Por defecto se omiten las filas que no cambiaron desde la última importación'
     )
     
     def __init__(self, *args, **kwargs):
@@ -0,0 +1,188 @@
+"""
+Reconstrucción del roster en un momento pasado ("as of").
+
+Periódicamente se toman instantáneas (InstantaneaRoster) del mes completo de
+cada persona con cambios desde la instantánea anterior. Para ver el roster
+tal como estaba en un momento dado se parte de la instantánea más reciente
+anterior a ese momento y se reproducen solo las auditorías posteriores,
+leídas por el índice (personal, fecha, creado_en). Un mes de un área se
+reconstruye con un número acotado de consultas, sin recorrer todo el
+historial de auditoría.
+"""
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date
+from functools import reduce
+import logging
+from operator import or_
+
+from django.db.models import Max, OuterRef, Q, Subquery
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .archivo_auditoria import leer_segmento, segmentos_para
+from .auditoria import CAMPOS_AUDITADOS, CAMPO_REGISTRO, VALORES_INICIALES
+from .models import Personal, Roster, RosterAudit, InstantaneaRoster
+
+logger = logging.getLogger('personal.business')
+
+# Orden de los valores de cada celda en InstantaneaRoster.celdas
+CAMPOS_CELDA = ('codigo', 'estado', 'observaciones')
+
+TAMANO_LOTE_INSTANTANEAS = 500
+
+
+def _limites(anio, mes):
+    return date(anio, mes, 1), date(anio, mes, monthrange(anio, mes)[1])
+
+
+# ============================================================================
+# INSTANTÁNEAS
+# ============================================================================
+
+def tomar_instantaneas(ahora=None):
+    """
+    Toma instantáneas de los meses de cada persona con auditorías desde la
+    última ejecución. La primera ejecución toma la línea base de todo el roster.
+
+    Las personas cuyo mes quedó vacío reciben una instantánea sin celdas.
+
+    Returns:
+        dict: {'instantaneas': filas creadas, 'tomada_en': momento de la toma}
+    """
+    tomada_en = ahora or timezone.now()
+    ultima = InstantaneaRoster.objects.aggregate(ultima=Max('tomada_en'))['ultima']
+
+    pendientes = defaultdict(set)
+    if ultima is None:
+        celdas = Roster.objects.all()
+    else:
+        cambios = RosterAudit.objects.filter(creado_en__gt=ultima, creado_en__lte=tomada_en)
+        for personal_id, mes in cambios.annotate(mes=TruncMonth('fecha')).values_list(
+            'personal_id', 'mes'
+        ).distinct().order_by():
+            pendientes[(mes.year, mes.month)].add(personal_id)
+        if not pendientes:
+            return {'instantaneas': 0, 'tomada_en': tomada_en}
+        celdas = Roster.objects.filter(reduce(or_, (
+            Q(fecha__range=_limites(anio, mes), personal_id__in=personas)
+            for (anio, mes), personas in pendientes.items()
+        )))
+
+    por_mes = defaultdict(dict)
+    for personal_id, fecha, *valores in celdas.values_list('personal_id', 'fecha', *CAMPOS_CELDA).order_by().iterator(
+        chunk_size=5000
+    ):
+        por_mes[(personal_id, f'{fecha.year}-{fecha.month:02d}')][str(fecha.day)] = valores
+    for (anio, mes), personas in pendientes.items():
+        for personal_id in personas:
+            por_mes.setdefault((personal_id, f'{anio}-{mes:02d}'), {})
+
+    InstantaneaRoster.objects.bulk_create(
+        [
+            InstantaneaRoster(personal_id=personal_id, periodo=periodo, tomada_en=tomada_en, celdas=celdas_mes)
+            for (personal_id, periodo), celdas_mes in por_mes.items()
+        ],
+        batch_size=TAMANO_LOTE_INSTANTANEAS
+    )
+    logger.info(f"Instantáneas de roster tomadas: {len(por_mes)} ({'incremental' if ultima else 'línea base'})")
+    return {'instantaneas': len(por_mes), 'tomada_en': tomada_en}
+
+
+# ============================================================================
+# RECONSTRUCCIÓN
+# ============================================================================
+
+def _aplicar(celdas, fecha, campo, valor_anterior, valor_nuevo):
+    """Aplica una entrada de auditoría al estado {fecha: {campo: valor}} de una persona."""
+    if campo == CAMPO_REGISTRO:
+        celdas.pop(fecha, None)
+        return
+    if campo not in CAMPOS_AUDITADOS:
+        return
+    celda = celdas.get(fecha)
+    if celda is None:
+        # Solo el alta (valor anterior vacío) crea la celda; p. ej. el motivo
+        # de un rechazo se audita después de eliminarla
+        if valor_anterior != '':
+            return
+        celda = celdas[fecha] = dict(VALORES_INICIALES)
+    celda[campo] = valor_nuevo
+
+
+def roster_en(momento, anio, mes, personal=None, area=None):
+    """
+    Roster de un mes tal como estaba en `momento`.
+
+    Args:
+        momento: datetime consultado
+        anio, mes: Mes del roster
+        personal: Persona (instancia o id) a reconstruir
+        area: Área (instancia o id) cuyo personal actual se reconstruye
+
+    Returns:
+        dict: {personal_id: {fecha: {'codigo', 'estado', 'observaciones'}}} (solo celdas existentes)
+    """
+    if personal is None and area is None:
+        raise ValueError('Debe indicar personal o área')
+    periodo = f'{anio}-{mes:02d}'
+    inicio, fin = _limites(anio, mes)
+    if personal is not None:
+        filtro = {'personal_id': getattr(personal, 'pk', personal)}
+    else:
+        filtro = {'personal__subarea__area_id': getattr(area, 'pk', area)}
+
+    # 1. Instantánea más reciente de cada persona anterior al momento
+    previas = InstantaneaRoster.objects.filter(
+        personal_id=OuterRef('personal_id'), periodo=periodo, tomada_en__lte=momento
+    ).order_by('-tomada_en').values('tomada_en')[:1]
+    estado = defaultdict(dict)
+    base = {}
+    for personal_id, tomada_en, celdas in InstantaneaRoster.objects.filter(
+        periodo=periodo, tomada_en=Subquery(previas), **filtro
+    ).values_list('personal_id', 'tomada_en', 'celdas'):
+        base[personal_id] = tomada_en
+        estado[personal_id] = {
+            date(anio, mes, int(dia)): dict(zip(CAMPOS_CELDA, valores, strict=True)) for dia, valores in celdas.items()
+        }
+
+    # 2. Auditorías posteriores. Quien no tiene instantánea no tuvo cambios
+    # antes de la más antigua de las demás (cada toma incluye a todos los que
+    # cambiaron), así que ese límite también le sirve.
+    desde = min(base.values()) if base else None
+    auditorias = RosterAudit.objects.filter(fecha__range=(inicio, fin), creado_en__lte=momento, **filtro)
+    if desde is not None:
+        auditorias = auditorias.filter(creado_en__gt=desde)
+    entradas = list(auditorias.order_by('creado_en', 'id').values_list(
+        'personal_id', 'fecha', 'campo_modificado', 'valor_anterior', 'valor_nuevo', 'creado_en', 'id'
+    ))
+
+    # 3. Auditorías ya retiradas al archivo histórico
+    segmentos = segmentos_para(
+        filtro.get('personal_id'), fecha_desde=inicio, fecha_hasta=fin
+    ).filter(auditado_desde__lte=momento)
+    if desde is not None:
+        segmentos = segmentos.filter(auditado_hasta__gt=desde)
+    segmentos = list(segmentos)
+    if segmentos:
+        if personal is not None:
+            personas = {filtro['personal_id']}
+        else:
+            personas = set(Personal.objects.filter(
+                subarea__area_id=filtro['personal__subarea__area_id']
+            ).values_list('pk', flat=True))
+        archivadas = [
+            (r['personal_id'], r['fecha'], r['campo_modificado'], r['valor_anterior'], r['valor_nuevo'],
+             r['creado_en'], r['id'])
+            for segmento in segmentos for r in leer_segmento(segmento)
+            if r['personal_id'] in personas and inicio <= r['fecha'] <= fin and r['creado_en'] <= momento
+        ]
+        entradas = sorted(archivadas + entradas, key=lambda entrada: (entrada[5], entrada[6]))
+
+    for personal_id, fecha, campo, valor_anterior, valor_nuevo, creado_en, _ in entradas:
+        tomada_en = base.get(personal_id)
+        if tomada_en is not None and creado_en <= tomada_en:
+            continue
+        _aplicar(estado[personal_id], fecha, campo, valor_anterior, valor_nuevo)
+
+    return {personal_id: celdas for personal_id, celdas in estado.items() if celdas}
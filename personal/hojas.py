@@ -0,0 +1,110 @@
+"""
+Lectura de libros Excel con varias hojas mensuales de Roster.
+
+El parseo de openpyxl es CPU-bound y no libera el GIL, así que cada hoja se
+lee en un proceso independiente. Este módulo no importa Django para que los
+procesos hijos puedan cargarlo con cualquier método de arranque (fork/spawn).
+"""
+from concurrent.futures import ProcessPoolExecutor
+import io
+import os
+import re
+import unicodedata
+
+import pandas as pd
+
+MESES = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6,
+    'julio': 7, 'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10,
+    'noviembre': 11, 'diciembre': 12,
+}
+
+# Palabras que pueden acompañar al mes en el nombre de la hoja ("Roster 03", "Mes Marzo")
+PALABRAS_PERMITIDAS = {'roster', 'mes'}
+
+
+def _normalizar_nombre(nombre):
+    texto = unicodedata.normalize('NFKD', str(nombre)).encode('ascii', 'ignore').decode()
+    return re.findall(r'[a-z]+|\d+', texto.lower())
+
+
+def mes_de_hoja(nombre, anio=None):
+    """
+    Obtiene el mes de una hoja a partir de su nombre.
+
+    Acepta nombres como 'Enero', 'MAR', 'Setiembre 2026', 'Roster_03', '2026-03'.
+    Si el nombre incluye un año distinto de `anio` la hoja se ignora.
+
+    Returns:
+        int del mes (1-12) o None si la hoja no es mensual
+    """
+    mes = None
+    for token in _normalizar_nombre(nombre):
+        if token.isdigit():
+            if len(token) == 4:
+                if anio is not None and int(token) != anio:
+                    return None
+            elif len(token) <= 2 and 1 <= int(token) <= 12 and mes is None:
+                mes = int(token)
+            else:
+                return None
+        elif token in PALABRAS_PERMITIDAS:
+            continue
+        else:
+            coincidencias = {
+                numero for completo, numero in MESES.items()
+                if len(token) >= 3 and completo.startswith(token)
+            }
+            if len(coincidencias) != 1:
+                return None
+            mes = coincidencias.pop()
+    return mes
+
+
+def detectar_hojas_mes(nombres_hojas, anio=None):
+    """
+    Detecta las hojas mensuales de un libro.
+
+    Returns:
+        dict {mes: nombre_hoja} ordenado por mes
+
+    Raises:
+        ValueError: Si dos hojas corresponden al mismo mes
+    """
+    hojas = {}
+    for nombre in nombres_hojas:
+        mes = mes_de_hoja(nombre, anio)
+        if mes is None:
+            continue
+        if mes in hojas:
+            raise ValueError(f"Las hojas '{hojas[mes]}' y '{nombre}' corresponden al mismo mes")
+        hojas[mes] = nombre
+    return dict(sorted(hojas.items()))
+
+
+def leer_hoja(contenido, hoja, dtype=None):
+    """Lee una hoja del libro en memoria. Se ejecuta dentro de los procesos hijos."""
+    return pd.read_excel(io.BytesIO(contenido), sheet_name=hoja, dtype=dtype)
+
+
+def leer_hojas(contenido, hojas, dtype=None, max_procesos=None):
+    """
+    Lee varias hojas de un libro Excel en paralelo.
+
+    Args:
+        contenido: Bytes del archivo .xlsx
+        hojas: Nombres de las hojas a leer
+        dtype: Dict {columna: str} para columnas que deben leerse como texto
+        max_procesos: Límite de procesos (por defecto uno por CPU)
+
+    Returns:
+        list de DataFrames en el mismo orden que `hojas`
+    """
+    hojas = list(hojas)
+    procesos = min(len(hojas), max_procesos or os.cpu_count() or 1)
+    if procesos <= 1:
+        return [leer_hoja(contenido, hoja, dtype) for hoja in hojas]
+
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        futuros = [ejecutor.submit(leer_hoja, contenido, hoja, dtype) for hoja in hojas]
+        return [futuro.result() for futuro in futuros]
@@ -0,0 +1,1017 @@
+"""
+Motor de importación columnar para cargas masivas desde Excel.
+
+Cada columna se limpia una sola vez con operaciones vectorizadas de pandas,
+los catálogos se resuelven con un único diccionario y la escritura se hace
+con bulk_create/bulk_update por lotes.
+"""
+from datetime import date
+from decimal import Decimal, InvalidOperation
+import hashlib
+import io
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+import pandas as pd
+import os
+import re
+
+from .auditoria import actuando_como, asignar_lote, auditorias_de_cambio, en_lote, encolar_auditorias
+from .catalogos import invalidar_catalogos
+from .cobertura import DeltasCobertura, mover_personal as mover_cobertura
+from .contadores import DeltasContadores, mover_personas
+from .hojas import detectar_hojas_mes, leer_hojas
+from .models import Area, SubArea, Personal, Roster, RosterAudit, HuellaImportacion
+from .permissions import filtrar_personal
+from .saldos import ControlSaldos
+from .validators import RosterValidator
+
+logger = logging.getLogger('personal.business')
+
+TAMANO_LOTE = 500
+
+# Filas por bloque al leer CSV (acota la memoria temporal del parser)
+TAMANO_BLOQUE_CSV = 50_000
+
+# Columna Excel -> (campo del modelo, valor por defecto)
+COLUMNAS_TEXTO_PERSONAL = {
+    'ApellidosNombres': ('apellidos_nombres', ''),
+    'TipoDoc': ('tipo_doc', 'DNI'),
+    'CodigoFotocheck': ('codigo_fotocheck', ''),
+    'Cargo': ('cargo', ''),
+    'TipoTrabajador': ('tipo_trab', 'Empleado'),
+    'Estado': ('estado', 'Activo'),
+    'Sexo': ('sexo', ''),
+    'Celular': ('celular', ''),
+    'CorreoPersonal': ('correo_personal', ''),
+    'CorreoCorporativo': ('correo_corporativo', ''),
+    'Direccion': ('direccion', ''),
+    'Ubigeo': ('ubigeo', ''),
+    'RegimenLaboral': ('regimen_laboral', ''),
+    'RegimenTurno': ('regimen_turno', ''),
+    'Observaciones': ('observaciones', ''),
+}
+
+# Columnas opcionales: solo se escriben si la celda trae un valor válido
+COLUMNAS_FECHA_PERSONAL = {
+    'FechaAlta': 'fecha_alta',
+    'FechaCese': 'fecha_cese',
+    'FechaNacimiento': 'fecha_nacimiento',
+}
+
+COLUMNAS_DECIMAL_PERSONAL = {
+    'DiasLibresCorte2025': 'dias_libres_corte_2025',
+}
+
+
+def _leer_csv(archivo, dtype):
+    """Lee un CSV por bloques detectando ';' o ',' como separador en la cabecera."""
+    cabecera = archivo.readline()
+    if isinstance(cabecera, bytes):
+        cabecera = cabecera.decode('utf-8-sig', errors='ignore')
+    archivo.seek(0)
+    separador = ';' if cabecera.count(';') > cabecera.count(',') else ','
+
+    bloques = pd.read_csv(
+        archivo, sep=separador, dtype=dtype, encoding='utf-8-sig',
+        chunksize=TAMANO_BLOQUE_CSV
+    )
+    return pd.concat(bloques, ignore_index=True)
+
+
+def _leer_parquet(archivo, dtype):
+    """Lee un Parquet/Arrow con pyarrow y lo convierte a pandas sin copias extra."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValidationError('Para importar archivos Parquet debe instalarse pyarrow.') from None
+
+    tabla = pq.read_table(archivo)
+    df = tabla.to_pandas(split_blocks=True, self_destruct=True)
+    del tabla
+    for columna in dtype or {}:
+        if columna in df:
+            df[columna] = df[columna].astype(object).where(df[columna].notna(), None).map(
+                lambda valor: None if valor is None else str(valor)
+            )
+    return df
+
+
+def leer_tabla(archivo, hoja, dtype=None):
+    """
+    Lee un archivo de importación como DataFrame según su extensión.
+
+    Excel usa la hoja indicada; CSV y Parquet contienen una sola tabla con el
+    mismo esquema de columnas que esa hoja.
+
+    Args:
+        archivo: Archivo subido (UploadedFile) o ruta
+        hoja: Nombre de la hoja Excel a leer
+        dtype: Dict {columna: str} para columnas que deben leerse como texto
+
+    Returns:
+        DataFrame con las columnas del archivo
+    """
+    nombre = getattr(archivo, 'name', str(archivo))
+    extension = os.path.splitext(nombre)[1].lower()
+
+    if extension == '.csv':
+        return _leer_csv(archivo, dtype)
+    if extension == '.parquet':
+        return _leer_parquet(archivo, dtype)
+    return pd.read_excel(archivo, sheet_name=hoja, dtype=dtype)
+
+
+def normalizar_documentos(serie):
+    """
+    Normaliza una columna de números de documento preservando ceros a la izquierda.
+
+    Los valores leídos como número (ej. 12345678.0) pierden el sufijo decimal y
+    las celdas vacías quedan como NA.
+    """
+    docs = serie.astype('string').str.strip().str.replace(r'\.0$', '', regex=True)
+    return docs.mask(docs.isin(['', 'nan', 'None']))
+
+
+def limpiar_texto(serie, defecto=''):
+    """Convierte una columna a texto sin espacios, reemplazando vacíos por el defecto."""
+    return serie.where(serie.notna(), defecto).astype(str).str.strip()
+
+
+def limpiar_booleanos(serie, defecto=True):
+    """Convierte una columna Sí/No a booleanos; las celdas vacías toman el defecto."""
+    valores = serie.astype('string').str.strip().str.lower()
+    return valores.isin(['sí', 'si', 'yes', '1', 'true']).where(serie.notna(), defecto).astype(bool)
+
+
+def separar_documentos(serie):
+    """Separa una columna de DNIs delimitados por ';' o ',' en listas normalizadas."""
+    def separar(valor):
+        if valor is None or valor is pd.NA:
+            return []
+        return [
+            re.sub(r'\.0$', '', dni.strip())
+            for dni in re.split(r'[;,]', str(valor)) if dni.strip()
+        ]
+
+    return serie.astype(object).where(serie.notna(), None).map(separar)
+
+
+def limpiar_fechas(serie):
+    """Convierte una columna a fechas (date) con None donde no haya fecha válida."""
+    fechas = pd.to_datetime(serie, errors='coerce', format='mixed')
+    return fechas.dt.date.astype(object).where(fechas.notna(), None)
+
+
+def limpiar_decimales(serie):
+    """Convierte una columna a Decimal con None donde no haya número válido."""
+    numeros = pd.to_numeric(serie, errors='coerce')
+
+    def a_decimal(valor):
+        try:
+            return Decimal(str(valor))
+        except (ValueError, TypeError, InvalidOperation):
+            return None
+
+    return numeros.astype(object).where(numeros.notna(), None).map(
+        lambda valor: None if valor is None else a_decimal(valor)
+    )
+
+
+def calcular_huellas(datos, columnas):
+    """
+    Calcula la huella (hash) de cada fila a partir de sus valores normalizados.
+
+    Returns:
+        Serie de hexdigests de 32 caracteres alineada con datos.index
+    """
+    if datos.empty:
+        return pd.Series(dtype=object, index=datos.index)
+    textos = datos[columnas].map(str).agg('\x1f'.join, axis=1)
+    return textos.map(
+        lambda texto: hashlib.blake2b(texto.encode('utf-8'), digest_size=16).hexdigest()
+    )
+
+
+def filtrar_sin_cambios(datos, tipo, fuente, clave='clave', huella='huella'):
+    """
+    Separa las filas cuya huella coincide con la guardada para la fuente.
+
+    Returns:
+        tuple: (filas con cambios, cantidad de filas sin cambios)
+    """
+    guardadas = dict(
+        HuellaImportacion.objects.filter(
+            tipo=tipo, fuente=fuente, clave__in=datos[clave].tolist()
+        ).values_list('clave', 'huella')
+    )
+    sin_cambios = datos[huella] == datos[clave].map(guardadas)
+    return datos[~sin_cambios], int(sin_cambios.sum())
+
+
+def guardar_huellas(tipo, fuente, huellas, tamano_lote=TAMANO_LOTE):
+    """Inserta o actualiza las huellas {clave: huella} de una fuente."""
+    if not huellas:
+        return
+    ahora = timezone.now()
+    HuellaImportacion.objects.bulk_create(
+        [
+            HuellaImportacion(tipo=tipo, fuente=fuente, clave=clave, huella=huella, actualizado_en=ahora)
+            for clave, huella in huellas.items()
+        ],
+        batch_size=tamano_lote,
+        update_conflicts=True,
+        unique_fields=['tipo', 'fuente', 'clave'],
+        update_fields=['huella', 'actualizado_en'],
+    )
+
+
+def invalidar_huellas(tipo, claves, fuente=None):
+    """
+    Elimina huellas para forzar que la próxima importación reprocese esas filas.
+
+    Se usa cuando el dato cambia por otra vía (formulario, edición de celda).
+    """
+    huellas = HuellaImportacion.objects.filter(tipo=tipo, clave__in=claves)
+    if fuente is not None:
+        huellas = huellas.filter(fuente=fuente)
+    huellas.delete()
+
+
+def _validar_longitudes(datos, modelo, campos, errores):
+    """
+    Descarta filas cuyo texto excede el max_length del campo.
+
+    Evita que un único valor inválido haga fallar el lote completo en BD.
+    """
+    invalidas = pd.Series(False, index=datos.index)
+    for campo in campos:
+        max_length = modelo._meta.get_field(campo).max_length
+        if not max_length:
+            continue
+        excedidas = datos[campo].str.len() > max_length
+        for fila in datos.loc[excedidas, '_fila']:
+            errores.append(f"Fila {fila}: {campo} excede {max_length} caracteres")
+        invalidas |= excedidas
+    return datos[~invalidas]
+
+
+def preparar_personal(df, errores):
+    """
+    Mapea y limpia las columnas de la hoja Personal a campos del modelo.
+
+    Args:
+        df: DataFrame leído de la hoja 'Personal'
+        errores: Lista donde se acumulan los mensajes de error
+
+    Returns:
+        DataFrame con una fila por nro_doc (la última aparición gana) y
+        columnas con los nombres de campo del modelo.
+    """
+    datos = pd.DataFrame({
+        '_fila': df.index + 2,
+        'nro_doc': normalizar_documentos(df['NroDoc']),
+    })
+
+    for columna, (campo, defecto) in COLUMNAS_TEXTO_PERSONAL.items():
+        datos[campo] = limpiar_texto(df[columna], defecto) if columna in df else defecto
+
+    for columna, campo in COLUMNAS_FECHA_PERSONAL.items():
+        if columna in df:
+            datos[campo] = limpiar_fechas(df[columna])
+
+    for columna, campo in COLUMNAS_DECIMAL_PERSONAL.items():
+        if columna in df:
+            datos[campo] = limpiar_decimales(df[columna])
+
+    # Resolver subáreas con una sola consulta. El nombre solo es único dentro de
+    # su área: con la columna Area se resuelve por (área, subárea) y sin ella los
+    # nombres repetidos en varias áreas se reportan como error en lugar de adivinar
+    datos['subarea_id'] = None
+    ambiguas = []
+    if 'SubArea' in df:
+        por_area = {}
+        por_nombre = {}
+        for area_nombre, nombre, subarea_id in SubArea.objects.values_list('area__nombre', 'nombre', 'id'):
+            por_area[(area_nombre, nombre)] = subarea_id
+            por_nombre.setdefault(nombre, []).append(subarea_id)
+        nombres = limpiar_texto(df['SubArea'])
+        areas = limpiar_texto(df['Area']) if 'Area' in df else pd.Series('', index=df.index)
+
+        ids = []
+        for fila, area_nombre, nombre in zip(datos['_fila'], areas, nombres, strict=True):
+            subarea_id = None
+            if area_nombre and nombre:
+                subarea_id = por_area.get((area_nombre, nombre))
+                if subarea_id is None:
+                    errores.append(f"Fila {fila}: SubÁrea '{nombre}' no encontrada en el área '{area_nombre}'")
+            elif len(por_nombre.get(nombre, [])) > 1:
+                ambiguas.append(fila)
+                errores.append(f"Fila {fila}: SubÁrea '{nombre}' existe en varias áreas; indique la columna Area")
+            elif nombre:
+                subarea_id = por_nombre[nombre][0] if nombre in por_nombre else None
+                if subarea_id is None:
+                    errores.append(f"Fila {fila}: SubÁrea '{nombre}' no encontrada")
+            ids.append(subarea_id)
+        datos['subarea_id'] = pd.Series(ids, index=datos.index, dtype=object)
+
+    # Las filas con subárea ambigua no se importan para no reasignar a nadie por error
+    datos = datos[~datos['_fila'].isin(ambiguas)]
+    datos = datos.dropna(subset=['nro_doc']).drop_duplicates('nro_doc', keep='last')
+    campos_texto = [campo for campo, _ in COLUMNAS_TEXTO_PERSONAL.values()] + ['nro_doc']
+    return _validar_longitudes(datos, Personal, campos_texto, errores)
+
+
+@transaction.atomic
+def importar_personal(df, usuario=None, fuente='Personal', forzar=False, tamano_lote=TAMANO_LOTE):
+    """
+    Importa personal desde un DataFrame usando nro_doc como clave.
+
+    Las filas cuya huella coincide con la de la importación anterior de la
+    misma fuente se omiten sin tocar la tabla Personal.
+
+    Args:
+        df: DataFrame leído de la hoja 'Personal'
+        usuario: Usuario que realiza la importación (para logging)
+        fuente: Origen lógico de la importación para las huellas
+        forzar: Si es True, reprocesa todas las filas aunque no hayan cambiado
+        tamano_lote: Registros por sentencia INSERT/UPDATE
+
+    Returns:
+        dict: Resultado con contadores y errores
+    """
+    logger.info(f"Iniciando importación columnar de personal por usuario {usuario}")
+
+    errores = []
+    datos = preparar_personal(df, errores)
+
+    columnas_huella = [col for col in datos.columns if col != '_fila']
+    datos['clave'] = datos['nro_doc']
+    datos['huella'] = calcular_huellas(datos, columnas_huella)
+    sin_cambios = 0
+    if not forzar:
+        datos, sin_cambios = filtrar_sin_cambios(datos, 'personal', fuente)
+
+    campos_opcionales = [
+        campo for campo in list(COLUMNAS_FECHA_PERSONAL.values()) + list(COLUMNAS_DECIMAL_PERSONAL.values())
+        if campo in datos
+    ]
+    campos_fijos = [campo for campo, _ in COLUMNAS_TEXTO_PERSONAL.values()] + ['subarea_id']
+
+    existentes = {
+        p.nro_doc: p
+        for p in Personal.objects.filter(nro_doc__in=datos['nro_doc'].tolist())
+    }
+
+    ahora = timezone.now()
+    nuevos = []
+    modificados = []
+    movidos = {}
+    for registro in datos.drop(columns=['_fila', 'clave', 'huella']).to_dict('records'):
+        valores = {campo: registro[campo] for campo in campos_fijos}
+        valores.update({
+            campo: registro[campo] for campo in campos_opcionales
+            if registro[campo] is not None
+        })
+
+        personal = existentes.get(registro['nro_doc'])
+        if personal is None:
+            nuevos.append(Personal(nro_doc=registro['nro_doc'], **valores))
+        else:
+            if personal.subarea_id != valores['subarea_id']:
+                movidos[personal.pk] = (personal.subarea_id, valores['subarea_id'])
+            for campo, valor in valores.items():
+                setattr(personal, campo, valor)
+            personal.actualizado_en = ahora
+            modificados.append(personal)
+
+    Personal.objects.bulk_create(nuevos, batch_size=tamano_lote)
+    if modificados:
+        Personal.objects.bulk_update(
+            modificados,
+            campos_fijos + campos_opcionales + ['actualizado_en'],
+            batch_size=tamano_lote
+        )
+        # Sin señales: contadores de aprobación y cobertura siguen a la persona explícitamente
+        area_de_subarea = dict(SubArea.objects.filter(
+            pk__in={subarea_id for par in movidos.values() for subarea_id in par if subarea_id}
+        ).values_list('id', 'area_id')) if movidos else {}
+        mover_personas({
+            personal_id: (area_de_subarea.get(anterior), area_de_subarea.get(nueva))
+            for personal_id, (anterior, nueva) in movidos.items()
+        })
+        mover_cobertura(movidos)
+    guardar_huellas('personal', fuente, dict(zip(datos['clave'], datos['huella'], strict=True)), tamano_lote)
+    # bulk_create/bulk_update no disparan señales: se invalidan los catálogos explícitamente
+    if nuevos or modificados:
+        invalidar_catalogos()
+
+    resultado = {
+        'creados': len(nuevos),
+        'actualizados': len(modificados),
+        'sin_cambios': sin_cambios,
+        'errores': errores
+    }
+
+    logger.info(
+        f"Importación de personal completada: {len(nuevos)} creados, "
+        f"{len(modificados)} actualizados, {sin_cambios} sin cambios, {len(errores)} errores"
+    )
+
+    return resultado
+
+
+def _sincronizar_responsables(deseados):
+    """
+    Sincroniza la tabla intermedia Area.responsables calculando el diff en memoria.
+
+    Args:
+        deseados: dict {area_id: set(personal_id)} con el estado final deseado
+    """
+    Through = Area.responsables.through
+    actuales = {}
+    for fila_id, area_id, personal_id in Through.objects.filter(
+        area_id__in=list(deseados)
+    ).values_list('id', 'area_id', 'personal_id'):
+        actuales[(area_id, personal_id)] = fila_id
+
+    objetivo = {
+        (area_id, personal_id)
+        for area_id, personas in deseados.items()
+        for personal_id in personas
+    }
+
+    eliminar = [fila_id for par, fila_id in actuales.items() if par not in objetivo]
+    agregar = [
+        Through(area_id=area_id, personal_id=personal_id)
+        for area_id, personal_id in objetivo - actuales.keys()
+    ]
+
+    if eliminar:
+        Through.objects.filter(id__in=eliminar).delete()
+    Through.objects.bulk_create(agregar)
+    return len(agregar), len(eliminar)
+
+
+@transaction.atomic
+def importar_areas(df, usuario=None, tamano_lote=TAMANO_LOTE):
+    """
+    Importa áreas (hoja 'Gerencias') con sus responsables usando operaciones masivas.
+
+    Los DNIs de Responsable_DNI se resuelven con una sola consulta y la tabla
+    intermedia se actualiza con el diff calculado en memoria.
+
+    Args:
+        df: DataFrame leído de la hoja 'Gerencias'
+        usuario: Usuario que realiza la importación (para logging)
+        tamano_lote: Registros por sentencia INSERT/UPDATE
+
+    Returns:
+        dict: Resultado con contadores y errores
+    """
+    logger.info(f"Iniciando importación masiva de áreas por usuario {usuario}")
+
+    errores = []
+    datos = pd.DataFrame({
+        '_fila': df.index + 2,
+        'nombre': limpiar_texto(df['Nombre']),
+        'descripcion': limpiar_texto(df['Descripcion']) if 'Descripcion' in df else '',
+        'activa': limpiar_booleanos(df['Activa']) if 'Activa' in df else True,
+    })
+    datos = datos[~datos['nombre'].isin(['', 'nan'])]
+
+    con_responsables = 'Responsable_DNI' in df
+    if con_responsables:
+        datos['dnis'] = separar_documentos(df['Responsable_DNI'])
+        todos = {dni for dnis in datos['dnis'] for dni in dnis}
+        personal_ids = dict(
+            Personal.objects.filter(nro_doc__in=todos).values_list('nro_doc', 'id')
+        )
+
+        validas = []
+        for fila, dnis in zip(datos['_fila'], datos['dnis'], strict=True):
+            faltantes = [dni for dni in dnis if dni not in personal_ids]
+            for dni in faltantes:
+                errores.append(f"Fila {fila}: Responsable con DNI {dni} no encontrado")
+            validas.append(not faltantes)
+        datos = datos[validas]
+
+    datos = datos.drop_duplicates('nombre', keep='last')
+    datos = _validar_longitudes(datos, Area, ['nombre'], errores)
+
+    existentes = {a.nombre: a for a in Area.objects.filter(nombre__in=datos['nombre'].tolist())}
+
+    ahora = timezone.now()
+    nuevas = []
+    modificadas = []
+    for registro in datos.to_dict('records'):
+        area = existentes.get(registro['nombre'])
+        if area is None:
+            nuevas.append(Area(
+                nombre=registro['nombre'],
+                descripcion=registro['descripcion'],
+                activa=registro['activa'],
+            ))
+        else:
+            area.descripcion = registro['descripcion']
+            area.activa = registro['activa']
+            area.actualizado_en = ahora
+            modificadas.append(area)
+
+    Area.objects.bulk_create(nuevas, batch_size=tamano_lote)
+    if modificadas:
+        Area.objects.bulk_update(
+            modificadas, ['descripcion', 'activa', 'actualizado_en'], batch_size=tamano_lote
+        )
+
+    if con_responsables and not datos.empty:
+        area_ids = dict(
+            Area.objects.filter(nombre__in=datos['nombre'].tolist()).values_list('nombre', 'id')
+        )
+        deseados = {
+            area_ids[nombre]: {personal_ids[dni] for dni in dnis}
+            for nombre, dnis in zip(datos['nombre'], datos['dnis'], strict=True)
+        }
+        _sincronizar_responsables(deseados)
+    if nuevas or modificadas:
+        invalidar_catalogos()
+
+    resultado = {
+        'creados': len(nuevas),
+        'actualizados': len(modificadas),
+        'errores': errores
+    }
+
+    logger.info(
+        f"Importación de áreas completada: {len(nuevas)} creadas, "
+        f"{len(modificadas)} actualizadas, {len(errores)} errores"
+    )
+
+    return resultado
+
+
+@transaction.atomic
+def importar_subareas(df, usuario=None, tamano_lote=TAMANO_LOTE):
+    """
+    Importa subáreas (hoja 'Areas') resolviendo el área padre con un mapa nombre->id.
+
+    Args:
+        df: DataFrame leído de la hoja 'Areas'
+        usuario: Usuario que realiza la importación (para logging)
+        tamano_lote: Registros por sentencia INSERT/UPDATE
+
+    Returns:
+        dict: Resultado con contadores y errores
+    """
+    logger.info(f"Iniciando importación masiva de subáreas por usuario {usuario}")
+
+    errores = []
+    datos = pd.DataFrame({
+        '_fila': df.index + 2,
+        'nombre': limpiar_texto(df['Nombre']),
+        'area_nombre': limpiar_texto(df['Area']),
+        'descripcion': limpiar_texto(df['Descripcion']) if 'Descripcion' in df else '',
+        'activa': limpiar_booleanos(df['Activa']) if 'Activa' in df else True,
+    })
+    datos = datos[~datos['nombre'].isin(['', 'nan']) & ~datos['area_nombre'].isin(['', 'nan'])]
+
+    area_ids = dict(Area.objects.values_list('nombre', 'id'))
+    datos['area_id'] = datos['area_nombre'].map(area_ids)
+    for fila, nombre in zip(datos.loc[datos['area_id'].isna(), '_fila'],
+                            datos.loc[datos['area_id'].isna(), 'area_nombre'], strict=True):
+        errores.append(f"Fila {fila}: Área '{nombre}' no encontrada")
+    datos = datos.dropna(subset=['area_id'])
+    datos['area_id'] = datos['area_id'].astype(int)
+    datos = datos.drop_duplicates(['nombre', 'area_id'], keep='last')
+    datos = _validar_longitudes(datos, SubArea, ['nombre'], errores)
+
+    existentes = {
+        (s.nombre, s.area_id): s
+        for s in SubArea.objects.filter(
+            area_id__in=datos['area_id'].unique().tolist(),
+            nombre__in=datos['nombre'].unique().tolist()
+        )
+    }
+
+    ahora = timezone.now()
+    nuevas = []
+    modificadas = []
+    for registro in datos.to_dict('records'):
+        subarea = existentes.get((registro['nombre'], registro['area_id']))
+        if subarea is None:
+            nuevas.append(SubArea(
+                nombre=registro['nombre'],
+                area_id=registro['area_id'],
+                descripcion=registro['descripcion'],
+                activa=registro['activa'],
+            ))
+        else:
+            subarea.descripcion = registro['descripcion']
+            subarea.activa = registro['activa']
+            subarea.actualizado_en = ahora
+            modificadas.append(subarea)
+
+    SubArea.objects.bulk_create(nuevas, batch_size=tamano_lote)
+    if modificadas:
+        SubArea.objects.bulk_update(
+            modificadas, ['descripcion', 'activa', 'actualizado_en'], batch_size=tamano_lote
+        )
+    if nuevas or modificadas:
+        invalidar_catalogos()
+
+    resultado = {
+        'creados': len(nuevas),
+        'actualizados': len(modificadas),
+        'errores': errores
+    }
+
+    logger.info(
+        f"Importación de subáreas completada: {len(nuevas)} creadas, "
+        f"{len(modificadas)} actualizadas, {len(errores)} errores"
+    )
+
+    return resultado
+
+
+def columnas_dias(df):
+    """Columnas de días de la hoja Roster (formato Dia1..Dia31 o Dia01..Dia31)."""
+    return [col for col in df.columns if re.match(r'^Dia\d+$', str(col))]
+
+
+def preparar_roster(df):
+    """
+    Normaliza la hoja matricial de Roster: DNI limpio y códigos en mayúsculas.
+
+    Returns:
+        DataFrame con '_fila', 'clave' (DNI) y una columna por día con el código
+        normalizado ('' para celdas vacías).
+    """
+    dias = columnas_dias(df)
+    datos = pd.DataFrame({'_fila': df.index + 2, 'clave': normalizar_documentos(df['DNI'])})
+    for col in dias:
+        codigos = limpiar_texto(df[col]).str.upper()
+        datos[col] = codigos.mask(codigos == 'NAN', '')
+    return datos.dropna(subset=['clave']), dias
+
+
+def _preparar_periodo(df, anio, mes, forzar):
+    """Normaliza la hoja de un mes y descarta las filas cuya huella no cambió."""
+    datos, dias = preparar_roster(df)
+    datos = datos.drop_duplicates('clave', keep='last')
+    datos['huella'] = calcular_huellas(datos, ['clave'] + dias)
+
+    sin_cambios = 0
+    if not forzar:
+        datos, sin_cambios = filtrar_sin_cambios(datos, 'roster', f'{anio}-{mes:02d}')
+    return datos, dias, sin_cambios
+
+
+@transaction.atomic
+def importar_roster_periodos(periodos, anio, usuario=None, forzar=False, tamano_lote=TAMANO_LOTE):
+    """
+    Importa varias hojas matriciales de Roster del mismo año en una sola fase de escritura.
+
+    Los saldos DL/DLA de todas las personas se precargan una vez y se validan
+    en memoria; las celdas aceptadas se escriben al final con bulk_create y
+    bulk_update, y las altas y cambios de código quedan en RosterAudit.
+
+    Args:
+        periodos: Dict {mes: DataFrame} con la hoja de cada mes
+        anio: Año del período importado
+        usuario: Usuario que realiza la importación
+        forzar: Si es True, reprocesa todas las filas aunque no hayan cambiado
+        tamano_lote: Registros por lote en las escrituras masivas
+
+    Returns:
+        dict: Resultado con contadores y errores
+    """
+    meses = sorted(periodos)
+    logger.info(f"Iniciando importación de roster {anio} meses {meses} por usuario {usuario}")
+
+    preparados = {mes: _preparar_periodo(periodos[mes], anio, mes, forzar) for mes in meses}
+    claves = set()
+    for datos, _, _ in preparados.values():
+        claves.update(datos['clave'])
+    personal_map = Personal.objects.in_bulk(list(claves), field_name='nro_doc')
+    saldos = ControlSaldos(personal_map.values())
+
+    usuario_auditoria = usuario if getattr(usuario, 'is_authenticated', False) else None
+    ahora = timezone.now()
+    errores = []
+    sin_cambios = 0
+    nuevos = []
+    modificados = []
+    cobertura = DeltasCobertura()
+    auditorias = []
+    huellas_por_fuente = {}
+
+    for mes, (datos, dias, omitidas) in preparados.items():
+        sin_cambios += omitidas
+        # Con varias hojas los errores indican el mes para ubicar la fila
+        prefijo = f"Mes {mes:02d}, " if len(meses) > 1 else ""
+
+        primer_dia = date(anio, mes, 1)
+        ultimo_dia = date(anio + (mes == 12), mes % 12 + 1, 1)
+        ids_mes = [personal_map[clave].pk for clave in datos['clave'] if clave in personal_map]
+        existentes = {
+            (personal_id, fecha): (pk, codigo)
+            for pk, personal_id, fecha, codigo in Roster.objects.filter(
+                personal_id__in=ids_mes,
+                fecha__gte=primer_dia,
+                fecha__lt=ultimo_dia
+            ).values_list('pk', 'personal_id', 'fecha', 'codigo')
+        }
+
+        huellas = {}
+        for registro in datos.to_dict('records'):
+            personal = personal_map.get(registro['clave'])
+            if personal is None:
+                errores.append(
+                    f"{prefijo}Fila {registro['_fila']}: Personal con DNI {registro['clave']} no encontrado"
+                )
+                continue
+
+            fila_con_error = False
+            for col_dia in dias:
+                codigo = registro[col_dia]
+                if not codigo:
+                    continue
+
+                dia = int(col_dia.replace('Dia', ''))
+                try:
+                    fecha = date(anio, mes, dia)
+                except ValueError:
+                    errores.append(f"{prefijo}Fila {registro['_fila']}, Día {dia}: fecha inválida")
+                    fila_con_error = True
+                    continue
+
+                pk, codigo_anterior = existentes.get((personal.pk, fecha), (None, None))
+                if codigo_anterior == codigo:
+                    continue
+
+                error = saldos.validar(personal, codigo, fecha)
+                if error:
+                    errores.append(f"{prefijo}Fila {registro['_fila']}, Día {dia}: {error}")
+                    fila_con_error = True
+                    continue
+
+                saldos.registrar(personal.pk, fecha, codigo, codigo_anterior)
+                cobertura.cambio(personal.subarea_id, fecha, codigo_anterior, codigo)
+                if pk is None:
+                    nuevos.append(Roster(personal=personal, fecha=fecha, codigo=codigo))
+                    auditorias.append(RosterAudit(
+                        personal=personal,
+                        fecha=fecha,
+                        campo_modificado='codigo',
+                        valor_anterior='',
+                        valor_nuevo=codigo,
+                        usuario=usuario_auditoria
+                    ))
+                else:
+                    modificados.append(Roster(pk=pk, codigo=codigo, actualizado_en=ahora))
+                    auditorias.append(RosterAudit(
+                        personal=personal,
+                        fecha=fecha,
+                        campo_modificado='codigo',
+                        valor_anterior=codigo_anterior,
+                        valor_nuevo=codigo,
+                        usuario=usuario_auditoria
+                    ))
+
+            # Las filas con errores no guardan huella para reintentarse en la próxima carga
+            if not fila_con_error:
+                huellas[registro['clave']] = registro['huella']
+        huellas_por_fuente[f'{anio}-{mes:02d}'] = huellas
+
+    # bulk_create/bulk_update no disparan señales: auditoría, contadores y cobertura se registran explícitamente
+    contadores = DeltasContadores()
+    contadores.sumar_celdas(nuevos)
+    Roster.objects.bulk_create(nuevos, batch_size=tamano_lote)
+    Roster.objects.bulk_update(modificados, ['codigo', 'actualizado_en'], batch_size=tamano_lote)
+    descripcion = f"Roster {anio}, meses {', '.join(f'{mes:02d}' for mes in meses)}"
+    with en_lote('importacion', usuario_auditoria, descripcion):
+        asignar_lote(auditorias)
+    RosterAudit.objects.bulk_create(auditorias, batch_size=tamano_lote)
+    contadores.aplicar()
+    cobertura.aplicar()
+    for fuente, huellas in huellas_por_fuente.items():
+        guardar_huellas('roster', fuente, huellas)
+
+    resultado = {
+        'creados': len(nuevos),
+        'actualizados': len(modificados),
+        'sin_cambios': sin_cambios,
+        'errores': errores
+    }
+
+    logger.info(
+        f"Importación de roster completada: {len(nuevos)} creados, {len(modificados)} actualizados, "
+        f"{sin_cambios} filas sin cambios, {len(errores)} errores"
+    )
+
+    return resultado
+
+
+def importar_roster(df, anio, mes, usuario=None, forzar=False):
+    """
+    Importa la hoja matricial de Roster (una fila por persona, una columna por día).
+
+    Solo se procesan las filas cuya huella cambió desde la última importación
+    del mismo período, y dentro de ellas solo las celdas cuyo código difiere
+    del guardado en BD.
+
+    Args:
+        df: DataFrame leído de la hoja 'Roster'
+        anio: Año del período importado
+        mes: Mes del período importado
+        usuario: Usuario que realiza la importación
+        forzar: Si es True, reprocesa todas las filas aunque no hayan cambiado
+
+    Returns:
+        dict: Resultado con contadores y errores
+    """
+    return importar_roster_periodos({mes: df}, anio, usuario=usuario, forzar=forzar)
+
+
+@transaction.atomic
+def cargar_registros_roster(registros, usuario, tamano_lote=TAMANO_LOTE):
+    """
+    Carga masiva de celdas de Roster (API) con un upsert por lotes.
+
+    Aplica las reglas de la edición de celdas en la web: alcance del usuario,
+    códigos válidos, fechas editables, fecha de alta, saldos DL/DLA y estado
+    inicial (borrador cuando el usuario edita su propio roster). Personal,
+    celdas existentes y saldos se cargan con una consulta cada uno y se
+    validan en memoria recorriendo cada persona por fecha. Si un registro es
+    inválido no se escribe nada.
+
+    Args:
+        registros: Lista de dicts {'personal': id, 'fecha', 'codigo', 'observaciones'};
+            si una celda se repite gana la última aparición
+        usuario: Usuario que realiza la carga
+        tamano_lote: Registros por lote en las escrituras masivas
+
+    Returns:
+        dict: {'creados', 'actualizados', 'sin_cambios'}
+
+    Raises:
+        ValidationError: Con un mensaje por registro inválido
+    """
+    celdas = {}
+    for indice, registro in enumerate(registros):
+        celdas[(registro['personal'], registro['fecha'])] = (indice, registro)
+    if not celdas:
+        return {'creados': 0, 'actualizados': 0, 'sin_cambios': 0}
+
+    personal_map = filtrar_personal(usuario).select_related('subarea').in_bulk({pk for pk, _ in celdas})
+    fechas = [fecha for _, fecha in celdas]
+    existentes = {
+        (personal_id, fecha): {'pk': pk, 'codigo': codigo, 'observaciones': observaciones,
+                               'estado': estado, 'aprobado_en': aprobado_en}
+        for pk, personal_id, fecha, codigo, observaciones, estado, aprobado_en in Roster.objects.filter(
+            personal_id__in=list(personal_map), fecha__range=(min(fechas), max(fechas))
+        ).values_list('pk', 'personal_id', 'fecha', 'codigo', 'observaciones', 'estado', 'aprobado_en')
+    }
+    saldos = ControlSaldos(personal_map.values())
+    propio = None if usuario.is_superuser else getattr(getattr(usuario, 'personal_data', None), 'pk', None)
+    hoy = timezone.localdate()
+
+    errores = []
+    aceptadas = []
+    sin_cambios = 0
+    for (personal_id, fecha), (indice, registro) in sorted(celdas.items()):
+        prefijo = f"Registro {indice}"
+        personal = personal_map.get(personal_id)
+        if personal is None:
+            errores.append(f"{prefijo}: personal {personal_id} no encontrado o fuera de su alcance")
+            continue
+        codigo = registro['codigo'].strip().upper()
+        if codigo not in RosterValidator.CODIGOS_VALIDOS:
+            errores.append(f"{prefijo}: código '{codigo}' inválido")
+            continue
+        if fecha.year < 2026:
+            errores.append(f"{prefijo}: no se puede editar el roster antes de enero 2026")
+            continue
+        if not usuario.is_superuser and fecha < hoy:
+            errores.append(f"{prefijo}: solo el administrador puede editar días anteriores al actual")
+            continue
+        if personal.fecha_alta and fecha < personal.fecha_alta:
+            errores.append(f"{prefijo}: fecha anterior a la fecha de alta ({personal.fecha_alta:%d/%m/%Y})")
+            continue
+
+        anterior = existentes.get((personal_id, fecha))
+        nueva = {
+            'codigo': codigo,
+            'observaciones': registro.get('observaciones', ''),
+            'estado': 'borrador' if personal_id == propio else 'aprobado',
+        }
+        if anterior and all(anterior[campo] == valor for campo, valor in nueva.items()):
+            sin_cambios += 1
+            continue
+        codigo_anterior = anterior['codigo'] if anterior else None
+        if codigo != codigo_anterior:
+            error = saldos.validar(personal, codigo, fecha)
+            if error:
+                errores.append(f"{prefijo}: {error}")
+                continue
+            saldos.registrar(personal_id, fecha, codigo, codigo_anterior)
+        aceptadas.append((personal, fecha, nueva, anterior))
+
+    if errores:
+        raise ValidationError(errores)
+
+    # bulk_create no dispara señales: auditoría, contadores, cobertura y huellas se registran explícitamente
+    ahora = timezone.now()
+    contadores = DeltasContadores()
+    cobertura = DeltasCobertura()
+    filas, auditorias = [], []
+    periodos = {}
+    for personal, fecha, nueva, anterior in aceptadas:
+        roster = Roster(personal=personal, fecha=fecha, modificado_por=usuario, actualizado_en=ahora, **nueva)
+        area_id = personal.subarea.area_id if personal.subarea else None
+        if anterior:
+            roster.aprobado_en = anterior['aprobado_en']
+            contadores.restar(area_id, anterior['estado'], anterior['aprobado_en'])
+        contadores.sumar(area_id, roster.estado, roster.aprobado_en)
+        cobertura.cambio(personal.subarea_id, fecha, anterior['codigo'] if anterior else None, roster.codigo)
+        filas.append(roster)
+        auditorias.append((roster, anterior))
+        periodos.setdefault(f'{fecha.year}-{fecha.month:02d}', set()).add(personal.nro_doc)
+
+    Roster.objects.bulk_create(
+        filas,
+        batch_size=tamano_lote,
+        update_conflicts=True,
+        unique_fields=['personal', 'fecha'],
+        update_fields=['codigo', 'observaciones', 'estado', 'modificado_por', 'actualizado_en'],
+    )
+    contadores.aplicar()
+    cobertura.aplicar()
+    with actuando_como(usuario):
+        encolar_auditorias([
+            auditoria for roster, anterior in auditorias for auditoria in auditorias_de_cambio(roster, anterior)
+        ])
+    # La próxima importación de esos períodos debe volver a comparar las filas
+    for fuente, documentos in periodos.items():
+        invalidar_huellas('roster', documentos, fuente=fuente)
+
+    actualizados = sum(1 for _, _, _, anterior in aceptadas if anterior)
+    resultado = {
+        'creados': len(aceptadas) - actualizados,
+        'actualizados': actualizados,
+        'sin_cambios': sin_cambios,
+    }
+    logger.info(
+        f"Carga masiva de roster por {usuario.username}: {resultado['creados']} creados, "
+        f"{actualizados} actualizados, {sin_cambios} sin cambios"
+    )
+    return resultado
+
+
+def importar_roster_anual(archivo, anio, usuario=None, forzar=False, max_procesos=None):
+    """
+    Importa un libro Excel con una hoja por mes (Enero, Febrero, ... o 01, 02, ...).
+
+    Las hojas se leen en paralelo en un pool de procesos y todos los meses se
+    escriben en una sola transacción.
+
+    Args:
+        archivo: Archivo .xlsx subido o abierto en modo binario
+        anio: Año al que corresponden las hojas
+        usuario: Usuario que realiza la importación
+        forzar: Si es True, reprocesa todas las filas aunque no hayan cambiado
+        max_procesos: Límite de procesos de lectura (por defecto IMPORTACION_MAX_PROCESOS)
+
+    Returns:
+        dict: Resultado con contadores, errores y 'meses' importados
+
+    Raises:
+        ValidationError: Si el libro no contiene hojas mensuales válidas
+    """
+    contenido = archivo.read()
+    try:
+        nombres = pd.ExcelFile(io.BytesIO(contenido)).sheet_names
+        hojas = detectar_hojas_mes(nombres, anio)
+    except ValueError as e:
+        raise ValidationError(str(e)) from e
+    if not hojas:
+        raise ValidationError(
+            'El libro no contiene hojas mensuales (use nombres como "Enero", "Feb" o "03").'
+        )
+
+    if max_procesos is None:
+        max_procesos = getattr(settings, 'IMPORTACION_MAX_PROCESOS', None)
+    tablas = leer_hojas(contenido, hojas.values(), dtype={'DNI': str}, max_procesos=max_procesos)
+
+    periodos = {}
+    for (mes, hoja), df in zip(hojas.items(), tablas, strict=True):
+        if 'DNI' not in df.columns:
+            raise ValidationError(f"La hoja '{hoja}' debe contener la columna: DNI")
+        periodos[mes] = df
+
+    resultado = importar_roster_periodos(periodos, anio, usuario=usuario, forzar=forzar)
+    resultado['meses'] = list(periodos)
+    return resultado
@@ -0,0 +1,82 @@
+"""
+Comando para exportar datasets en Parquet o CSV para BI.
+
+Ejemplos:
+    python manage.py exportar_analitica roster auditoria --desde 2026-01-01 --hasta 2026-12-31
+    python manage.py exportar_analitica roster personal --incremental --consumidor bi-nocturno
+"""
+from datetime import datetime
+import os
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from personal.analitica import (
+    DATASETS, FORMATOS_ANALITICA, consulta_dataset, escribir_csv, escribir_parquet,
+    exportar_incremental
+)
+
+
+def _fecha(valor):
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+class Command(BaseCommand):
+    help = 'Exporta Roster, Personal, SubÁreas, Áreas y Auditoría en Parquet o CSV para BI'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'datasets',
+            nargs='*',
+            choices=list(DATASETS),
+            help='Datasets a exportar (por defecto todos)',
+        )
+        parser.add_argument(
+            '--formato',
+            choices=FORMATOS_ANALITICA,
+            default='parquet',
+            help='Formato de salida (parquet o csv)',
+        )
+        parser.add_argument('--desde', type=_fecha, help='Fecha mínima AAAA-MM-DD (roster y auditoría)')
+        parser.add_argument('--hasta', type=_fecha, help='Fecha máxima AAAA-MM-DD (roster y auditoría)')
+        parser.add_argument(
+            '--salida',
+            default='.',
+            help='Directorio donde se escriben los archivos',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Exportar solo filas modificadas desde la marca de agua del consumidor',
+        )
+        parser.add_argument(
+            '--consumidor',
+            default='bi',
+            help='Nombre del consumidor para las marcas de agua incrementales',
+        )
+
+    def handle(self, *args, **options):
+        datasets = options['datasets'] or list(DATASETS)
+        formato = options['formato']
+        os.makedirs(options['salida'], exist_ok=True)
+        sello = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+        for nombre in datasets:
+            ruta = os.path.join(options['salida'], f'{nombre}_{sello}.{formato}')
+            modo, kwargs = ('wb', {}) if formato == 'parquet' else ('w', {'newline': '', 'encoding': 'utf-8'})
+            try:
+                with open(ruta, modo, **kwargs) as destino:
+                    if options['incremental']:
+                        resultado = exportar_incremental(
+                            nombre, options['consumidor'], destino, formato,
+                            options['desde'], options['hasta']
+                        )
+                    else:
+                        consulta = consulta_dataset(nombre, options['desde'], options['hasta'])
+                        escribir = escribir_parquet if formato == 'parquet' else escribir_csv
+                        resultado = escribir(destino, nombre, consulta)
+            except ValidationError as e:
+                raise CommandError('; '.join(e.messages)) from e
+
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {nombre}: {resultado["filas"]} filas -> {ruta}'
+            ))
@@ -0,0 +1,37 @@
+"""
+Comando para recalcular los contadores de aprobación y la cobertura diaria desde Roster.
+
+Ejemplos:
+    python manage.py reconciliar_contadores
+    python manage.py reconciliar_contadores --verificar
+"""
+from django.core.management.base import BaseCommand
+from personal.cobertura import reconciliar_cobertura
+from personal.contadores import reconciliar_contadores
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores de aprobación por área y la cobertura diaria, y corrige la deriva'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Solo informa las diferencias sin corregirlas',
+        )
+
+    def handle(self, *args, **options):
+        corregir = not options['verificar']
+        accion = 'detectados' if options['verificar'] else 'corregidos'
+        for nombre, reconciliar in (
+            ('Contadores', reconciliar_contadores),
+            ('Cobertura diaria', reconciliar_cobertura),
+        ):
+            resultado = reconciliar(corregir=corregir)
+            if not any(resultado.values()):
+                self.stdout.write(self.style.SUCCESS(f'✓ {nombre} sin deriva'))
+                continue
+            self.stdout.write(self.style.WARNING(
+                f"{nombre} con deriva ({accion}): {resultado['creados']} faltantes, "
+                f"{resultado['actualizados']} con total distinto, {resultado['eliminados']} sobrantes"
+            ))
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("personal", "0010_alter_area_responsables"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HuellaImportacion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[("personal", "Personal"), ("roster", "Roster")],
+                        max_length=20,
+                        verbose_name="Tipo",
+                    ),
+                ),
+                (
+                    "fuente",
+                    models.CharField(
+                        help_text="Origen lógico de la importación (hoja, período, etc.)",
+                        max_length=200,
+                        verbose_name="Fuente",
+                    ),
+                ),
+                (
+                    "clave",
+                    models.CharField(
+                        help_text="Identificador de la fila dentro de la fuente (ej. DNI)",
+                        max_length=100,
+                        verbose_name="Clave",
+                    ),
+                ),
+                ("huella", models.CharField(max_length=32, verbose_name="Huella")),
+                ("actualizado_en", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Huella de Importación",
+                "verbose_name_plural": "Huellas de Importación",
+                "indexes": [
+                    models.Index(fields=["tipo", "clave"], name="personal_hu_tipo_a0a781_idx")
+                ],
+                "unique_together": {("tipo", "fuente", "clave")},
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("personal", "0011_huellaimportacion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MarcaAguaExportacion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("consumidor", models.CharField(max_length=100, verbose_name="Consumidor")),
+                ("dataset", models.CharField(max_length=50, verbose_name="Dataset")),
+                (
+                    "marca",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Marca de Agua"),
+                ),
+                (
+                    "filas",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Filas de la Última Exportación"
+                    ),
+                ),
+                ("actualizado_en", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Marca de Agua de Exportación",
+                "verbose_name_plural": "Marcas de Agua de Exportación",
+                "unique_together": {("consumidor", "dataset")},
+            },
+        ),
+    ]
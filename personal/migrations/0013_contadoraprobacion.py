@@ -0,0 +1,102 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def forwards_poblar_contadores(apps, schema_editor):
+    Roster = apps.get_model("personal", "Roster")
+    ContadorAprobacion = apps.get_model("personal", "ContadorAprobacion")
+    totales = {}
+    filas = (
+        Roster.objects.filter(
+            Q(estado__in=["borrador", "pendiente"]) | Q(estado="aprobado", aprobado_en__isnull=False)
+        )
+        .annotate(dia=TruncDate("aprobado_en", tzinfo=timezone.get_current_timezone()))
+        .values_list("personal__subarea__area_id", "estado", "dia")
+        .annotate(total=Count("pk"))
+        .order_by()
+    )
+    for area_id, estado, dia, total in filas:
+        fecha = dia if estado == "aprobado" else None
+        clave = (area_id, estado, fecha)
+        totales[clave] = totales.get(clave, 0) + total
+    ContadorAprobacion.objects.bulk_create([
+        ContadorAprobacion(
+            clave=f"{area_id or 0}:{estado}:{fecha.isoformat() if fecha else ''}",
+            area_id=area_id, estado=estado, fecha=fecha, total=total,
+        )
+        for (area_id, estado, fecha), total in totales.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("personal", "0012_marcaaguaexportacion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContadorAprobacion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "clave",
+                    models.CharField(
+                        help_text="área:estado:fecha",
+                        max_length=50,
+                        unique=True,
+                        verbose_name="Clave",
+                    ),
+                ),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[
+                            ("aprobado", "Aprobado"),
+                            ("pendiente", "Pendiente de Aprobación"),
+                            ("borrador", "Borrador"),
+                        ],
+                        max_length=20,
+                        verbose_name="Estado",
+                    ),
+                ),
+                (
+                    "fecha",
+                    models.DateField(blank=True, null=True, verbose_name="Fecha de Aprobación"),
+                ),
+                ("total", models.IntegerField(default=0, verbose_name="Total")),
+                ("actualizado_en", models.DateTimeField(auto_now=True)),
+                (
+                    "area",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="contadores_aprobacion",
+                        to="personal.area",
+                        verbose_name="Área",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Contador de Aprobaciones",
+                "verbose_name_plural": "Contadores de Aprobaciones",
+                "indexes": [
+                    models.Index(
+                        fields=["area", "estado", "fecha"], name="personal_co_area_id_94e0f2_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(forwards_poblar_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("personal", "0013_contadoraprobacion"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="roster",
+            index=models.Index(
+                condition=models.Q(("estado", "pendiente")),
+                fields=["-actualizado_en", "-id"],
+                name="roster_cola_pendientes_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("personal", "0014_roster_cola_pendientes_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Notificacion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("destinatario", models.EmailField(max_length=254, verbose_name="Destinatario")),
+                (
+                    "evento",
+                    models.CharField(
+                        choices=[
+                            ("enviado", "Cambio enviado a aprobación"),
+                            ("aprobado", "Cambio aprobado"),
+                            ("rechazado", "Cambio rechazado"),
+                        ],
+                        max_length=20,
+                        verbose_name="Evento",
+                    ),
+                ),
+                ("mensaje", models.CharField(max_length=300, verbose_name="Mensaje")),
+                (
+                    "enviado_en",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Enviado en"),
+                ),
+                ("creado_en", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Notificación",
+                "verbose_name_plural": "Notificaciones",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("enviado_en__isnull", True)),
+                        fields=["destinatario", "creado_en"],
+                        name="notificacion_por_enviar_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("personal", "0015_notificacion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SegmentoAuditoria",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "periodo",
+                    models.CharField(
+                        help_text="Mes de auditoría (AAAA-MM)", max_length=7, verbose_name="Período"
+                    ),
+                ),
+                ("archivo", models.CharField(max_length=200, unique=True, verbose_name="Archivo")),
+                ("filas", models.PositiveIntegerField(default=0, verbose_name="Filas")),
+                ("personal_min", models.PositiveIntegerField(verbose_name="Personal (id mínimo)")),
+                ("personal_max", models.PositiveIntegerField(verbose_name="Personal (id máximo)")),
+                ("fecha_min", models.DateField(verbose_name="Fecha mínima")),
+                ("fecha_max", models.DateField(verbose_name="Fecha máxima")),
+                ("auditado_desde", models.DateTimeField(verbose_name="Auditado desde")),
+                ("auditado_hasta", models.DateTimeField(verbose_name="Auditado hasta")),
+                ("creado_en", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Segmento de Auditoría",
+                "verbose_name_plural": "Segmentos de Auditoría",
+                "ordering": ["-auditado_hasta"],
+                "indexes": [
+                    models.Index(
+                        fields=["fecha_min", "fecha_max"], name="personal_se_fecha_m_79beb8_idx"
+                    ),
+                    models.Index(
+                        fields=["personal_min", "personal_max"],
+                        name="personal_se_persona_5927b2_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("personal", "0016_segmentoauditoria"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InstantaneaRoster",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "periodo",
+                    models.CharField(
+                        help_text="Mes del roster (AAAA-MM)", max_length=7, verbose_name="Período"
+                    ),
+                ),
+                ("tomada_en", models.DateTimeField(verbose_name="Tomada en")),
+                (
+                    "celdas",
+                    models.JSONField(
+                        default=dict,
+                        help_text="{día: [código, estado, observaciones]}",
+                        verbose_name="Celdas",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Instantánea de Roster",
+                "verbose_name_plural": "Instantáneas de Roster",
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name="rosteraudit",
+            name="personal_ro_persona_ba546c_idx",
+        ),
+        migrations.AddIndex(
+            model_name="rosteraudit",
+            index=models.Index(
+                fields=["personal", "fecha", "creado_en"], name="personal_ro_persona_a2f87e_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="instantanearoster",
+            name="personal",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="instantaneas_roster",
+                to="personal.personal",
+                verbose_name="Personal",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="instantanearoster",
+            index=models.Index(
+                fields=["personal", "periodo", "-tomada_en"], name="personal_in_persona_392cdf_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="instantanearoster",
+            index=models.Index(
+                fields=["periodo", "-tomada_en"], name="personal_in_periodo_556e5a_idx"
+            ),
+        ),
+    ]
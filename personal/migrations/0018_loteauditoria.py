@@ -0,0 +1,94 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("personal", "0017_instantanearoster"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoteAuditoria",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "origen",
+                    models.CharField(
+                        choices=[
+                            ("importacion", "Importación Excel"),
+                            ("aprobacion", "Aprobación en lote"),
+                            ("rechazo", "Rechazo en lote"),
+                            ("envio", "Envío a aprobación"),
+                            ("api", "Carga por API"),
+                            ("deshacer", "Deshacer lote"),
+                        ],
+                        max_length=20,
+                        verbose_name="Origen",
+                    ),
+                ),
+                (
+                    "descripcion",
+                    models.CharField(blank=True, max_length=200, verbose_name="Descripción"),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(default=0, verbose_name="Registros auditados"),
+                ),
+                (
+                    "deshecho_en",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Deshecho en"),
+                ),
+                ("creado_en", models.DateTimeField(auto_now_add=True)),
+                (
+                    "deshecho_por",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="lotes_auditoria_deshechos",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Deshecho por",
+                    ),
+                ),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="lotes_auditoria",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Usuario",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Lote de Auditoría",
+                "verbose_name_plural": "Lotes de Auditoría",
+                "ordering": ["-creado_en"],
+            },
+        ),
+        migrations.AddField(
+            model_name="rosteraudit",
+            name="lote",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="auditorias",
+                to="personal.loteauditoria",
+                verbose_name="Lote",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("personal", "0018_loteauditoria"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="roster",
+            name="personal_ro_fecha_6e82a0_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="rosteraudit",
+            name="personal_ro_creado__585704_idx",
+        ),
+        migrations.AddIndex(
+            model_name="roster",
+            index=models.Index(fields=["fecha", "id"], name="personal_ro_fecha_bd44ca_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="rosteraudit",
+            index=models.Index(fields=["-creado_en", "-id"], name="personal_ro_creado__eadb70_idx"),
+        ),
+    ]
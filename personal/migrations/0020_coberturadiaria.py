@@ -0,0 +1,125 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+CATEGORIAS = {
+    "T": "presencia", "TR": "presencia",
+    "D": "descanso", "DL": "descanso", "DLA": "descanso", "DOL": "descanso", "DS": "descanso",
+    "F": "descanso", "FC": "descanso",
+    "V": "ausencia", "DM": "ausencia", "L": "ausencia", "P": "ausencia", "S": "ausencia",
+}
+
+
+def forwards_poblar_cobertura(apps, schema_editor):
+    Roster = apps.get_model("personal", "Roster")
+    SubArea = apps.get_model("personal", "SubArea")
+    CoberturaDiaria = apps.get_model("personal", "CoberturaDiaria")
+    area_de_subarea = dict(SubArea.objects.values_list("id", "area_id"))
+    totales = {}
+    filas = (
+        Roster.objects.values_list("fecha", "personal__subarea_id", "codigo")
+        .annotate(total=Count("pk"))
+        .order_by()
+    )
+    for fecha, subarea_id, codigo, total in filas:
+        clave = (fecha, subarea_id, CATEGORIAS.get(codigo, "otro"))
+        totales[clave] = totales.get(clave, 0) + total
+    CoberturaDiaria.objects.bulk_create([
+        CoberturaDiaria(
+            clave=f"{fecha.isoformat()}:{subarea_id or 0}:{categoria}",
+            fecha=fecha, subarea_id=subarea_id, area_id=area_de_subarea.get(subarea_id),
+            categoria=categoria, total=total,
+        )
+        for (fecha, subarea_id, categoria), total in totales.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("personal", "0019_indices_paginacion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="subarea",
+            name="dotacion_minima",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Personas en presencia (T/TR) requeridas por día; 0 = sin mínimo",
+                verbose_name="Dotación Mínima",
+            ),
+        ),
+        migrations.CreateModel(
+            name="CoberturaDiaria",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "clave",
+                    models.CharField(
+                        help_text="fecha:subárea:categoría",
+                        max_length=50,
+                        unique=True,
+                        verbose_name="Clave",
+                    ),
+                ),
+                ("fecha", models.DateField(verbose_name="Fecha")),
+                (
+                    "categoria",
+                    models.CharField(
+                        choices=[
+                            ("presencia", "Presencia (T/TR)"),
+                            ("descanso", "Descanso"),
+                            ("ausencia", "Ausencia"),
+                            ("otro", "Otro"),
+                        ],
+                        max_length=20,
+                        verbose_name="Categoría",
+                    ),
+                ),
+                ("total", models.IntegerField(default=0, verbose_name="Total")),
+                ("actualizado_en", models.DateTimeField(auto_now=True)),
+                (
+                    "area",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="coberturas",
+                        to="personal.area",
+                        verbose_name="Área",
+                    ),
+                ),
+                (
+                    "subarea",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="coberturas",
+                        to="personal.subarea",
+                        verbose_name="SubÁrea",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Cobertura Diaria",
+                "verbose_name_plural": "Coberturas Diarias",
+                "indexes": [
+                    models.Index(fields=["fecha", "area"], name="personal_co_fecha_9cc6bf_idx"),
+                    models.Index(
+                        fields=["subarea", "fecha"], name="personal_co_subarea_6411d5_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(forwards_poblar_cobertura, migrations.RunPython.noop),
+    ]
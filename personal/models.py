@@ -57,6 +57,11 @@ class SubArea(models.Model):
     )
     descripcion = models.TextField(blank=True, verbose_name="Descripción")
     activa = models.BooleanField(default=True, verbose_name="Activa")
+    dotacion_minima = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Dotación Mínima",
+        help_text="Personas en presencia (T/TR) requeridas por día; 0 = sin mínimo"
+    )
     
     creado_en = models.DateTimeField(auto_now_add=True)
     actualizado_en = models.DateTimeField(auto_now=True)
@@ -275,7 +280,7 @@ class Personal(models.Model):
         help_text="Días libres acumulados al corte del 31 de diciembre de 2025 (valor manual)"
     )
 
-    def calcular_dias_libres_ganados(self):
+    def calcular_dias_libres_ganados(self, conteos=None):
         """
         Calcula días libres ganados basados en el régimen de turno.
         Por ejemplo:
@@ -284,11 +289,35 @@ class Personal(models.Model):
         - TR siempre es 5x2: cada 5 días TR genera 2 días libres
         
         Acumula fracciones y redondea al entero más próximo al final.
+        
+        Args:
+            conteos: Dict {codigo: cantidad} precalculado (evita consultas)
         """
-        rosters = Roster.objects.filter(personal=self)
-        count_t = rosters.filter(codigo="T").count()
-        count_tr = rosters.filter(codigo="TR").count()
+        if conteos is not None:
+            count_t = conteos.get("T", 0)
+            count_tr = conteos.get("TR", 0)
+        else:
+            rosters = Roster.objects.filter(personal=self)
+            count_t = rosters.filter(codigo="T").count()
+            count_tr = rosters.filter(codigo="TR").count()
+        
+        factor_t = self.factor_turno
+        
+        # TR siempre es 5x2 (cada 5 días genera 2 libres)
+        factor_tr = 5.0 / 2.0  # 2.5 días TR por cada día libre
         
+        # Calcular días libres con decimales
+        dias_libres_de_t = count_t / factor_t
+        dias_libres_de_tr = count_tr / factor_tr
+        
+        # Sumar y redondear al entero más próximo
+        total_dias_libres = round(dias_libres_de_t + dias_libres_de_tr)
+        
+        return total_dias_libres
+
+    @property
+    def factor_turno(self):
+        """Días T necesarios para ganar un día libre según el régimen de turno."""
         # Calcular factor para T según régimen de turno
         factor_t = 3  # Por defecto 21x7 -> 21/7 = 3
         if self.regimen_turno:
@@ -302,46 +331,45 @@ class Personal(models.Model):
                         factor_t = dias_trabajo / dias_descanso
             except (ValueError, ZeroDivisionError):
                 pass  # Usar factor por defecto
-        
-        # TR siempre es 5x2 (cada 5 días genera 2 libres)
-        factor_tr = 5.0 / 2.0  # 2.5 días TR por cada día libre
-        
-        # Calcular días libres con decimales
-        dias_libres_de_t = count_t / factor_t
-        dias_libres_de_tr = count_tr / factor_tr
-        
-        # Sumar y redondear al entero más próximo
-        total_dias_libres = round(dias_libres_de_t + dias_libres_de_tr)
-        
-        return total_dias_libres
+        return factor_t
 
-    def calcular_dias_dl_usados(self):
+    def calcular_dias_dl_usados(self, conteos=None):
         """
         Calcula cuántos días DL ha usado el personal en el roster.
         """
+        if conteos is not None:
+            return conteos.get("DL", 0)
         return Roster.objects.filter(personal=self, codigo="DL").count()
     
-    def calcular_dias_dla_usados(self):
+    def calcular_dias_dla_usados(self, conteos=None):
         """
         Calcula cuántos días DLA (Día Libre Acumulado) ha usado el personal en el roster.
         """
+        if conteos is not None:
+            return conteos.get("DLA", 0)
         return Roster.objects.filter(personal=self, codigo="DLA").count()
     
-    def validar_dla_consecutivos(self, fecha_nueva):
+    def validar_dla_consecutivos(self, fecha_nueva, fechas_dla=None):
         """
         Valida que no se ingresen más de 7 días DLA consecutivos.
         Retorna (es_valido, mensaje)
+        
+        Args:
+            fecha_nueva: Fecha del nuevo DLA
+            fechas_dla: Fechas DLA existentes precalculadas (evita la consulta)
         """
         from datetime import timedelta
         
-        # Obtener todos los registros DLA del personal ordenados por fecha
-        rosters_dla = Roster.objects.filter(
-            personal=self, 
-            codigo="DLA"
-        ).order_by('fecha')
+        if fechas_dla is None:
+            # Obtener todos los registros DLA del personal ordenados por fecha
+            rosters_dla = Roster.objects.filter(
+                personal=self, 
+                codigo="DLA"
+            ).order_by('fecha')
+            fechas_dla = rosters_dla.values_list('fecha', flat=True)
         
         # Agregar la nueva fecha para validar
-        fechas_dla = list(rosters_dla.values_list('fecha', flat=True))
+        fechas_dla = list(fechas_dla)
         fechas_dla.append(fecha_nueva)
         fechas_dla.sort()
         
@@ -359,12 +387,12 @@ class Personal(models.Model):
         
         return True, ""
     
-    def validar_saldo_dla(self, nueva_dla=False):
+    def validar_saldo_dla(self, nueva_dla=False, conteos=None):
         """
         Valida que el saldo de días al 31/12/25 no sea negativo después de descontar DLA.
         Retorna (es_valido, mensaje, saldo_actual)
         """
-        dias_dla_usados = self.calcular_dias_dla_usados()
+        dias_dla_usados = self.calcular_dias_dla_usados(conteos)
         if nueva_dla:
             dias_dla_usados += 1
         
@@ -375,14 +403,18 @@ class Personal(models.Model):
         
         return True, "", saldo
     
-    def validar_saldo_dl(self, nuevo_dl=False):
+    def validar_saldo_dl(self, nuevo_dl=False, conteos=None):
         """
         Valida que los días libres pendientes no sean negativos después de usar DL.
         Retorna (es_valido, mensaje, dias_pendientes)
+        
+        Args:
+            nuevo_dl: Si se está agregando un nuevo DL
+            conteos: Dict {codigo: cantidad} precalculado (evita consultas)
         """
-        dias_ganados = self.calcular_dias_libres_ganados()
-        dias_dl_usados = self.calcular_dias_dl_usados()
-        dias_dla_usados = self.calcular_dias_dla_usados()
+        dias_ganados = self.calcular_dias_libres_ganados(conteos)
+        dias_dl_usados = self.calcular_dias_dl_usados(conteos)
+        dias_dla_usados = self.calcular_dias_dla_usados(conteos)
         
         # Si estamos intentando agregar un nuevo DL, incrementar el contador
         if nuevo_dl:
@@ -563,10 +595,29 @@ class Roster(models.Model):
         unique_together = ['personal', 'fecha']
         indexes = [
             models.Index(fields=['personal', 'fecha']),
-            models.Index(fields=['fecha']),
+            # Paginación de la API por (fecha, id)
+            models.Index(fields=['fecha', 'id']),
             models.Index(fields=['estado']),
+            # Cola de aprobación: índice parcial solo sobre las celdas pendientes
+            models.Index(
+                fields=['-actualizado_en', '-id'],
+                condition=models.Q(estado='pendiente'),
+                name='roster_cola_pendientes_idx',
+            ),
         ]
     
+    # Campos cuyo valor cargado se conserva para auditoría y contadores
+    CAMPOS_SEGUIDOS = ('codigo', 'observaciones', 'estado', 'aprobado_en')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._valores_cargados = {
+            campo: instance.__dict__[campo]
+            for campo in cls.CAMPOS_SEGUIDOS if campo in instance.__dict__
+        }
+        return instance
+    
     def __str__(self):
         return f"{self.personal} - {self.fecha} - {self.codigo}"
     
@@ -631,6 +682,55 @@ class Roster(models.Model):
         logger.info(f"Roster validado: {self.personal} - {self.fecha} - {self.codigo}")
 
 
+class LoteAuditoria(models.Model):
+    """
+    Cabecera de una acción masiva (importación, aprobación en lote, carga por API).
+
+    Las auditorías generadas por la acción apuntan al lote, lo que permite
+    deshacerla completa (ver auditoria.deshacer_lote).
+    """
+    ORIGEN_CHOICES = [
+        ('importacion', 'Importación Excel'),
+        ('aprobacion', 'Aprobación en lote'),
+        ('rechazo', 'Rechazo en lote'),
+        ('envio', 'Envío a aprobación'),
+        ('api', 'Carga por API'),
+        ('deshacer', 'Deshacer lote'),
+    ]
+    
+    origen = models.CharField(max_length=20, choices=ORIGEN_CHOICES, verbose_name="Origen")
+    descripcion = models.CharField(max_length=200, blank=True, verbose_name="Descripción")
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='lotes_auditoria',
+        verbose_name="Usuario"
+    )
+    total = models.PositiveIntegerField(default=0, verbose_name="Registros auditados")
+    
+    deshecho_en = models.DateTimeField(null=True, blank=True, verbose_name="Deshecho en")
+    deshecho_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='lotes_auditoria_deshechos',
+        verbose_name="Deshecho por"
+    )
+    
+    creado_en = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Lote de Auditoría"
+        verbose_name_plural = "Lotes de Auditoría"
+        ordering = ['-creado_en']
+    
+    def __str__(self):
+        return f"{self.get_origen_display()} #{self.pk} ({self.total})"
+
+
 class RosterAudit(models.Model):
     """
     Auditoría de cambios en el roster.
@@ -665,6 +765,14 @@ class RosterAudit(models.Model):
         blank=True,
         verbose_name="Usuario que realizó el cambio"
     )
+    lote = models.ForeignKey(
+        LoteAuditoria,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='auditorias',
+        verbose_name="Lote"
+    )
     
     creado_en = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Auditoría")
     
@@ -673,9 +781,266 @@ class RosterAudit(models.Model):
         verbose_name_plural = "Auditorías de Roster"
         ordering = ['-creado_en']
         indexes = [
-            models.Index(fields=['personal', 'fecha']),
-            models.Index(fields=['-creado_en']),
+            # Reproducción del historial de una persona a partir de una instantánea
+            models.Index(fields=['personal', 'fecha', 'creado_en']),
+            # Paginación de la API por (creado_en, id)
+            models.Index(fields=['-creado_en', '-id']),
         ]
     
     def __str__(self):
         return f"{self.personal} - {self.fecha} - {self.campo_modificado}"
+
+
+class InstantaneaRoster(models.Model):
+    """
+    Estado completo del roster de una persona en un mes, en un momento dado.
+
+    Es el punto de partida para reconstruir el roster en una fecha pasada:
+    se toma la instantánea más reciente anterior a esa fecha y se reproducen
+    solo las auditorías posteriores (ver historico.py).
+    """
+    personal = models.ForeignKey(
+        Personal,
+        on_delete=models.CASCADE,
+        related_name='instantaneas_roster',
+        verbose_name="Personal"
+    )
+    periodo = models.CharField(max_length=7, verbose_name="Período", help_text="Mes del roster (AAAA-MM)")
+    tomada_en = models.DateTimeField(verbose_name="Tomada en")
+    celdas = models.JSONField(
+        default=dict,
+        verbose_name="Celdas",
+        help_text="{día: [código, estado, observaciones]}"
+    )
+    
+    class Meta:
+        verbose_name = "Instantánea de Roster"
+        verbose_name_plural = "Instantáneas de Roster"
+        indexes = [
+            models.Index(fields=['personal', 'periodo', '-tomada_en']),
+            models.Index(fields=['periodo', '-tomada_en']),
+        ]
+    
+    def __str__(self):
+        return f"{self.personal} - {self.periodo} - {self.tomada_en}"
+
+
+class SegmentoAuditoria(models.Model):
+    """
+    Índice de un segmento del archivo histórico de auditoría.
+
+    Cada segmento es un archivo JSONL comprimido con gzip, de solo anexado,
+    con las auditorías de un mes retiradas de la tabla RosterAudit. Los
+    rangos permiten abrir solo los segmentos que pueden contener una consulta
+    (ver archivo_auditoria.py).
+    """
+    periodo = models.CharField(max_length=7, verbose_name="Período", help_text="Mes de auditoría (AAAA-MM)")
+    archivo = models.CharField(max_length=200, unique=True, verbose_name="Archivo")
+    filas = models.PositiveIntegerField(default=0, verbose_name="Filas")
+    
+    personal_min = models.PositiveIntegerField(verbose_name="Personal (id mínimo)")
+    personal_max = models.PositiveIntegerField(verbose_name="Personal (id máximo)")
+    fecha_min = models.DateField(verbose_name="Fecha mínima")
+    fecha_max = models.DateField(verbose_name="Fecha máxima")
+    auditado_desde = models.DateTimeField(verbose_name="Auditado desde")
+    auditado_hasta = models.DateTimeField(verbose_name="Auditado hasta")
+    
+    creado_en = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Segmento de Auditoría"
+        verbose_name_plural = "Segmentos de Auditoría"
+        ordering = ['-auditado_hasta']
+        indexes = [
+            models.Index(fields=['fecha_min', 'fecha_max']),
+            models.Index(fields=['personal_min', 'personal_max']),
+        ]
+    
+    def __str__(self):
+        return f"{self.periodo} - {self.archivo} ({self.filas})"
+
+
+class HuellaImportacion(models.Model):
+    """
+    Huella (hash) de cada fila importada, agrupada por fuente de importación.
+    Permite omitir en re-importaciones las filas que no cambiaron.
+    """
+    TIPO_CHOICES = [
+        ('personal', 'Personal'),
+        ('roster', 'Roster'),
+    ]
+    
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, verbose_name="Tipo")
+    fuente = models.CharField(
+        max_length=200,
+        verbose_name="Fuente",
+        help_text="Origen lógico de la importación (hoja, período, etc.)"
+    )
+    clave = models.CharField(
+        max_length=100,
+        verbose_name="Clave",
+        help_text="Identificador de la fila dentro de la fuente (ej. DNI)"
+    )
+    huella = models.CharField(max_length=32, verbose_name="Huella")
+    
+    actualizado_en = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Huella de Importación"
+        verbose_name_plural = "Huellas de Importación"
+        unique_together = ['tipo', 'fuente', 'clave']
+        indexes = [
+            models.Index(fields=['tipo', 'clave']),
+        ]
+    
+    def __str__(self):
+        return f"{self.tipo} - {self.fuente} - {self.clave}"
+
+
+class MarcaAguaExportacion(models.Model):
+    """
+    Última marca de agua (actualizado_en/creado_en) entregada a un consumidor
+    de exportaciones analíticas, para que las cargas nocturnas pidan solo cambios.
+    """
+    consumidor = models.CharField(max_length=100, verbose_name="Consumidor")
+    dataset = models.CharField(max_length=50, verbose_name="Dataset")
+    marca = models.DateTimeField(null=True, blank=True, verbose_name="Marca de Agua")
+    filas = models.PositiveIntegerField(default=0, verbose_name="Filas de la Última Exportación")
+    
+    actualizado_en = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Marca de Agua de Exportación"
+        verbose_name_plural = "Marcas de Agua de Exportación"
+        unique_together = ['consumidor', 'dataset']
+    
+    def __str__(self):
+        return f"{self.consumidor} - {self.dataset} - {self.marca}"
+
+
+class ContadorAprobacion(models.Model):
+    """
+    Conteo desnormalizado de celdas de roster por área y estado.
+
+    Borradores y pendientes se cuentan sin fecha; los aprobados, por día de
+    aprobación. Lo mantienen las rutas de escritura del roster (ver contadores.py).
+    """
+    clave = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name="Clave",
+        help_text="área:estado:fecha"
+    )
+    area = models.ForeignKey(
+        Area,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='contadores_aprobacion',
+        verbose_name="Área"
+    )
+    estado = models.CharField(max_length=20, choices=Roster.ESTADO_CHOICES, verbose_name="Estado")
+    fecha = models.DateField(null=True, blank=True, verbose_name="Fecha de Aprobación")
+    total = models.IntegerField(default=0, verbose_name="Total")
+    
+    actualizado_en = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Contador de Aprobaciones"
+        verbose_name_plural = "Contadores de Aprobaciones"
+        indexes = [
+            models.Index(fields=['area', 'estado', 'fecha']),
+        ]
+    
+    def __str__(self):
+        return f"{self.clave} = {self.total}"
+
+
+class CoberturaDiaria(models.Model):
+    """
+    Celdas de roster por día, subárea y categoría de código.
+
+    La dotación del día y los huecos frente a SubArea.dotacion_minima se leen
+    de estas filas en lugar de contar Roster. La mantienen las rutas de
+    escritura del roster (ver cobertura.py).
+    """
+    CATEGORIA_CHOICES = [
+        ('presencia', 'Presencia (T/TR)'),
+        ('descanso', 'Descanso'),
+        ('ausencia', 'Ausencia'),
+        ('otro', 'Otro'),
+    ]
+    
+    clave = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name="Clave",
+        help_text="fecha:subárea:categoría"
+    )
+    fecha = models.DateField(verbose_name="Fecha")
+    area = models.ForeignKey(
+        Area,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='coberturas',
+        verbose_name="Área"
+    )
+    subarea = models.ForeignKey(
+        SubArea,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='coberturas',
+        verbose_name="SubÁrea"
+    )
+    categoria = models.CharField(max_length=20, choices=CATEGORIA_CHOICES, verbose_name="Categoría")
+    total = models.IntegerField(default=0, verbose_name="Total")
+    
+    actualizado_en = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Cobertura Diaria"
+        verbose_name_plural = "Coberturas Diarias"
+        indexes = [
+            models.Index(fields=['fecha', 'area']),
+            models.Index(fields=['subarea', 'fecha']),
+        ]
+    
+    def __str__(self):
+        return f"{self.clave} = {self.total}"
+
+
+class Notificacion(models.Model):
+    """
+    Bandeja de salida de notificaciones de aprobación.
+
+    Los eventos se agregan en la misma transacción que el cambio y se envían
+    después agrupados por destinatario (ver notificaciones.py).
+    """
+    EVENTO_CHOICES = [
+        ('enviado', 'Cambio enviado a aprobación'),
+        ('aprobado', 'Cambio aprobado'),
+        ('rechazado', 'Cambio rechazado'),
+    ]
+    
+    destinatario = models.EmailField(verbose_name="Destinatario")
+    evento = models.CharField(max_length=20, choices=EVENTO_CHOICES, verbose_name="Evento")
+    mensaje = models.CharField(max_length=300, verbose_name="Mensaje")
+    enviado_en = models.DateTimeField(null=True, blank=True, verbose_name="Enviado en")
+    
+    creado_en = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Notificación"
+        verbose_name_plural = "Notificaciones"
+        indexes = [
+            models.Index(
+                fields=['destinatario', 'creado_en'],
+                condition=models.Q(enviado_en__isnull=True),
+                name='notificacion_por_enviar_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.destinatario} - {self.evento} - {self.creado_en}"
@@ -0,0 +1,162 @@
+"""
+Notificaciones de aprobación con bandeja de salida y resúmenes por destinatario.
+
+Las vistas y servicios agregan los eventos (envío a aprobación, aprobación,
+rechazo) con un solo bulk_create dentro de la transacción del cambio. La
+tarea periódica enviar_resumenes agrupa los eventos de cada destinatario
+cuya notificación más antigua superó la ventana configurada y los entrega
+como un único correo, usando una sola conexión SMTP para todo el lote.
+"""
+from collections import defaultdict
+from datetime import timedelta
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import Personal, Notificacion
+
+logger = logging.getLogger('personal.business')
+
+ASUNTOS_EVENTO = dict(Notificacion.EVENTO_CHOICES)
+
+
+def _correos(personal_qs):
+    """{personal_id: correo} usando el correo del usuario, el corporativo o el personal."""
+    correos = {}
+    for pk, correo_usuario, corporativo, personal in personal_qs.values_list(
+        'pk', 'usuario__email', 'correo_corporativo', 'correo_personal'
+    ):
+        correo = correo_usuario or corporativo or personal
+        if correo:
+            correos[pk] = correo
+    return correos
+
+
+def encolar(notificaciones):
+    """Agrega las notificaciones a la bandeja de salida con una sola inserción."""
+    if notificaciones:
+        Notificacion.objects.bulk_create(notificaciones)
+    return len(notificaciones)
+
+
+def notificar_envio(personal, cantidad):
+    """
+    Avisa a los responsables del área de la persona que tiene cambios por aprobar.
+
+    Returns:
+        int: Notificaciones encoladas
+    """
+    if not cantidad or not personal.subarea_id:
+        return 0
+    responsables = Personal.objects.filter(areas_responsable__subareas=personal.subarea_id).distinct()
+    mensaje = f"{personal.apellidos_nombres} envió {cantidad} cambio(s) de roster para aprobación"
+    return encolar([
+        Notificacion(destinatario=correo, evento='enviado', mensaje=mensaje[:300])
+        for correo in set(_correos(responsables).values())
+    ])
+
+
+def notificar_resolucion(rosters, evento, usuario=None):
+    """
+    Avisa a cada persona la aprobación o rechazo de sus celdas de roster.
+
+    Args:
+        rosters: Celdas resueltas (instancias de Roster)
+        evento: 'aprobado' o 'rechazado'
+        usuario: Usuario que resolvió
+
+    Returns:
+        int: Notificaciones encoladas
+    """
+    rosters = list(rosters)
+    if not rosters:
+        return 0
+    correos = _correos(Personal.objects.filter(pk__in={roster.personal_id for roster in rosters}))
+    accion = 'aprobado' if evento == 'aprobado' else 'rechazado'
+    por = f" por {usuario.get_full_name() or usuario.username}" if usuario else ''
+    return encolar([
+        Notificacion(
+            destinatario=correos[roster.personal_id],
+            evento=evento,
+            mensaje=f"Cambio del {roster.fecha:%d/%m/%Y} ({roster.codigo}) {accion}{por}"[:300]
+        )
+        for roster in rosters if roster.personal_id in correos
+    ])
+
+
+def _resumen(destinatario, notificaciones):
+    lineas = [
+        f"- {timezone.localtime(notificacion.creado_en):%d/%m %H:%M} {notificacion.mensaje}"
+        for notificacion in notificaciones
+    ]
+    asunto = f"Resumen de cambios de roster ({len(notificaciones)})"
+    cuerpo = "Novedades del sistema de roster:\n\n" + "\n".join(lineas)
+    return EmailMessage(asunto, cuerpo, settings.DEFAULT_FROM_EMAIL, [destinatario])
+
+
+def enviar_resumenes(ventana=None, max_destinatarios=None, ahora=None):
+    """
+    Envía un resumen por destinatario con todas sus notificaciones pendientes.
+
+    Solo se consideran destinatarios cuya notificación más antigua tiene al
+    menos `ventana` de antigüedad, así los eventos cercanos se agrupan en un
+    mismo correo. Las filas se bloquean con SKIP LOCKED para que dos
+    trabajadores no envíen el mismo resumen.
+
+    Args:
+        ventana: timedelta de agrupación (por defecto NOTIFICACIONES_VENTANA_MINUTOS)
+        max_destinatarios: Resúmenes por ejecución (por defecto NOTIFICACIONES_MAX_DESTINATARIOS)
+
+    Returns:
+        dict: {'enviados': correos enviados, 'notificaciones': filas marcadas, 'errores': [...]}
+    """
+    if ventana is None:
+        ventana = timedelta(minutes=settings.NOTIFICACIONES_VENTANA_MINUTOS)
+    max_destinatarios = max_destinatarios or settings.NOTIFICACIONES_MAX_DESTINATARIOS
+    ahora = ahora or timezone.now()
+    errores = []
+
+    with transaction.atomic():
+        listos = list(
+            Notificacion.objects.filter(enviado_en__isnull=True)
+            .values('destinatario')
+            .annotate(primera=Min('creado_en'))
+            .filter(primera__lte=ahora - ventana)
+            .order_by('primera')
+            .values_list('destinatario', flat=True)[:max_destinatarios]
+        )
+        if not listos:
+            return {'enviados': 0, 'notificaciones': 0, 'errores': errores}
+
+        por_destinatario = defaultdict(list)
+        for notificacion in Notificacion.objects.select_for_update(skip_locked=True).filter(
+            destinatario__in=listos, enviado_en__isnull=True
+        ).order_by('destinatario', 'creado_en'):
+            por_destinatario[notificacion.destinatario].append(notificacion)
+
+        enviadas = []
+        conexion = get_connection(fail_silently=False)
+        try:
+            conexion.open()
+            for destinatario, notificaciones in por_destinatario.items():
+                try:
+                    conexion.send_messages([_resumen(destinatario, notificaciones)])
+                except Exception as e:
+                    # Un destinatario rechazado no bloquea al resto del lote
+                    errores.append(f"{destinatario}: {e}")
+                    continue
+                enviadas.extend(notificacion.pk for notificacion in notificaciones)
+        finally:
+            conexion.close()
+
+        Notificacion.objects.filter(pk__in=enviadas).update(enviado_en=ahora)
+
+    enviados = len(por_destinatario) - len(errores)
+    logger.info(f"Resúmenes de notificación enviados: {enviados}, {len(enviadas)} notificaciones")
+    if errores:
+        logger.warning(f"Errores al enviar resúmenes: {errores}")
+    return {'enviados': enviados, 'notificaciones': len(enviadas), 'errores': errores}
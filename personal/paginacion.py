@@ -0,0 +1,170 @@
+"""
+Paginación por llave (keyset / seek) para listas largas.
+
+En lugar de OFFSET, cada página filtra a partir de la última fila de la
+anterior por (campo, id) en orden descendente. Con un índice sobre esas
+columnas el costo de una página profunda es el mismo que el de la primera.
+"""
+import base64
+from datetime import datetime
+import logging
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+logger = logging.getLogger('personal.business')
+
+TAMANO_PAGINA_KEYSET = 50
+
+
+def codificar_cursor(valor, pk):
+    """Cursor opaco (base64 url-safe) para continuar después de (valor, pk)."""
+    texto = f"{valor.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, convertir=datetime.fromisoformat):
+    """Retorna (valor, pk) o None si el cursor no es válido; `convertir` interpreta el valor."""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valor, pk = base64.urlsafe_b64decode(cursor + relleno).decode().split('|')
+        return convertir(valor), int(pk)
+    except (ValueError, UnicodeDecodeError, ValidationError):
+        logger.warning(f"Cursor de paginación inválido: {cursor!r}")
+        return None
+
+
+def _filtro_keyset(queryset, campo, valor, pk, descendente):
+    """Filas posteriores a (valor, pk) en el orden de la página."""
+    # El límite <=/>= permite recorrer el índice por rango; el OR desempata por id
+    if descendente:
+        return queryset.filter(**{f'{campo}__lte': valor}).filter(Q(**{f'{campo}__lt': valor}) | Q(pk__lt=pk))
+    return queryset.filter(**{f'{campo}__gte': valor}).filter(Q(**{f'{campo}__gt': valor}) | Q(pk__gt=pk))
+
+
+def paginar_keyset(queryset, cursor=None, tamano=TAMANO_PAGINA_KEYSET, campo='actualizado_en'):
+    """
+    Página de un queryset ordenado por (campo, id) descendente.
+
+    Args:
+        queryset: QuerySet ya filtrado
+        cursor: Cursor devuelto por la página anterior (None = primera página)
+        tamano: Filas por página
+        campo: Campo de fecha/hora por el que se ordena
+
+    Returns:
+        (filas, siguiente): lista de objetos y cursor de la página siguiente (None si es la última)
+    """
+    queryset = queryset.order_by(f'-{campo}', '-pk')
+    posicion = decodificar_cursor(cursor) if cursor else None
+    if posicion:
+        queryset = _filtro_keyset(queryset, campo, *posicion, descendente=True)
+
+    filas = list(queryset[:tamano + 1])
+    siguiente = None
+    if len(filas) > tamano:
+        filas = filas[:tamano]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(getattr(ultima, campo), ultima.pk)
+    return filas, siguiente
+
+
+# ============================================================================
+# PAGINACIÓN DE LA API
+# ============================================================================
+
+class PaginacionKeyset(BasePagination):
+    """
+    Paginación de la API por (campo, id), sin COUNT(*) ni OFFSET.
+
+    La respuesta trae `next` (URL de la página siguiente o None) y `results`.
+    El orden es descendente; ?ordering=<campo> lo invierte. ?page_size=
+    ajusta el tamaño hasta `max_page_size`.
+    """
+    campo = None
+    page_size = TAMANO_PAGINA_KEYSET
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginar_con(queryset, [], request, view)
+
+    def paginar_con(self, queryset, filas, request, view=None):
+        """
+        Página que combina un queryset con filas ya cargadas en memoria
+        (p. ej. auditorías archivadas), ordenadas juntas por (campo, id).
+
+        Un cursor inválido responde 400 (ParseError).
+        """
+        self.request = request
+        tamano = self._tamano(request)
+        descendente = request.query_params.get('ordering') != self.campo
+        posicion = None
+        if request.query_params.get(self.cursor_query_param):
+            campo_modelo = queryset.model._meta.get_field(self.campo)
+            posicion = decodificar_cursor(
+                request.query_params[self.cursor_query_param], convertir=campo_modelo.to_python
+            )
+            if posicion is None:
+                raise ParseError('Cursor de paginación inválido')
+
+        orden = f'-{self.campo}' if descendente else self.campo
+        queryset = queryset.order_by(orden, '-pk' if descendente else 'pk')
+        if posicion:
+            queryset = _filtro_keyset(queryset, self.campo, *posicion, descendente=descendente)
+        pagina = list(queryset[:tamano + 1])
+
+        if filas:
+            def llave(fila):
+                return (getattr(fila, self.campo), fila.pk)
+
+            if posicion and descendente:
+                filas = [fila for fila in filas if llave(fila) < posicion]
+            elif posicion:
+                filas = [fila for fila in filas if llave(fila) > posicion]
+            pagina = sorted(pagina + filas, key=llave, reverse=descendente)[:tamano + 1]
+
+        self.siguiente = None
+        if len(pagina) > tamano:
+            pagina = pagina[:tamano]
+            ultima = pagina[-1]
+            self.siguiente = codificar_cursor(getattr(ultima, self.campo), ultima.pk)
+        return pagina
+
+    def get_paginated_response(self, data):
+        siguiente = None
+        if self.siguiente:
+            siguiente = replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, self.siguiente
+            )
+        return Response({'next': siguiente, 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def _tamano(self, request):
+        try:
+            tamano = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return min(max(tamano, 1), self.max_page_size)
+
+
+class PaginacionRoster(PaginacionKeyset):
+    campo = 'fecha'
+
+
+class PaginacionAuditoria(PaginacionKeyset):
+    campo = 'creado_en'
@@ -77,6 +77,25 @@ def filtrar_personal(user):
     return Personal.objects.none()
 
 
+def clave_alcance(user):
+    """
+    Identificador estable del alcance de datos que ve el usuario.
+
+    Usuarios con el mismo alcance (p. ej. responsables de las mismas áreas)
+    obtienen los mismos resultados de filtrar_personal/filtrar_subareas, por
+    lo que pueden compartir archivos exportados en caché.
+    """
+    if user.is_superuser:
+        return 'todos'
+    areas = sorted(get_areas_responsable(user).values_list('pk', flat=True))
+    if areas:
+        return 'areas-' + '-'.join(str(pk) for pk in areas)
+    personal = getattr(user, 'personal_data', None)
+    if personal:
+        return f'personal-{personal.pk}'
+    return 'ninguno'
+
+
 def puede_editar_personal(user, personal):
     """Verifica si el usuario puede editar un personal específico."""
     if user.is_superuser:
@@ -112,20 +131,17 @@ def get_context_usuario(user):
     """
     Retorna contexto común para el usuario (gerencia, es_responsable, etc).
     """
-    from .models import Roster
+    from .contadores import totales_aprobacion
     
     es_responsable = es_responsable_area(user)
     areas = get_areas_responsable(user) if es_responsable else Area.objects.none()
     
-    # Contar cambios pendientes de aprobación
+    # Cambios pendientes de aprobación (suma de los contadores por área)
     cambios_pendientes = 0
     if user.is_superuser:
-        cambios_pendientes = Roster.objects.filter(estado='pendiente').count()
+        cambios_pendientes = totales_aprobacion()['pendientes']
     elif areas.exists():
-        cambios_pendientes = Roster.objects.filter(
-            estado='pendiente',
-            personal__subarea__area__in=areas
-        ).count()
+        cambios_pendientes = totales_aprobacion(areas)['pendientes']
     
     return {
         'es_responsable': es_responsable,
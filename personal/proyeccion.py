@@ -0,0 +1,133 @@
+"""
+Proyección de saldos de días libres sobre el roster planificado.
+
+validar_saldo_dl solo mira el saldo con todas las celdas cargadas. Aquí se
+arma una matriz persona × día con los códigos planificados del horizonte y
+las curvas de saldo se obtienen con sumas acumuladas de NumPy sobre esa
+matriz, aplicando la misma fórmula de Personal.validar_saldo_dl en cada día:
+
+    corte 2025 - DLA + round(T / factor del régimen + TR / 2.5) - DL
+
+Las celdas anteriores al horizonte entran como conteos iniciales (una
+consulta agregada); las del horizonte con una sola consulta de filas.
+"""
+from datetime import timedelta
+import logging
+
+import numpy as np
+
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Roster
+from .saldos import CODIGOS_SALDO
+
+logger = logging.getLogger('personal.business')
+
+# TR siempre es 5x2: cada 2.5 días TR generan un día libre
+FACTOR_TR = 5.0 / 2.0
+
+MAX_DIAS_PROYECCION = 366
+
+# Valor de cada código en la matriz (0 = sin celda o código sin efecto en el saldo)
+_INDICE_CODIGO = {codigo: indice for indice, codigo in enumerate(CODIGOS_SALDO, start=1)}
+
+
+def curvas_saldo(matriz, previos, corte, factores):
+    """
+    Saldo de días libres de cada persona al cierre de cada día.
+
+    Args:
+        matriz: ndarray (personas, días) con el índice de CODIGOS_SALDO (desde 1) de cada celda
+        previos: ndarray (personas, len(CODIGOS_SALDO)) con los conteos anteriores al horizonte
+        corte: ndarray (personas,) con los días libres al corte 2025
+        factores: ndarray (personas,) con los días T necesarios por día libre
+
+    Returns:
+        ndarray (personas, días) de saldos
+    """
+    acumulados = {
+        codigo: previos[:, indice - 1, None] + np.cumsum(matriz == indice, axis=1, dtype=np.int32)
+        for codigo, indice in _INDICE_CODIGO.items()
+    }
+    # np.round redondea al par como round() de Python, igual que calcular_dias_libres_ganados
+    ganados = np.round(acumulados['T'] / factores[:, None] + acumulados['TR'] / FACTOR_TR)
+    return corte[:, None] - acumulados['DLA'] + ganados - acumulados['DL']
+
+
+def primer_dia_negativo(saldos):
+    """Índice del primer día con saldo negativo por persona (-1 si nunca baja de cero)."""
+    negativos = saldos < 0
+    return np.where(negativos.any(axis=1), negativos.argmax(axis=1), -1)
+
+
+def proyectar_saldos(personal_qs, desde=None, dias=90, incluir_curvas=False):
+    """
+    Proyecta los saldos de días libres de un grupo de personas.
+
+    Args:
+        personal_qs: QuerySet de Personal a proyectar
+        desde: Primer día del horizonte (por defecto hoy)
+        dias: Largo del horizonte en días
+        incluir_curvas: Si es True agrega el saldo de cada día
+
+    Returns:
+        dict: {'desde', 'hasta', 'personal': [{'personal', 'apellidos_nombres', 'nro_doc',
+        'saldo_inicial', 'saldo_final', 'saldo_minimo', 'primera_fecha_negativa', ['saldos']}]}
+    """
+    desde = desde or timezone.localdate()
+    hasta = desde + timedelta(days=dias - 1)
+    personas = list(personal_qs.only(
+        'id', 'apellidos_nombres', 'nro_doc', 'regimen_turno', 'dias_libres_corte_2025'
+    ).order_by('apellidos_nombres', 'pk'))
+    resultado = {'desde': desde.isoformat(), 'hasta': hasta.isoformat(), 'personal': []}
+    if not personas:
+        return resultado
+
+    fila_de = {persona.pk: fila for fila, persona in enumerate(personas)}
+    ids = list(fila_de)
+    previos = np.zeros((len(personas), len(CODIGOS_SALDO)), dtype=np.int32)
+    for personal_id, codigo, total in Roster.objects.filter(
+        personal_id__in=ids, codigo__in=CODIGOS_SALDO, fecha__lt=desde
+    ).values_list('personal_id', 'codigo').annotate(total=Count('id')).order_by():
+        previos[fila_de[personal_id], _INDICE_CODIGO[codigo] - 1] = total
+
+    filas, columnas, valores = [], [], []
+    for personal_id, fecha, codigo in Roster.objects.filter(
+        personal_id__in=ids, codigo__in=CODIGOS_SALDO, fecha__range=(desde, hasta)
+    ).values_list('personal_id', 'fecha', 'codigo').iterator(chunk_size=5000):
+        filas.append(fila_de[personal_id])
+        columnas.append((fecha - desde).days)
+        valores.append(_INDICE_CODIGO[codigo])
+    matriz = np.zeros((len(personas), dias), dtype=np.int8)
+    matriz[filas, columnas] = valores
+
+    corte = np.array([float(persona.dias_libres_corte_2025) for persona in personas])
+    factores = np.array([persona.factor_turno for persona in personas], dtype=float)
+    saldos = curvas_saldo(matriz, previos, corte, factores)
+    # Una columna vacía deja solo los conteos previos: el saldo antes del horizonte
+    iniciales = curvas_saldo(np.zeros((len(personas), 1), dtype=np.int8), previos, corte, factores)[:, 0]
+    primeros = primer_dia_negativo(saldos)
+    minimos = saldos.min(axis=1)
+
+    for fila, persona in enumerate(personas):
+        entrada = {
+            'personal': persona.pk,
+            'apellidos_nombres': persona.apellidos_nombres,
+            'nro_doc': persona.nro_doc,
+            'saldo_inicial': float(iniciales[fila]),
+            'saldo_final': float(saldos[fila, -1]),
+            'saldo_minimo': float(minimos[fila]),
+            'primera_fecha_negativa': (
+                (desde + timedelta(days=int(primeros[fila]))).isoformat() if primeros[fila] >= 0 else None
+            ),
+        }
+        if incluir_curvas:
+            entrada['saldos'] = saldos[fila].tolist()
+        resultado['personal'].append(entrada)
+
+    logger.debug(
+        f"Proyección de saldos: {len(personas)} personas x {dias} días, "
+        f"{int((primeros >= 0).sum())} con saldo negativo"
+    )
+    return resultado
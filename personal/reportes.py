@@ -0,0 +1,185 @@
+"""
+Motor de reportes mensuales calculados en la base de datos.
+
+Los totales se obtienen con GROUP BY y agregación condicional
+(`Count(..., filter=Q(...))`), de modo que la BD devuelve una fila por
+persona o por área en lugar de una fila por día de roster. El Excel se
+escribe con el motor de exportación en streaming y los meses cerrados se
+sirven desde la caché de archivos.
+"""
+from calendar import monthrange
+from datetime import date
+import logging
+
+from django.db.models import Count, Q
+
+from .catalogos import CODIGOS_ROSTER
+from .exportacion import (
+    TAMANO_CURSOR, abrir_libro, columna, escribir_hoja, firma_consulta, hash_version,
+    registrar_exportacion
+)
+from .models import SubArea, Personal, Roster
+from .saldos import CODIGOS_SALDO
+
+logger = logging.getLogger('personal.business')
+
+
+def limites_mes(anio, mes):
+    return date(anio, mes, 1), date(anio, mes, monthrange(anio, mes)[1])
+
+
+def mes_cerrado(anio, mes, hoy=None):
+    """Un mes está cerrado cuando ya terminó (sus datos no deberían cambiar)."""
+    return limites_mes(anio, mes)[1] < (hoy or date.today())
+
+
+def mes_anterior(hoy=None):
+    hoy = hoy or date.today()
+    return (hoy.year - 1, 12) if hoy.month == 1 else (hoy.year, hoy.month - 1)
+
+
+def pivot_codigos(celdas, campos_persona):
+    """
+    Tabla persona × código de un queryset de Roster, agregada en la BD.
+
+    Args:
+        celdas: QuerySet de Roster ya filtrado
+        campos_persona: Campos de la persona a incluir (ej. 'personal__nro_doc')
+
+    Returns:
+        (codigos, filas): códigos presentes y cursor de tuplas
+        (*campos_persona, total_codigo..., total)
+    """
+    presentes = set(celdas.order_by().values_list('codigo', flat=True).distinct())
+    orden = {codigo: indice for indice, (codigo, _) in enumerate(CODIGOS_ROSTER)}
+    codigos = sorted(presentes, key=lambda codigo: (orden.get(codigo, len(orden)), codigo))
+
+    totales = {f'c{indice}': Count('pk', filter=Q(codigo=codigo)) for indice, codigo in enumerate(codigos)}
+    consulta = celdas.order_by(
+        'personal__apellidos_nombres', 'personal_id'
+    ).values(
+        'personal_id', *campos_persona
+    ).annotate(total=Count('pk'), **totales).values_list(*campos_persona, *totales, 'total')
+    return codigos, consulta.iterator(chunk_size=TAMANO_CURSOR)
+
+
+def dotacion_por_area(anio, mes):
+    """
+    Dotación al cierre del mes, altas y ceses por área (un GROUP BY sobre Personal).
+
+    Returns:
+        QuerySet de tuplas (area, dotacion, altas, ceses) ordenado por área
+    """
+    primer_dia, ultimo_dia = limites_mes(anio, mes)
+    vigente = (
+        (Q(fecha_alta__isnull=True) | Q(fecha_alta__lte=ultimo_dia))
+        & (Q(fecha_cese__isnull=True) | Q(fecha_cese__gt=ultimo_dia))
+    )
+    return Personal.objects.values('subarea__area__nombre').annotate(
+        dotacion=Count('pk', filter=vigente),
+        altas=Count('pk', filter=Q(fecha_alta__gte=primer_dia, fecha_alta__lte=ultimo_dia)),
+        ceses=Count('pk', filter=Q(fecha_cese__gte=primer_dia, fecha_cese__lte=ultimo_dia)),
+    ).order_by('subarea__area__nombre').values_list(
+        'subarea__area__nombre', 'dotacion', 'altas', 'ceses'
+    )
+
+
+def movimientos_saldo(anio, mes):
+    """
+    Movimientos del saldo de días libres de cada persona en el mes.
+
+    Los conteos del mes y acumulados al cierre salen de una sola consulta
+    agregada; el saldo se calcula con las mismas reglas de Personal usadas
+    al validar DL/DLA.
+
+    Yields:
+        (DNI, nombre, régimen, T, TR, ganados, DL, DLA, saldo_inicial, saldo_final)
+    """
+    primer_dia, ultimo_dia = limites_mes(anio, mes)
+    agregados = {}
+    for codigo in CODIGOS_SALDO:
+        agregados[f'{codigo}_mes'] = Count('pk', filter=Q(codigo=codigo, fecha__gte=primer_dia))
+        agregados[f'{codigo}_acum'] = Count('pk', filter=Q(codigo=codigo))
+    conteos = {
+        fila.pop('personal_id'): fila
+        for fila in Roster.objects.filter(
+            fecha__lte=ultimo_dia, codigo__in=CODIGOS_SALDO
+        ).values('personal_id').annotate(**agregados).order_by()
+    }
+
+    personas = Personal.objects.filter(pk__in=conteos.keys()).order_by('apellidos_nombres', 'pk').only(
+        'nro_doc', 'apellidos_nombres', 'regimen_turno', 'dias_libres_corte_2025'
+    )
+    for persona in personas.iterator(chunk_size=TAMANO_CURSOR):
+        fila = conteos[persona.pk]
+        al_cierre = {codigo: fila[f'{codigo}_acum'] for codigo in CODIGOS_SALDO}
+        al_inicio = {codigo: al_cierre[codigo] - fila[f'{codigo}_mes'] for codigo in CODIGOS_SALDO}
+        saldo_inicial = persona.validar_saldo_dl(conteos=al_inicio)[2]
+        saldo_final = persona.validar_saldo_dl(conteos=al_cierre)[2]
+        ganados = (
+            persona.calcular_dias_libres_ganados(al_cierre)
+            - persona.calcular_dias_libres_ganados(al_inicio)
+        )
+        yield (
+            persona.nro_doc, persona.apellidos_nombres, persona.regimen_turno,
+            fila['T_mes'], fila['TR_mes'], ganados, fila['DL_mes'], fila['DLA_mes'],
+            saldo_inicial, saldo_final,
+        )
+
+
+def exportar_reporte_mensual(destino, anio, mes):
+    """
+    Escribe el reporte mensual: códigos por persona, dotación por área y saldos.
+
+    Args:
+        destino: Ruta o archivo binario donde escribir el .xlsx
+        anio: Año del reporte
+        mes: Mes del reporte
+    """
+    primer_dia, ultimo_dia = limites_mes(anio, mes)
+    celdas = Roster.objects.filter(fecha__gte=primer_dia, fecha__lte=ultimo_dia)
+    campos_persona = [
+        'personal__nro_doc', 'personal__apellidos_nombres',
+        'personal__subarea__area__nombre', 'personal__subarea__nombre'
+    ]
+    codigos, filas_codigos = pivot_codigos(celdas, campos_persona)
+
+    with abrir_libro(destino) as libro:
+        escribir_hoja(libro, 'Codigos', [
+            columna('DNI', Personal, 'nro_doc', texto=True),
+            columna('ApellidosNombres', ancho=40),
+            columna('Area', ancho=30),
+            columna('SubArea', ancho=30),
+        ] + [columna(codigo, ancho=5) for codigo in codigos] + [columna('Total', ancho=5)], filas_codigos)
+
+        escribir_hoja(libro, 'Dotacion', [
+            columna('Area', ancho=30),
+            columna('Dotacion', ancho=8),
+            columna('Altas', ancho=6),
+            columna('Ceses', ancho=6),
+        ], ((area or 'Sin área', *totales) for area, *totales in dotacion_por_area(anio, mes)))
+
+        escribir_hoja(libro, 'Saldos', [
+            columna('DNI', Personal, 'nro_doc', texto=True),
+            columna('ApellidosNombres', ancho=40),
+            columna('RegimenTurno', Personal, 'regimen_turno'),
+            columna('T', ancho=4),
+            columna('TR', ancho=4),
+            columna('Ganados', ancho=6),
+            columna('DL', ancho=4),
+            columna('DLA', ancho=4),
+            columna('SaldoInicial', ancho=6),
+            columna('SaldoFinal', ancho=6),
+        ], movimientos_saldo(anio, mes))
+
+    logger.info(f"Reporte mensual {anio}-{mes:02d} generado")
+
+
+def version_reporte_mensual(anio, mes):
+    celdas = Roster.objects.filter(fecha__lte=limites_mes(anio, mes)[1])
+    return hash_version(
+        firma_consulta(celdas), firma_consulta(Personal.objects.all()), firma_consulta(SubArea.objects.all())
+    )
+
+
+registrar_exportacion('reporte_mensual', exportar_reporte_mensual, version_reporte_mensual)
@@ -0,0 +1,75 @@
+"""
+Saldos DL/DLA en memoria para validar cargas masivas de Roster.
+
+Las reglas de saldo viven en Personal (validar_saldo_dl, validar_saldo_dla,
+validar_dla_consecutivos); aquí solo se precargan los conteos de todas las
+personas del lote con una consulta agregada y se mantienen al día a medida
+que se aceptan celdas, sin volver a consultar la BD por cada celda.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Count
+
+from .models import Roster
+
+# Códigos que intervienen en el cálculo de saldos
+CODIGOS_SALDO = ('T', 'TR', 'DL', 'DLA')
+
+
+class ControlSaldos:
+    """Conteos de códigos y fechas DLA por persona, precargados una sola vez."""
+
+    def __init__(self, personas):
+        self.conteos = defaultdict(Counter)
+        self.fechas_dla = defaultdict(set)
+
+        ids = [persona.pk for persona in personas]
+        if not ids:
+            return
+
+        agregados = (
+            Roster.objects.filter(personal_id__in=ids, codigo__in=CODIGOS_SALDO)
+            .values_list('personal_id', 'codigo')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+        for personal_id, codigo, total in agregados:
+            self.conteos[personal_id][codigo] = total
+
+        for personal_id, fecha in Roster.objects.filter(
+            personal_id__in=ids, codigo='DLA'
+        ).values_list('personal_id', 'fecha'):
+            self.fechas_dla[personal_id].add(fecha)
+
+    def validar(self, personal, codigo, fecha):
+        """Aplica las reglas de saldo DL/DLA a una celda. Retorna mensaje de error o None."""
+        conteos = self.conteos[personal.pk]
+        if codigo == 'DLA':
+            es_valido_saldo, mensaje_saldo, _ = personal.validar_saldo_dla(
+                nueva_dla=True, conteos=conteos
+            )
+            if not es_valido_saldo:
+                return f"No se puede usar DLA. {mensaje_saldo}"
+            es_valido_consecutivos, mensaje_consecutivos = personal.validar_dla_consecutivos(
+                fecha, fechas_dla=sorted(self.fechas_dla[personal.pk] - {fecha})
+            )
+            if not es_valido_consecutivos:
+                return mensaje_consecutivos
+        if codigo == 'DL':
+            es_valido_dl, mensaje_dl, _ = personal.validar_saldo_dl(
+                nuevo_dl=True, conteos=conteos
+            )
+            if not es_valido_dl:
+                return mensaje_dl
+        return None
+
+    def registrar(self, personal_id, fecha, codigo, codigo_anterior=None):
+        """Refleja en los conteos una celda aceptada (reemplazando su código anterior)."""
+        conteos = self.conteos[personal_id]
+        if codigo_anterior:
+            conteos[codigo_anterior] -= 1
+            if codigo_anterior == 'DLA':
+                self.fechas_dla[personal_id].discard(fecha)
+        conteos[codigo] += 1
+        if codigo == 'DLA':
+            self.fechas_dla[personal_id].add(fecha)
@@ -1,11 +1,73 @@
 """
 Serializers para la API REST del módulo personal.
 """
+from django.core.exceptions import FieldDoesNotExist
 from rest_framework import serializers
-from .models import Area, SubArea, Personal, Roster, RosterAudit
+from .models import Area, SubArea, Personal, Roster, RosterAudit, LoteAuditoria
+
+
+# ============================================================================
+# CAMPOS PARCIALES (?fields=)
+# ============================================================================
+
+def campos_solicitados(request):
+    """Nombres pedidos con ?fields=a,b,c en una lectura, o None si no se pidió un subconjunto."""
+    if request is None or request.method != 'GET':
+        return None
+    valor = request.query_params.get('fields', '')
+    campos = {nombre.strip() for nombre in valor.split(',') if nombre.strip()}
+    return campos or None
+
+
+def columnas_de_campos(serializer_class, campos):
+    """
+    Columnas del modelo que necesitan los campos indicados de un serializer.
+    
+    Returns:
+        (columnas, relaciones) para .only() y .select_related(), o None si
+        algún campo no se resuelve a columnas (p. ej. un SerializerMethodField)
+    """
+    modelo = serializer_class.Meta.model
+    declarados = serializer_class().fields
+    columnas, relaciones = {modelo._meta.pk.name}, set()
+    for nombre in campos & set(declarados):
+        campo = declarados[nombre]
+        if campo.source == '*':
+            return None
+        ruta = campo.source.split('.')
+        actual = modelo
+        for posicion, parte in enumerate(ruta, start=1):
+            try:
+                campo_modelo = actual._meta.get_field(parte)
+            except FieldDoesNotExist:
+                return None
+            if campo_modelo.many_to_many or campo_modelo.one_to_many:
+                return None
+            if posicion < len(ruta):
+                if not campo_modelo.is_relation:
+                    return None
+                relaciones.add('__'.join(ruta[:posicion]))
+                actual = campo_modelo.related_model
+        columnas.add('__'.join(ruta))
+    return columnas | relaciones, relaciones
+
+
+class CamposParcialesMixin:
+    """Deja en el serializer solo los campos pedidos con ?fields= (en lecturas)."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campos = campos_solicitados(self.context.get('request'))
+        if campos and campos & set(self.fields):
+            for nombre in set(self.fields) - campos:
+                self.fields.pop(nombre)
 
 
 class AreaSerializer(serializers.ModelSerializer):
+    """
+    Los totales se leen de las anotaciones del queryset de AreaViewSet
+    (y los responsables de su prefetch); sin ellas se consultan.
+    """
     responsables_nombres = serializers.SerializerMethodField()
     total_areas = serializers.SerializerMethodField()
     total_personal = serializers.SerializerMethodField()
@@ -20,10 +82,13 @@ class AreaSerializer(serializers.ModelSerializer):
         read_only_fields = ['creado_en', 'actualizado_en']
     
     def get_total_areas(self, obj):
+        if hasattr(obj, 'total_areas'):
+            return obj.total_areas
         return obj.subareas.filter(activa=True).count()
     
     def get_total_personal(self, obj):
-        from django.db.models import Count
+        if hasattr(obj, 'total_personal'):
+            return obj.total_personal
         return Personal.objects.filter(
             subarea__area=obj,
             estado='Activo'
@@ -34,6 +99,7 @@ class AreaSerializer(serializers.ModelSerializer):
 
 
 class SubAreaSerializer(serializers.ModelSerializer):
+    """El total de personal se lee de la anotación de SubAreaViewSet; sin ella se consulta."""
     area_nombre = serializers.CharField(source='area.nombre', read_only=True)
     total_personal = serializers.SerializerMethodField()
     
@@ -41,12 +107,14 @@ class SubAreaSerializer(serializers.ModelSerializer):
         model = SubArea
         fields = [
             'id', 'nombre', 'area', 'area_nombre',
-            'descripcion', 'activa', 'total_personal',
+            'descripcion', 'activa', 'dotacion_minima', 'total_personal',
             'creado_en', 'actualizado_en'
         ]
         read_only_fields = ['creado_en', 'actualizado_en']
     
     def get_total_personal(self, obj):
+        if hasattr(obj, 'total_personal'):
+            return obj.total_personal
         return obj.personal_asignado.filter(estado='Activo').count()
 
 
@@ -95,7 +163,7 @@ class PersonalCreateUpdateSerializer(serializers.ModelSerializer):
         return value
 
 
-class RosterSerializer(serializers.ModelSerializer):
+class RosterSerializer(CamposParcialesMixin, serializers.ModelSerializer):
     personal_nombre = serializers.CharField(source='personal.apellidos_nombres', read_only=True)
     personal_doc = serializers.CharField(source='personal.nro_doc', read_only=True)
     subarea_nombre = serializers.CharField(source='personal.subarea.nombre', read_only=True)
@@ -110,29 +178,23 @@ class RosterSerializer(serializers.ModelSerializer):
         read_only_fields = ['creado_en', 'actualizado_en']
 
 
+class RosterRegistroSerializer(serializers.Serializer):
+    """
+    Celda de una carga masiva. Solo valida el formato (sin consultas); las
+    reglas de negocio se aplican en conjunto en cargar_registros_roster.
+    """
+    personal = serializers.IntegerField(min_value=1)
+    fecha = serializers.DateField()
+    codigo = serializers.CharField(max_length=10)
+    observaciones = serializers.CharField(max_length=300, required=False, allow_blank=True, default='')
+
+
 class RosterBulkCreateSerializer(serializers.Serializer):
     """Serializer para creación masiva de registros de roster."""
-    registros = RosterSerializer(many=True)
-    
-    def create(self, validated_data):
-        registros_data = validated_data.get('registros', [])
-        roster_instances = []
-        
-        for registro_data in registros_data:
-            roster, created = Roster.objects.update_or_create(
-                personal=registro_data['personal'],
-                fecha=registro_data['fecha'],
-                defaults={
-                    'codigo': registro_data.get('codigo', ''),
-                    'observaciones': registro_data.get('observaciones', ''),
-                }
-            )
-            roster_instances.append(roster)
-        
-        return roster_instances
+    registros = RosterRegistroSerializer(many=True, allow_empty=False)
 
 
-class RosterAuditSerializer(serializers.ModelSerializer):
+class RosterAuditSerializer(CamposParcialesMixin, serializers.ModelSerializer):
     personal_nombre = serializers.CharField(source='personal.apellidos_nombres', read_only=True)
     usuario_username = serializers.CharField(source='usuario.username', read_only=True)
     
@@ -144,3 +206,16 @@ class RosterAuditSerializer(serializers.ModelSerializer):
             'usuario', 'usuario_username', 'creado_en'
         ]
         read_only_fields = ['creado_en']
+
+
+class LoteAuditoriaSerializer(serializers.ModelSerializer):
+    usuario_username = serializers.CharField(source='usuario.username', read_only=True)
+    origen_display = serializers.CharField(source='get_origen_display', read_only=True)
+    
+    class Meta:
+        model = LoteAuditoria
+        fields = [
+            'id', 'origen', 'origen_display', 'descripcion', 'usuario', 'usuario_username',
+            'total', 'creado_en', 'deshecho_en', 'deshecho_por'
+        ]
+        read_only_fields = fields
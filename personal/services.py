@@ -10,10 +10,13 @@ import re
 from decimal import Decimal
 from datetime import datetime
 
+from .auditoria import actuando_como, en_lote, encolar_auditorias
 from .models import Area, SubArea, Personal, Roster, RosterAudit
+from .importacion import importar_areas, leer_tabla
+from .notificaciones import notificar_envio, notificar_resolucion
 from .validators import (
     PersonalValidator, RosterValidator,
-    validar_archivo_excel
+    validar_archivo_excel, validar_archivo_importacion
 )
 
 logger = logging.getLogger('personal.business')
@@ -82,10 +85,10 @@ class AreaService:
         logger.info(f"Iniciando importación de gerencias por usuario {usuario.username}")
         
         # Validar archivo
-        validar_archivo_excel(archivo)
+        validar_archivo_importacion(archivo)
         
         try:
-            df = pd.read_excel(archivo, sheet_name='Gerencias')
+            df = leer_tabla(archivo, 'Gerencias', dtype={'Responsable_DNI': str})
         except Exception as e:
             logger.error(f"Error al leer Excel: {str(e)}")
             raise ValidationError(f"Error al leer el archivo Excel: {str(e)}")
@@ -96,75 +99,11 @@ class AreaService:
         if columnas_faltantes:
             raise ValidationError(f"Columnas faltantes: {', '.join(columnas_faltantes)}")
         
-        creados = 0
-        actualizados = 0
-        errores = []
-        
-        for idx, row in df.iterrows():
-            try:
-                nombre = str(row['Nombre']).strip()
-                if not nombre or nombre == 'nan':
-                    continue
-                
-                responsables_list = None
-                fila_con_error = False
-                if 'Responsable_DNI' in row:
-                    responsables_list = []
-                    if pd.notna(row['Responsable_DNI']):
-                        dni_raw = str(row['Responsable_DNI'])
-                        dni_list = [d.strip() for d in re.split(r'[;,]', dni_raw) if d.strip()]
-                        for dni in dni_list:
-                            try:
-                                responsables_list.append(
-                                    Personal.objects.get(nro_doc=dni)
-                                )
-                            except Personal.DoesNotExist:
-                                errores.append(
-                                    f"Fila {idx + 2}: Responsable con DNI {dni} no encontrado"
-                                )
-                                fila_con_error = True
-
-                    if fila_con_error:
-                        continue
-                
-                # Determinar si está activa
-                activa = True
-                if 'Activa' in row and pd.notna(row['Activa']):
-                    activa = str(row['Activa']).strip().lower() in ['sí', 'si', 'yes', '1', 'true']
-                
-                # Crear o actualizar
-                gerencia, created = Area.objects.update_or_create(
-                    nombre=nombre,
-                    defaults={
-                        'descripcion': row.get('Descripcion', '') if pd.notna(row.get('Descripcion')) else '',
-                        'activa': activa,
-                    }
-                )
-                if responsables_list is not None:
-                    gerencia.responsables.set(responsables_list)
-                
-                if created:
-                    creados += 1
-                    logger.info(f"Área creada: {nombre}")
-                else:
-                    actualizados += 1
-                    logger.info(f"Área actualizada: {nombre}")
-            
-            except ValidationError as e:
-                errores.append(f"Fila {idx + 2}: {str(e)}")
-            except Exception as e:
-                logger.error(f"Error en fila {idx + 2}: {str(e)}")
-                errores.append(f"Fila {idx + 2}: Error inesperado - {str(e)}")
-        
-        resultado = {
-            'creados': creados,
-            'actualizados': actualizados,
-            'errores': errores
-        }
+        resultado = importar_areas(df, usuario=usuario.username)
         
         logger.info(
-            f"Importación completada: {creados} creadas, "
-            f"{actualizados} actualizadas, {len(errores)} errores"
+            f"Importación completada: {resultado['creados']} creadas, "
+            f"{resultado['actualizados']} actualizadas, {len(resultado['errores'])} errores"
         )
         
         return resultado
@@ -203,7 +142,6 @@ class RosterService:
         # Validar código
         codigo_validado = RosterValidator.validar_codigo(codigo)
         
-        # Guardar valor anterior para auditoría
         codigo_anterior = roster.codigo
         
         # Actualizar
@@ -219,17 +157,11 @@ class RosterService:
         else:
             roster.estado = 'pendiente'
         
-        roster.save()
-        
-        # Crear registro de auditoría
-        RosterAudit.objects.create(
-            personal=roster.personal,
-            fecha=roster.fecha,
-            campo_modificado='codigo',
-            valor_anterior=codigo_anterior,
-            valor_nuevo=codigo_validado,
-            usuario=usuario
-        )
+        # La auditoría de los campos modificados la registra la señal del roster
+        with actuando_como(usuario):
+            roster.save()
+        if roster.estado == 'pendiente':
+            notificar_envio(roster.personal, 1)
         
         logger.info(
             f"Roster actualizado: {roster.personal} - {roster.fecha} - "
@@ -275,17 +207,9 @@ class RosterService:
         roster.estado = 'aprobado'
         roster.aprobado_por = usuario
         roster.aprobado_en = timezone.now()
-        roster.save()
-        
-        # Auditoría
-        RosterAudit.objects.create(
-            personal=roster.personal,
-            fecha=roster.fecha,
-            campo_modificado='estado',
-            valor_anterior='pendiente',
-            valor_nuevo='aprobado',
-            usuario=usuario
-        )
+        with actuando_como(usuario):
+            roster.save()
+        notificar_resolucion([roster], 'aprobado', usuario)
         
         logger.info(
             f"Cambio aprobado: {roster.personal} - {roster.fecha} - "
@@ -334,16 +258,17 @@ class RosterService:
         # Si existe un valor aprobado anterior, restaurarlo
         # Por ahora, simplemente eliminamos el registro pendiente
         roster.delete()
+        notificar_resolucion([roster], 'rechazado', usuario)
         
-        # Auditoría
-        RosterAudit.objects.create(
-            personal=roster.personal,
+        # Auditoría (la eliminación no pasa por la señal de guardado)
+        encolar_auditorias([RosterAudit(
+            personal_id=roster.personal_id,
             fecha=roster.fecha,
             campo_modificado='estado',
             valor_anterior='pendiente',
             valor_nuevo=f'rechazado: {motivo}',
             usuario=usuario
-        )
+        )])
         
         logger.info(
             f"Cambio rechazado: {roster.personal} - {roster.fecha} - "
@@ -386,71 +311,63 @@ class RosterService:
         actualizados = 0
         errores = []
         
-        for idx, row in df.iterrows():
-            try:
-                # Obtener datos
-                dni = str(row['DNI']).strip()
-                fecha_str = str(row['Fecha']).strip()
-                codigo = str(row['Codigo']).strip().upper()
-                
-                if not dni or dni == 'nan' or not fecha_str or not codigo:
-                    continue
-                
-                # Buscar personal
+        with actuando_como(usuario), en_lote('importacion', usuario, f"Roster desde Excel ({getattr(archivo, 'name', '')})"):
+            for idx, row in df.iterrows():
                 try:
-                    personal = Personal.objects.get(nro_doc=dni)
-                except Personal.DoesNotExist:
-                    errores.append(f"Fila {idx + 2}: Personal con DNI {dni} no encontrado")
-                    continue
+                    # Obtener datos
+                    dni = str(row['DNI']).strip()
+                    fecha_str = str(row['Fecha']).strip()
+                    codigo = str(row['Codigo']).strip().upper()
                 
-                # Parsear fecha
-                try:
-                    if isinstance(row['Fecha'], pd.Timestamp):
-                        fecha = row['Fecha'].date()
-                    else:
-                        fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date()
-                except ValueError:
-                    errores.append(f"Fila {idx + 2}: Formato de fecha inválido: {fecha_str}")
-                    continue
+                    if not dni or dni == 'nan' or not fecha_str or not codigo:
+                        continue
                 
-                # Validar código
-                try:
-                    codigo = RosterValidator.validar_codigo(codigo)
-                except ValidationError as e:
-                    errores.append(f"Fila {idx + 2}: {str(e)}")
-                    continue
+                    # Buscar personal
+                    try:
+                        personal = Personal.objects.get(nro_doc=dni)
+                    except Personal.DoesNotExist:
+                        errores.append(f"Fila {idx + 2}: Personal con DNI {dni} no encontrado")
+                        continue
                 
-                # Crear o actualizar
-                roster, created = Roster.objects.update_or_create(
-                    personal=personal,
-                    fecha=fecha,
-                    defaults={
-                        'codigo': codigo,
-                        'modificado_por': usuario,
-                        'estado': 'aprobado' if usuario.is_superuser else 'pendiente',
-                        'fuente': f'Importación Excel por {usuario.username}'
-                    }
-                )
+                    # Parsear fecha
+                    try:
+                        if isinstance(row['Fecha'], pd.Timestamp):
+                            fecha = row['Fecha'].date()
+                        else:
+                            fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date()
+                    except ValueError:
+                        errores.append(f"Fila {idx + 2}: Formato de fecha inválido: {fecha_str}")
+                        continue
                 
-                if created:
-                    creados += 1
-                else:
-                    actualizados += 1
-                    # Crear auditoría
-                    RosterAudit.objects.create(
+                    # Validar código
+                    try:
+                        codigo = RosterValidator.validar_codigo(codigo)
+                    except ValidationError as e:
+                        errores.append(f"Fila {idx + 2}: {str(e)}")
+                        continue
+                
+                    # Crear o actualizar
+                    roster, created = Roster.objects.update_or_create(
                         personal=personal,
                         fecha=fecha,
-                        campo_modificado='codigo',
-                        valor_anterior='',
-                        valor_nuevo=codigo,
-                        usuario=usuario
+                        defaults={
+                            'codigo': codigo,
+                            'modificado_por': usuario,
+                            'estado': 'aprobado' if usuario.is_superuser else 'pendiente',
+                            'fuente': f'Importación Excel por {usuario.username}'
+                        }
                     )
+                
+                    if created:
+                        creados += 1
+                    else:
+                        actualizados += 1
             
-            except ValidationError as e:
-                errores.append(f"Fila {idx + 2}: {str(e)}")
-            except Exception as e:
-                logger.error(f"Error en fila {idx + 2}: {str(e)}")
-                errores.append(f"Fila {idx + 2}: Error inesperado - {str(e)}")
+                except ValidationError as e:
+                    errores.append(f"Fila {idx + 2}: {str(e)}")
+                except Exception as e:
+                    logger.error(f"Error en fila {idx + 2}: {str(e)}")
+                    errores.append(f"Fila {idx + 2}: Error inesperado - {str(e)}")
         
         resultado = {
             'creados': creados,
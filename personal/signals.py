@@ -1,36 +1,135 @@
 """
 Signals para el módulo personal.
 """
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from .models import Roster, RosterAudit
+from .auditoria import (
+    valores_anteriores, auditorias_de_cambio, auditoria_de_baja, encolar_auditorias, encolar_conteos_celda,
+    instantanea
+)
+from .catalogos import invalidar_catalogos
+from .cobertura import mover_personal as mover_cobertura
+from .contadores import mover_personal
+from .models import Area, SubArea, Personal, Roster, CoberturaDiaria
 
 
 @receiver(pre_save, sender=Roster)
-def audit_roster_changes(sender, instance, **kwargs):
-    """
-    Registra cambios en el roster antes de guardar.
-    """
-    if instance.pk:  # Solo si ya existe (actualización)
-        try:
-            old_instance = Roster.objects.get(pk=instance.pk)
-            
-            # Verificar cambios en campos relevantes
-            campos_a_auditar = ['codigo', 'observaciones']
-            
-            for campo in campos_a_auditar:
-                valor_anterior = str(getattr(old_instance, campo))
-                valor_nuevo = str(getattr(instance, campo))
-                
-                if valor_anterior != valor_nuevo:
-                    # Crear registro de auditoría
-                    RosterAudit.objects.create(
-                        personal=instance.personal,
-                        fecha=instance.fecha,
-                        campo_modificado=campo,
-                        valor_anterior=valor_anterior,
-                        valor_nuevo=valor_nuevo,
-                        usuario=None  # Se puede obtener del request en la vista
-                    )
-        except Roster.DoesNotExist:
-            pass
+def capturar_valores_anteriores(sender, instance, raw=False, **kwargs):
+    """
+    Toma los valores previos del roster desde la instantánea de carga (sin SELECT).
+    """
+    if raw:
+        return
+    instance._anteriores = valores_anteriores(instance)
+
+
+@receiver(post_save, sender=Roster)
+def audit_roster_changes(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Registra en la auditoría los campos que cambiaron; se insertan al confirmar la transacción.
+    """
+    if raw:
+        return
+    anteriores = instance.__dict__.get('_anteriores')
+    if created or anteriores:
+        encolar_auditorias(auditorias_de_cambio(instance, anteriores, update_fields))
+    instance._valores_cargados = instantanea(instance)
+
+
+@receiver(post_save, sender=Roster)
+def actualizar_conteos_roster(sender, instance, raw=False, **kwargs):
+    """
+    Encola para la cobertura diaria y los contadores de aprobación el alta o
+    cambio de la celda; se escriben al confirmar la transacción.
+    """
+    if raw:
+        return
+    encolar_conteos_celda(instance, instance.__dict__.pop('_anteriores', None))
+
+
+@receiver(post_delete, sender=Roster)
+def descontar_conteos_roster(sender, instance, **kwargs):
+    """
+    Encola el descuento de la celda eliminada en la cobertura diaria y los contadores de aprobación.
+    """
+    encolar_conteos_celda(instance, baja=True)
+
+
+@receiver(post_delete, sender=Roster)
+def auditar_baja_roster(sender, instance, **kwargs):
+    """
+    Registra en la auditoría la eliminación de la celda (necesaria para reconstruir el historial).
+    """
+    encolar_auditorias([auditoria_de_baja(instance)])
+
+
+@receiver(pre_save, sender=Personal)
+def detectar_cambio_area(sender, instance, raw=False, **kwargs):
+    """
+    Guarda el área y la subárea anteriores si la persona cambia de subárea
+    (para mover sus contadores y su cobertura).
+    """
+    if raw or not instance.pk:
+        return
+    anterior = Personal.objects.filter(pk=instance.pk).values_list(
+        'subarea_id', 'subarea__area_id'
+    ).first()
+    if anterior and anterior[0] != instance.subarea_id:
+        instance._area_anterior = anterior[1]
+        instance._subarea_anterior = anterior[0]
+
+
+@receiver(post_save, sender=Personal)
+def invalidar_huella_personal(sender, instance, created, **kwargs):
+    """
+    Invalida la huella de importación cuando el personal se edita fuera de la importación.
+    """
+    if not created:
+        from .importacion import invalidar_huellas
+        invalidar_huellas('personal', [instance.nro_doc])
+
+
+@receiver(post_save, sender=Personal)
+def mover_contadores_personal(sender, instance, **kwargs):
+    """
+    Traslada los contadores de aprobación de la persona a su nueva área.
+    """
+    if '_area_anterior' in instance.__dict__:
+        area_anterior = instance.__dict__.pop('_area_anterior')
+        area_nueva = SubArea.objects.filter(pk=instance.subarea_id).values_list('area_id', flat=True).first()
+        mover_personal(instance.pk, area_anterior, area_nueva)
+
+
+@receiver(post_save, sender=Personal)
+def mover_cobertura_personal(sender, instance, **kwargs):
+    """
+    Traslada la cobertura diaria de la persona a su nueva subárea.
+    """
+    if '_subarea_anterior' in instance.__dict__:
+        subarea_anterior = instance.__dict__.pop('_subarea_anterior')
+        mover_cobertura({instance.pk: (subarea_anterior, instance.subarea_id)})
+
+
+@receiver(post_save, sender=SubArea)
+def actualizar_area_cobertura(sender, instance, created, raw=False, **kwargs):
+    """
+    Reasigna el área de la cobertura diaria cuando la subárea cambia de área.
+    """
+    if raw or created:
+        return
+    CoberturaDiaria.objects.filter(subarea=instance).exclude(area_id=instance.area_id).update(
+        area_id=instance.area_id
+    )
+
+
+@receiver(post_save, sender=Area)
+@receiver(post_save, sender=SubArea)
+@receiver(post_save, sender=Personal)
+@receiver(post_delete, sender=Area)
+@receiver(post_delete, sender=SubArea)
+@receiver(post_delete, sender=Personal)
+def invalidar_catalogos_compartidos(sender, **kwargs):
+    """
+    Publica una nueva versión de los catálogos compartidos al cambiar áreas, subáreas o personal.
+    """
+    invalidar_catalogos()
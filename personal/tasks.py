@@ -96,52 +96,34 @@ def procesar_import_excel(archivo_path, tipo_import):
 
 
 @shared_task
-def generar_reporte_mensual(mes, anio):
+def generar_reporte_mensual(mes=None, anio=None):
     """
-    Generar reporte mensual de asistencias.
+    Generar reporte mensual de asistencias (códigos por persona, dotación y saldos).
+    
+    Los totales se calculan en la BD y el archivo queda en la caché de
+    exportaciones, de donde se sirven las descargas del mismo mes.
     
     Args:
-        mes: Número del mes (1-12)
+        mes: Número del mes (1-12); por defecto el mes anterior (recién cerrado)
         anio: Año
     
     Returns:
         dict con ruta del archivo generado
     """
-    from datetime import date
+    import os
+    from .exportacion import obtener_exportacion
+    from .reportes import mes_anterior
+    
+    if mes is None or anio is None:
+        anio, mes = mes_anterior()
     
     try:
-        fecha_inicio = date(anio, mes, 1)
-        if mes == 12:
-            fecha_fin = date(anio + 1, 1, 1)
-        else:
-            fecha_fin = date(anio, mes + 1, 1)
-        
-        roster = Roster.objects.filter(
-            fecha__gte=fecha_inicio,
-            fecha__lt=fecha_fin
-        ).select_related('personal', 'personal__area')
-        
-        data = []
-        for r in roster:
-            data.append({
-                'Fecha': r.fecha,
-                'DNI': r.personal.nro_doc,
-                'Nombres': r.personal.apellidos_nombres,
-                'Area': r.personal.area.nombre if r.personal.area else '',
-                'Codigo': r.codigo,
-                'DiasLibresGanados': float(r.dias_libres_ganados),
-            })
-        
-        df = pd.DataFrame(data)
-        filename = f'reporte_{anio}_{mes:02d}.xlsx'
-        filepath = f'/tmp/{filename}'
-        
-        df.to_excel(filepath, index=False)
+        filepath = obtener_exportacion('reporte_mensual', 'todos', f'{anio}-{mes:02d}', anio, mes)
         
         return {
             'success': True,
             'filepath': filepath,
-            'filename': filename
+            'filename': os.path.basename(filepath)
         }
         
     except Exception as e:
@@ -175,20 +157,103 @@ def enviar_notificacion_email(asunto, mensaje, destinatarios):
 
 
 @shared_task
-def limpiar_datos_antiguos(dias=365):
+def enviar_resumenes_notificaciones():
+    """
+    Envía los resúmenes de notificaciones de aprobación acumulados en la bandeja de salida.
+    """
+    from .notificaciones import enviar_resumenes
+    
+    resultado = enviar_resumenes()
+    return {
+        'success': not resultado['errores'],
+        **resultado
+    }
+
+
+@shared_task
+def tomar_instantaneas_roster():
+    """
+    Toma las instantáneas de roster de los meses con cambios desde la última ejecución.
+    """
+    from .historico import tomar_instantaneas
+    
+    resultado = tomar_instantaneas()
+    return {
+        'success': True,
+        'instantaneas': resultado['instantaneas'],
+        'tomada_en': resultado['tomada_en'].isoformat()
+    }
+
+
+@shared_task
+def limpiar_datos_antiguos(dias=365, archivar=None):
     """
     Limpiar registros de auditoría antiguos.
     
     Args:
-        dias: Días de antigüedad para eliminar
+        dias: Días de antigüedad para retirar de la tabla
+        archivar: Mover la auditoría a segmentos comprimidos en lugar de
+            eliminarla (por defecto AUDITORIA_ARCHIVAR)
     """
     from datetime import timedelta
-    from .models import RosterAudit
+    from django.conf import settings
+    from django.utils import timezone
+    from .archivo_auditoria import archivar_auditorias
+    from .models import RosterAudit, Notificacion
+    
+    if archivar is None:
+        archivar = settings.AUDITORIA_ARCHIVAR
+    fecha_limite = timezone.now() - timedelta(days=dias)
+    if archivar:
+        archivo = archivar_auditorias(fecha_limite)
+        eliminados = 0
+    else:
+        archivo = {'archivados': 0, 'segmentos': 0}
+        eliminados = RosterAudit.objects.filter(creado_en__lt=fecha_limite).delete()[0]
+    notificaciones = Notificacion.objects.filter(enviado_en__lt=fecha_limite).delete()
+    
+    return {
+        'success': True,
+        'eliminados': eliminados,
+        **archivo,
+        'notificaciones_eliminadas': notificaciones[0]
+    }
+
+
+@shared_task
+def pregenerar_exportaciones_roster(anio=None, mes=None):
+    """
+    Genera por adelantado las plantillas de roster de un mes (por defecto el siguiente).
+    
+    Se generan para el alcance completo y para el de cada área con responsables,
+    de modo que las descargas de fin de mes se sirvan desde la caché en disco.
+    
+    Args:
+        anio: Año a generar
+        mes: Mes a generar
+    """
+    from datetime import date
+    from .exportacion import obtener_exportacion
+    from .models import Area
+    
+    if anio is None or mes is None:
+        hoy = date.today()
+        anio, mes = (hoy.year + 1, 1) if hoy.month == 12 else (hoy.year, hoy.month + 1)
+    periodo = f'{anio}-{mes:02d}'
     
-    fecha_limite = datetime.now() - timedelta(days=dias)
-    eliminados = RosterAudit.objects.filter(creado_en__lt=fecha_limite).delete()
+    activos = Personal.objects.filter(estado='Activo')
+    obtener_exportacion('roster', 'todos', periodo, mes, anio, activos)
+    generados = 1
+    
+    for area_id in Area.objects.filter(activa=True, responsables__isnull=False).values_list('pk', flat=True).distinct():
+        obtener_exportacion(
+            'roster', f'areas-{area_id}', periodo, mes, anio,
+            activos.filter(subarea__area__in=[area_id])
+        )
+        generados += 1
     
     return {
         'success': True,
-        'eliminados': eliminados[0]
+        'periodo': periodo,
+        'generados': generados
     }
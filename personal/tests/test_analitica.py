@@ -0,0 +1,106 @@
+"""
+Tests para la exportación columnar (Parquet/CSV) para BI.
+"""
+import csv
+import io
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from personal.models import Personal, Roster, MarcaAguaExportacion
+from personal.analitica import (
+    consulta_dataset, escribir_parquet, exportar_incremental, iterar_csv
+)
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+@pytest.fixture
+def roster():
+    persona = Personal.objects.create(
+        nro_doc='01234567', apellidos_nombres='ALFA', cargo='X', tipo_trab='Empleado',
+        dias_libres_corte_2025=Decimal('2.5')
+    )
+    Roster.objects.bulk_create([
+        Roster(personal=persona, fecha=date(2026, 1, dia), codigo='T' if dia % 2 else 'DL')
+        for dia in range(1, 11)
+    ])
+    return persona
+
+
+@pytest.mark.django_db
+class TestExportarParquet:
+    def test_esquema_columnar_y_lotes(self, roster):
+        destino = io.BytesIO()
+        consulta = consulta_dataset('roster', desde=date(2026, 1, 3), hasta=date(2026, 1, 9))
+
+        resultado = escribir_parquet(destino, 'roster', consulta, tamano_lote=3)
+        destino.seek(0)
+        tabla = pq.read_table(destino)
+
+        assert resultado['filas'] == tabla.num_rows == 7
+        assert tabla.schema.field('fecha').type == pa.date32()
+        assert pa.types.is_dictionary(tabla.schema.field('codigo').type)
+        assert tabla.column('personal_nro_doc').to_pylist()[0] == '01234567'
+        assert tabla.column('fecha').to_pylist()[0] == date(2026, 1, 3)
+
+    def test_personal_decimal_exacto(self, roster):
+        destino = io.BytesIO()
+        escribir_parquet(destino, 'personal', consulta_dataset('personal'))
+        destino.seek(0)
+
+        assert pq.read_table(destino).column('dias_libres_corte_2025').to_pylist() == [Decimal('2.5')]
+
+
+@pytest.mark.django_db
+class TestExportacionIncremental:
+    def test_solo_filas_modificadas_despues_de_la_marca(self, roster):
+        primera = exportar_incremental('roster', 'bi', io.BytesIO())
+        assert primera['filas'] == 10
+
+        cambio = Roster.objects.get(personal=roster, fecha=date(2026, 1, 5))
+        cambio.codigo = 'V'
+        cambio.save()
+        destino = io.StringIO()
+        segunda = exportar_incremental('roster', 'bi', destino, formato='csv')
+
+        filas = list(csv.DictReader(io.StringIO(destino.getvalue())))
+        assert segunda['filas'] == 1
+        assert filas[0]['codigo'] == 'V'
+        assert MarcaAguaExportacion.objects.get(consumidor='bi', dataset='roster').marca == segunda['marca']
+
+        assert exportar_incremental('roster', 'bi', io.BytesIO())['filas'] == 0
+
+    def test_csv_en_bloques(self, roster):
+        bloques = list(iterar_csv('roster', consulta_dataset('roster'), tamano_lote=4))
+
+        assert len(bloques) == 3
+        assert bloques[0].startswith('id,personal_id,personal_nro_doc,fecha,codigo')
+        assert sum(bloque.count('\n') for bloque in bloques) == 11
+
+
+@pytest.mark.django_db
+class TestExportacionAnaliticaEntradas:
+    def test_comando(self, roster, tmp_path):
+        call_command('exportar_analitica', 'roster', 'areas', '--salida', str(tmp_path), stdout=io.StringIO())
+
+        archivos = sorted(p.name.split('_')[0] for p in tmp_path.iterdir())
+        assert archivos == ['areas', 'roster']
+
+    def test_api_requiere_admin_y_entrega_marca(self, roster, client):
+        usuario = User.objects.create_user('u', password='x')
+        client.force_login(usuario)
+        assert client.get('/api/analitica/roster/').status_code == 403
+
+        admin = User.objects.create_superuser('admin', 'a@a.com', 'x')
+        client.force_login(admin)
+        respuesta = client.get('/api/analitica/roster/', {'desde': '2026-01-01', 'hasta': '2026-01-02'})
+
+        assert respuesta.status_code == 200
+        assert 'X-Marca-Agua' in respuesta
+        tabla = pq.read_table(io.BytesIO(b''.join(respuesta.streaming_content)))
+        assert tabla.num_rows == 2
+
+        assert client.get('/api/analitica/desconocido/').status_code == 400
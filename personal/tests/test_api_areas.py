@@ -0,0 +1,48 @@
+"""
+Tests de consultas de las listas de gerencias y subáreas en la API.
+"""
+import pytest
+from django.contrib.auth.models import User
+from personal.models import Area, SubArea, Personal
+
+
+@pytest.mark.django_db
+class TestApiAreas:
+    @pytest.fixture
+    def cliente(self, client):
+        client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'x'))
+        return client
+
+    def _areas(self, cantidad):
+        for n in range(cantidad):
+            area = Area.objects.create(nombre=f'AREA {n}')
+            activa = SubArea.objects.create(nombre=f'SUB {n}', area=area)
+            SubArea.objects.create(nombre=f'SUB {n} B', area=area, activa=False)
+            for m in range(3):
+                persona = Personal.objects.create(
+                    nro_doc=f'{n:04d}{m:04d}', apellidos_nombres=f'PERSONA {n}-{m}', cargo='X',
+                    tipo_trab='Empleado', subarea=activa, estado='Cesado' if m == 2 else 'Activo'
+                )
+                if m == 0:
+                    area.responsables.add(persona)
+
+    def test_lista_de_gerencias_en_consultas_constantes(self, cliente, django_assert_num_queries):
+        self._areas(8)
+        # Sesión, usuario, COUNT de la página, áreas anotadas y prefetch de responsables
+        with django_assert_num_queries(5):
+            datos = cliente.get('/api/gerencias/').json()
+
+        area = datos['results'][0]
+        assert (area['total_areas'], area['total_personal']) == (1, 2)
+        assert area['responsables_nombres'] == ['PERSONA 0-0']
+        assert area['responsables'] == [Personal.objects.get(nro_doc='00000000').pk]
+
+    def test_lista_de_subareas_en_consultas_constantes(self, cliente, django_assert_num_queries):
+        self._areas(8)
+        # Sesión, usuario, COUNT de la página y subáreas anotadas
+        with django_assert_num_queries(4):
+            datos = cliente.get('/api/subareas/').json()
+
+        assert [(subarea['nombre'], subarea['total_personal']) for subarea in datos['results'][:2]] == [
+            ('SUB 0', 2), ('SUB 0 B', 0)
+        ]
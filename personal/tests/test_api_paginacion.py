@@ -0,0 +1,72 @@
+"""
+Tests para la paginación por cursor y los campos parciales de la API.
+"""
+import base64
+import pytest
+from datetime import date
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from personal.models import Area, SubArea, Personal, Roster
+
+
+@pytest.mark.django_db
+class TestApiPaginacion:
+    @pytest.fixture
+    def cliente(self, client):
+        client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'x'))
+        return client
+
+    @pytest.fixture
+    def personas(self):
+        area = Area.objects.create(nombre='AREA')
+        subarea = SubArea.objects.create(nombre='SUB', area=area)
+        personas = [
+            Personal.objects.create(
+                nro_doc=f'0000000{n}', apellidos_nombres=f'PERSONA {n}', cargo='X', tipo_trab='Empleado',
+                subarea=subarea
+            )
+            for n in range(1, 3)
+        ]
+        for persona in personas:
+            for dia in range(1, 4):
+                Roster.objects.create(personal=persona, fecha=date(2026, 3, dia), codigo='T')
+        return personas
+
+    def _recorrer(self, cliente, url, params):
+        filas, respuesta = [], cliente.get(url, params).json()
+        while True:
+            filas += respuesta['results']
+            if not respuesta['next']:
+                return filas
+            respuesta = cliente.get(respuesta['next']).json()
+
+    def test_cursor_recorre_por_fecha_e_id_sin_count(self, cliente, personas):
+        with CaptureQueriesContext(connection) as consultas:
+            filas = self._recorrer(cliente, '/api/roster/', {'page_size': 4})
+
+        esperado = list(Roster.objects.order_by('-fecha', '-id').values_list('id', flat=True))
+        assert [fila['id'] for fila in filas] == esperado
+        assert not any('COUNT(' in consulta['sql'].upper() for consulta in consultas.captured_queries)
+
+        ascendente = self._recorrer(cliente, '/api/roster/', {'page_size': 4, 'ordering': 'fecha'})
+        assert [fila['id'] for fila in ascendente] == esperado[::-1]
+
+    def test_cursor_invalido_responde_400(self, cliente, personas):
+        # Decodifica bien pero la fecha no es válida para el campo del modelo
+        malformado = base64.urlsafe_b64encode(b'xx|1').decode()
+
+        for url in ('/api/roster/', '/api/roster-audit/'):
+            assert cliente.get(url, {'cursor': malformado}).status_code == 400
+            assert cliente.get(url, {'cursor': 'no-es-un-cursor'}).status_code == 400
+
+    def test_campos_parciales_podan_columnas(self, cliente, personas):
+        with CaptureQueriesContext(connection) as consultas:
+            datos = cliente.get('/api/roster/', {'fields': 'id,fecha,codigo'}).json()
+
+        assert set(datos['results'][0]) == {'id', 'fecha', 'codigo'}
+        sql = next(consulta['sql'] for consulta in consultas.captured_queries if 'personal_roster' in consulta['sql'])
+        assert 'JOIN' not in sql and 'observaciones' not in sql
+
+        datos = cliente.get('/api/roster/', {'fields': 'fecha,personal_nombre'}).json()
+        assert datos['results'][0] == {'fecha': '2026-03-03', 'personal_nombre': 'PERSONA 2'}
@@ -0,0 +1,92 @@
+"""
+Tests para el archivo histórico (segmentos comprimidos) de la auditoría.
+"""
+import pytest
+from datetime import date, datetime, timezone as dt_timezone
+from django.contrib.auth.models import User
+from personal.archivo_auditoria import archivar_auditorias, consultar_archivo
+from personal.models import Personal, RosterAudit, SegmentoAuditoria
+from personal.tasks import limpiar_datos_antiguos
+
+
+@pytest.fixture
+def archivo(settings, tmp_path):
+    settings.AUDITORIA_ARCHIVO_DIR = tmp_path / 'archivo'
+    return settings.AUDITORIA_ARCHIVO_DIR
+
+
+@pytest.mark.django_db
+class TestArchivoAuditoria:
+    def _auditorias(self):
+        personas = [
+            Personal.objects.create(
+                nro_doc=f'0000000{n}', apellidos_nombres=f'PERSONA {n}', cargo='X', tipo_trab='Empleado'
+            )
+            for n in range(1, 3)
+        ]
+        fechas = [
+            datetime(2025, 1, 10, 12, tzinfo=dt_timezone.utc),
+            datetime(2025, 1, 20, 12, tzinfo=dt_timezone.utc),
+            datetime(2025, 2, 5, 12, tzinfo=dt_timezone.utc),
+        ]
+        for dia, creado_en in enumerate(fechas, start=1):
+            for persona in personas:
+                auditoria = RosterAudit.objects.create(
+                    personal=persona, fecha=date(2025, 1, dia), campo_modificado='codigo',
+                    valor_anterior='T', valor_nuevo='DL'
+                )
+                RosterAudit.objects.filter(pk=auditoria.pk).update(creado_en=creado_en)
+        RosterAudit.objects.create(
+            personal=personas[0], fecha=date(2026, 3, 1), campo_modificado='codigo', valor_anterior='T', valor_nuevo='N'
+        )
+        return personas
+
+    def test_archiva_por_mes_y_consulta(self, archivo, django_assert_num_queries):
+        personas = self._auditorias()
+
+        resultado = archivar_auditorias(datetime(2026, 1, 1, tzinfo=dt_timezone.utc))
+
+        assert resultado == {'archivados': 6, 'segmentos': 2}
+        assert RosterAudit.objects.count() == 1
+        enero = SegmentoAuditoria.objects.get(periodo='2025-01')
+        assert (enero.filas, enero.fecha_min, enero.fecha_max) == (4, date(2025, 1, 1), date(2025, 1, 2))
+        assert len(list(archivo.iterdir())) == 2
+
+        # Índice y personal (sin usuarios); la fecha descarta el segmento de febrero
+        with django_assert_num_queries(2):
+            archivadas = consultar_archivo(personal_id=personas[0].pk, fecha=date(2025, 1, 2))
+        assert [(a.fecha, a.personal) for a in archivadas] == [(date(2025, 1, 2), personas[0])]
+
+    def test_api_combina_tabla_y_archivo(self, archivo, client):
+        personas = self._auditorias()
+        limpiar_datos_antiguos(dias=1, archivar=True)
+        client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'x'))
+
+        respuesta = client.get('/api/roster-audit/', {'personal': personas[0].pk})
+
+        datos = respuesta.json()
+        assert datos['next'] is None
+        assert [fila['fecha'] for fila in datos['results']] == ['2026-03-01', '2025-01-03', '2025-01-02', '2025-01-01']
+        assert datos['results'][1]['personal_nombre'] == 'PERSONA 1'
+
+        # El cursor recorre tabla y archivo juntos
+        primera = client.get('/api/roster-audit/', {'personal': personas[0].pk, 'page_size': 2}).json()
+        segunda = client.get(primera['next']).json()
+        assert [fila['fecha'] for fila in primera['results'] + segunda['results']] == [
+            '2026-03-01', '2025-01-03', '2025-01-02', '2025-01-01'
+        ]
+        assert segunda['next'] is None
+
+    def test_api_filtros_invalidos(self, archivo, client):
+        client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'x'))
+
+        for filtros in ({'personal': 'abc'}, {'fecha': '2025-02-30'}, {'fecha': 'ayer'}):
+            respuesta = client.get('/api/roster-audit/', filtros)
+            assert respuesta.status_code == 400
+            assert 'error' in respuesta.json()
+
+    def test_modo_eliminar(self, archivo):
+        self._auditorias()
+        resultado = limpiar_datos_antiguos(dias=1, archivar=False)
+        assert (resultado['eliminados'], resultado['archivados']) == (6, 0)
+        assert not SegmentoAuditoria.objects.exists()
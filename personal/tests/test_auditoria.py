@@ -0,0 +1,124 @@
+"""
+Tests para la captura de auditoría del roster.
+"""
+import json
+import pytest
+from datetime import date
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from personal.models import Area, SubArea, Personal, Roster, RosterAudit
+from personal.services import RosterService
+
+
+@pytest.mark.django_db
+class TestAuditoriaRoster:
+    def _persona(self):
+        area = Area.objects.create(nombre='AREA')
+        subarea = SubArea.objects.create(nombre='SUB', area=area)
+        return Personal.objects.create(
+            nro_doc='00000001', apellidos_nombres='ALFA', cargo='X', tipo_trab='Empleado', subarea=subarea
+        )
+
+    def test_guardar_no_relee_la_fila(self, django_assert_num_queries, django_capture_on_commit_callbacks):
+        persona = self._persona()
+        with django_capture_on_commit_callbacks(execute=True):
+            Roster.objects.create(personal=persona, fecha=date(2026, 3, 1), codigo='T')
+        roster = Roster.objects.get(personal=persona)
+
+        roster.codigo = 'DL'
+        with django_capture_on_commit_callbacks(execute=True):
+            # El UPDATE y la subárea de la persona (no viene cargada en la celda); la fila
+            # no se relee y la auditoría y la cobertura diaria se escriben al confirmar
+            with django_assert_num_queries(2):
+                roster.save()
+
+        assert list(RosterAudit.objects.order_by('id').values_list('valor_anterior', 'valor_nuevo')) == [
+            ('', 'T'), ('T', 'DL')
+        ]
+
+    def test_lote_en_una_insercion(self, django_assert_num_queries, django_capture_on_commit_callbacks):
+        persona = self._persona()
+        rosters = [
+            Roster.objects.create(personal=persona, fecha=date(2026, 3, dia), codigo='T') for dia in range(1, 4)
+        ]
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            with transaction.atomic():
+                for roster in rosters:
+                    roster.codigo = 'N'
+                    roster.observaciones = 'turno noche'
+                    roster.save()
+        assert len(callbacks) == 1
+        with CaptureQueriesContext(connection) as consultas:
+            callbacks[0]()
+        inserciones = [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if consulta['sql'].startswith(f'INSERT INTO "{RosterAudit._meta.db_table}"')
+        ]
+        assert len(inserciones) == 1
+
+        assert RosterAudit.objects.count() == 6
+
+    def test_savepoint_revertido_descarta_auditorias(self, django_capture_on_commit_callbacks):
+        persona = self._persona()
+        roster = Roster.objects.create(personal=persona, fecha=date(2026, 3, 1), codigo='T')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        roster.codigo = 'DL'
+                        roster.save()
+                        raise ValueError
+                except ValueError:
+                    pass
+
+        assert not RosterAudit.objects.exists()
+
+    def test_servicio_y_request_registran_al_usuario(self, client, django_capture_on_commit_callbacks):
+        persona = self._persona()
+        roster = Roster.objects.create(personal=persona, fecha=date(2026, 3, 1), codigo='T')
+        admin = User.objects.create_superuser('admin', 'admin@test.com', 'x')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            RosterService.actualizar_roster(roster.pk, 'DL', admin)
+        # Un solo registro por campo, sin el duplicado explícito del servicio
+        assert list(RosterAudit.objects.values_list('campo_modificado', 'usuario')) == [('codigo', admin.pk)]
+
+        client.force_login(admin)
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(
+                '/roster/update-cell/',
+                json.dumps({'personal_id': persona.pk, 'fecha': '2026-03-01', 'codigo': 'T'}),
+                content_type='application/json'
+            )
+        assert RosterAudit.objects.filter(valor_nuevo='T', usuario=admin).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_transaccion_revertida_no_retiene_el_lote():
+    area = Area.objects.create(nombre='AREA')
+    persona = Personal.objects.create(
+        nro_doc='00000001', apellidos_nombres='ALFA', cargo='X', tipo_trab='Empleado',
+        subarea=SubArea.objects.create(nombre='SUB', area=area)
+    )
+    roster = Roster.objects.create(personal=persona, fecha=date(2026, 3, 1), codigo='T')
+
+    try:
+        with transaction.atomic():
+            roster.codigo = 'DL'
+            roster.save()
+            raise ValueError
+    except ValueError:
+        pass
+
+    # La transacción siguiente abre su propio lote en lugar del descartado
+    roster = Roster.objects.get(pk=roster.pk)
+    with transaction.atomic():
+        roster.codigo = 'N'
+        roster.save()
+
+    assert list(RosterAudit.objects.order_by('id').values_list('valor_anterior', 'valor_nuevo')) == [
+        ('', 'T'), ('T', 'N')
+    ]
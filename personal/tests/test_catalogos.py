@@ -0,0 +1,89 @@
+"""
+Tests para las instantáneas compartidas de catálogos.
+"""
+import pytest
+import pandas as pd
+from django.db import transaction
+from personal.catalogos import obtener_catalogos, invalidar_catalogos
+from personal.forms import PersonalForm, SubAreaForm
+from personal.importacion import importar_personal
+from personal.models import Area, SubArea, Personal
+
+
+@pytest.mark.django_db
+class TestCatalogos:
+    def _datos(self):
+        area = Area.objects.create(nombre='AREA')
+        inactiva = Area.objects.create(nombre='CERRADA', activa=False)
+        subarea = SubArea.objects.create(nombre='SUB', area=area)
+        SubArea.objects.create(nombre='VIEJA', area=inactiva, activa=False)
+        Personal.objects.create(
+            nro_doc='00000001', apellidos_nombres='ALFA', cargo='X', tipo_trab='Empleado', subarea=subarea
+        )
+        Personal.objects.create(
+            nro_doc='00000002', apellidos_nombres='BETA', cargo='X', tipo_trab='Empleado', estado='Cesado'
+        )
+        return area, subarea
+
+    def test_instantanea_se_reutiliza_sin_consultas(self, django_assert_num_queries):
+        area, subarea = self._datos()
+        catalogos = obtener_catalogos()
+
+        assert [a.nombre for a in catalogos.areas_activas] == ['AREA']
+        assert [(s.nombre, s.area.nombre) for s in catalogos.subareas_activas] == [('SUB', 'AREA')]
+        assert [p.nro_doc for p in catalogos.personal_activo] == ['00000001']
+        assert catalogos.subareas_de([area.pk]) == (catalogos.subareas_activas[0],)
+        assert isinstance(catalogos.subareas, tuple)
+
+        with django_assert_num_queries(0):
+            assert obtener_catalogos() is catalogos
+
+    def test_guardar_modelo_publica_nueva_version(self, django_capture_on_commit_callbacks):
+        area, _ = self._datos()
+        anterior = obtener_catalogos()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            SubArea.objects.create(nombre='NUEVA', area=area)
+
+        actual = obtener_catalogos()
+        assert actual.version != anterior.version
+        assert 'NUEVA' in [s.nombre for s in actual.subareas]
+        assert 'NUEVA' not in [s.nombre for s in anterior.subareas]
+
+    def test_importacion_masiva_invalida(self, django_capture_on_commit_callbacks):
+        self._datos()
+        anterior = obtener_catalogos()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            importar_personal(pd.DataFrame([{'NroDoc': '00000003', 'ApellidosNombres': 'GAMMA'}]))
+
+        assert obtener_catalogos().version != anterior.version
+        assert '00000003' in [p.nro_doc for p in obtener_catalogos().personal_activo]
+
+    def test_transaccion_revertida_no_publica(self, django_capture_on_commit_callbacks):
+        area, _ = self._datos()
+        anterior = obtener_catalogos()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    SubArea.objects.create(nombre='FANTASMA', area=area)
+                    # Otro request que lea los catálogos antes del commit no ve una versión nueva
+                    assert obtener_catalogos() is anterior
+                    raise ValueError
+            except ValueError:
+                pass
+
+        assert obtener_catalogos() is anterior
+
+    def test_formularios_leen_opciones_de_la_instantanea(self, django_assert_num_queries):
+        area, subarea = self._datos()
+        invalidar_catalogos()
+        obtener_catalogos()
+
+        with django_assert_num_queries(0):
+            opciones = list(PersonalForm().fields['subarea'].choices)
+            areas = list(SubAreaForm().fields['area'].choices)
+
+        assert (subarea.pk, 'AREA - SUB') in opciones
+        assert (area.pk, 'AREA') in areas
@@ -0,0 +1,130 @@
+"""
+Tests para la cobertura diaria precalculada y los huecos de dotación mínima.
+"""
+import pytest
+import pandas as pd
+from datetime import date
+from django.contrib.auth.models import User
+from django.utils import timezone
+from personal.auditoria import deshacer_lote
+from personal.cobertura import huecos_cobertura, reconciliar_cobertura, totales_cobertura
+from personal.importacion import importar_roster
+from personal.models import Area, SubArea, Personal, Roster, CoberturaDiaria, LoteAuditoria
+
+SIN_DERIVA = {'creados': 0, 'actualizados': 0, 'eliminados': 0}
+
+
+@pytest.mark.django_db
+class TestCoberturaDiaria:
+    @pytest.fixture
+    def personas(self):
+        area = Area.objects.create(nombre='AREA')
+        subarea = SubArea.objects.create(nombre='SUB', area=area, dotacion_minima=2)
+        return [
+            Personal.objects.create(
+                nro_doc=f'0000000{n}', apellidos_nombres=f'PERSONA {n}', cargo='X', tipo_trab='Empleado',
+                subarea=subarea, regimen_turno='21x7'
+            )
+            for n in range(1, 3)
+        ]
+
+    def _cobertura(self, fecha):
+        return {
+            (subarea_id, categoria): total
+            for subarea_id, categoria, total in CoberturaDiaria.objects.filter(
+                fecha=fecha, total__gt=0
+            ).values_list('subarea_id', 'categoria', 'total')
+        }
+
+    def test_senales_de_roster_y_personal(self, personas, django_capture_on_commit_callbacks):
+        alfa, beta = personas
+        subarea = alfa.subarea
+        fecha = date(2026, 3, 1)
+        with django_capture_on_commit_callbacks(execute=True):
+            roster = Roster.objects.create(personal=alfa, fecha=fecha, codigo='T')
+            Roster.objects.create(personal=beta, fecha=fecha, codigo='TR')
+        assert self._cobertura(fecha) == {(subarea.pk, 'presencia'): 2}
+
+        roster.codigo = 'DL'
+        with django_capture_on_commit_callbacks(execute=True):
+            roster.save()
+        assert self._cobertura(fecha) == {(subarea.pk, 'presencia'): 1, (subarea.pk, 'descanso'): 1}
+
+        otra = SubArea.objects.create(nombre='OTRA', area=subarea.area)
+        beta.subarea = otra
+        beta.save()
+        assert self._cobertura(fecha) == {(subarea.pk, 'descanso'): 1, (otra.pk, 'presencia'): 1}
+
+        nueva_area = Area.objects.create(nombre='NUEVA')
+        otra.area = nueva_area
+        otra.save()
+        assert totales_cobertura(fecha, [nueva_area]) == {
+            'total': 1, 'presencia': 1, 'descanso': 0, 'ausencia': 0, 'otro': 0
+        }
+
+        with django_capture_on_commit_callbacks(execute=True):
+            roster.delete()
+        assert self._cobertura(fecha) == {(otra.pk, 'presencia'): 1}
+        assert reconciliar_cobertura(corregir=False) == SIN_DERIVA
+
+    def test_escrituras_masivas(self, client, personas, django_capture_on_commit_callbacks):
+        alfa, beta = personas
+        admin = User.objects.create_superuser('admin', 'admin@test.com', 'x')
+        with django_capture_on_commit_callbacks(execute=True):
+            Roster.objects.create(personal=alfa, fecha=date(2026, 3, 1), codigo='V')
+        importar_roster(pd.DataFrame([
+            {'DNI': persona.nro_doc, 'Dia01': 'T', 'Dia02': 'T'} for persona in personas
+        ]), 2026, 3)
+        assert reconciliar_cobertura(corregir=False) == SIN_DERIVA
+
+        client.force_login(admin)
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post('/api/roster/bulk_create/', {'registros': [
+                {'personal': alfa.pk, 'fecha': '2026-03-02', 'codigo': 'DM'},
+                {'personal': beta.pk, 'fecha': '2026-03-03', 'codigo': 'T'},
+            ]}, content_type='application/json')
+        assert self._cobertura(date(2026, 3, 2)) == {
+            (alfa.subarea_id, 'presencia'): 1, (alfa.subarea_id, 'ausencia'): 1
+        }
+        assert reconciliar_cobertura(corregir=False) == SIN_DERIVA
+
+        with django_capture_on_commit_callbacks(execute=True):
+            deshacer_lote(LoteAuditoria.objects.get(origen='api').pk, admin)
+        assert self._cobertura(date(2026, 3, 2)) == {(alfa.subarea_id, 'presencia'): 2}
+        assert reconciliar_cobertura(corregir=False) == SIN_DERIVA
+
+        # La deriva se corrige desde Roster
+        CoberturaDiaria.objects.all().delete()
+        assert reconciliar_cobertura()['creados'] == 2
+        assert reconciliar_cobertura(corregir=False) == SIN_DERIVA
+
+    def test_huecos_api_y_portada(self, client, personas, django_capture_on_commit_callbacks):
+        alfa, beta = personas
+        subarea = alfa.subarea
+        hoy = timezone.localdate()
+        with django_capture_on_commit_callbacks(execute=True):
+            Roster.objects.create(personal=alfa, fecha=hoy, codigo='T')
+            Roster.objects.create(personal=beta, fecha=hoy, codigo='T')
+            Roster.objects.create(personal=alfa, fecha=date(2026, 3, 2), codigo='T')
+            Roster.objects.create(personal=beta, fecha=date(2026, 3, 2), codigo='V')
+        # Sin dotación mínima no se revisa
+        SubArea.objects.create(nombre='LIBRE', area=subarea.area)
+
+        huecos = huecos_cobertura(date(2026, 3, 1), date(2026, 3, 2))
+        assert [(hueco['fecha'], hueco['presencia'], hueco['faltantes']) for hueco in huecos] == [
+            ('2026-03-01', 0, 2), ('2026-03-02', 1, 1)
+        ]
+
+        client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'x'))
+        respuesta = client.get('/api/roster/cobertura/', {
+            'desde': '2026-03-02', 'hasta': '2026-03-02', 'subarea': subarea.pk
+        })
+        assert respuesta.json()['huecos'] == [{
+            'fecha': '2026-03-02', 'area': subarea.area_id, 'area_nombre': 'AREA',
+            'subarea': subarea.pk, 'subarea_nombre': 'SUB', 'minimo': 2, 'presencia': 1, 'faltantes': 1,
+        }]
+        assert client.get('/api/roster/cobertura/', {
+            'desde': '2026-01-01', 'hasta': '2027-12-31'
+        }).status_code == 400
+
+        assert client.get('/').context['total_roster_hoy'] == 2
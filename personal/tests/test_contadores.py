@@ -0,0 +1,147 @@
+"""
+Tests para los contadores desnormalizados de aprobaciones por área.
+"""
+import pytest
+import pandas as pd
+from datetime import date
+from django.contrib.auth.models import User
+from django.utils import timezone
+from personal.catalogos import obtener_catalogos
+from personal.contadores import DeltasContadores, totales_aprobacion, reconciliar_contadores
+from personal.importacion import importar_personal
+from personal.models import Area, SubArea, Personal, Roster, ContadorAprobacion
+from personal.permissions import get_context_usuario
+
+
+@pytest.mark.django_db
+class TestContadoresAprobacion:
+    def _persona(self, area_nombre='AREA', nro_doc='00000001'):
+        area, _ = Area.objects.get_or_create(nombre=area_nombre)
+        subarea, _ = SubArea.objects.get_or_create(nombre='SUB', area=area)
+        persona = Personal.objects.create(
+            nro_doc=nro_doc, apellidos_nombres=f'PERSONA {nro_doc}', cargo='X', tipo_trab='Empleado',
+            subarea=subarea
+        )
+        return area, persona
+
+    def test_ciclo_de_aprobacion(self, django_capture_on_commit_callbacks):
+        area, persona = self._persona()
+        with django_capture_on_commit_callbacks(execute=True):
+            roster = Roster.objects.create(personal=persona, fecha=date(2026, 3, 1), codigo='T', estado='borrador')
+        assert totales_aprobacion([area])['borradores'] == 1
+
+        roster.estado = 'pendiente'
+        with django_capture_on_commit_callbacks(execute=True):
+            roster.save()
+        totales = totales_aprobacion([area])
+        assert (totales['borradores'], totales['pendientes']) == (0, 1)
+
+        roster.estado = 'aprobado'
+        roster.aprobado_en = timezone.now()
+        with django_capture_on_commit_callbacks(execute=True):
+            roster.save()
+        totales = totales_aprobacion([area])
+        assert (totales['pendientes'], totales['aprobados_hoy'], totales['total_semana']) == (0, 1, 1)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            roster.delete()
+        assert totales_aprobacion([area])['aprobados_hoy'] == 0
+
+    def test_guardar_celda_difiere_los_contadores(self, django_assert_num_queries,
+                                                  django_capture_on_commit_callbacks):
+        area, persona = self._persona()
+        with django_capture_on_commit_callbacks(execute=True):
+            rosters = [
+                Roster.objects.create(personal=persona, fecha=date(2026, 3, dia), codigo='T', estado='borrador')
+                for dia in range(1, 4)
+            ]
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            # Solo los UPDATE: la persona y su subárea vienen cargadas en la celda
+            with django_assert_num_queries(3):
+                for roster in rosters:
+                    roster.estado = 'pendiente'
+                    roster.save()
+        assert len(callbacks) == 1
+        callbacks[0]()
+
+        totales = totales_aprobacion([area])
+        assert (totales['borradores'], totales['pendientes']) == (0, 3)
+        assert reconciliar_contadores(corregir=False) == {'creados': 0, 'actualizados': 0, 'eliminados': 0}
+
+    def test_enviar_a_aprobacion_masivo(self, client, django_capture_on_commit_callbacks):
+        area, persona = self._persona()
+        persona.usuario = User.objects.create_user('persona', password='x')
+        persona.save()
+        with django_capture_on_commit_callbacks(execute=True):
+            for dia in range(1, 4):
+                Roster.objects.create(personal=persona, fecha=date(2026, 3, dia), codigo='T', estado='borrador')
+
+        client.force_login(persona.usuario)
+        client.post('/roster/enviar-aprobacion/')
+
+        totales = totales_aprobacion([area])
+        assert (totales['borradores'], totales['pendientes']) == (0, 3)
+        assert reconciliar_contadores(corregir=False) == {'creados': 0, 'actualizados': 0, 'eliminados': 0}
+
+    def test_cambio_de_area_traslada_conteos(self, django_capture_on_commit_callbacks):
+        area, persona = self._persona()
+        otra = Area.objects.create(nombre='OTRA')
+
+        # La celda y el traslado en la misma transacción: la celda se cuenta una sola vez
+        with django_capture_on_commit_callbacks(execute=True):
+            Roster.objects.create(personal=persona, fecha=date(2026, 3, 1), codigo='T', estado='pendiente')
+            persona.subarea = SubArea.objects.create(nombre='SUB2', area=otra)
+            persona.save()
+
+        assert totales_aprobacion([area])['pendientes'] == 0
+        assert totales_aprobacion([otra])['pendientes'] == 1
+
+    def test_importacion_de_personal_traslada_conteos(self, django_capture_on_commit_callbacks):
+        area, persona = self._persona()
+        otra = Area.objects.create(nombre='OTRA')
+        SubArea.objects.create(nombre='SUB2', area=otra)
+        with django_capture_on_commit_callbacks(execute=True):
+            Roster.objects.create(personal=persona, fecha=date(2026, 3, 1), codigo='T', estado='pendiente')
+            Roster.objects.create(
+                personal=persona, fecha=date(2026, 3, 2), codigo='T', estado='aprobado', aprobado_en=timezone.now()
+            )
+
+        importar_personal(pd.DataFrame([
+            {'NroDoc': persona.nro_doc, 'ApellidosNombres': persona.apellidos_nombres, 'SubArea': 'SUB2'}
+        ]))
+
+        assert totales_aprobacion([area]) == {
+            'borradores': 0, 'pendientes': 0, 'aprobados_hoy': 0, 'total_semana': 0
+        }
+        assert (totales_aprobacion([otra])['pendientes'], totales_aprobacion([otra])['aprobados_hoy']) == (1, 1)
+        assert reconciliar_contadores(corregir=False) == {'creados': 0, 'actualizados': 0, 'eliminados': 0}
+
+    def test_celdas_de_subarea_creada_en_la_transaccion(self):
+        _, persona = self._persona()
+        obtener_catalogos()
+        # La subárea nueva aún no está en la instantánea publicada
+        otra = Area.objects.create(nombre='OTRA')
+        persona.subarea = SubArea.objects.create(nombre='SUB2', area=otra)
+
+        contadores = DeltasContadores()
+        contadores.sumar_celdas([Roster(personal=persona, fecha=date(2026, 3, 1), estado='pendiente')])
+
+        assert contadores.deltas == {(otra.pk, 'pendiente', None): 1}
+
+    def test_badge_y_reconciliacion(self, django_assert_num_queries, django_capture_on_commit_callbacks):
+        area, persona = self._persona()
+        with django_capture_on_commit_callbacks(execute=True):
+            Roster.objects.create(personal=persona, fecha=date(2026, 3, 1), codigo='T', estado='pendiente')
+            Roster.objects.create(personal=persona, fecha=date(2026, 3, 2), codigo='T', estado='pendiente')
+        # update() no pasa por las rutas de escritura: genera deriva
+        Roster.objects.filter(fecha=date(2026, 3, 2)).update(estado='borrador')
+
+        superusuario = User.objects.create_superuser('admin', 'admin@test.com', 'x')
+        assert get_context_usuario(superusuario)['cambios_pendientes'] == 2
+
+        assert reconciliar_contadores() == {'creados': 1, 'actualizados': 1, 'eliminados': 0}
+        assert get_context_usuario(superusuario)['cambios_pendientes'] == 1
+        assert ContadorAprobacion.objects.get(area=area, estado='borrador').total == 1
+        with django_assert_num_queries(1):
+            totales_aprobacion()
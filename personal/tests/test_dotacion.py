@@ -0,0 +1,106 @@
+"""
+Tests para la dotación diaria por área, subárea y código.
+"""
+import pytest
+from datetime import date
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from personal.dotacion import conteos_dotacion, series_dotacion
+from personal.models import Area, SubArea, Personal, Roster
+
+
+@pytest.fixture(autouse=True)
+def cache_limpia():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestDotacion:
+    @pytest.fixture
+    def subareas(self, django_capture_on_commit_callbacks):
+        area = Area.objects.create(nombre='OPERACIONES')
+        mina = SubArea.objects.create(nombre='MINA', area=area)
+        planta = SubArea.objects.create(nombre='PLANTA', area=area)
+        personas = [
+            Personal.objects.create(
+                nro_doc=f'0000000{n}', apellidos_nombres=f'PERSONA {n}', cargo='X', tipo_trab='Empleado',
+                subarea=subarea
+            )
+            for n, subarea in enumerate((mina, mina, planta))
+        ]
+        with django_capture_on_commit_callbacks(execute=True):
+            for persona in personas:
+                for dia, codigo in ((1, 'T'), (2, 'TR'), (3, 'DL')):
+                    Roster.objects.create(personal=persona, fecha=date(2025, 1, dia), codigo=codigo)
+            # Las celdas no aprobadas no cuentan
+            Roster.objects.create(personal=personas[0], fecha=date(2025, 1, 4), codigo='T', estado='pendiente')
+        return mina, planta, personas
+
+    def test_series_densas_por_subarea_y_area(self, subareas):
+        mina, planta, _ = subareas
+
+        datos = series_dotacion(date(2025, 1, 1), date(2025, 1, 4))
+
+        assert datos['fechas'] == ['2025-01-01', '2025-01-02', '2025-01-03', '2025-01-04']
+        assert [(s['subarea_nombre'], s['codigo'], s['conteos']) for s in datos['series']] == [
+            ('MINA', 'T', [2, 0, 0, 0]), ('MINA', 'TR', [0, 2, 0, 0]),
+            ('PLANTA', 'T', [1, 0, 0, 0]), ('PLANTA', 'TR', [0, 1, 0, 0]),
+        ]
+        por_area = series_dotacion(date(2025, 1, 1), date(2025, 1, 2), codigos={'T'}, nivel='area')
+        assert por_area['series'] == [
+            {'area': mina.area_id, 'area_nombre': 'OPERACIONES', 'codigo': 'T', 'conteos': [3, 0]}
+        ]
+
+    def test_mes_cerrado_en_cache_hasta_que_cambia(self, subareas, django_assert_num_queries,
+                                                    django_capture_on_commit_callbacks):
+        _, _, personas = subareas
+        conteos_dotacion(date(2025, 1, 1), date(2025, 1, 31))
+
+        # Marca de auditoría y verificación del mes en caché, sin GROUP BY
+        with django_assert_num_queries(2):
+            conteos = conteos_dotacion(date(2025, 1, 1), date(2025, 1, 31))
+        assert conteos[(date(2025, 1, 3), personas[0].subarea_id, 'DL')] == 2
+
+        roster = Roster.objects.get(personal=personas[0], fecha=date(2025, 1, 3))
+        roster.codigo = 'T'
+        with django_capture_on_commit_callbacks(execute=True):
+            roster.save()
+
+        conteos = conteos_dotacion(date(2025, 1, 1), date(2025, 1, 31))
+        assert conteos[(date(2025, 1, 3), personas[0].subarea_id, 'DL')] == 1
+        assert conteos[(date(2025, 1, 3), personas[0].subarea_id, 'T')] == 1
+
+    def test_api(self, client, subareas):
+        client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'x'))
+
+        datos = client.get('/api/roster/dotacion/', {
+            'desde': '2025-01-01', 'hasta': '2025-01-03', 'codigos': 'todos', 'nivel': 'area'
+        }).json()
+
+        assert [(s['codigo'], s['conteos']) for s in datos['series']] == [
+            ('DL', [0, 0, 3]), ('T', [3, 0, 0]), ('TR', [0, 3, 0])
+        ]
+        assert client.get('/api/roster/dotacion/', {'desde': '2025-01-01', 'hasta': '2027-12-31'}).status_code == 400
+
+    def test_api_limitada_a_las_areas_del_responsable(self, client, subareas):
+        mina, _, personas = subareas
+        ajena = SubArea.objects.create(nombre='AJENA', area=Area.objects.create(nombre='OTRA'))
+        Personal.objects.filter(pk=personas[2].pk).update(subarea=ajena)
+        cache.clear()
+        usuario = User.objects.create_user('jefe', password='x')
+        responsable = Personal.objects.create(
+            nro_doc='00000009', apellidos_nombres='JEFE', cargo='X', tipo_trab='Empleado',
+            subarea=mina, usuario=usuario
+        )
+        mina.area.responsables.add(responsable)
+        client.force_login(usuario)
+
+        datos = client.get('/api/roster/dotacion/', {'desde': '2025-01-01', 'hasta': '2025-01-01'}).json()
+
+        assert [(s['subarea_nombre'], s['conteos']) for s in datos['series']] == [('MINA', [2])]
+        client.force_login(User.objects.create_user('nadie', password='x'))
+        assert client.get('/api/roster/dotacion/', {
+            'desde': '2025-01-01', 'hasta': '2025-01-01'
+        }).json()['series'] == []
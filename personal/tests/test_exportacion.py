@@ -0,0 +1,234 @@
+"""
+Tests para el motor de exportación Excel en streaming.
+"""
+import io
+import pytest
+import pandas as pd
+from datetime import date
+from openpyxl import load_workbook
+from personal.models import Area, SubArea, Personal, Roster
+from personal.exportacion import (
+    exportar_personal, exportar_gerencias, exportar_roster, respuesta_xlsx
+)
+from personal.importacion import importar_roster
+
+
+def _exportar(exportador, *args):
+    destino = io.BytesIO()
+    exportador(destino, *args)
+    destino.seek(0)
+    return destino
+
+
+@pytest.mark.django_db
+class TestExportarRoster:
+    def _personas(self):
+        area = Area.objects.create(nombre='AREA')
+        subarea = SubArea.objects.create(nombre='SUB', area=area)
+        return [
+            Personal.objects.create(
+                nro_doc=doc, apellidos_nombres=nombre, cargo='X', tipo_trab='Empleado', subarea=subarea
+            )
+            for doc, nombre in [('00000002', 'BETA'), ('00000001', 'ALFA'), ('00000003', 'GAMMA')]
+        ]
+
+    def test_matriz_combina_cursores_en_orden(self):
+        beta, alfa, gamma = self._personas()
+        Roster.objects.create(personal=alfa, fecha=date(2026, 2, 1), codigo='T')
+        Roster.objects.create(personal=gamma, fecha=date(2026, 2, 28), codigo='V')
+        Roster.objects.create(personal=gamma, fecha=date(2026, 3, 1), codigo='DM')
+
+        archivo = _exportar(exportar_roster, 2, 2026, Personal.objects.all())
+
+        libro = load_workbook(archivo)
+        assert libro.sheetnames == ['Roster', 'CAT_Codigos', 'CAT_Descripcion']
+        df = pd.read_excel(archivo, sheet_name='Roster', dtype={'DNI': str})
+        assert list(df['DNI']) == ['00000001', '00000002', '00000003']
+        assert df.columns[-1] == 'Dia28'
+        assert df.loc[0, 'Dia01'] == 'T'
+        assert df.loc[2, 'Dia28'] == 'V'
+        assert df.loc[1].filter(regex=r'^Dia\d').isna().all()
+        assert libro['Roster'].data_validations.dataValidation[0].sqref is not None
+
+    def test_consultas_constantes(self, django_assert_max_num_queries):
+        personas = self._personas()
+        for i in range(30):
+            Personal.objects.create(
+                nro_doc=f'1{i:07d}', apellidos_nombres=f'P {i}', cargo='X', tipo_trab='Empleado'
+            )
+        Roster.objects.bulk_create([
+            Roster(personal=p, fecha=date(2026, 2, d), codigo='T') for p in personas for d in range(1, 10)
+        ])
+
+        with django_assert_max_num_queries(3):
+            _exportar(exportar_roster, 2, 2026, Personal.objects.all())
+
+    def test_ida_y_vuelta_con_importacion(self):
+        alfa = self._personas()[1]
+        Roster.objects.create(personal=alfa, fecha=date(2026, 2, 3), codigo='TR')
+        archivo = _exportar(exportar_roster, 2, 2026, Personal.objects.all())
+
+        df = pd.read_excel(archivo, sheet_name='Roster', dtype={'DNI': str})
+        df['Dia04'] = df['Dia04'].astype(object)
+        df.loc[0, 'Dia04'] = 'T'
+        resultado = importar_roster(df, 2026, 2)
+
+        assert resultado['creados'] == 1
+        assert resultado['errores'] == []
+
+
+@pytest.mark.django_db
+class TestExportarPersonal:
+    def test_documentos_como_texto_y_plantilla_vacia(self):
+        Personal.objects.create(
+            nro_doc='01234567', apellidos_nombres='PERSONA', cargo='X', tipo_trab='Empleado',
+            fecha_alta=date(2024, 5, 1)
+        )
+        archivo = _exportar(exportar_personal, Personal.objects.all())
+
+        hoja = load_workbook(archivo)['Personal']
+        assert hoja['A2'].value == '01234567'
+        assert hoja['A2'].number_format == '@'
+        assert hoja['I2'].value == '2024-05-01'
+        assert hoja.column_dimensions['A'].width > len('NroDoc')
+
+        plantilla = load_workbook(_exportar(exportar_personal, None))['Personal']
+        assert plantilla['C2'].value == 'APELLIDOS, NOMBRES'
+
+    def test_gerencias_con_responsables(self):
+        persona = Personal.objects.create(
+            nro_doc='00000001', apellidos_nombres='RESP', cargo='X', tipo_trab='Empleado'
+        )
+        area = Area.objects.create(nombre='AREA A')
+        area.responsables.add(persona)
+
+        hoja = load_workbook(_exportar(exportar_gerencias, Area.objects.all()))['Gerencias']
+
+        assert [c.value for c in hoja[2]] == ['AREA A', '00000001', 'RESP', None, 'Sí']
+
+    def test_respuesta_en_streaming(self):
+        respuesta = respuesta_xlsx(exportar_personal, 'personal.xlsx', None)
+
+        contenido = b''.join(respuesta.streaming_content)
+        assert respuesta['Content-Disposition'].startswith('attachment; filename="personal.xlsx"')
+        assert load_workbook(io.BytesIO(contenido))['Personal'].max_row == 2
+
+
+@pytest.mark.django_db
+class TestCacheExportaciones:
+    @pytest.fixture(autouse=True)
+    def directorio(self, settings, tmp_path):
+        settings.EXPORTACIONES_DIR = tmp_path
+        return tmp_path
+
+    def _persona(self):
+        return Personal.objects.create(
+            nro_doc='00000001', apellidos_nombres='ALFA', cargo='X', tipo_trab='Empleado'
+        )
+
+    def test_reutiliza_archivo_hasta_que_cambian_los_datos(self, directorio):
+        from personal.exportacion import obtener_exportacion
+        persona = self._persona()
+        personal_qs = Personal.objects.all()
+
+        primera = obtener_exportacion('roster', 'todos', '2026-02', 2, 2026, personal_qs)
+        assert obtener_exportacion('roster', 'todos', '2026-02', 2, 2026, personal_qs) == primera
+        assert obtener_exportacion('roster', 'areas-1', '2026-02', 2, 2026, personal_qs) != primera
+
+        Roster.objects.create(personal=persona, fecha=date(2026, 2, 1), codigo='T')
+        nueva = obtener_exportacion('roster', 'todos', '2026-02', 2, 2026, personal_qs)
+
+        assert nueva != primera
+        assert not (directorio / primera).exists()
+        assert pd.read_excel(nueva, sheet_name='Roster').loc[0, 'Dia01'] == 'T'
+
+    def test_respuesta_sobrevive_a_la_depuracion(self, directorio, settings):
+        from personal.exportacion import respuesta_exportacion
+        self._persona()
+        # Sin presupuesto la depuración elimina el archivo recién generado
+        settings.EXPORTACIONES_MAX_BYTES = 0
+
+        respuesta = respuesta_exportacion('personal', 'todos', '', 'personal.xlsx', Personal.objects.all())
+
+        assert not list(directorio.iterdir())
+        contenido = b''.join(respuesta.streaming_content)
+        assert load_workbook(io.BytesIO(contenido))['Personal']['A2'].value == '00000001'
+
+    def test_depuracion_lru_por_tamano(self, directorio):
+        import os
+        import time
+        from personal.exportacion import depurar_exportaciones
+        for indice, nombre in enumerate(['a.xlsx', 'b.xlsx', 'c.xlsx']):
+            ruta = directorio / nombre
+            ruta.write_bytes(b'x' * 100)
+            os.utime(ruta, (time.time() - 100 + indice, time.time() - 100 + indice))
+        os.utime(directorio / 'a.xlsx')  # usado recientemente
+
+        assert depurar_exportaciones(max_bytes=200) == 1
+        assert sorted(p.name for p in directorio.iterdir()) == ['a.xlsx', 'c.xlsx']
+
+    def test_intercambio_de_responsables_cambia_la_version(self):
+        from personal.exportacion import version_gerencias
+        uno, dos = self._persona(), Personal.objects.create(
+            nro_doc='00000002', apellidos_nombres='BETA', cargo='X', tipo_trab='Empleado'
+        )
+        area_a, area_b = Area.objects.create(nombre='AREA A'), Area.objects.create(nombre='AREA B')
+        area_a.responsables.add(uno)
+        area_b.responsables.add(dos)
+        anterior = version_gerencias(Area.objects.all())
+
+        # Mismo conteo y misma suma de ids, distinta asignación
+        area_a.responsables.set([dos])
+        area_b.responsables.set([uno])
+
+        assert version_gerencias(Area.objects.all()) != anterior
+
+    def test_pregenerar_mes_siguiente(self, directorio):
+        from personal.tasks import pregenerar_exportaciones_roster
+        self._persona()
+
+        resultado = pregenerar_exportaciones_roster(2026, 3)
+
+        assert resultado['generados'] == 1
+        assert [p.name.startswith('roster-2026-03-') for p in directorio.iterdir()] == [True]
+
+
+@pytest.mark.django_db
+class TestExportarRosterRango:
+    def test_hojas_por_mes_resumen_y_catalogos_unicos(self, django_assert_max_num_queries):
+        from personal.exportacion import exportar_roster_rango
+        alfa = Personal.objects.create(
+            nro_doc='00000001', apellidos_nombres='ALFA', cargo='X', tipo_trab='Empleado'
+        )
+        beta = Personal.objects.create(
+            nro_doc='00000002', apellidos_nombres='BETA', cargo='X', tipo_trab='Empleado'
+        )
+        Roster.objects.bulk_create([
+            Roster(personal=alfa, fecha=date(2025, 12, 31), codigo='T'),
+            Roster(personal=alfa, fecha=date(2026, 1, 2), codigo='T'),
+            Roster(personal=alfa, fecha=date(2026, 2, 3), codigo='V'),
+            Roster(personal=beta, fecha=date(2026, 1, 5), codigo='T'),
+            Roster(personal=beta, fecha=date(2026, 3, 1), codigo='T'),
+        ])
+
+        destino = io.BytesIO()
+        with django_assert_max_num_queries(10):
+            exportar_roster_rango(destino, date(2025, 12, 1), date(2026, 2, 1), Personal.objects.all())
+        destino.seek(0)
+
+        libro = load_workbook(destino)
+        assert libro.sheetnames == [
+            'Resumen', 'Diciembre 2025', 'Enero 2026', 'Febrero 2026', 'CAT_Codigos', 'CAT_Descripcion'
+        ]
+        resumen = [[c.value for c in fila] for fila in libro['Resumen'].iter_rows()]
+        assert resumen == [
+            ['DNI', 'ApellidosNombres', 'T', 'V', 'Total'],
+            ['00000001', 'ALFA', 2, 1, 3],
+            ['00000002', 'BETA', 1, 0, 1],
+        ]
+        assert libro['Febrero 2026'].max_column == 4 + 28
+
+    def test_rango_invalido(self):
+        from personal.exportacion import exportar_roster_rango
+        with pytest.raises(ValueError):
+            exportar_roster_rango(io.BytesIO(), date(2026, 3, 1), date(2026, 1, 1), Personal.objects.all())
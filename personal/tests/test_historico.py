@@ -0,0 +1,99 @@
+"""
+Tests para la reconstrucción del roster en un momento pasado.
+"""
+import pytest
+from datetime import date
+from django.contrib.auth.models import User
+from django.utils import timezone
+from personal.historico import roster_en, tomar_instantaneas
+from personal.models import Area, SubArea, Personal, Roster, InstantaneaRoster
+from personal.services import RosterService
+
+
+@pytest.mark.django_db
+class TestRosterHistorico:
+    @pytest.fixture
+    def confirmar(self, django_capture_on_commit_callbacks):
+        """Ejecuta una acción confirmando sus auditorías y retorna el momento posterior."""
+        def ejecutar(accion):
+            with django_capture_on_commit_callbacks(execute=True):
+                accion()
+            return timezone.now()
+        return ejecutar
+
+    def _area(self):
+        area = Area.objects.create(nombre='AREA')
+        subarea = SubArea.objects.create(nombre='SUB', area=area)
+        personas = [
+            Personal.objects.create(
+                nro_doc=f'0000000{n}', apellidos_nombres=f'PERSONA {n}', cargo='X', tipo_trab='Empleado',
+                subarea=subarea
+            )
+            for n in range(1, 3)
+        ]
+        return area, personas
+
+    def test_reproduce_cambios_altas_y_bajas(self, confirmar):
+        area, (alfa, beta) = self._area()
+        inicio = confirmar(lambda: [
+            Roster.objects.create(personal=alfa, fecha=date(2026, 3, dia), codigo='T') for dia in (1, 2)
+        ])
+        assert tomar_instantaneas()['instantaneas'] == 1
+
+        roster = Roster.objects.get(personal=alfa, fecha=date(2026, 3, 1))
+        roster.codigo = 'DL'
+        tras_cambio = confirmar(roster.save)
+        tras_baja = confirmar(Roster.objects.filter(personal=alfa, fecha=date(2026, 3, 2)).delete)
+        tras_alta = confirmar(lambda: Roster.objects.create(
+            personal=beta, fecha=date(2026, 3, 5), codigo='N', estado='borrador'
+        ))
+
+        assert roster_en(inicio, 2026, 3, area=area) == {alfa.pk: {
+            date(2026, 3, 1): {'codigo': 'T', 'estado': 'aprobado', 'observaciones': ''},
+            date(2026, 3, 2): {'codigo': 'T', 'estado': 'aprobado', 'observaciones': ''},
+        }}
+        assert roster_en(tras_cambio, 2026, 3, personal=alfa)[alfa.pk][date(2026, 3, 1)]['codigo'] == 'DL'
+        assert list(roster_en(tras_baja, 2026, 3, personal=alfa)[alfa.pk]) == [date(2026, 3, 1)]
+        assert roster_en(tras_alta, 2026, 3, personal=beta) == {beta.pk: {
+            date(2026, 3, 5): {'codigo': 'N', 'estado': 'borrador', 'observaciones': ''},
+        }}
+
+    def test_instantanea_incremental_y_consultas_acotadas(self, confirmar, django_assert_max_num_queries):
+        area, (alfa, beta) = self._area()
+        confirmar(lambda: [
+            Roster.objects.create(personal=persona, fecha=date(2026, 3, dia), codigo='T')
+            for persona in (alfa, beta) for dia in range(1, 11)
+        ])
+        tomar_instantaneas()
+        roster = Roster.objects.get(personal=beta, fecha=date(2026, 3, 4))
+        roster.codigo = 'DL'
+        confirmar(roster.save)
+
+        # Solo la persona con cambios recibe una instantánea nueva
+        assert tomar_instantaneas()['instantaneas'] == 1
+        assert InstantaneaRoster.objects.filter(personal=beta).count() == 2
+
+        with django_assert_max_num_queries(3):
+            estado = roster_en(timezone.now(), 2026, 3, area=area)
+        assert estado[beta.pk][date(2026, 3, 4)]['codigo'] == 'DL'
+        assert len(estado[alfa.pk]) == 10
+
+    def test_rechazo_y_api(self, client, confirmar):
+        area, (alfa, _) = self._area()
+        admin = User.objects.create_superuser('admin', 'admin@test.com', 'x')
+        antes = confirmar(lambda: Roster.objects.create(
+            personal=alfa, fecha=date(2026, 3, 1), codigo='T', estado='pendiente'
+        ))
+        pendiente = Roster.objects.get(personal=alfa)
+        confirmar(lambda: RosterService.rechazar_cambio(pendiente.pk, admin, 'duplicado'))
+
+        assert roster_en(timezone.now(), 2026, 3, personal=alfa) == {}
+        client.force_login(admin)
+        respuesta = client.get('/api/roster/historico/', {
+            'momento': antes.isoformat(), 'anio': 2026, 'mes': 3, 'personal': alfa.pk
+        })
+        assert respuesta.json()['personal'] == [{
+            'personal': alfa.pk,
+            'celdas': {'2026-03-01': {'codigo': 'T', 'estado': 'pendiente', 'observaciones': ''}},
+        }]
+        assert client.get('/api/roster/historico/', {'anio': 2026, 'mes': 3}).status_code == 400
@@ -0,0 +1,378 @@
+"""
+Tests para el motor de importación columnar.
+"""
+import pytest
+import pandas as pd
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.utils import timezone
+from personal.models import Area, SubArea, Personal, Roster, RosterAudit, LoteAuditoria
+from personal.importacion import (
+    importar_personal, importar_areas, importar_subareas, importar_roster,
+    importar_roster_anual, importar_roster_periodos,
+    leer_tabla, normalizar_documentos
+)
+
+
+def test_normalizar_documentos():
+    serie = pd.Series(['01234567', 12345678.0, ' 87654321 ', None, 'nan'])
+    resultado = normalizar_documentos(serie)
+    assert list(resultado[:3]) == ['01234567', '12345678', '87654321']
+    assert resultado[3:].isna().all()
+
+
+@pytest.mark.django_db
+class TestImportarPersonal:
+    def _df(self, filas):
+        return pd.DataFrame(filas)
+
+    def test_crea_y_actualiza_por_nro_doc(self):
+        area = Area.objects.create(nombre='AREA TEST')
+        subarea = SubArea.objects.create(nombre='SUBAREA TEST', area=area)
+        Personal.objects.create(
+            nro_doc='00000001', apellidos_nombres='ANTIGUO', cargo='X', tipo_trab='Empleado',
+            fecha_alta=date(2020, 1, 1)
+        )
+
+        df = self._df([
+            {'NroDoc': '00000001', 'ApellidosNombres': 'NUEVO NOMBRE', 'SubArea': 'SUBAREA TEST',
+             'FechaAlta': None, 'DiasLibresCorte2025': 3.5},
+            {'NroDoc': '00000002', 'ApellidosNombres': 'PERSONA DOS', 'SubArea': 'NO EXISTE',
+             'FechaAlta': '2024-05-01', 'DiasLibresCorte2025': None},
+        ])
+        resultado = importar_personal(df)
+
+        assert resultado['creados'] == 1
+        assert resultado['actualizados'] == 1
+        assert any('NO EXISTE' in e for e in resultado['errores'])
+
+        uno = Personal.objects.get(nro_doc='00000001')
+        assert uno.apellidos_nombres == 'NUEVO NOMBRE'
+        assert uno.subarea == subarea
+        assert uno.fecha_alta == date(2020, 1, 1)  # Celda vacía no sobrescribe
+        assert uno.dias_libres_corte_2025 == Decimal('3.5')
+
+        dos = Personal.objects.get(nro_doc='00000002')
+        assert dos.subarea is None
+        assert dos.fecha_alta == date(2024, 5, 1)
+        assert dos.tipo_trab == 'Empleado'
+
+    def test_subarea_repetida_en_varias_areas(self):
+        norte = SubArea.objects.create(nombre='MANTENIMIENTO', area=Area.objects.create(nombre='NORTE'))
+        sur = SubArea.objects.create(nombre='MANTENIMIENTO', area=Area.objects.create(nombre='SUR'))
+        Personal.objects.create(
+            nro_doc='00000001', apellidos_nombres='UNO', cargo='X', tipo_trab='Empleado', subarea=norte
+        )
+
+        resultado = importar_personal(self._df([
+            {'NroDoc': '00000001', 'ApellidosNombres': 'UNO', 'SubArea': 'MANTENIMIENTO', 'Area': ''},
+            {'NroDoc': '00000002', 'ApellidosNombres': 'DOS', 'SubArea': 'MANTENIMIENTO', 'Area': 'SUR'},
+        ]))
+
+        # Sin área el nombre es ambiguo: la fila se reporta y la persona conserva su subárea
+        assert resultado['errores'] == [
+            "Fila 2: SubÁrea 'MANTENIMIENTO' existe en varias áreas; indique la columna Area"
+        ]
+        assert Personal.objects.get(nro_doc='00000001').subarea == norte
+        assert Personal.objects.get(nro_doc='00000002').subarea == sur
+
+    def test_consultas_por_lote(self, django_assert_max_num_queries):
+        df = self._df([
+            {'NroDoc': f'{i:08d}', 'ApellidosNombres': f'PERSONA {i}', 'Cargo': 'CARGO'}
+            for i in range(300)
+        ])
+        with django_assert_max_num_queries(30):
+            resultado = importar_personal(df)
+        assert resultado['creados'] == 300
+
+        with django_assert_max_num_queries(30):
+            resultado = importar_personal(df, forzar=True)
+        assert resultado['actualizados'] == 300
+
+
+@pytest.mark.django_db
+class TestImportarAreas:
+    def _persona(self, nro_doc):
+        return Personal.objects.create(
+            nro_doc=nro_doc, apellidos_nombres=f'P {nro_doc}', cargo='X', tipo_trab='Empleado'
+        )
+
+    def test_sincroniza_responsables(self):
+        uno, dos, tres = self._persona('00000001'), self._persona('00000002'), self._persona('00000003')
+        area = Area.objects.create(nombre='AREA A')
+        area.responsables.set([uno, dos])
+
+        df = pd.DataFrame([
+            {'Nombre': 'AREA A', 'Responsable_DNI': '00000002; 00000003', 'Activa': 'No'},
+            {'Nombre': 'AREA B', 'Responsable_DNI': '00000001', 'Activa': None},
+            {'Nombre': 'AREA C', 'Responsable_DNI': '99999999', 'Activa': 'Sí'},
+        ])
+        resultado = importar_areas(df)
+
+        assert resultado['creados'] == 1
+        assert resultado['actualizados'] == 1
+        assert resultado['errores'] == ['Fila 4: Responsable con DNI 99999999 no encontrado']
+
+        area.refresh_from_db()
+        assert area.activa is False
+        assert set(area.responsables.all()) == {dos, tres}
+        area_b = Area.objects.get(nombre='AREA B')
+        assert area_b.activa is True
+        assert list(area_b.responsables.all()) == [uno]
+        assert not Area.objects.filter(nombre='AREA C').exists()
+
+    def test_importar_subareas(self):
+        area = Area.objects.create(nombre='AREA A')
+        SubArea.objects.create(nombre='SUB 1', area=area, descripcion='vieja')
+
+        df = pd.DataFrame([
+            {'Nombre': 'SUB 1', 'Area': 'AREA A', 'Descripcion': 'nueva'},
+            {'Nombre': 'SUB 2', 'Area': 'AREA A', 'Descripcion': None},
+            {'Nombre': 'SUB 3', 'Area': 'NO EXISTE', 'Descripcion': None},
+        ])
+        resultado = importar_subareas(df)
+
+        assert resultado['creados'] == 1
+        assert resultado['actualizados'] == 1
+        assert len(resultado['errores']) == 1
+        assert SubArea.objects.get(nombre='SUB 1').descripcion == 'nueva'
+        assert SubArea.objects.filter(nombre='SUB 2', area=area).exists()
+
+
+@pytest.mark.django_db
+class TestReimportacionIdempotente:
+    def _personal(self, n):
+        return [
+            Personal.objects.create(
+                nro_doc=f'{i:08d}', apellidos_nombres=f'P {i}', cargo='X', tipo_trab='Empleado'
+            )
+            for i in range(n)
+        ]
+
+    def _roster_df(self, personas, codigo='T'):
+        return pd.DataFrame([
+            {'DNI': p.nro_doc, **{f'Dia{d:02d}': codigo for d in range(1, 6)}}
+            for p in personas
+        ])
+
+    def test_personal_sin_cambios_se_omite(self):
+        df = pd.DataFrame([
+            {'NroDoc': f'{i:08d}', 'ApellidosNombres': f'PERSONA {i}'} for i in range(5)
+        ])
+        importar_personal(df)
+        df.loc[2, 'ApellidosNombres'] = 'CORREGIDO'
+
+        resultado = importar_personal(df)
+
+        assert resultado['actualizados'] == 1
+        assert resultado['sin_cambios'] == 4
+        assert Personal.objects.get(nro_doc='00000002').apellidos_nombres == 'CORREGIDO'
+
+    def test_edicion_manual_invalida_huella(self):
+        df = pd.DataFrame([{'NroDoc': '00000001', 'ApellidosNombres': 'ORIGINAL'}])
+        importar_personal(df)
+        persona = Personal.objects.get(nro_doc='00000001')
+        persona.apellidos_nombres = 'EDITADO'
+        persona.save()
+
+        resultado = importar_personal(df)
+
+        assert resultado['actualizados'] == 1
+        assert Personal.objects.get(nro_doc='00000001').apellidos_nombres == 'ORIGINAL'
+
+    def test_roster_solo_procesa_celdas_modificadas(self, django_assert_max_num_queries):
+        personas = self._personal(20)
+        df = self._roster_df(personas)
+        resultado = importar_roster(df, 2026, 3)
+        assert resultado['creados'] == 100
+
+        df.loc[3, 'Dia02'] = 'TR'
+        with django_assert_max_num_queries(15):
+            resultado = importar_roster(df, 2026, 3)
+
+        assert resultado['actualizados'] == 1
+        assert resultado['sin_cambios'] == 19
+        assert Roster.objects.get(personal=personas[3], fecha=date(2026, 3, 2)).codigo == 'TR'
+
+    def test_roster_reprocesar_forzado(self):
+        personas = self._personal(2)
+        df = self._roster_df(personas)
+        importar_roster(df, 2026, 3)
+
+        resultado = importar_roster(df, 2026, 3, forzar=True)
+
+        assert resultado['sin_cambios'] == 0
+        assert resultado['creados'] == resultado['actualizados'] == 0
+
+
+@pytest.mark.django_db
+class TestLeerTabla:
+    def test_csv_preserva_ceros_y_separador(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        contenido = 'NroDoc;ApellidosNombres\n01234567;PERSONA UNO\n'.encode('utf-8-sig')
+        archivo = SimpleUploadedFile('personal.csv', contenido)
+
+        df = leer_tabla(archivo, 'Personal', dtype={'NroDoc': str})
+        resultado = importar_personal(df)
+
+        assert resultado['creados'] == 1
+        assert Personal.objects.filter(nro_doc='01234567').exists()
+
+    def test_parquet_mismo_esquema(self, tmp_path):
+        pytest.importorskip('pyarrow')
+        ruta = tmp_path / 'roster.parquet'
+        pd.DataFrame({'DNI': [1234567], 'Dia01': ['t']}).to_parquet(ruta)
+        Personal.objects.create(
+            nro_doc='1234567', apellidos_nombres='P', cargo='X', tipo_trab='Empleado'
+        )
+
+        with open(ruta, 'rb') as archivo:
+            df = leer_tabla(archivo, 'Roster', dtype={'DNI': str})
+        resultado = importar_roster(df, 2026, 3)
+
+        assert resultado['creados'] == 1
+        assert Roster.objects.get(fecha=date(2026, 3, 1)).codigo == 'T'
+
+
+class TestHojasMensuales:
+    def test_detecta_nombres_de_mes(self):
+        from personal.hojas import detectar_hojas_mes
+        nombres = ['Instrucciones', 'Enero', 'FEB', 'Setiembre 2026', 'Roster_03', 'Hoja1',
+                   'Octubre 2025', 'Catalogo']
+        assert detectar_hojas_mes(nombres, 2026) == {
+            1: 'Enero', 2: 'FEB', 3: 'Roster_03', 9: 'Setiembre 2026'
+        }
+
+    def test_mes_duplicado(self):
+        from personal.hojas import detectar_hojas_mes
+        with pytest.raises(ValueError):
+            detectar_hojas_mes(['Marzo', '03'])
+
+
+@pytest.mark.django_db
+class TestImportarRosterAnual:
+    def _libro(self, tmp_path, hojas):
+        ruta = tmp_path / 'anual.xlsx'
+        with pd.ExcelWriter(ruta) as writer:
+            for nombre, df in hojas.items():
+                df.to_excel(writer, sheet_name=nombre, index=False)
+        return ruta
+
+    def test_importa_todas_las_hojas_en_una_escritura(self, tmp_path, django_assert_max_num_queries):
+        personas = [
+            Personal.objects.create(
+                nro_doc=f'{i:08d}', apellidos_nombres=f'P {i}', cargo='X', tipo_trab='Empleado'
+            )
+            for i in range(3)
+        ]
+        hoja = pd.DataFrame([
+            {'DNI': p.nro_doc, **{f'Dia{d:02d}': 'T' for d in range(1, 4)}} for p in personas
+        ])
+        ruta = self._libro(tmp_path, {'Instrucciones': pd.DataFrame({'x': [1]}),
+                                      'Enero': hoja, 'Febrero': hoja, 'Marzo': hoja})
+
+        with open(ruta, 'rb') as archivo, django_assert_max_num_queries(20):
+            resultado = importar_roster_anual(archivo, 2026, max_procesos=2)
+
+        assert resultado['meses'] == [1, 2, 3]
+        assert resultado['creados'] == 27
+        assert resultado['errores'] == []
+        assert Roster.objects.filter(fecha__month=2, codigo='T').count() == 9
+
+    def test_saldo_dl_se_acumula_entre_meses(self):
+        persona = Personal.objects.create(
+            nro_doc='00000001', apellidos_nombres='P', cargo='X', tipo_trab='Empleado',
+            regimen_turno='21x7'
+        )
+        enero = pd.DataFrame([{'DNI': '00000001', 'Dia01': 'T', 'Dia02': 'T', 'Dia03': 'T'}])
+        febrero = pd.DataFrame([{'DNI': '00000001', 'Dia01': 'DL', 'Dia02': 'DL'}])
+
+        resultado = importar_roster_periodos({1: enero, 2: febrero}, 2026)
+
+        # 3 días T dan 1 día libre: el primer DL usa el saldo de enero, el segundo falla
+        assert resultado['creados'] == 4
+        assert len(resultado['errores']) == 1
+        assert resultado['errores'][0].startswith('Mes 02, Fila 2, Día 2')
+        assert Roster.objects.get(personal=persona, fecha=date(2026, 2, 1)).codigo == 'DL'
+
+    def test_cambios_de_codigo_quedan_auditados(self):
+        from personal.models import RosterAudit
+        persona = Personal.objects.create(
+            nro_doc='00000001', apellidos_nombres='P', cargo='X', tipo_trab='Empleado'
+        )
+        Roster.objects.create(personal=persona, fecha=date(2026, 1, 1), codigo='T')
+
+        resultado = importar_roster(pd.DataFrame([{'DNI': '00000001', 'Dia01': 'TR'}]), 2026, 1)
+
+        assert resultado['actualizados'] == 1
+        auditoria = RosterAudit.objects.get(personal=persona)
+        assert (auditoria.valor_anterior, auditoria.valor_nuevo) == ('T', 'TR')
+
+
+@pytest.mark.django_db
+class TestCargaMasivaApi:
+    URL = '/api/roster/bulk_create/'
+
+    @pytest.fixture
+    def personas(self):
+        area = Area.objects.create(nombre='AREA')
+        subarea = SubArea.objects.create(nombre='SUB', area=area)
+        return [
+            Personal.objects.create(
+                nro_doc=f'{i:08d}', apellidos_nombres=f'P {i}', cargo='X', tipo_trab='Empleado',
+                subarea=subarea, regimen_turno='21x7'
+            )
+            for i in range(3)
+        ]
+
+    def _registros(self, personas, dias, codigo='T'):
+        return [
+            {'personal': persona.pk, 'fecha': date(2026, 3, dia).isoformat(), 'codigo': codigo}
+            for persona in personas for dia in dias
+        ]
+
+    def test_upsert_en_consultas_constantes(self, client, personas, django_assert_max_num_queries,
+                                            django_capture_on_commit_callbacks):
+        client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'x'))
+        Roster.objects.create(personal=personas[0], fecha=date(2026, 3, 1), codigo='TR')
+        Roster.objects.create(personal=personas[0], fecha=date(2026, 3, 2), codigo='T')
+        registros = self._registros(personas, range(1, 31))
+
+        with django_capture_on_commit_callbacks(execute=True), django_assert_max_num_queries(20):
+            respuesta = client.post(self.URL, {'registros': registros}, content_type='application/json')
+
+        assert respuesta.status_code == 201
+        datos = respuesta.json()
+        assert (datos['creados'], datos['actualizados'], datos['sin_cambios']) == (88, 1, 1)
+        assert Roster.objects.get(personal=personas[0], fecha=date(2026, 3, 1)).codigo == 'T'
+        lote = LoteAuditoria.objects.get(origen='api')
+        assert RosterAudit.objects.filter(lote=lote).count() == lote.total == 89
+
+    def test_saldo_insuficiente_rechaza_todo_el_lote(self, client, personas):
+        client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'x'))
+        # 3 días T dan 1 día libre: el segundo DL no tiene saldo
+        registros = self._registros(personas[:1], (1, 2, 3)) + self._registros(personas[:1], (4, 5), codigo='DL')
+
+        respuesta = client.post(self.URL, {'registros': registros}, content_type='application/json')
+
+        assert respuesta.status_code == 400
+        assert respuesta.json()['errores'][0].startswith('Registro 4:')
+        assert not Roster.objects.exists()
+
+    def test_usuario_propio_queda_en_borrador(self, client, personas):
+        usuario = User.objects.create_user('p0', password='x')
+        personas[0].usuario = usuario
+        personas[0].save()
+        client.force_login(usuario)
+        manana = timezone.localdate() + timedelta(days=1)
+        propio = {'personal': personas[0].pk, 'fecha': manana.isoformat(), 'codigo': 'T'}
+
+        respuesta = client.post(self.URL, {'registros': [propio]}, content_type='application/json')
+        assert respuesta.status_code == 201
+        assert Roster.objects.get(personal=personas[0]).estado == 'borrador'
+
+        ajeno = {'personal': personas[1].pk, 'fecha': manana.isoformat(), 'codigo': 'T'}
+        pasado = {'personal': personas[0].pk, 'fecha': '2026-01-02', 'codigo': 'T'}
+        respuesta = client.post(self.URL, {'registros': [ajeno, pasado]}, content_type='application/json')
+        assert len(respuesta.json()['errores']) == 2
@@ -0,0 +1,116 @@
+"""
+Tests para los lotes de auditoría y su reversión.
+"""
+import json
+import pytest
+from datetime import date
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from personal.auditoria import deshacer_lote, en_lote
+from personal.catalogos import obtener_catalogos
+from personal.contadores import reconciliar_contadores
+from personal.models import Area, SubArea, Personal, Roster, RosterAudit, LoteAuditoria
+
+
+@pytest.mark.django_db
+class TestLotesAuditoria:
+    @pytest.fixture
+    def admin(self):
+        return User.objects.create_superuser('admin', 'admin@test.com', 'x')
+
+    @pytest.fixture
+    def persona(self):
+        area = Area.objects.create(nombre='AREA')
+        subarea = SubArea.objects.create(nombre='SUB', area=area)
+        return Personal.objects.create(
+            nro_doc='00000001', apellidos_nombres='ALFA', cargo='X', tipo_trab='Empleado', subarea=subarea
+        )
+
+    def _celdas(self, persona):
+        return {
+            roster.fecha.day: (roster.codigo, roster.estado, roster.observaciones)
+            for roster in Roster.objects.filter(personal=persona)
+        }
+
+    def test_deshacer_restaura_altas_cambios_y_bajas(self, admin, persona, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            for dia in (1, 2):
+                Roster.objects.create(personal=persona, fecha=date(2026, 3, dia), codigo='T')
+        antes = self._celdas(persona)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic(), en_lote('importacion', admin, 'prueba') as lote:
+                roster = Roster.objects.get(personal=persona, fecha=date(2026, 3, 1))
+                roster.codigo = 'DL'
+                roster.observaciones = 'descanso'
+                roster.save()
+                Roster.objects.filter(personal=persona, fecha=date(2026, 3, 2)).delete()
+                Roster.objects.create(personal=persona, fecha=date(2026, 3, 3), codigo='N')
+        lote = lote.instancia
+        assert lote.total == RosterAudit.objects.filter(lote=lote).count() == 4
+
+        with django_capture_on_commit_callbacks(execute=True):
+            resultado = deshacer_lote(lote.pk, admin)
+
+        assert (resultado['restauradas'], resultado['recreadas'], resultado['eliminadas']) == (1, 1, 1)
+        assert self._celdas(persona) == antes
+        lote.refresh_from_db()
+        assert lote.deshecho_por == admin
+        assert LoteAuditoria.objects.get(origen='deshacer').auditorias.exists()
+        with pytest.raises(ValidationError):
+            deshacer_lote(lote.pk, admin)
+
+    def test_aprobacion_masiva_y_conflictos(self, admin, persona, client, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            pendientes = [
+                Roster.objects.create(personal=persona, fecha=date(2026, 3, dia), codigo='T', estado='pendiente')
+                for dia in (1, 2)
+            ]
+        client.force_login(admin)
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(
+                '/roster/aprobar-lote/', json.dumps({'ids': [roster.pk for roster in pendientes]}),
+                content_type='application/json'
+            )
+        lote = LoteAuditoria.objects.get(origen='aprobacion')
+        assert lote.usuario == admin
+
+        # Un cambio posterior sobre el día 2 lo deja fuera de la reversión
+        roster = Roster.objects.get(personal=persona, fecha=date(2026, 3, 2))
+        roster.codigo = 'DL'
+        with django_capture_on_commit_callbacks(execute=True):
+            roster.save()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            respuesta = client.post(f'/api/lotes-auditoria/{lote.pk}/deshacer/')
+
+        assert respuesta.json()['conflictos'] == [{'personal': persona.pk, 'fecha': '2026-03-02'}]
+        assert self._celdas(persona) == {1: ('T', 'pendiente', ''), 2: ('DL', 'aprobado', '')}
+        assert Roster.objects.get(personal=persona, fecha=date(2026, 3, 1)).aprobado_por is None
+        assert client.post(f'/api/lotes-auditoria/{lote.pk}/deshacer/').status_code == 400
+
+    def test_deshacer_tras_mover_de_area_en_la_transaccion(self, admin, persona, client,
+                                                            django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            roster = Roster.objects.create(personal=persona, fecha=date(2026, 3, 1), codigo='T', estado='pendiente')
+        client.force_login(admin)
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post('/roster/aprobar-lote/', json.dumps({'ids': [roster.pk]}), content_type='application/json')
+        lote = LoteAuditoria.objects.get(origen='aprobacion')
+        obtener_catalogos()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                # La subárea nueva aún no está en la instantánea de catálogos publicada
+                persona.subarea = SubArea.objects.create(nombre='SUB2', area=Area.objects.create(nombre='OTRA'))
+                persona.save()
+                deshacer_lote(lote.pk, admin)
+
+        assert reconciliar_contadores(corregir=False) == {'creados': 0, 'actualizados': 0, 'eliminados': 0}
+
+    def test_sin_cambios_no_crea_lote(self, admin):
+        with en_lote('api', admin) as lote:
+            pass
+        assert lote.instancia is None
+        assert not LoteAuditoria.objects.exists()
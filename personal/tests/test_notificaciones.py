@@ -0,0 +1,69 @@
+"""
+Tests para la bandeja de salida y los resúmenes de notificaciones de aprobación.
+"""
+import json
+import pytest
+from datetime import date, timedelta
+from django.contrib.auth.models import User
+from django.core import mail
+from django.utils import timezone
+from personal.models import Area, SubArea, Personal, Roster, Notificacion
+from personal.notificaciones import enviar_resumenes
+
+
+@pytest.fixture
+def correo_locmem(settings):
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+@pytest.mark.django_db
+class TestNotificaciones:
+    def _area(self):
+        area = Area.objects.create(nombre='AREA')
+        subarea = SubArea.objects.create(nombre='SUB', area=area)
+        responsable = Personal.objects.create(
+            nro_doc='00000009', apellidos_nombres='RESPONSABLE', cargo='X', tipo_trab='Empleado',
+            correo_corporativo='responsable@test.com'
+        )
+        area.responsables.add(responsable)
+        persona = Personal.objects.create(
+            nro_doc='00000001', apellidos_nombres='ALFA', cargo='X', tipo_trab='Empleado', subarea=subarea,
+            usuario=User.objects.create_user('alfa', 'alfa@test.com', 'x')
+        )
+        return persona
+
+    def test_aprobacion_en_lote_encola_por_celda(self, client):
+        persona = self._area()
+        ids = [
+            Roster.objects.create(personal=persona, fecha=date(2026, 3, dia), codigo='T', estado='pendiente').pk
+            for dia in range(1, 4)
+        ]
+        client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'x'))
+
+        client.post('/roster/aprobar-lote/', json.dumps({'ids': ids}), content_type='application/json')
+
+        assert Notificacion.objects.filter(destinatario='alfa@test.com', evento='aprobado').count() == 3
+
+    def test_resumen_agrupa_por_destinatario(self, client, correo_locmem):
+        persona = self._area()
+        for dia in range(1, 3):
+            Roster.objects.create(personal=persona, fecha=date(2026, 3, dia), codigo='T', estado='borrador')
+        client.force_login(persona.usuario)
+        client.post('/roster/enviar-aprobacion/')
+        pendiente = Roster.objects.filter(personal=persona).first()
+        client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'x'))
+        client.post(f'/roster/aprobar/{pendiente.pk}/')
+        client.post(f'/roster/rechazar/{Roster.objects.get(estado="pendiente").pk}/')
+
+        # Dentro de la ventana aún no se envía nada
+        assert enviar_resumenes(ventana=timedelta(minutes=15))['enviados'] == 0
+
+        resultado = enviar_resumenes(ventana=timedelta(0), ahora=timezone.now() + timedelta(seconds=1))
+
+        assert resultado == {'enviados': 2, 'notificaciones': 3, 'errores': []}
+        por_destinatario = {mensaje.to[0]: mensaje for mensaje in mail.outbox}
+        assert set(por_destinatario) == {'responsable@test.com', 'alfa@test.com'}
+        assert 'envió 2 cambio(s)' in por_destinatario['responsable@test.com'].body
+        assert por_destinatario['alfa@test.com'].subject == 'Resumen de cambios de roster (2)'
+        assert not Notificacion.objects.filter(enviado_en__isnull=True).exists()
+        assert enviar_resumenes(ventana=timedelta(0))['enviados'] == 0
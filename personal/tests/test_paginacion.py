@@ -0,0 +1,61 @@
+"""
+Tests para la paginación por llave de la cola de aprobación.
+"""
+import pytest
+from contextlib import nullcontext
+from datetime import date, datetime, timezone as dt_timezone
+from django.contrib.auth.models import User
+from personal.models import Area, SubArea, Personal, Roster
+from personal.paginacion import paginar_keyset, codificar_cursor
+
+
+@pytest.mark.django_db
+class TestPaginacionKeyset:
+    def _pendientes(self, n, capturar=None):
+        area = Area.objects.create(nombre='AREA')
+        subarea = SubArea.objects.create(nombre='SUB', area=area)
+        persona = Personal.objects.create(
+            nro_doc='00000001', apellidos_nombres='ALFA', cargo='X', tipo_trab='Empleado', subarea=subarea
+        )
+        for dia in range(1, n + 1):
+            with capturar(execute=True) if capturar else nullcontext():
+                roster = Roster.objects.create(
+                    personal=persona, fecha=date(2026, 3, dia), codigo='T', estado='pendiente'
+                )
+            # Empates de actualizado_en de a pares para ejercitar el desempate por id
+            Roster.objects.filter(pk=roster.pk).update(
+                actualizado_en=datetime(2026, 3, 1, 8, (dia + 1) // 2, tzinfo=dt_timezone.utc)
+            )
+        return Roster.objects.filter(estado='pendiente')
+
+    def test_recorre_todas_las_paginas_sin_repetir(self, django_assert_num_queries):
+        pendientes = self._pendientes(7)
+        esperado = list(pendientes.order_by('-actualizado_en', '-pk').values_list('pk', flat=True))
+
+        vistos, cursor = [], None
+        for _ in range(3):
+            with django_assert_num_queries(1):
+                filas, cursor = paginar_keyset(pendientes, cursor, tamano=3)
+            vistos += [fila.pk for fila in filas]
+
+        assert vistos == esperado
+        assert cursor is None
+
+    def test_cursor_invalido_vuelve_a_la_primera_pagina(self):
+        pendientes = self._pendientes(4)
+        primera, _ = paginar_keyset(pendientes, tamano=2)
+        filas, _ = paginar_keyset(pendientes, 'no-es-un-cursor', tamano=2)
+        assert filas == primera
+
+    def test_dashboard_pagina_con_cursor(self, client, django_capture_on_commit_callbacks):
+        pendientes = self._pendientes(3, django_capture_on_commit_callbacks)
+        ultima = pendientes.order_by('-actualizado_en', '-pk').first()
+        client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'x'))
+
+        respuesta = client.get('/aprobaciones/', {'despues': codificar_cursor(ultima.actualizado_en, ultima.pk)})
+
+        assert respuesta.status_code == 200
+        assert [fila.pk for fila in respuesta.context['pendientes']] == list(
+            pendientes.exclude(pk=ultima.pk).order_by('-actualizado_en', '-pk').values_list('pk', flat=True)
+        )
+        assert respuesta.context['stats']['pendientes'] == 3
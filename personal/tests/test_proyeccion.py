@@ -0,0 +1,82 @@
+"""
+Tests para la proyección vectorizada de saldos de días libres.
+"""
+import time
+import numpy as np
+import pytest
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from personal.models import Area, SubArea, Personal, Roster
+from personal.proyeccion import curvas_saldo, primer_dia_negativo, proyectar_saldos
+from personal.saldos import CODIGOS_SALDO
+
+
+def test_curvas_iguales_a_la_formula_del_modelo():
+    rng = np.random.default_rng(7)
+    personas, dias = 1000, 180
+    matriz = rng.integers(0, len(CODIGOS_SALDO) + 1, size=(personas, dias), dtype=np.int8)
+    previos = rng.integers(0, 40, size=(personas, len(CODIGOS_SALDO))).astype(np.int32)
+    corte = rng.integers(0, 10, size=personas).astype(float)
+    factores = rng.choice([3.0, 2.0, 5.0], size=personas)
+
+    inicio = time.perf_counter()
+    saldos = curvas_saldo(matriz, previos, corte, factores)
+    primeros = primer_dia_negativo(saldos)
+    assert time.perf_counter() - inicio < 0.5
+
+    # Misma fórmula que Personal.validar_saldo_dl, día por día, para una muestra
+    for fila in (0, 123, 999):
+        conteos = Counter(dict(zip(CODIGOS_SALDO, previos[fila].tolist(), strict=True)))
+        esperados = []
+        for valor in matriz[fila]:
+            if valor:
+                conteos[CODIGOS_SALDO[valor - 1]] += 1
+            ganados = round(conteos['T'] / factores[fila] + conteos['TR'] / 2.5)
+            esperados.append(corte[fila] - conteos['DLA'] + ganados - conteos['DL'])
+        assert saldos[fila].tolist() == esperados
+        negativos = [dia for dia, saldo in enumerate(esperados) if saldo < 0]
+        assert primeros[fila] == (negativos[0] if negativos else -1)
+
+
+@pytest.mark.django_db
+class TestProyeccionSaldos:
+    @pytest.fixture
+    def persona(self):
+        area = Area.objects.create(nombre='AREA')
+        subarea = SubArea.objects.create(nombre='SUB', area=area)
+        persona = Personal.objects.create(
+            nro_doc='00000001', apellidos_nombres='ALFA', cargo='X', tipo_trab='Empleado',
+            subarea=subarea, regimen_turno='21x7', dias_libres_corte_2025=Decimal('1')
+        )
+        # Antes del horizonte: 3 T ganan un día libre
+        planificados = ['T', 'T', 'T'] + [None] * 6 + ['DL', 'DL', 'DL', 'T', 'T', 'T']
+        Roster.objects.bulk_create([
+            Roster(personal=persona, fecha=date(2026, 3, 1) + timedelta(days=dia), codigo=codigo)
+            for dia, codigo in enumerate(planificados) if codigo
+        ])
+        return persona
+
+    def test_marca_primer_dia_negativo(self, persona):
+        resultado = proyectar_saldos(Personal.objects.all(), date(2026, 3, 10), 6, incluir_curvas=True)
+
+        fila = resultado['personal'][0]
+        assert fila['saldos'] == [1, 0, -1, -1, 0, 0]
+        assert (fila['saldo_inicial'], fila['saldo_minimo'], fila['saldo_final']) == (2, -1, 0)
+        assert fila['primera_fecha_negativa'] == '2026-03-12'
+        # Con todo el roster cargado coincide con la validación actual
+        conteos = Counter(Roster.objects.filter(personal=persona).values_list('codigo', flat=True))
+        assert persona.validar_saldo_dl(conteos=conteos)[2] == fila['saldo_final']
+
+    def test_api(self, client, persona):
+        client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'x'))
+        respuesta = client.get('/api/personal/proyeccion_saldos/', {
+            'area': persona.subarea.area_id, 'desde': '2026-03-10', 'dias': 30
+        })
+        assert respuesta.status_code == 200
+        datos = respuesta.json()
+        assert datos['hasta'] == '2026-04-08'
+        assert datos['personal'][0]['primera_fecha_negativa'] == '2026-03-12'
+        assert 'saldos' not in datos['personal'][0]
+        assert client.get('/api/personal/proyeccion_saldos/', {'dias': 30}).status_code == 400
@@ -0,0 +1,76 @@
+"""
+Tests para el motor de reportes mensuales.
+"""
+import io
+import pytest
+from datetime import date
+from decimal import Decimal
+from openpyxl import load_workbook
+from personal.models import Area, SubArea, Personal, Roster
+from personal.reportes import (
+    dotacion_por_area, exportar_reporte_mensual, movimientos_saldo, mes_anterior
+)
+
+
+@pytest.fixture
+def datos():
+    area = Area.objects.create(nombre='OPERACIONES')
+    subarea = SubArea.objects.create(nombre='PLANTA', area=area)
+    alfa = Personal.objects.create(
+        nro_doc='00000001', apellidos_nombres='ALFA', cargo='X', tipo_trab='Empleado',
+        subarea=subarea, regimen_turno='21x7', dias_libres_corte_2025=Decimal('2'),
+        fecha_alta=date(2020, 1, 1)
+    )
+    Personal.objects.create(
+        nro_doc='00000002', apellidos_nombres='BETA', cargo='X', tipo_trab='Empleado',
+        subarea=subarea, fecha_alta=date(2026, 2, 10), fecha_cese=date(2026, 2, 20)
+    )
+    Roster.objects.bulk_create(
+        [Roster(personal=alfa, fecha=date(2026, 1, d), codigo='T') for d in range(1, 4)]
+        + [Roster(personal=alfa, fecha=date(2026, 2, d), codigo='T') for d in range(1, 7)]
+        + [Roster(personal=alfa, fecha=date(2026, 2, 7), codigo='DL'),
+           Roster(personal=alfa, fecha=date(2026, 2, 8), codigo='DLA')]
+    )
+    return alfa
+
+
+@pytest.mark.django_db
+class TestReporteMensual:
+    def test_dotacion_por_area(self, datos):
+        assert list(dotacion_por_area(2026, 2)) == [('OPERACIONES', 1, 1, 1)]
+
+    def test_movimientos_de_saldo(self, datos):
+        filas = list(movimientos_saldo(2026, 2))
+
+        # Enero: 3 T -> 1 ganado; febrero: 6 T -> 2 ganados, usa 1 DL y 1 DLA
+        assert filas == [('00000001', 'ALFA', '21x7', 6, 0, 2, 1, 1, 3.0, 3.0)]
+
+    def test_consultas_agregadas(self, datos, django_assert_max_num_queries):
+        with django_assert_max_num_queries(6):
+            exportar_reporte_mensual(io.BytesIO(), 2026, 2)
+
+    def test_libro_con_tres_hojas(self, datos):
+        destino = io.BytesIO()
+        exportar_reporte_mensual(destino, 2026, 2)
+        destino.seek(0)
+
+        libro = load_workbook(destino)
+        assert libro.sheetnames == ['Codigos', 'Dotacion', 'Saldos']
+        assert [c.value for c in libro['Codigos'][2]] == [
+            '00000001', 'ALFA', 'OPERACIONES', 'PLANTA', 6, 1, 1, 8
+        ]
+
+    def test_tarea_usa_cache_del_mes_cerrado(self, datos, settings, tmp_path):
+        from personal.tasks import generar_reporte_mensual
+        settings.EXPORTACIONES_DIR = tmp_path
+
+        primera = generar_reporte_mensual(2, 2026)
+        segunda = generar_reporte_mensual(2, 2026)
+
+        assert primera['success'] and primera['filepath'] == segunda['filepath']
+        assert primera['filename'].startswith('reporte_mensual-2026-02-')
+
+
+def test_mes_anterior():
+    assert mes_anterior(date(2026, 1, 15)) == (2025, 12)
+    assert mes_anterior(date(2026, 3, 1)) == (2026, 2)
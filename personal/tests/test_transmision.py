@@ -0,0 +1,71 @@
+"""
+Tests para las respuestas en flujo (NDJSON / CSV) del roster.
+"""
+import json
+import pytest
+from datetime import date
+from django.contrib.auth.models import User
+from personal.models import Area, SubArea, Personal, Roster
+from personal.transmision import iterar_ndjson, columnas_roster
+
+
+@pytest.mark.django_db
+class TestRosterEnFlujo:
+    @pytest.fixture
+    def cliente(self, client):
+        client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'x'))
+        return client
+
+    @pytest.fixture
+    def personas(self):
+        area = Area.objects.create(nombre='AREA')
+        subarea = SubArea.objects.create(nombre='SUB', area=area)
+        personas = [
+            Personal.objects.create(
+                nro_doc=f'0000000{n}', apellidos_nombres=f'PERSONA {n}', cargo='X', tipo_trab='Empleado',
+                subarea=subarea
+            )
+            for n in range(1, 3)
+        ]
+        for persona in personas:
+            for dia in range(1, 6):
+                Roster.objects.create(personal=persona, fecha=date(2026, 3, dia), codigo='T')
+        return personas
+
+    def _contenido(self, respuesta):
+        assert respuesta.streaming
+        return b''.join(respuesta.streaming_content).decode()
+
+    def test_por_rango_ndjson(self, cliente, personas):
+        respuesta = cliente.get('/api/roster/por_rango/', {'fecha_desde': '2026-03-02', 'fecha_hasta': '2026-03-04'})
+
+        assert respuesta['Content-Type'].startswith('application/x-ndjson')
+        filas = [json.loads(linea) for linea in self._contenido(respuesta).splitlines()]
+        assert [(fila['fecha'], fila['personal_doc']) for fila in filas[:2]] == [
+            ('2026-03-02', '00000001'), ('2026-03-02', '00000002')
+        ]
+        assert len(filas) == 6
+        assert filas[0]['subarea_nombre'] == 'SUB'
+
+    def test_por_rango_csv_con_campos(self, cliente, personas):
+        respuesta = cliente.get('/api/roster/por_rango/', {
+            'fecha_desde': '2026-03-01', 'fecha_hasta': '2026-03-01', 'formato': 'csv', 'fields': 'fecha,codigo'
+        })
+
+        # La cabecera sale antes de leer filas
+        assert next(iter(respuesta.streaming_content)) == b'fecha,codigo\r\n'
+        assert b''.join(respuesta.streaming_content).decode().splitlines() == ['2026-03-01,T', '2026-03-01,T']
+        assert cliente.get('/api/roster/por_rango/', {'fecha_desde': '2026-03-01'}).status_code == 400
+
+    def test_roster_de_personal_en_flujo(self, cliente, personas):
+        url = f'/api/personal/{personas[0].pk}/roster/'
+        assert len(cliente.get(url).json()) == 5
+
+        respuesta = cliente.get(url, {'formato': 'ndjson', 'fecha_hasta': '2026-03-02', 'fields': 'fecha'})
+
+        assert self._contenido(respuesta) == '{"fecha":"2026-03-01"}\n{"fecha":"2026-03-02"}\n'
+        assert cliente.get(url, {'formato': 'xml'}).status_code == 400
+
+    def test_bloques_de_tamano_fijo(self, personas):
+        bloques = list(iterar_ndjson(Roster.objects.order_by('id'), columnas_roster({'id'}), tamano=4))
+        assert [bloque.count('\n') for bloque in bloques] == [4, 4, 2]
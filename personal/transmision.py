@@ -0,0 +1,119 @@
+"""
+Respuestas en flujo (NDJSON / CSV) para consultas de roster por rango.
+
+Las filas se leen de un cursor del servidor (`.values_list().iterator()`) y
+se codifican por bloques, de modo que la memoria del worker no depende del
+tamaño del rango y los primeros bytes salen con el primer bloque.
+"""
+import csv
+from datetime import date, datetime
+import io
+import json
+import logging
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+logger = logging.getLogger('personal.business')
+
+FORMATOS_FLUJO = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Filas por viaje al servidor y por bloque de texto enviado
+TAMANO_BLOQUE_FLUJO = 2000
+
+# Columna de salida -> lookup (mismos nombres que RosterSerializer, más el estado)
+COLUMNAS_ROSTER = {
+    'id': 'id',
+    'personal': 'personal_id',
+    'personal_nombre': 'personal__apellidos_nombres',
+    'personal_doc': 'personal__nro_doc',
+    'subarea_nombre': 'personal__subarea__nombre',
+    'fecha': 'fecha',
+    'codigo': 'codigo',
+    'estado': 'estado',
+    'observaciones': 'observaciones',
+    'creado_en': 'creado_en',
+    'actualizado_en': 'actualizado_en',
+}
+
+
+def columnas_roster(campos=None):
+    """Columnas de salida; con campos (?fields=) solo las pedidas que existan."""
+    if campos:
+        elegidas = {nombre: lookup for nombre, lookup in COLUMNAS_ROSTER.items() if nombre in campos}
+        if elegidas:
+            return elegidas
+    return dict(COLUMNAS_ROSTER)
+
+
+def _texto(valor):
+    """Fechas en ISO 8601 (las horas en la zona local, como la API)."""
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).isoformat() if timezone.is_aware(valor) else valor.isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    raise TypeError(f'Tipo no serializable: {type(valor).__name__}')
+
+
+def _bloques(consulta, columnas, tamano):
+    bloque = []
+    for fila in consulta.values_list(*columnas.values()).iterator(chunk_size=tamano):
+        bloque.append(fila)
+        if len(bloque) >= tamano:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def iterar_ndjson(consulta, columnas, tamano=TAMANO_BLOQUE_FLUJO):
+    """Genera un objeto JSON por línea, en bloques de texto de `tamano` filas."""
+    nombres = list(columnas)
+    # El codificador en C solo vuelve a Python (default) para fechas
+    codificar = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_texto).encode
+    for bloque in _bloques(consulta, columnas, tamano):
+        yield ''.join([codificar(dict(zip(nombres, fila, strict=True))) + '\n' for fila in bloque])
+
+
+def iterar_csv(consulta, columnas, tamano=TAMANO_BLOQUE_FLUJO):
+    """Genera el CSV: la cabecera de inmediato y luego un bloque de texto por lote."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(list(columnas))
+    yield buffer.getvalue()
+    for bloque in _bloques(consulta, columnas, tamano):
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows(
+            [
+                '' if valor is None else _texto(valor) if isinstance(valor, date) else valor
+                for valor in fila
+            ]
+            for fila in bloque
+        )
+        yield buffer.getvalue()
+
+
+def respuesta_flujo(consulta, columnas, formato, nombre_archivo):
+    """
+    StreamingHttpResponse con las filas de la consulta en NDJSON o CSV.
+
+    Args:
+        consulta: QuerySet ya filtrado y ordenado
+        columnas: Dict {columna de salida: lookup} (ver columnas_roster)
+        formato: Clave de FORMATOS_FLUJO
+        nombre_archivo: Nombre sugerido sin extensión (para el CSV descargable)
+    """
+    if formato == 'csv':
+        contenido = iterar_csv(consulta, columnas)
+    else:
+        contenido = iterar_ndjson(consulta, columnas)
+    response = StreamingHttpResponse(contenido, content_type=FORMATOS_FLUJO[formato])
+    if formato == 'csv':
+        response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.csv"'
+    # Evita que un proxy (nginx) acumule el flujo antes de reenviarlo
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -42,6 +42,7 @@ urlpatterns = [
     path('roster/<int:pk>/editar/', views.roster_update, name='roster_update'),
     path('roster/exportar/', views.roster_export, name='roster_export'),
     path('roster/importar/', views.roster_import, name='roster_import'),
+    path('roster/reporte-mensual/', views.reporte_mensual, name='reporte_mensual'),
     path('roster/update-cell/', views.roster_update_cell, name='roster_update_cell'),
     
     # Sistema de Aprobaciones
@@ -273,23 +273,28 @@ class AreaValidator:
         return True
 
 
-def validar_archivo_excel(archivo):
+EXTENSIONES_EXCEL = ['.xlsx', '.xls']
+EXTENSIONES_IMPORTACION = EXTENSIONES_EXCEL + ['.csv', '.parquet']
+
+
+def validar_archivo_excel(archivo, extensiones_validas=None):
     """
     Valida que un archivo sea un Excel válido.
     
     Args:
         archivo: Archivo subido (UploadedFile)
+        extensiones_validas: Extensiones aceptadas (por defecto solo Excel)
     
     Raises:
         ValidationError: Si el archivo no es válido
     """
     # Validar extensión
     nombre = archivo.name.lower()
-    extensiones_validas = ['.xlsx', '.xls']
+    extensiones_validas = extensiones_validas or EXTENSIONES_EXCEL
     
     if not any(nombre.endswith(ext) for ext in extensiones_validas):
         raise ValidationError(
-            _(f'El archivo debe ser Excel ({", ".join(extensiones_validas)}).')
+            _(f'El archivo debe ser de tipo {", ".join(extensiones_validas)}.')
         )
     
     # Validar tamaño (máximo 10MB)
@@ -303,5 +308,18 @@ def validar_archivo_excel(archivo):
     if archivo.size == 0:
         raise ValidationError(_('El archivo está vacío.'))
     
-    logger.info(f"Archivo Excel validado: {archivo.name} ({archivo.size} bytes)")
+    logger.info(f"Archivo validado: {archivo.name} ({archivo.size} bytes)")
     return True
+
+
+def validar_archivo_importacion(archivo):
+    """
+    Valida un archivo de importación: Excel, CSV o Parquet.
+    
+    Args:
+        archivo: Archivo subido (UploadedFile)
+    
+    Raises:
+        ValidationError: Si el archivo no es válido
+    """
+    return validar_archivo_excel(archivo, EXTENSIONES_IMPORTACION)
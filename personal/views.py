@@ -5,6 +5,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import logout as auth_logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Q, Count
 from django.http import JsonResponse, HttpResponse
 from django.core.paginator import Paginator
@@ -19,11 +20,18 @@ from collections import defaultdict
 import json
 import re
 
+from .auditoria import en_lote, encolar_auditorias
+from .catalogos import obtener_catalogos
+from .cobertura import totales_cobertura
+from .contadores import registrar_cambio, totales_aprobacion
 from .models import Area, SubArea, Personal, Roster, RosterAudit
+from .notificaciones import notificar_envio, notificar_resolucion
+from .paginacion import paginar_keyset
 from .forms import AreaForm, SubAreaForm, PersonalForm, RosterForm, ImportExcelForm
 from .permissions import (
     filtrar_areas, filtrar_subareas, filtrar_personal,
-    puede_editar_personal, get_context_usuario, es_responsable_area
+    puede_editar_personal, get_context_usuario, es_responsable_area, clave_alcance,
+    get_areas_responsable
 )
 
 
@@ -34,15 +42,21 @@ def home(request):
     gerencias_filtradas = filtrar_areas(request.user)
     areas_filtradas = filtrar_subareas(request.user)
     personal_filtrado = filtrar_personal(request.user)
+    hoy = timezone.localdate()
+    
+    # Superusuarios y responsables leen la cobertura precalculada de sus áreas
+    if request.user.is_superuser:
+        total_roster_hoy = totales_cobertura(hoy)['total']
+    elif get_areas_responsable(request.user).exists():
+        total_roster_hoy = totales_cobertura(hoy, get_areas_responsable(request.user))['total']
+    else:
+        total_roster_hoy = Roster.objects.filter(fecha=hoy, personal__in=personal_filtrado).count()
     
     context = {
         'total_gerencias': gerencias_filtradas.filter(activa=True).count(),
         'total_areas': areas_filtradas.filter(activa=True).count(),
         'total_personal': personal_filtrado.filter(estado='Activo').count(),
-        'total_roster_hoy': Roster.objects.filter(
-            fecha=datetime.now().date(),
-            personal__in=personal_filtrado
-        ).count(),
+        'total_roster_hoy': total_roster_hoy,
     }
     context.update(get_context_usuario(request.user))
     return render(request, 'home.html', context)
@@ -153,7 +167,7 @@ def subarea_list(request):
     if buscar:
         subareas = subareas.filter(nombre__icontains=buscar)
     
-    areas = Area.objects.filter(activa=True)
+    areas = obtener_catalogos().areas_activas
     
     context = {
         'subareas': subareas,
@@ -236,7 +250,7 @@ def personal_list(request):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
-    subareas = SubArea.objects.filter(activa=True).select_related('area')
+    subareas = obtener_catalogos().subareas_activas
     
     return render(request, 'personal/personal_list.html', {
         'page_obj': page_obj,
@@ -300,7 +314,7 @@ def personal_update(request, pk):
         form = PersonalForm(instance=personal)
         # Si es responsable, limitar opciones de área
         if es_responsable_area(request.user) and not request.user.is_superuser:
-            form.fields['subarea'].queryset = filtrar_subareas(request.user)
+            form.limitar_subareas(get_areas_responsable(request.user))
     
     context = {
         'form': form,
@@ -509,7 +523,7 @@ def roster_matricial(request):
         tabla_datos.append(fila)
     
     # Obtener todas las áreas para el filtro
-    areas = SubArea.objects.filter(activa=True).select_related('area').order_by('area__nombre', 'nombre')
+    areas = obtener_catalogos().subareas_activas
     
     # Aplicar paginación
     if per_page_num is not None:
@@ -604,11 +618,14 @@ def roster_update(request, pk):
 
 # ================== IMPORT/EXPORT ==================
 
-# Importar utilidades de Excel
-from .excel_utils import (
-    crear_plantilla_personal, crear_plantilla_gerencias,
-    crear_plantilla_areas, crear_plantilla_roster
+# Motor de exportación Excel en streaming (con caché en disco por versión de datos)
+from .exportacion import respuesta_exportacion, respuesta_xlsx, meses_rango, MAX_MESES_RANGO
+from .reportes import exportar_reporte_mensual, mes_anterior, mes_cerrado
+from .importacion import (
+    importar_personal, importar_areas, importar_subareas, importar_roster, importar_roster_anual,
+    invalidar_huellas, leer_tabla
 )
+from .validators import validar_archivo_importacion
 
 # ===== GERENCIAS =====
 
@@ -618,15 +635,9 @@ def area_export(request):
     areas = filtrar_areas(request.user)
     
     # Crear plantilla con datos actuales
-    excel_file = crear_plantilla_gerencias(areas)
-    
-    response = HttpResponse(
-        excel_file.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return respuesta_exportacion(
+        'gerencias', 'todos', '', f'gerencias_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx', areas
     )
-    response['Content-Disposition'] = f'attachment; filename=gerencias_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-    
-    return response
 
 
 @login_required
@@ -638,12 +649,10 @@ def area_import(request):
             archivo = request.FILES['archivo']
             
             try:
+                validar_archivo_importacion(archivo)
+                
                 # Forzar DNI como texto para preservar ceros a la izquierda
-                df = pd.read_excel(
-                    archivo, 
-                    sheet_name='Gerencias',
-                    dtype={'Responsable_DNI': str}
-                )
+                df = leer_tabla(archivo, 'Gerencias', dtype={'Responsable_DNI': str})
                 
                 # Validar columnas
                 columnas_requeridas = ['Nombre']
@@ -651,61 +660,10 @@ def area_import(request):
                     messages.error(request, 'El archivo debe contener al menos la columna: Nombre')
                     return redirect('area_import')
                 
-                creados = 0
-                actualizados = 0
-                errores = []
-                
-                for idx, row in df.iterrows():
-                    try:
-                        nombre = str(row['Nombre']).strip()
-                        if not nombre or nombre == 'nan':
-                            continue
-                        
-                        responsables_list = None
-                        fila_con_error = False
-                        if 'Responsable_DNI' in row:
-                            responsables_list = []
-                            if pd.notna(row['Responsable_DNI']):
-                                dni_responsable = row['Responsable_DNI']
-                                if isinstance(dni_responsable, (int, float)):
-                                    dni_responsable = str(int(dni_responsable)).strip()
-                                else:
-                                    dni_responsable = str(dni_responsable).strip()
-
-                                dni_list = [d.strip() for d in re.split(r'[;,]', dni_responsable) if d.strip()]
-                                for dni in dni_list:
-                                    try:
-                                        responsables_list.append(Personal.objects.get(nro_doc=dni))
-                                    except Personal.DoesNotExist:
-                                        errores.append(f"Fila {idx + 2}: Responsable con DNI {dni} no encontrado")
-                                        fila_con_error = True
-
-                            if fila_con_error:
-                                continue
-                        
-                        # Determinar si está activa
-                        activa = True
-                        if 'Activa' in row and pd.notna(row['Activa']):
-                            activa = str(row['Activa']).strip().lower() in ['sí', 'si', 'yes', '1', 'true']
-                        
-                        # Crear o actualizar
-                        area, created = Area.objects.update_or_create(
-                            nombre=nombre,
-                            defaults={
-                                'descripcion': row.get('Descripcion', '') if pd.notna(row.get('Descripcion')) else '',
-                                'activa': activa,
-                            }
-                        )
-                        if responsables_list is not None:
-                            area.responsables.set(responsables_list)
-                        
-                        if created:
-                            creados += 1
-                        else:
-                            actualizados += 1
-                    
-                    except Exception as e:
-                        errores.append(f"Fila {idx + 2}: {str(e)}")
+                resultado = importar_areas(df, usuario=request.user)
+                creados = resultado['creados']
+                actualizados = resultado['actualizados']
+                errores = resultado['errores']
                 
                 if creados > 0:
                     messages.success(request, f'✓ {creados} gerencias creadas')
@@ -725,13 +683,9 @@ def area_import(request):
     
     # Si se solicita plantilla vacía, generarla y descargar
     if request.GET.get('plantilla') == 'vacia':
-        excel_file = crear_plantilla_gerencias(None)
-        response = HttpResponse(
-            excel_file.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return respuesta_exportacion(
+            'gerencias', 'plantilla', '', f'plantilla_gerencias_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
         )
-        response['Content-Disposition'] = f'attachment; filename=plantilla_gerencias_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-        return response
     
     context = {
         'form': form,
@@ -748,15 +702,10 @@ def subarea_export(request):
     """Exportar áreas a Excel con plantilla y catálogos."""
     subareas = filtrar_subareas(request.user)
     
-    excel_file = crear_plantilla_areas(subareas)
-    
-    response = HttpResponse(
-        excel_file.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return respuesta_exportacion(
+        'subareas', clave_alcance(request.user), '',
+        f'areas_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx', subareas
     )
-    response['Content-Disposition'] = f'attachment; filename=areas_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-    
-    return response
 
 
 @login_required
@@ -768,52 +717,18 @@ def subarea_import(request):
             archivo = request.FILES['archivo']
             
             try:
-                df = pd.read_excel(archivo, sheet_name='Areas')
+                validar_archivo_importacion(archivo)
+                df = leer_tabla(archivo, 'Areas')
                 
-                columnas_requeridas = ['Nombre', 'Gerencia']
+                columnas_requeridas = ['Nombre', 'Area']
                 if not all(col in df.columns for col in columnas_requeridas):
                     messages.error(request, 'El archivo debe contener: Nombre, Area')
                     return redirect('subarea_import')
                 
-                creados = 0
-                actualizados = 0
-                errores = []
-                
-                for idx, row in df.iterrows():
-                    try:
-                        nombre = str(row['Nombre']).strip()
-                        area_nombre = str(row['Area']).strip()
-                        
-                        if not nombre or nombre == 'nan' or not area_nombre or area_nombre == 'nan':
-                            continue
-                        
-                        # Buscar área
-                        try:
-                            area = Area.objects.get(nombre=area_nombre)
-                        except Area.DoesNotExist:
-                            errores.append(f"Fila {idx + 2}: Área '{area_nombre}' no encontrada")
-                            continue
-                        
-                        activa = True
-                        if 'Activa' in row and pd.notna(row['Activa']):
-                            activa = str(row['Activa']).strip().lower() in ['sí', 'si', 'yes', '1', 'true']
-                        
-                        area, created = SubArea.objects.update_or_create(
-                            nombre=nombre,
-                            area=area,
-                            defaults={
-                                'descripcion': row.get('Descripcion', '') if pd.notna(row.get('Descripcion')) else '',
-                                'activa': activa,
-                            }
-                        )
-                        
-                        if created:
-                            creados += 1
-                        else:
-                            actualizados += 1
-                    
-                    except Exception as e:
-                        errores.append(f"Fila {idx + 2}: {str(e)}")
+                resultado = importar_subareas(df, usuario=request.user)
+                creados = resultado['creados']
+                actualizados = resultado['actualizados']
+                errores = resultado['errores']
                 
                 if creados > 0:
                     messages.success(request, f'✓ {creados} áreas creadas')
@@ -833,13 +748,9 @@ def subarea_import(request):
     
     # Si se solicita plantilla vacía, generarla y descargar
     if request.GET.get('plantilla') == 'vacia':
-        excel_file = crear_plantilla_areas(None)
-        response = HttpResponse(
-            excel_file.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return respuesta_exportacion(
+            'subareas', 'plantilla', '', f'plantilla_areas_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
         )
-        response['Content-Disposition'] = f'attachment; filename=plantilla_areas_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-        return response
     
     context = {
         'form': form,
@@ -854,17 +765,12 @@ def subarea_import(request):
 @login_required
 def personal_export(request):
     """Exportar personal a Excel con plantilla y catálogos."""
-    personal = filtrar_personal(request.user).select_related('subarea', 'subarea__area')
-    
-    excel_file = crear_plantilla_personal(personal)
+    personal = filtrar_personal(request.user)
     
-    response = HttpResponse(
-        excel_file.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return respuesta_exportacion(
+        'personal', clave_alcance(request.user), '',
+        f'personal_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx', personal
     )
-    response['Content-Disposition'] = f'attachment; filename=personal_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-    
-    return response
 
 
 @login_required
@@ -876,10 +782,11 @@ def personal_import(request):
             archivo = request.FILES['archivo']
             
             try:
-                # Leer Excel forzando NroDoc como texto para preservar ceros a la izquierda
-                df = pd.read_excel(
-                    archivo, 
-                    sheet_name='Personal',
+                validar_archivo_importacion(archivo)
+                
+                # Leer forzando NroDoc como texto para preservar ceros a la izquierda
+                df = leer_tabla(
+                    archivo, 'Personal',
                     dtype={'NroDoc': str, 'CodigoFotocheck': str, 'Celular': str}
                 )
                 
@@ -888,100 +795,19 @@ def personal_import(request):
                     messages.error(request, 'El archivo debe contener: NroDoc, ApellidosNombres')
                     return redirect('personal_import')
                 
-                creados = 0
-                actualizados = 0
-                errores = []
-                
-                for idx, row in df.iterrows():
-                    try:
-                        # Procesar DNI - asegurar que se mantienen ceros a la izquierda
-                        nro_doc_raw = row['NroDoc']
-                        if pd.isna(nro_doc_raw):
-                            continue
-                        
-                        # Si es número, convertir a string sin notación científica
-                        if isinstance(nro_doc_raw, (int, float)):
-                            nro_doc = str(int(nro_doc_raw)).strip()
-                        else:
-                            nro_doc = str(nro_doc_raw).strip()
-                        
-                        if not nro_doc or nro_doc == 'nan':
-                            continue
-                        
-                        apellidos_nombres = str(row['ApellidosNombres']).strip()
-                        
-                        # Buscar área
-                        subarea = None
-                        if 'SubArea' in row and pd.notna(row['SubArea']):
-                            try:
-                                area = SubArea.objects.get(nombre=str(row['SubArea']).strip())
-                            except SubArea.DoesNotExist:
-                                pass
-                        
-                        # Preparar datos
-                        datos = {
-                            'apellidos_nombres': apellidos_nombres,
-                            'tipo_doc': row.get('TipoDoc', 'DNI') if pd.notna(row.get('TipoDoc')) else 'DNI',
-                            'codigo_fotocheck': row.get('CodigoFotocheck', '') if pd.notna(row.get('CodigoFotocheck')) else '',
-                            'cargo': row.get('Cargo', '') if pd.notna(row.get('Cargo')) else '',
-                            'tipo_trab': row.get('TipoTrabajador', 'Empleado') if pd.notna(row.get('TipoTrabajador')) else 'Empleado',
-                            'subarea': subarea,
-                            'estado': row.get('Estado', 'Activo') if pd.notna(row.get('Estado')) else 'Activo',
-                            'sexo': row.get('Sexo', '') if pd.notna(row.get('Sexo')) else '',
-                            'celular': row.get('Celular', '') if pd.notna(row.get('Celular')) else '',
-                            'correo_personal': row.get('CorreoPersonal', '') if pd.notna(row.get('CorreoPersonal')) else '',
-                            'correo_corporativo': row.get('CorreoCorporativo', '') if pd.notna(row.get('CorreoCorporativo')) else '',
-                            'direccion': row.get('Direccion', '') if pd.notna(row.get('Direccion')) else '',
-                            'ubigeo': row.get('Ubigeo', '') if pd.notna(row.get('Ubigeo')) else '',
-                            'regimen_laboral': row.get('RegimenLaboral', '') if pd.notna(row.get('RegimenLaboral')) else '',
-                            'regimen_turno': row.get('RegimenTurno', '') if pd.notna(row.get('RegimenTurno')) else '',
-                            'observaciones': row.get('Observaciones', '') if pd.notna(row.get('Observaciones')) else '',
-                        }
-                        
-                        # Fechas
-                        if 'FechaAlta' in row and pd.notna(row['FechaAlta']):
-                            try:
-                                datos['fecha_alta'] = pd.to_datetime(row['FechaAlta']).date()
-                            except (ValueError, TypeError):
-                                pass
-                        
-                        if 'FechaCese' in row and pd.notna(row['FechaCese']):
-                            try:
-                                datos['fecha_cese'] = pd.to_datetime(row['FechaCese']).date()
-                            except (ValueError, TypeError):
-                                pass
-                        
-                        if 'FechaNacimiento' in row and pd.notna(row['FechaNacimiento']):
-                            try:
-                                datos['fecha_nacimiento'] = pd.to_datetime(row['FechaNacimiento']).date()
-                            except (ValueError, TypeError):
-                                pass
-                        
-                        # Decimales
-                        if 'DiasLibresCorte2025' in row and pd.notna(row['DiasLibresCorte2025']):
-                            try:
-                                datos['dias_libres_corte_2025'] = Decimal(str(row['DiasLibresCorte2025']))
-                            except (ValueError, TypeError, InvalidOperation):
-                                pass
-                        
-                        # Crear o actualizar (DNI es la clave única)
-                        personal_obj, created = Personal.objects.update_or_create(
-                            nro_doc=nro_doc,
-                            defaults=datos
-                        )
-                        
-                        if created:
-                            creados += 1
-                        else:
-                            actualizados += 1
-                    
-                    except Exception as e:
-                        errores.append(f"Fila {idx + 2}: {str(e)}")
+                resultado = importar_personal(
+                    df, usuario=request.user, forzar=form.cleaned_data['reprocesar']
+                )
+                creados = resultado['creados']
+                actualizados = resultado['actualizados']
+                errores = resultado['errores']
                 
                 if creados > 0:
                     messages.success(request, f'✓ {creados} personas creadas')
                 if actualizados > 0:
                     messages.info(request, f'ℹ {actualizados} personas actualizadas')
+                if resultado['sin_cambios'] > 0:
+                    messages.info(request, f'ℹ {resultado["sin_cambios"]} personas sin cambios (omitidas)')
                 if errores:
                     for error in errores[:10]:
                         messages.warning(request, error)
@@ -998,13 +824,9 @@ def personal_import(request):
     
     # Si se solicita plantilla vacía, generarla y descargar
     if request.GET.get('plantilla') == 'vacia':
-        excel_file = crear_plantilla_personal(None)
-        response = HttpResponse(
-            excel_file.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return respuesta_exportacion(
+            'personal', 'plantilla', '', f'plantilla_personal_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
         )
-        response['Content-Disposition'] = f'attachment; filename=plantilla_personal_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-        return response
     
     context = {
         'form': form,
@@ -1018,25 +840,60 @@ def personal_import(request):
 
 @login_required
 def roster_export(request):
-    """Exportar roster a Excel con plantilla y catálogos."""
+    """
+    Exportar roster a Excel con plantilla y catálogos.
+    
+    Con ?anual=1 exporta los 12 meses del año; con ?hasta=AAAA-MM exporta
+    desde mes/anio hasta ese mes. En ambos casos se genera una hoja por mes
+    y una hoja de resumen por persona y código.
+    """
     mes = int(request.GET.get('mes', datetime.now().month))
     anio = int(request.GET.get('anio', datetime.now().year))
     
-    primer_dia = datetime(anio, mes, 1).date()
-    ultimo_dia = datetime(anio, mes, monthrange(anio, mes)[1]).date()
-    
-    personal_qs = filtrar_personal(request.user).filter(estado='Activo').order_by('apellidos_nombres')
-    rosters = Roster.objects.filter(fecha__gte=primer_dia, fecha__lte=ultimo_dia, personal__in=personal_qs)
+    personal_qs = filtrar_personal(request.user).filter(estado='Activo')
     
-    excel_file = crear_plantilla_roster(mes, anio, personal_qs, rosters)
+    if request.GET.get('anual') or request.GET.get('hasta'):
+        if request.GET.get('anual'):
+            desde, hasta = datetime(anio, 1, 1).date(), datetime(anio, 12, 1).date()
+        else:
+            desde = datetime(anio, mes, 1).date()
+            try:
+                hasta = datetime.strptime(request.GET['hasta'], '%Y-%m').date()
+            except ValueError:
+                messages.error(request, 'El parámetro "hasta" debe tener el formato AAAA-MM')
+                return redirect('roster_matricial')
+        if not 1 <= len(meses_rango(desde, hasta)) <= MAX_MESES_RANGO:
+            messages.error(request, f'El rango debe tener entre 1 y {MAX_MESES_RANGO} meses')
+            return redirect('roster_matricial')
+        return respuesta_exportacion(
+            'roster_rango', clave_alcance(request.user), f'{desde:%Y-%m}_{hasta:%Y-%m}',
+            f'roster_{desde:%Y_%m}_a_{hasta:%Y_%m}_{datetime.now().strftime("%H%M%S")}.xlsx',
+            desde, hasta, personal_qs
+        )
     
-    response = HttpResponse(
-        excel_file.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return respuesta_exportacion(
+        'roster', clave_alcance(request.user), f'{anio}-{mes:02d}',
+        f'roster_{anio}_{mes:02d}_{datetime.now().strftime("%H%M%S")}.xlsx',
+        mes, anio, personal_qs
     )
-    response['Content-Disposition'] = f'attachment; filename=roster_{anio}_{mes:02d}_{datetime.now().strftime("%H%M%S")}.xlsx'
+
+
+@login_required
+def reporte_mensual(request):
+    """Descargar el reporte mensual (códigos por persona, dotación por área y saldos)."""
+    if not request.user.is_superuser:
+        messages.error(request, 'Solo los administradores pueden descargar el reporte mensual')
+        return redirect('home')
+    
+    anio_anterior, mes_previo = mes_anterior()
+    mes = int(request.GET.get('mes', mes_previo))
+    anio = int(request.GET.get('anio', anio_anterior))
+    nombre_archivo = f'reporte_{anio}_{mes:02d}.xlsx'
     
-    return response
+    # Solo los meses cerrados se guardan en caché; el mes en curso cambia a diario
+    if mes_cerrado(anio, mes):
+        return respuesta_exportacion('reporte_mensual', 'todos', f'{anio}-{mes:02d}', nombre_archivo, anio, mes)
+    return respuesta_xlsx(exportar_reporte_mensual, nombre_archivo, anio, mes)
 
 
 @login_required
@@ -1048,101 +905,46 @@ def roster_import(request):
             archivo = request.FILES['archivo']
             
             try:
-                # Forzar DNI como texto para preservar ceros a la izquierda
-                df = pd.read_excel(
-                    archivo, 
-                    sheet_name='Roster',
-                    dtype={'DNI': str}
-                )
-                
-                columnas_requeridas = ['DNI']
-                if not all(col in df.columns for col in columnas_requeridas):
-                    messages.error(request, 'El archivo debe contener la columna: DNI')
-                    return redirect('roster_import')
+                validar_archivo_importacion(archivo)
                 
                 # Detectar mes y año (pedir al usuario o extraer del nombre del archivo)
                 mes = int(request.POST.get('mes', datetime.now().month))
                 anio = int(request.POST.get('anio', datetime.now().year))
+                forzar = form.cleaned_data['reprocesar']
                 
-                # Obtener columnas de días (solo formato Dia1, Dia2, ... Dia31)
-                import re
-                columnas_dias = []
-                for col in df.columns:
-                    # Solo columnas que sean exactamente "Dia" seguido de un número
-                    if re.match(r'^Dia\d+$', str(col)):
-                        columnas_dias.append(col)
-                
-                creados = 0
-                actualizados = 0
-                errores = []
-                
-                for idx, row in df.iterrows():
-                    try:
-                        # Procesar DNI correctamente para preservar ceros
-                        dni_raw = row['DNI']
-                        if pd.isna(dni_raw):
-                            continue
-                        
-                        if isinstance(dni_raw, (int, float)):
-                            nro_doc = str(int(dni_raw)).strip()
-                        else:
-                            nro_doc = str(dni_raw).strip()
-                        
-                        if not nro_doc or nro_doc == 'nan':
-                            continue
-                        
-                        personal = Personal.objects.get(nro_doc=nro_doc)
-                        
-                        # Procesar cada día
-                        for col_dia in columnas_dias:
-                            dia = int(col_dia.replace('Dia', '').strip())
-                            codigo = str(row[col_dia]).strip().upper() if pd.notna(row[col_dia]) else ''
-                            
-                            if codigo and codigo != 'NAN':
-                                fecha = datetime(anio, mes, dia).date()
-                                
-                                # Validaciones especiales para DLA
-                                if codigo == 'DLA':
-                                    # 1. Validar saldo disponible al 31/12/25
-                                    es_valido_saldo, mensaje_saldo, saldo = personal.validar_saldo_dla(nueva_dla=True)
-                                    if not es_valido_saldo:
-                                        errores.append(f"Fila {idx + 2}, Día {dia}: No se puede usar DLA. {mensaje_saldo}")
-                                        continue
-                                    
-                                    # 2. Validar máximo 7 días consecutivos
-                                    es_valido_consecutivos, mensaje_consecutivos = personal.validar_dla_consecutivos(fecha)
-                                    if not es_valido_consecutivos:
-                                        errores.append(f"Fila {idx + 2}, Día {dia}: {mensaje_consecutivos}")
-                                        continue
-                                
-                                # Validaciones especiales para DL
-                                if codigo == 'DL':
-                                    # Validar que haya días libres pendientes disponibles
-                                    es_valido_dl, mensaje_dl, dias_pendientes = personal.validar_saldo_dl(nuevo_dl=True)
-                                    if not es_valido_dl:
-                                        errores.append(f"Fila {idx + 2}, Día {dia}: {mensaje_dl}")
-                                        continue
-                                
-                                roster, created = Roster.objects.update_or_create(
-                                    personal=personal,
-                                    fecha=fecha,
-                                    defaults={'codigo': codigo}
-                                )
-                                
-                                if created:
-                                    creados += 1
-                                else:
-                                    actualizados += 1
+                if request.POST.get('modo') == 'anual':
+                    if not archivo.name.lower().endswith(('.xlsx', '.xls')):
+                        messages.error(request, 'El modo anual requiere un libro Excel con una hoja por mes')
+                        return redirect('roster_import')
+                    resultado = importar_roster_anual(
+                        archivo, anio, usuario=request.user, forzar=forzar
+                    )
+                    messages.info(
+                        request,
+                        f'ℹ Meses importados: {", ".join(f"{m:02d}" for m in resultado["meses"])}'
+                    )
+                else:
+                    # Forzar DNI como texto para preservar ceros a la izquierda
+                    df = leer_tabla(archivo, 'Roster', dtype={'DNI': str})
                     
-                    except Personal.DoesNotExist:
-                        errores.append(f"Fila {idx + 2}: Personal con DNI {nro_doc} no encontrado")
-                    except Exception as e:
-                        errores.append(f"Fila {idx + 2}: {str(e)}")
+                    columnas_requeridas = ['DNI']
+                    if not all(col in df.columns for col in columnas_requeridas):
+                        messages.error(request, 'El archivo debe contener la columna: DNI')
+                        return redirect('roster_import')
+                    
+                    resultado = importar_roster(
+                        df, anio, mes, usuario=request.user, forzar=forzar
+                    )
+                creados = resultado['creados']
+                actualizados = resultado['actualizados']
+                errores = resultado['errores']
                 
                 if creados > 0:
                     messages.success(request, f'✓ {creados} registros creados')
                 if actualizados > 0:
                     messages.info(request, f'ℹ {actualizados} registros actualizados')
+                if resultado['sin_cambios'] > 0:
+                    messages.info(request, f'ℹ {resultado["sin_cambios"]} filas sin cambios (omitidas)')
                 if errores:
                     for error in errores[:10]:
                         messages.warning(request, error)
@@ -1265,6 +1067,9 @@ def roster_update_cell(request):
                 if personal.subarea and areas_responsable.filter(pk=personal.subarea.area_id).exists():
                     estado_inicial = 'aprobado'
         
+        # La próxima importación del período debe volver a comparar esta fila
+        invalidar_huellas('roster', [personal.nro_doc], fuente=f'{fecha.year}-{fecha.month:02d}')
+        
         if codigo:
             # Crear o actualizar roster
             roster, created = Roster.objects.update_or_create(
@@ -1331,8 +1136,6 @@ def dashboard_aprobaciones(request):
     areas_responsable = Area.objects.none()
     if request.user.is_superuser:
         pendientes_qs = Roster.objects.filter(estado='pendiente')
-        borradores_qs = Roster.objects.filter(estado='borrador')
-        aprobados_qs = Roster.objects.filter(estado='aprobado')
     else:
         areas_responsable = get_areas_responsable(request.user)
         if not areas_responsable.exists():
@@ -1343,18 +1146,10 @@ def dashboard_aprobaciones(request):
             estado='pendiente',
             personal__subarea__area__in=areas_responsable
         )
-        borradores_qs = Roster.objects.filter(
-            estado='borrador',
-            personal__subarea__area__in=areas_responsable
-        )
-        aprobados_qs = Roster.objects.filter(
-            estado='aprobado',
-            personal__subarea__area__in=areas_responsable
-        )
     
     # Filtros
     buscar = request.GET.get('buscar', '')
-    subarea_filtro = request.GET.get('area', '')
+    subarea_filtro = request.GET.get('subarea', '')
     codigo_filtro = request.GET.get('codigo', '')
     fecha_desde = request.GET.get('fecha_desde', '')
     fecha_hasta = request.GET.get('fecha_hasta', '')
@@ -1367,7 +1162,7 @@ def dashboard_aprobaciones(request):
         )
     
     if subarea_filtro:
-        pendientes_qs = pendientes_qs.filter(personal__subarea__area_id=subarea_filtro)
+        pendientes_qs = pendientes_qs.filter(personal__subarea_id=subarea_filtro)
     
     if codigo_filtro:
         pendientes_qs = pendientes_qs.filter(codigo=codigo_filtro)
@@ -1378,39 +1173,42 @@ def dashboard_aprobaciones(request):
     if fecha_hasta:
         pendientes_qs = pendientes_qs.filter(fecha__lte=fecha_hasta)
     
-    pendientes = pendientes_qs.select_related(
-        'personal', 'personal__subarea__area', 'modificado_por'
-    ).order_by('-actualizado_en')
-    
-    # Estadísticas
-    hoy = timezone.now().date()
-    inicio_semana = hoy - timedelta(days=hoy.weekday())
+    # Paginación por llave sobre (actualizado_en, id): usa el índice parcial de pendientes
+    cursor = request.GET.get('despues', '')
+    pendientes, siguiente = paginar_keyset(
+        pendientes_qs.select_related('personal', 'personal__subarea__area', 'modificado_por'),
+        cursor
+    )
+    filtros = request.GET.copy()
+    filtros.pop('despues', None)
     
-    stats = {
-        'pendientes': pendientes_qs.count(),
-        'borradores': borradores_qs.count(),
-        'aprobados_hoy': aprobados_qs.filter(aprobado_en__date=hoy).count(),
-        'total_semana': aprobados_qs.filter(aprobado_en__date__gte=inicio_semana).count(),
-    }
+    # Estadísticas desde los contadores por área (el conteo de pendientes
+    # solo se hace sobre Roster cuando hay filtros aplicados)
+    stats = totales_aprobacion(None if request.user.is_superuser else areas_responsable)
+    if buscar or subarea_filtro or codigo_filtro or fecha_desde or fecha_hasta:
+        stats['pendientes'] = pendientes_qs.count()
     
     # Obtener áreas para filtro
+    catalogos = obtener_catalogos()
     if request.user.is_superuser:
-        areas = SubArea.objects.filter(activa=True).order_by('nombre')
-    elif areas_responsable.exists():
-        areas = SubArea.objects.filter(area__in=areas_responsable, activa=True).order_by('nombre')
+        areas = catalogos.subareas_activas
     else:
-        areas = SubArea.objects.none()
+        areas = catalogos.subareas_de(areas_responsable.values_list('pk', flat=True))
     
     context = {
         'pendientes': pendientes,
         'stats': stats,
         'areas_responsable': areas_responsable,
         'subareas': areas,
+        'areas': areas,
         'buscar': buscar,
         'area_filtro': subarea_filtro,
         'codigo_filtro': codigo_filtro,
         'fecha_desde': fecha_desde,
         'fecha_hasta': fecha_hasta,
+        'cursor': cursor,
+        'siguiente': siguiente,
+        'filtros': filtros.urlencode(),
     }
     
     return render(request, 'personal/dashboard_aprobaciones.html', context)
@@ -1435,10 +1233,12 @@ def aprobar_cambio(request, pk):
             'error': 'No tiene permisos para aprobar este cambio'
         }, status=403)
     
-    roster.estado = 'aprobado'
-    roster.aprobado_por = request.user
-    roster.aprobado_en = timezone.now()
-    roster.save()
+    with transaction.atomic():
+        roster.estado = 'aprobado'
+        roster.aprobado_por = request.user
+        roster.aprobado_en = timezone.now()
+        roster.save()
+        notificar_resolucion([roster], 'aprobado', request.user)
     
     messages.success(request, f'Cambio aprobado para {roster.personal} en {roster.fecha}')
     
@@ -1465,7 +1265,9 @@ def rechazar_cambio(request, pk):
     fecha = roster.fecha
     
     # Eliminar el registro rechazado
-    roster.delete()
+    with transaction.atomic():
+        roster.delete()
+        notificar_resolucion([roster], 'rechazado', request.user)
     
     messages.warning(request, f'Cambio rechazado y eliminado para {personal_nombre} en {fecha}')
     
@@ -1487,7 +1289,19 @@ def enviar_cambios_aprobacion(request):
             estado='borrador'
         )
         
-        count = borradores.update(estado='pendiente')
+        with transaction.atomic(), en_lote('envio', request.user, str(personal)):
+            fechas = list(borradores.select_for_update().values_list('fecha', flat=True))
+            count = borradores.filter(fecha__in=fechas).update(estado='pendiente')
+            # update() no dispara señales: contadores y auditoría se registran explícitamente
+            registrar_cambio(personal.pk, ('borrador', None), ('pendiente', None), cantidad=count)
+            encolar_auditorias([
+                RosterAudit(
+                    personal_id=personal.pk, fecha=fecha, campo_modificado='estado',
+                    valor_anterior='borrador', valor_nuevo='pendiente', usuario=request.user
+                )
+                for fecha in fechas
+            ])
+            notificar_envio(personal, count)
         
         if count > 0:
             messages.success(request, f'{count} cambio(s) enviado(s) para aprobación')
@@ -1513,14 +1327,17 @@ def aprobar_lote(request):
         # Filtrar solo los que el usuario puede aprobar
         rosters = Roster.objects.filter(pk__in=ids, estado='pendiente')
         
-        aprobados = 0
-        for roster in rosters:
-            if roster.puede_aprobar(request.user):
-                roster.estado = 'aprobado'
-                roster.aprobado_por = request.user
-                roster.aprobado_en = timezone.now()
-                roster.save()
-                aprobados += 1
+        aprobados = []
+        with transaction.atomic(), en_lote('aprobacion', request.user, f'{len(ids)} celda(s) seleccionada(s)'):
+            for roster in rosters:
+                if roster.puede_aprobar(request.user):
+                    roster.estado = 'aprobado'
+                    roster.aprobado_por = request.user
+                    roster.aprobado_en = timezone.now()
+                    roster.save()
+                    aprobados.append(roster)
+            notificar_resolucion(aprobados, 'aprobado', request.user)
+        aprobados = len(aprobados)
         
         return JsonResponse({
             'success': True,
@@ -1546,11 +1363,14 @@ def rechazar_lote(request):
         # Filtrar solo los que el usuario puede rechazar
         rosters = Roster.objects.filter(pk__in=ids, estado='pendiente')
         
-        rechazados = 0
-        for roster in rosters:
-            if roster.puede_aprobar(request.user):
-                roster.delete()
-                rechazados += 1
+        rechazados = []
+        with transaction.atomic(), en_lote('rechazo', request.user, f'{len(ids)} celda(s) seleccionada(s)'):
+            for roster in rosters:
+                if roster.puede_aprobar(request.user):
+                    roster.delete()
+                    rechazados.append(roster)
+            notificar_resolucion(rechazados, 'rechazado', request.user)
+        rechazados = len(rechazados)
         
         return JsonResponse({
             'success': True,